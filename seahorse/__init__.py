@@ -5,6 +5,12 @@ from seahorse.utils.version import get_version
 VERSION=(4, 2, 1, "beta", 0)
 
 def setup(setup_prefix=True):
-    pass
+    """
+    Load the settings, so that a broken config file is reported up front
+    rather than by the first command reading a setting.
+    """
+    from seahorse.conf import settings
+
+    settings.DATABASES
 
 __version__ = get_version(VERSION)
\ No newline at end of file
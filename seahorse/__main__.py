@@ -1,4 +1,4 @@
-from seahorse.core import management
+from seahorse.core import client
 
 if __name__ == "__main__":
-    management.execute_from_command_line()
\ No newline at end of file
+    client.main()
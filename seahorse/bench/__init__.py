@@ -0,0 +1,94 @@
+"""
+Benchmarks of the management framework hot paths, run by the bench command.
+
+Benchmarks register themselves with @register and return the per-call
+duration, in seconds, of each of their repeats. Results are plain JSON so
+that runs can be saved and compared against a baseline.
+"""
+import platform
+import sys
+import time
+import timeit
+from importlib import import_module
+
+from seahorse.utils.stats import summarize
+from seahorse.utils.version import get_version
+
+BENCHMARK_MODULES = ["seahorse.bench.framework", "seahorse.bench.template"]
+
+_registry = {}
+
+
+def register(name, group):
+    """
+    Register func(repeat, scale) as the benchmark name.
+    """
+
+    def decorator(func):
+        _registry[name] = (group, func)
+        return func
+
+    return decorator
+
+
+def get_benchmarks():
+    """
+    Return {name: (group, func)} for every registered benchmark.
+    """
+    for module in BENCHMARK_MODULES:
+        import_module(module)
+    return dict(_registry)
+
+
+def time_calls(func, repeat, number=None, setup=None):
+    """
+    Return the per-call duration of func for each of repeat runs of number
+    calls. number is calibrated to about 0.05s per run when omitted.
+    """
+    timer = timeit.Timer(func, setup=setup or (lambda: None))
+    if number is None:
+        number, _ = timer.autorange()
+        number = max(1, number // 4)
+    return [elapsed / number for elapsed in timer.repeat(repeat, number)]
+
+
+def run_benchmarks(names=None, repeat=5, scale=1000):
+    """
+    Run the benchmarks and groups named in names (every benchmark by
+    default) and return the results document.
+    """
+    benchmarks = get_benchmarks()
+    results = {}
+    for name, (group, func) in benchmarks.items():
+        if names and name not in names and group not in names:
+            continue
+        samples = func(repeat, scale)
+        results[name] = {"group": group, "unit": "s/call", **summarize(samples)}
+    return {
+        "meta": {
+            "seahorse": get_version(),
+            "python": sys.version.split()[0],
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "timestamp": time.time(),
+            "repeat": repeat,
+            "scale": scale,
+        },
+        "benchmarks": results,
+    }
+
+
+def compare(results, baseline, threshold=0.1, key="min"):
+    """
+    Compare two results documents benchmark by benchmark. Return a list of
+    (name, baseline, current, ratio, regressed) tuples; a benchmark has
+    regressed when it got slower by more than threshold (0.1 is 10%).
+    """
+    rows = []
+    for name, current in results["benchmarks"].items():
+        previous = baseline.get("benchmarks", {}).get(name)
+        if not previous or not previous.get(key):
+            continue
+        ratio = current[key] / previous[key]
+        rows.append((name, previous[key], current[key], ratio, ratio > 1 + threshold))
+    return rows
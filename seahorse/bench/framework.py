@@ -0,0 +1,190 @@
+"""
+Benchmarks of command discovery, parsing, dispatch and output.
+"""
+import os
+import subprocess
+import sys
+import time
+from io import StringIO
+
+from seahorse.bench import register, time_calls
+from seahorse.core import management, metrics
+from seahorse.core.management.base import BaseCommand, OutputWrapper
+from seahorse.utils.datastructures import CaseInsensitiveMapping
+
+
+class NoopCommand(BaseCommand):
+    """
+    Stand-in with the options of a provisioning command and no work, so
+    call_command() benchmarks measure the framework alone.
+    """
+
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--vpcid", action="append")
+        parser.add_argument("--CIDR", action="append")
+        parser.add_argument("--region", default="us-east-1")
+
+    def handle(self, *args, **options):
+        pass
+
+
+@register("startup.version", "startup")
+def startup_version(repeat, scale):
+    """
+    Cold CLI start: a new interpreter running `python -m seahorse version`,
+    never forwarded to a running `serve` process.
+    """
+    env = dict(os.environ, SEAHORSE_NO_SERVER="1")
+    root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [root, env.get("PYTHONPATH")]))
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "seahorse", "version"],
+            env=env,
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+@register("commands.get_commands", "commands")
+def get_commands(repeat, scale):
+    """
+    Command discovery in a fresh process, i.e. reading the persisted
+    manifest.
+    """
+    management.get_commands()
+
+    def setup():
+        management.get_manifest.cache_clear()
+        management.get_commands.cache_clear()
+
+    return time_calls(management.get_commands, repeat, number=1, setup=setup)
+
+
+@register("commands.load_command_class", "commands")
+def load_command_class(repeat, scale):
+    return time_calls(
+        lambda: management.load_command_class("seahorse.core", "eks"), repeat
+    )
+
+
+@register("parser.create_parser", "parser")
+def create_parser(repeat, scale):
+    command = NoopCommand()
+    return time_calls(lambda: command.create_parser("seahorse", "noop"), repeat)
+
+
+@register("parser.call_command", "parser")
+def call_command(repeat, scale):
+    command = NoopCommand(stdout=StringIO())
+    return time_calls(
+        lambda: management.call_command(command, vpcid=["vpc-1"]), repeat
+    )
+
+
+@register("parser.call_command_uncached", "parser")
+def call_command_uncached(repeat, scale):
+    """
+    call_command() with the compiled parser cache cleared on every call.
+    """
+    command = NoopCommand(stdout=StringIO())
+
+    def call():
+        management.clear_parser_cache()
+        management.call_command(command, vpcid=["vpc-1"])
+
+    return time_calls(call, repeat)
+
+
+@register("output.write", "output")
+def output_write(repeat, scale):
+    out = OutputWrapper(StringIO())
+    line = "eks cluster vpc-1 provisioned"
+
+    def write():
+        out.write(line)
+        # Keep the buffer from growing across repeats.
+        out._out.seek(0)
+
+    return time_calls(write, repeat)
+
+
+@register("output.write_buffered", "output")
+def output_write_buffered(repeat, scale):
+    out = OutputWrapper(StringIO(), buffer_size=64 * 1024)
+    line = "eks cluster vpc-1 provisioned"
+
+    def write():
+        out.write(line)
+        if out._buffered > 60 * 1024:
+            out.flush()
+            out._out.seek(0)
+
+    return time_calls(write, repeat)
+
+
+@register("output.write_jsonl", "output")
+def output_write_jsonl(repeat, scale):
+    out = OutputWrapper(StringIO(), format="jsonl", buffer_size=64 * 1024)
+    out.context = {"command": "eks"}
+    record = {"event": "step", "resource": "cluster/vpc-1", "status": "succeeded"}
+
+    def write():
+        out.write_record(record)
+        if out._buffered > 60 * 1024:
+            out.flush()
+            out._out.seek(0)
+
+    return time_calls(write, repeat)
+
+
+@register("metrics.update", "metrics")
+def metrics_update(repeat, scale):
+    """
+    The per-command cost of the metrics execute() updates.
+    """
+
+    def update():
+        metrics.COMMAND_INVOCATIONS.inc(command="eks")
+        metrics.COMMANDS_IN_FLIGHT.inc(command="eks")
+        metrics.COMMANDS_IN_FLIGHT.dec(command="eks")
+        metrics.HANDLE_SECONDS.observe(0.02, command="eks")
+
+    return time_calls(update, repeat)
+
+
+def _mapping_data(scale):
+    return {"Key-%d" % i: i for i in range(scale)}
+
+
+@register("mapping.construct", "mapping")
+def mapping_construct(repeat, scale):
+    data = _mapping_data(scale)
+    return time_calls(lambda: CaseInsensitiveMapping(data), repeat)
+
+
+@register("mapping.lookup", "mapping")
+def mapping_lookup(repeat, scale):
+    mapping = CaseInsensitiveMapping(_mapping_data(scale))
+    keys = ["key-%d" % i for i in range(scale)]
+
+    def lookup():
+        for key in keys:
+            mapping[key]
+
+    return [sample / scale for sample in time_calls(lookup, repeat)]
+
+
+@register("mapping.eq", "mapping")
+def mapping_eq(repeat, scale):
+    first = CaseInsensitiveMapping(_mapping_data(scale))
+    second = CaseInsensitiveMapping(
+        {key.upper(): value for key, value in _mapping_data(scale).items()}
+    )
+    return time_calls(lambda: first == second, repeat)
@@ -0,0 +1,98 @@
+"""
+Load tests of the provisioning commands against the cloud stand-in.
+
+run_load() starts a seahorse.test.cloud.CloudServer, runs invocations of a
+command through call_command() from concurrency threads, each against the
+server, and reports the throughput and the latency distribution of the
+invocations. "{i}" in the arguments is replaced by the index of the
+invocation, e.g. to provision a different VPC each time:
+
+    run_load("eks", ["--vpcid", "vpc-{i}"], invocations=200, concurrency=8,
+             server_options={"latency": 0.02, "throttle_rate": 0.05})
+
+Provisioning state goes to a temporary database, so that every run starts
+from scratch and the real state is left alone.
+"""
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+
+from seahorse.cloud.ratelimit import limiter
+from seahorse.core.management import call_command
+from seahorse.db import connections
+from seahorse.test.cloud import CloudServer
+from seahorse.utils.stats import summarize
+
+STATE_ALIAS = "loadtest"
+
+
+def run_load(
+    command_name,
+    args=(),
+    invocations=100,
+    concurrency=8,
+    server_options=None,
+    rate_limits=None,
+):
+    """
+    Return the report of invocations runs of command_name with args.
+    rate_limits replace the RATE_LIMITS setting for the duration of the run.
+    """
+    latencies = []
+    errors = []
+
+    def invoke(index):
+        argv = [arg.replace("{i}", str(index)) for arg in args]
+        start = time.perf_counter()
+        try:
+            call_command(
+                command_name,
+                *argv,
+                endpoint=server.url,
+                database=STATE_ALIAS,
+                stdout=StringIO(),
+                stderr=StringIO(),
+            )
+        except Exception as e:
+            errors.append("%s: %s" % (e.__class__.__name__, e))
+        else:
+            latencies.append(time.perf_counter() - start)
+        finally:
+            connections.close_all()
+
+    with tempfile.TemporaryDirectory() as tmp, CloudServer(
+        **(server_options or {})
+    ) as server:
+        connections.settings[STATE_ALIAS] = {
+            "ENGINE": "seahorse.db.backends.sqlite3",
+            "NAME": os.path.join(tmp, "state.sqlite3"),
+            "OPTIONS": {},
+            "POOL": {},
+        }
+        limiter.reset(rate_limits)
+        try:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                list(pool.map(invoke, range(invocations)))
+            wall_time = time.perf_counter() - start
+            limits = limiter.stats()
+        finally:
+            limiter.reset()
+            # Pools are created again on demand, without the state alias.
+            connections.shutdown()
+            del connections.settings[STATE_ALIAS]
+        return {
+            "command": command_name,
+            "args": list(args),
+            "invocations": invocations,
+            "concurrency": concurrency,
+            "wall_time": wall_time,
+            "throughput": len(latencies) / wall_time if wall_time else 0.0,
+            "errors": len(errors),
+            "error_samples": errors[:5],
+            "latency": summarize(latencies),
+            "server": server.stats(),
+            "rate_limits": limits,
+        }
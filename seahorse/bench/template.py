@@ -0,0 +1,61 @@
+"""
+Benchmarks of manifest rendering.
+"""
+from seahorse.bench import register, time_calls
+from seahorse.template import Engine, Template
+
+MANIFEST = """\
+apiVersion: eksctl.io/v1alpha5
+kind: ClusterConfig
+metadata:
+  name: {{ name }}
+  region: {{ region }}
+  tags: {{ json_tags }}
+vpc:
+  id: {{ json_vpcid }}
+  cidr: {{ json_cidr }}
+managedNodeGroups: {{ json_nodepools }}
+"""
+
+
+def _contexts(scale):
+    return [
+        {
+            "name": "cluster-%d" % i,
+            "region": "us-east-1",
+            "tags": {"team": "platform", "index": str(i)},
+            "vpcid": "vpc-%d" % i,
+            "cidr": "10.%d.0.0/16" % (i % 256),
+            "nodepools": ["default", "gpu"],
+        }
+        for i in range(scale)
+    ]
+
+
+@register("template.render_many", "template")
+def render_many(repeat, scale):
+    """
+    Render one manifest per cluster through the engine, compiled once.
+    """
+    contexts = _contexts(scale)
+    engine = Engine()
+
+    def render():
+        for _ in engine.render_many(engine.from_string(MANIFEST), contexts):
+            pass
+
+    return [sample / scale for sample in time_calls(render, repeat, number=1)]
+
+
+@register("template.render_uncached", "template")
+def render_uncached(repeat, scale):
+    """
+    Compile the template again for every cluster.
+    """
+    contexts = _contexts(scale)
+
+    def render():
+        for context in contexts:
+            Template(MANIFEST).render(context)
+
+    return [sample / scale for sample in time_calls(render, repeat, number=1)]
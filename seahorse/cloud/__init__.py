@@ -0,0 +1,3 @@
+"""
+Plumbing shared by the clients of the cloud provider APIs.
+"""
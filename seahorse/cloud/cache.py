@@ -0,0 +1,205 @@
+"""
+Cache of the answers of read-only provider calls.
+
+Provisioning asks the same questions over and over: does the VPC exist,
+which CIDRs are free in it, what is the network of the host project. The
+answers are cached per (provider, resource type, key) for the TTL of the
+resource type:
+
+    from seahorse.cloud.cache import describe_cache
+
+    vpc = describe_cache.get("eks", "vpc", vpcid, fetch)
+
+fetch(etag) is called on a miss with None, and with the ETag or generation
+of the cached answer once it has expired, when there is one. It returns
+(value, etag), etag None when the provider has no such thing, or
+NOT_MODIFIED to keep the cached value for another TTL.
+
+Commands mutating a resource invalidate() it, or set() the answer of the
+mutation as its new description. With persist, the answers still fresh are
+saved to describe.json in the cache directory by save() and loaded by the
+next run; they must then be JSON serializable.
+
+TTLs come from settings.CLOUD_CACHE_TTLS over DEFAULT_TTLS, in seconds; 0
+disables caching of a resource type.
+"""
+import json
+import os
+import threading
+import time
+
+from seahorse.conf import settings
+from seahorse.utils._os import atomic_write, get_cache_dir
+from seahorse.utils.datastructures import LRUCache
+
+DEFAULT_TTL = 60
+DEFAULT_TTLS = {
+    "vpc": 300,
+    "subnets": 60,
+    "network": 300,
+    "subscription": 3600,
+    "cluster": 15,
+    "nodegroup": 15,
+    "nodepool": 15,
+}
+
+NOT_MODIFIED = object()
+
+
+class Entry:
+    __slots__ = ("value", "etag", "expires")
+
+    def __init__(self, value, etag, expires):
+        self.value = value
+        self.etag = etag
+        self.expires = expires
+
+
+class DescribeCache:
+    def __init__(
+        self, ttls=None, maxsize=None, persist=None, path=None, clock=time.time
+    ):
+        self._ttls = ttls
+        self._maxsize = maxsize
+        self._persist = persist
+        self.path = path
+        self.clock = clock
+        self._entries = None
+        self._lock = threading.Lock()
+        self.counters = {
+            "hits": 0,
+            "misses": 0,
+            "revalidated": 0,
+            "refreshed": 0,
+            "invalidated": 0,
+        }
+
+    @property
+    def ttls(self):
+        if self._ttls is None:
+            self._ttls = {**DEFAULT_TTLS, **settings.CLOUD_CACHE_TTLS}
+        return self._ttls
+
+    @property
+    def persist(self):
+        if self._persist is None:
+            self._persist = settings.CLOUD_CACHE_PERSIST
+        return self._persist
+
+    @property
+    def entries(self):
+        if self._entries is None:
+            with self._lock:
+                if self._entries is None:
+                    maxsize = self._maxsize or settings.CLOUD_CACHE_SIZE
+                    entries = LRUCache(maxsize)
+                    if self.persist:
+                        self._load(entries)
+                    self._entries = entries
+        return self._entries
+
+    def _path(self):
+        return self.path or get_cache_dir("describe.json")
+
+    def _load(self, entries):
+        try:
+            with open(self._path()) as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            return
+        now = self.clock()
+        for provider, resource_type, key, value, etag, expires in data:
+            if expires > now:
+                entries.set((provider, resource_type, key), Entry(value, etag, expires))
+
+    def save(self):
+        """
+        Write the fresh entries to disk, if persistence is enabled.
+        """
+        if not self.persist or self._entries is None:
+            return
+        now = self.clock()
+        data = [
+            [*key, entry.value, entry.etag, entry.expires]
+            for key, entry in self._entries.items()
+            if entry.expires > now
+        ]
+        path = self._path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        atomic_write(path, json.dumps(data))
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def get(self, provider, resource_type, key, fetch):
+        """
+        Return the answer for key, calling fetch(etag) when it isn't cached
+        or has expired.
+        """
+        ttl = self.ttls.get(resource_type, DEFAULT_TTL)
+        cache_key = (provider, resource_type, key)
+        entry = self.entries.get(cache_key) if ttl else None
+        now = self.clock()
+        if entry is not None and entry.expires > now:
+            self._count("hits")
+            return entry.value
+        result = fetch(entry.etag if entry is not None else None)
+        if result is NOT_MODIFIED:
+            if entry is None:
+                raise ValueError(
+                    "fetch() returned NOT_MODIFIED without an etag to revalidate."
+                )
+            self._count("revalidated")
+            value, etag = entry.value, entry.etag
+        else:
+            self._count("refreshed" if entry is not None else "misses")
+            value, etag = result
+        if ttl:
+            self.entries.set(cache_key, Entry(value, etag, now + ttl))
+        return value
+
+    def set(self, provider, resource_type, key, value, etag=None):
+        """
+        Cache value as the answer for key, e.g. the resource returned by the
+        call that provisioned it.
+        """
+        ttl = self.ttls.get(resource_type, DEFAULT_TTL)
+        if ttl:
+            self.entries.set(
+                (provider, resource_type, key), Entry(value, etag, self.clock() + ttl)
+            )
+
+    def invalidate(self, provider, resource_type=None, key=None):
+        """
+        Forget the answers about key, about every resource of resource_type
+        if key is None, about everything of provider if both are None.
+        """
+        for cache_key, _ in self.entries.items():
+            if (
+                cache_key[0] == provider
+                and resource_type in (None, cache_key[1])
+                and key in (None, cache_key[2])
+            ):
+                self.entries.pop(cache_key)
+                self._count("invalidated")
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        entries = self.entries
+        with self._lock:
+            return {**self.counters, "size": len(entries), "maxsize": entries.maxsize}
+
+    def reset(self):
+        """
+        Drop the entries, e.g. to load them again from disk.
+        """
+        with self._lock:
+            self._entries = None
+            for name in self.counters:
+                self.counters[name] = 0
+
+
+describe_cache = DescribeCache()
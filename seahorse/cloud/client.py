@@ -0,0 +1,149 @@
+"""
+HTTP client of the provider provisioning APIs.
+
+Resources live at /<provider>/<kind>/<name>: PUT creates or updates one
+from a JSON spec, GET describes it and answers 304 Not Modified to a
+matching If-None-Match. GET /<provider>/<kind>?name=...&name=... describes
+several resources of a kind in one request. The base URL of a provider comes
+from the --endpoint option of the provisioning commands or from
+settings.CLOUD_ENDPOINTS.
+
+Responses are mapped to the exceptions of seahorse.cloud.ratelimit, so
+calls made through the limiter are retried: 429 raises Throttled with the
+Retry-After delay, 5xx and connection failures raise TransientError. Other
+errors raise CloudError.
+"""
+import http.client
+import json
+import threading
+from urllib.parse import quote, urlencode, urlsplit
+
+from seahorse.cloud.cache import NOT_MODIFIED
+from seahorse.cloud.ratelimit import Throttled, TransientError, parse_retry_after
+from seahorse.conf import settings
+
+
+class CloudError(Exception):
+    def __init__(self, status, message):
+        super().__init__("%d %s" % (status, message))
+        self.status = status
+
+
+class CloudClient:
+    """
+    Keep one persistent connection per thread to the API at endpoint.
+    """
+
+    def __init__(self, endpoint, provider, timeout=30.0):
+        url = urlsplit(endpoint)
+        if url.scheme not in ("http", "https") or not url.hostname:
+            raise ValueError("Invalid endpoint %r." % endpoint)
+        self.endpoint = endpoint
+        self.provider = provider
+        self.timeout = timeout
+        self._url = url
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn_class = (
+                http.client.HTTPSConnection
+                if self._url.scheme == "https"
+                else http.client.HTTPConnection
+            )
+            conn = conn_class(self._url.hostname, self._url.port, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def path(self, kind, name):
+        prefix = self._url.path.rstrip("/")
+        return "%s/%s/%s/%s" % (
+            prefix,
+            quote(self.provider),
+            quote(kind),
+            quote(name, safe=""),
+        )
+
+    def request(self, method, path, body=None, headers=None):
+        """
+        Return the status, headers and decoded JSON body of a response.
+        """
+        headers = {"Accept": "application/json", **(headers or {})}
+        if body is not None:
+            body = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+        conn = self._connection()
+        try:
+            conn.request(method, path, body, headers)
+            response = conn.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException) as e:
+            conn.close()
+            self._local.conn = None
+            raise TransientError("%s %s: %s" % (method, path, e)) from e
+        if response.status == 429:
+            raise Throttled(
+                "%s %s was throttled." % (method, path),
+                retry_after=parse_retry_after(response.getheader("Retry-After")),
+            )
+        if response.status >= 500:
+            raise TransientError("%s %s: %d" % (method, path, response.status))
+        if response.status >= 400:
+            raise CloudError(response.status, data.decode(errors="replace"))
+        return response.status, response.headers, json.loads(data) if data else None
+
+    def put(self, kind, name, spec):
+        return self.request("PUT", self.path(kind, name), spec)[2]
+
+    def get(self, kind, name, etag=None):
+        """
+        Describe a resource, in the fetch(etag) protocol of the describe
+        cache: return (value, etag) or NOT_MODIFIED.
+        """
+        headers = {"If-None-Match": etag} if etag else None
+        status, response_headers, data = self.request(
+            "GET", self.path(kind, name), headers=headers
+        )
+        if status == 304:
+            return NOT_MODIFIED
+        return data, response_headers.get("ETag")
+
+    def describe_many(self, kind, names):
+        """
+        Describe the resources names of kind in one request. Return {name:
+        resource}, without the names that don't exist.
+        """
+        path = "%s/%s/%s?%s" % (
+            self._url.path.rstrip("/"),
+            quote(self.provider),
+            quote(kind),
+            urlencode([("name", name) for name in names]),
+        )
+        data = self.request("GET", path)[2]
+        return {item["name"]: item for item in data["items"]}
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(provider, endpoint=None):
+    """
+    Return the shared client of provider at endpoint, by default its entry in
+    settings.CLOUD_ENDPOINTS, or None when the provider has no endpoint.
+    """
+    endpoint = endpoint or settings.CLOUD_ENDPOINTS.get(provider)
+    if not endpoint:
+        return None
+    key = (provider, endpoint)
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = CloudClient(endpoint, provider)
+        return _clients[key]
@@ -0,0 +1,327 @@
+"""
+Process-wide rate limiting of provider API calls.
+
+Every call goes through a token bucket per (provider, operation class),
+shared by all threads and asyncio tasks of the process:
+
+    from seahorse.cloud.ratelimit import limiter
+
+    limiter.call("eks", "read", client.describe_cluster, name)
+    await limiter.acall("eks", "read", client.adescribe_cluster, name)
+
+Buckets hand out reservations: acquiring a token takes the lock only to
+book the next free slot, then the caller sleeps until its slot outside the
+lock (time.sleep() in a thread, asyncio.sleep() in a task), so waiters are
+served in order and nobody polls. Throttling answers raise Throttled; the
+bucket then stops issuing tokens for the Retry-After delay and the call is
+retried with exponential backoff and full jitter.
+
+Limits come from settings.RATE_LIMITS, {provider: {operation: {"rate":
+per second, "burst": bucket size}}}, over DEFAULT_RATE_LIMITS.
+"""
+import asyncio
+import email.utils
+import random
+import threading
+import time
+
+from seahorse.conf import settings
+from seahorse.core import metrics
+
+READ = "read"
+MUTATE = "mutate"
+
+# Conservative defaults, below the documented per-account limits.
+DEFAULT_RATE_LIMITS = {
+    "*": {READ: {"rate": 10, "burst": 20}, MUTATE: {"rate": 2, "burst": 5}},
+    "eks": {READ: {"rate": 10, "burst": 20}, MUTATE: {"rate": 2, "burst": 5}},
+    "gke": {READ: {"rate": 20, "burst": 40}, MUTATE: {"rate": 5, "burst": 10}},
+    "aks": {READ: {"rate": 12, "burst": 24}, MUTATE: {"rate": 2, "burst": 4}},
+}
+
+
+class Throttled(Exception):
+    """
+    The provider refused a call for exceeding its limits, e.g. a 429.
+    retry_after is the delay it asked for, in seconds, if any.
+    """
+
+    def __init__(self, message="Throttled", retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TransientError(Exception):
+    """
+    A failure worth retrying with backoff, e.g. a 503.
+    """
+
+
+class RetriesExhausted(Exception):
+    pass
+
+
+def parse_retry_after(value, now=None):
+    """
+    Return the delay in seconds of a Retry-After header, delay-seconds or an
+    HTTP date, or None if it can't be parsed.
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    now = time.time() if now is None else now
+    return max(0.0, when.timestamp() - now)
+
+
+def backoff_delay(attempt, base=0.5, cap=30.0, retry_after=None):
+    """
+    Return the delay before retry number attempt (from 0): exponential
+    backoff with full jitter, at least retry_after.
+    """
+    delay = random.uniform(0, min(cap, base * 2**attempt))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+def _observe_call(provider, operation, start, exception=None):
+    if exception is None:
+        outcome = "ok"
+    elif isinstance(exception, Throttled):
+        outcome = "throttled"
+    else:
+        outcome = "error"
+    metrics.PROVIDER_CALL_SECONDS.observe(
+        time.perf_counter() - start,
+        provider=provider,
+        operation=operation,
+        outcome=outcome,
+    )
+
+
+class TokenBucket:
+    """
+    rate tokens per second, at most burst of them at once.
+    """
+
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._updated = clock()
+        self.metrics = {
+            "acquired": 0,
+            "delayed": 0,
+            "wait_seconds": 0.0,
+            "throttled": 0,
+            "retries": 0,
+            "failures": 0,
+        }
+
+    def _refill(self, now):
+        # Called with the lock held. Tokens accrue from _updated on, which
+        # pause() moves to the end of the pause.
+        if now > self._updated:
+            elapsed = now - self._updated
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def reserve(self, tokens=1):
+        """
+        Take tokens and return how long to wait before using them. Tokens
+        may go negative: later callers wait behind earlier ones.
+        """
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            self._tokens -= tokens
+            wait = max(0.0, self._updated - now - self._tokens / self.rate)
+            self.metrics["acquired"] += 1
+            if wait:
+                self.metrics["delayed"] += 1
+                self.metrics["wait_seconds"] += wait
+            return wait
+
+    def pause(self, seconds):
+        """
+        Issue no token for seconds, e.g. after a Retry-After. The bucket
+        starts empty afterwards, so the callers held back by the pause
+        resume at the bucket's rate rather than all at once.
+        """
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            self._tokens = min(self._tokens, 0.0)
+            self._updated = max(self._updated, now + seconds)
+
+    def record(self, name, value=1):
+        with self._lock:
+            self.metrics[name] += value
+
+    def stats(self):
+        with self._lock:
+            return {"rate": self.rate, "burst": self.burst, **self.metrics}
+
+
+class RateLimiter:
+    """
+    The token buckets of every (provider, operation class) pair, and the
+    retry policy of the calls going through them.
+    """
+
+    def __init__(
+        self,
+        limits=None,
+        max_attempts=5,
+        backoff_base=0.5,
+        backoff_cap=30.0,
+        clock=time.monotonic,
+        sleep=time.sleep,
+        async_sleep=asyncio.sleep,
+    ):
+        self._limits = limits
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.clock = clock
+        self.sleep = sleep
+        self.async_sleep = async_sleep
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    @property
+    def limits(self):
+        if self._limits is None:
+            limits = {
+                provider: {
+                    operation: dict(limit) for operation, limit in operations.items()
+                }
+                for provider, operations in DEFAULT_RATE_LIMITS.items()
+            }
+            overrides = settings.RATE_LIMITS
+            # Each limit of the settings overrides the keys it names, over the
+            # provider's default or else the "*" one, which goes first.
+            for provider in sorted(overrides, key=lambda provider: provider != "*"):
+                operations = limits.setdefault(provider, {})
+                for operation, limit in overrides[provider].items():
+                    default = operations.get(operation) or limits["*"].get(operation)
+                    operations[operation] = {**(default or {}), **limit}
+            self._limits = limits
+        return self._limits
+
+    def bucket(self, provider, operation=READ):
+        key = (provider, operation)
+        try:
+            return self._buckets[key]
+        except KeyError:
+            pass
+        with self._lock:
+            if key not in self._buckets:
+                operations = self.limits.get(provider) or self.limits["*"]
+                limit = operations.get(operation) or self.limits["*"][operation]
+                self._buckets[key] = TokenBucket(
+                    limit["rate"], limit["burst"], clock=self.clock
+                )
+            return self._buckets[key]
+
+    def acquire(self, provider, operation=READ):
+        wait = self.bucket(provider, operation).reserve()
+        if wait:
+            self.sleep(wait)
+
+    async def aacquire(self, provider, operation=READ):
+        wait = self.bucket(provider, operation).reserve()
+        if wait:
+            await self.async_sleep(wait)
+
+    def _retry_delay(self, bucket, attempt, exception):
+        """
+        Return the delay before retrying after exception, or raise when the
+        call must not be retried.
+        """
+        if not isinstance(exception, (Throttled, TransientError)):
+            raise exception
+        retry_after = None
+        if isinstance(exception, Throttled):
+            bucket.record("throttled")
+            retry_after = exception.retry_after
+            if retry_after:
+                bucket.pause(retry_after)
+        if attempt + 1 >= self.max_attempts:
+            bucket.record("failures")
+            raise RetriesExhausted(
+                "Gave up after %d attempts: %s" % (self.max_attempts, exception)
+            ) from exception
+        bucket.record("retries")
+        return backoff_delay(
+            attempt, self.backoff_base, self.backoff_cap, retry_after=retry_after
+        )
+
+    def call(self, provider, operation, func, *args, **kwargs):
+        """
+        Call func(*args, **kwargs) within the limits of provider's operation
+        class, retrying on Throttled and TransientError.
+        """
+        bucket = self.bucket(provider, operation)
+        attempt = 0
+        while True:
+            self.acquire(provider, operation)
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                _observe_call(provider, operation, start, e)
+                self.sleep(self._retry_delay(bucket, attempt, e))
+            else:
+                _observe_call(provider, operation, start)
+                return result
+            attempt += 1
+
+    async def acall(self, provider, operation, func, *args, **kwargs):
+        """
+        Like call(), for a coroutine function.
+        """
+        bucket = self.bucket(provider, operation)
+        attempt = 0
+        while True:
+            await self.aacquire(provider, operation)
+            start = time.perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as e:
+                _observe_call(provider, operation, start, e)
+                await self.async_sleep(self._retry_delay(bucket, attempt, e))
+            else:
+                _observe_call(provider, operation, start)
+                return result
+            attempt += 1
+
+    def stats(self):
+        """
+        Return {"provider.operation": bucket metrics}.
+        """
+        return {
+            "%s.%s" % key: bucket.stats() for key, bucket in list(self._buckets.items())
+        }
+
+    def reset(self, limits=None):
+        """
+        Drop the buckets and use limits from now on, by default those of the
+        settings.
+        """
+        with self._lock:
+            self._buckets = {}
+            self._limits = limits
+
+
+limiter = RateLimiter()
@@ -0,0 +1,399 @@
+"""
+Wait for provider operations to complete.
+
+Creating a cluster returns long before the cluster is usable. The watcher
+polls every pending operation of the process from a single event loop, in
+a thread of its own, until its resource reports a ready status:
+
+    from seahorse.cloud.watcher import watcher
+
+    future = watcher.watch(client, "cluster", "vpc-1", timeout=1800)
+    future.add_done_callback(on_ready)
+    resource = future.result()
+
+or, from a coroutine, resource = await watcher.wait(client, "cluster", name).
+
+Polls due at about the same time are batched into one describe call per
+client and kind, of up to batch_size resources, so that waiting on hundreds
+of clusters costs a few requests per poll round. The interval between polls
+of an operation comes from a PollPolicy: short at first, backing off, short
+again around the time operations of the same kind took to complete before,
+as recorded by OperationHistory.
+"""
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import statistics
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future
+
+from seahorse.cloud.ratelimit import READ, limiter
+from seahorse.utils._os import atomic_write, get_cache_dir
+
+READY_STATUSES = frozenset({"READY", "ACTIVE", "RUNNING", "AVAILABLE", "SUCCEEDED"})
+FAILED_STATUSES = frozenset({"FAILED", "ERROR", "CREATE_FAILED", "UPDATE_FAILED"})
+
+
+class OperationFailed(Exception):
+    def __init__(self, message, resource=None):
+        super().__init__(message)
+        self.resource = resource
+
+
+class WatchTimeout(Exception):
+    pass
+
+
+def is_ready(resource):
+    return resource.get("status") in READY_STATUSES
+
+
+def has_failed(resource):
+    return resource.get("status") in FAILED_STATUSES
+
+
+def describe_resources(client, kind, names):
+    """
+    Return {name: resource} for names, in a single request when the client
+    has describe_many(), within the provider's read rate limit.
+    """
+    describe_many = getattr(client, "describe_many", None)
+    if describe_many is not None:
+        return limiter.call(client.provider, READ, describe_many, kind, names)
+    found = {}
+    for name in names:
+        value, _ = limiter.call(client.provider, READ, client.get, kind, name)
+        if value is not None:
+            found[name] = value
+    return found
+
+
+class PollPolicy:
+    """
+    Intervals between the polls of an operation.
+
+    Without an expected duration, the interval grows from initial by factor
+    per poll, up to maximum. With one, polls back off the same way but
+    don't sleep past the start of the window of margin seconds around the
+    expected completion time, margin being the larger of window times the
+    expected duration and near. Within the window operations are polled
+    every near seconds; past it, at intervals growing with the overrun.
+    """
+
+    def __init__(self, initial=1.0, factor=1.5, maximum=30.0, near=2.0, window=0.2):
+        self.initial = initial
+        self.factor = factor
+        self.maximum = maximum
+        self.near = near
+        self.window = window
+
+    def interval(self, elapsed, polls, expected=None):
+        backoff = min(self.initial * self.factor**polls, self.maximum)
+        if expected is None:
+            return backoff
+        remaining = expected - elapsed
+        margin = max(self.window * expected, self.near)
+        if remaining > margin:
+            return min(backoff, remaining - margin)
+        if remaining >= -margin:
+            return self.near
+        overrun = -remaining - margin
+        return min(max(self.near, overrun * (self.factor - 1)), self.maximum)
+
+
+class OperationHistory:
+    """
+    The durations of the last keep operations of each provider and kind,
+    kept in operations.json in the cache directory.
+    """
+
+    def __init__(self, path=None, keep=20):
+        self.path = path or get_cache_dir("operations.json")
+        self.keep = keep
+        self._durations = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        # Called with the lock held.
+        if self._durations is None:
+            try:
+                with open(self.path) as fh:
+                    data = json.load(fh)
+            except (OSError, ValueError):
+                data = {}
+            self._durations = defaultdict(
+                lambda: deque(maxlen=self.keep),
+                {
+                    key: deque(values, maxlen=self.keep)
+                    for key, values in data.items()
+                },
+            )
+        return self._durations
+
+    def expected(self, provider, kind):
+        """
+        Return the median duration of the recorded operations, or None.
+        """
+        with self._lock:
+            durations = self._load().get("%s.%s" % (provider, kind))
+            return statistics.median(durations) if durations else None
+
+    def record(self, provider, kind, duration):
+        with self._lock:
+            self._load()["%s.%s" % (provider, kind)].append(duration)
+            self._dirty = True
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {key: list(values) for key, values in self._durations.items()}
+            self._dirty = False
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        atomic_write(self.path, json.dumps(data, sort_keys=True))
+
+
+class Operation:
+    __slots__ = (
+        "client",
+        "kind",
+        "name",
+        "future",
+        "started",
+        "deadline",
+        "expected",
+        "polls",
+    )
+
+    def __init__(self, client, kind, name, started, deadline, expected):
+        self.client = client
+        self.kind = kind
+        self.name = name
+        self.future = Future()
+        self.started = started
+        self.deadline = deadline
+        self.expected = expected
+        self.polls = 0
+
+
+class ReadinessWatcher:
+    """
+    Poll pending operations in batches until their resource is ready.
+
+    describe(client, kind, names) returns {name: resource}; names it omits
+    are assumed not to be visible yet. Describe errors left after the
+    limiter's retries fail the operations of the batch.
+    """
+
+    def __init__(
+        self,
+        describe=describe_resources,
+        policy=None,
+        history=None,
+        batch_size=100,
+        coalesce=0.25,
+        is_ready=is_ready,
+        has_failed=has_failed,
+        clock=time.monotonic,
+    ):
+        self.describe = describe
+        self.policy = policy or PollPolicy()
+        self.history = history if history is not None else OperationHistory()
+        self.batch_size = batch_size
+        self.coalesce = coalesce
+        self.is_ready = is_ready
+        self.has_failed = has_failed
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._counter = itertools.count()
+        self._counters = {
+            "watched": 0,
+            "requests": 0,
+            "polls": 0,
+            "ready": 0,
+            "failed": 0,
+            "timed_out": 0,
+        }
+
+    def _start(self):
+        # Called with the lock held.
+        if self._thread is None:
+            self._loop = asyncio.new_event_loop()
+            self._queue = []
+            self._closing = False
+            self._wakeup = asyncio.Event()
+            self._tasks = set()
+            self._thread = threading.Thread(
+                target=self._loop.run_until_complete,
+                args=(self._run(),),
+                name="seahorse-watcher",
+                daemon=True,
+            )
+            self._thread.start()
+        return self._loop
+
+    def watch(self, client, kind, name, timeout=None):
+        """
+        Return a concurrent.futures.Future resolved with the resource once it
+        is ready. It fails with OperationFailed if the resource reports a
+        failed status, and with WatchTimeout after timeout seconds.
+        Callbacks added to it run in the watcher's thread.
+        """
+        now = self.clock()
+        operation = Operation(
+            client,
+            kind,
+            name,
+            now,
+            None if timeout is None else now + timeout,
+            self.history.expected(client.provider, kind),
+        )
+        with self._lock:
+            self._counters["watched"] += 1
+            self._start().call_soon_threadsafe(self._schedule, operation, now)
+        return operation.future
+
+    async def wait(self, client, kind, name, timeout=None):
+        """
+        Like watch(), awaitable from the caller's event loop.
+        """
+        return await asyncio.wrap_future(self.watch(client, kind, name, timeout))
+
+    def _schedule(self, operation, due):
+        if operation.deadline is not None:
+            due = min(due, operation.deadline)
+        heapq.heappush(self._queue, (due, next(self._counter), operation))
+        self._wakeup.set()
+
+    async def _run(self):
+        while not self._closing:
+            self._wakeup.clear()
+            if not self._queue:
+                await self._wakeup.wait()
+                continue
+            delay = self._queue[0][0] - self.clock()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            # Take the operations falling due soon along with those due now,
+            # so that polls of operations started together share requests.
+            horizon = self.clock() + self.coalesce
+            batches = defaultdict(list)
+            while self._queue and self._queue[0][0] <= horizon:
+                operation = heapq.heappop(self._queue)[2]
+                if not operation.future.cancelled():
+                    batches[(id(operation.client), operation.kind)].append(operation)
+            for operations in batches.values():
+                for start in range(0, len(operations), self.batch_size):
+                    task = asyncio.ensure_future(
+                        self._poll(operations[start : start + self.batch_size])
+                    )
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for _, _, operation in self._queue:
+            operation.future.cancel()
+
+    async def _poll(self, operations):
+        client, kind = operations[0].client, operations[0].kind
+        names = [operation.name for operation in operations]
+        with self._lock:
+            self._counters["requests"] += 1
+            self._counters["polls"] += len(operations)
+        try:
+            found = await self._loop.run_in_executor(
+                None, self.describe, client, kind, names
+            )
+        except asyncio.CancelledError:
+            for operation in operations:
+                operation.future.cancel()
+            raise
+        except Exception as e:
+            for operation in operations:
+                self._resolve(operation, "failed", exception=e)
+            return
+        now = self.clock()
+        for operation in operations:
+            resource = found.get(operation.name)
+            if resource is not None and self.is_ready(resource):
+                self.history.record(client.provider, kind, now - operation.started)
+                self._resolve(operation, "ready", result=resource)
+            elif resource is not None and self.has_failed(resource):
+                self._resolve(
+                    operation,
+                    "failed",
+                    exception=OperationFailed(
+                        "%s %s %s is %s."
+                        % (client.provider, kind, operation.name, resource["status"]),
+                        resource,
+                    ),
+                )
+            elif operation.deadline is not None and now >= operation.deadline:
+                self._resolve(
+                    operation,
+                    "timed_out",
+                    exception=WatchTimeout(
+                        "%s %s %s was not ready after %.0fs."
+                        % (
+                            client.provider,
+                            kind,
+                            operation.name,
+                            now - operation.started,
+                        )
+                    ),
+                )
+            else:
+                operation.polls += 1
+                interval = self.policy.interval(
+                    now - operation.started, operation.polls, operation.expected
+                )
+                self._schedule(operation, now + interval)
+
+    def _resolve(self, operation, outcome, result=None, exception=None):
+        with self._lock:
+            self._counters[outcome] += 1
+        if operation.future.set_running_or_notify_cancel():
+            if exception is None:
+                operation.future.set_result(result)
+            else:
+                operation.future.set_exception(exception)
+
+    def save(self):
+        self.history.save()
+
+    def close(self):
+        """
+        Stop the watcher's thread, cancelling the pending operations, and
+        save the history.
+        """
+        with self._lock:
+            thread, loop = self._thread, self._loop
+            self._thread = self._loop = None
+        if thread is not None:
+            loop.call_soon_threadsafe(self._stop)
+            thread.join()
+            loop.close()
+        self.save()
+
+    def _stop(self):
+        self._closing = True
+        self._wakeup.set()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters)
+
+
+watcher = ReadinessWatcher()
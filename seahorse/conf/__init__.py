@@ -0,0 +1,263 @@
+"""
+Settings and configuration for seahorse.
+
+Settings are layered, each layer overriding the previous one:
+
+1. seahorse.conf.global_settings;
+2. the config file, SEAHORSE_CONFIG or config.toml / config.json in the
+   config directory (~/.config/seahorse);
+3. SEAHORSE_<NAME> environment variables, parsed as JSON when they are
+   valid JSON and kept as strings otherwise. The variables controlling
+   seahorse itself, RESERVED_ENVIRONMENT_VARIABLES, aren't settings.
+
+Names are case-insensitive: settings.DATABASES and settings.databases are
+the same setting. Nothing is read until the first access.
+"""
+import json
+import os
+import threading
+
+from seahorse.conf import global_settings
+from seahorse.core.exception import ImproperlyConfigured
+from seahorse.utils._os import get_config_dir
+from seahorse.utils.datastructures import CaseInsensitiveMapping
+
+ENVIRONMENT_VARIABLE = "SEAHORSE_CONFIG"
+ENVIRONMENT_PREFIX = "SEAHORSE_"
+RESERVED_ENVIRONMENT_VARIABLES = frozenset(
+    {
+        ENVIRONMENT_VARIABLE,
+        "SEAHORSE_CACHE_DIR",
+        "SEAHORSE_STATE_DIR",
+        "SEAHORSE_SOCKET",
+        "SEAHORSE_NO_SERVER",
+        "SEAHORSE_TEST_WORKER",
+    }
+)
+CONFIG_FILE_NAMES = ("config.toml", "config.json")
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+# path -> (stamp, parsed content), so a file is parsed again only once it
+# changed on disk.
+_config_files = {}
+_config_files_lock = threading.Lock()
+
+
+def file_stamp(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def config_file_path():
+    """
+    Return the path of the config file, or None if there is none.
+    """
+    path = os.environ.get(ENVIRONMENT_VARIABLE)
+    if path:
+        return path
+    for name in CONFIG_FILE_NAMES:
+        path = get_config_dir(name)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _parse_config_file(path):
+    try:
+        if path.endswith(".toml"):
+            if tomllib is None:
+                raise ImproperlyConfigured(
+                    "Reading %s requires Python 3.11 or later." % path
+                )
+            with open(path, "rb") as fh:
+                data = tomllib.load(fh)
+        else:
+            with open(path) as fh:
+                data = json.load(fh)
+    except (OSError, ValueError) as e:
+        raise ImproperlyConfigured("Cannot read config file %s: %s" % (path, e))
+    if not isinstance(data, dict):
+        raise ImproperlyConfigured("Config file %s must define a mapping." % path)
+    return data
+
+
+def load_config_file(path):
+    """
+    Return (stamp, settings) of the config file at path, parsing it only if
+    it changed since the last call.
+    """
+    stamp = file_stamp(path)
+    if stamp is None:
+        raise ImproperlyConfigured("Config file %s doesn't exist." % path)
+    with _config_files_lock:
+        cached = _config_files.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached
+    cached = (stamp, _parse_config_file(path))
+    with _config_files_lock:
+        _config_files[path] = cached
+    return cached
+
+
+def _parse_env_value(value):
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def _environ_settings(environ):
+    return sorted(
+        (key[len(ENVIRONMENT_PREFIX) :], value)
+        for key, value in environ.items()
+        if key.startswith(ENVIRONMENT_PREFIX)
+        and key not in RESERVED_ENVIRONMENT_VARIABLES
+    )
+
+
+class Settings:
+    """
+    An immutable snapshot of the layered settings.
+    """
+
+    def __init__(self, config_file=None, overrides=None, environ=None):
+        self.config_file = config_file
+        self.overrides = overrides or {}
+        self.environ = os.environ if environ is None else environ
+        items = [
+            (name, getattr(global_settings, name))
+            for name in dir(global_settings)
+            if name.isupper()
+        ]
+        config_stamp = None
+        if config_file:
+            config_stamp, data = load_config_file(config_file)
+            items.extend(data.items())
+        environ_items = _environ_settings(self.environ)
+        items.extend((name, _parse_env_value(value)) for name, value in environ_items)
+        items.extend(self.overrides.items())
+        self._stamp = (config_stamp, environ_items)
+        self._values = CaseInsensitiveMapping(items)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return self._values[name]
+        except KeyError:
+            raise AttributeError("Setting %r is not defined." % name)
+
+    def __contains__(self, name):
+        return name in self._values
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def get(self, name, default=None):
+        return self._values.get(name, default)
+
+    def is_stale(self):
+        """
+        Return True if the config file or the environment changed since the
+        settings were loaded. Only stats the config file.
+        """
+        config_stamp = file_stamp(self.config_file) if self.config_file else None
+        return self._stamp != (config_stamp, _environ_settings(self.environ))
+
+    def reloaded(self):
+        """
+        Return fresh settings from the same sources.
+        """
+        return Settings(self.config_file, self.overrides, self.environ)
+
+    def diff(self, other):
+        """
+        Return the names of the settings that differ between self and other.
+        """
+        if self._values == other._values:
+            return set()
+        names = {name.lower(): name for name in other._values}
+        names.update((name.lower(), name) for name in self._values)
+        missing = object()
+        return {
+            name
+            for name in names.values()
+            if self._values.get(name, missing) != other._values.get(name, missing)
+        }
+
+    def __repr__(self):
+        return "<%s config_file=%r>" % (self.__class__.__name__, self.config_file)
+
+
+class LazySettings:
+    """
+    A lazy proxy for the process settings, loaded on first access.
+    """
+
+    def __init__(self):
+        self._wrapped = None
+        self._explicit = False
+        self._lock = threading.Lock()
+
+    def _setup(self):
+        with self._lock:
+            if self._wrapped is None:
+                self._wrapped = Settings(config_file_path())
+        return self._wrapped
+
+    def __getattr__(self, name):
+        wrapped = self._wrapped or self._setup()
+        return getattr(wrapped, name)
+
+    def __contains__(self, name):
+        return name in (self._wrapped or self._setup())
+
+    def __iter__(self):
+        return iter(self._wrapped or self._setup())
+
+    def __repr__(self):
+        if self._wrapped is None:
+            return "<LazySettings [Unevaluated]>"
+        return "<LazySettings %r>" % self._wrapped
+
+    @property
+    def configured(self):
+        """Return True if the settings have already been loaded."""
+        return self._wrapped is not None
+
+    def configure(self, config_file=None, **options):
+        """
+        Load the settings from config_file with options overriding every
+        layer, instead of from the default sources. Settings are configured
+        once per process.
+        """
+        if self._wrapped is not None:
+            raise RuntimeError("Settings already configured.")
+        self._wrapped = Settings(config_file, options)
+        self._explicit = True
+
+    def reload(self):
+        """
+        Reload the settings if their sources changed, including a config
+        file created, removed or named by SEAHORSE_CONFIG since they were
+        loaded, and return the names of the settings whose value changed.
+        """
+        current = self._wrapped or self._setup()
+        config_file = current.config_file
+        if not self._explicit:
+            config_file = config_file_path()
+        if config_file == current.config_file and not current.is_stale():
+            return set()
+        fresh = Settings(config_file, current.overrides, current.environ)
+        self._wrapped = fresh
+        return current.diff(fresh)
+
+
+settings = LazySettings()
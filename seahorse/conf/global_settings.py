@@ -0,0 +1,29 @@
+"""
+Default seahorse settings. Override these in the config file or with
+SEAHORSE_<NAME> environment variables.
+"""
+
+# Database connections, see seahorse.db. An empty dict is a SQLite database
+# in the data directory.
+DATABASES = {}
+
+# IDs of system check messages to silence, e.g. ["aws.W003"].
+SILENCED_SYSTEM_CHECKS = []
+
+# Directories searched for manifest templates given by a relative name.
+TEMPLATE_DIRS = []
+
+# Provider API rate limits, {provider: {operation class: {"rate": calls per
+# second, "burst": bucket size}}}, over seahorse.cloud.ratelimit defaults.
+RATE_LIMITS = {}
+
+# Cache of read-only provider calls, see seahorse.cloud.cache: TTLs in seconds
+# per resource type, the maximum number of entries, and whether the answers
+# are kept on disk between runs.
+CLOUD_CACHE_TTLS = {}
+CLOUD_CACHE_SIZE = 1024
+CLOUD_CACHE_PERSIST = False
+
+# Base URLs of the provider provisioning APIs, {provider: URL}. Providers
+# without one are provisioned as a dry run.
+CLOUD_ENDPOINTS = {}
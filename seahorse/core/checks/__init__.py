@@ -0,0 +1,46 @@
+from seahorse.core.checks.messages import (
+    CRITICAL,
+    DEBUG,
+    ERROR,
+    INFO,
+    LEVEL_NAMES,
+    WARNING,
+    CheckMessage,
+    Critical,
+    Debug,
+    Error,
+    Info,
+    Warning,
+)
+from seahorse.core.checks.registry import (
+    CheckRegistry,
+    Tags,
+    register,
+    registry,
+    run_checks,
+    tag_exists,
+)
+
+# Import these to force registration of checks
+import seahorse.core.checks.cloud  # NOQA isort:skip
+
+__all__ = [
+    "CheckMessage",
+    "CheckRegistry",
+    "Debug",
+    "Info",
+    "Warning",
+    "Error",
+    "Critical",
+    "DEBUG",
+    "INFO",
+    "WARNING",
+    "ERROR",
+    "CRITICAL",
+    "LEVEL_NAMES",
+    "register",
+    "registry",
+    "run_checks",
+    "tag_exists",
+    "Tags",
+]
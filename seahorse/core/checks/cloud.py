@@ -0,0 +1,143 @@
+"""
+Pre-flight checks of the cloud providers: the command line tools and
+credentials the provisioning commands rely on and, as deployment checks,
+the reachability of the provider's API.
+"""
+import socket
+import subprocess
+from shutil import which
+
+from seahorse.core.checks.inputs import env_stamp, file_stamp, tool_stamp
+from seahorse.core.checks.messages import Warning
+from seahorse.core.checks.registry import Tags, register
+
+# Arguments printing the version of each tool, which fails on a broken
+# installation.
+VERSION_ARGS = {
+    "aws": ["--version"],
+    "az": ["--version"],
+    "gcloud": ["--version"],
+    "kubectl": ["version", "--client"],
+}
+
+PROVIDERS = {
+    Tags.aws: {
+        "tools": ["aws", "kubectl"],
+        "credentials": ["~/.aws/credentials", "~/.aws/config"],
+        "env": ["AWS_ACCESS_KEY_ID", "AWS_PROFILE"],
+        "login": "aws configure",
+        "endpoint": ("sts.amazonaws.com", 443),
+    },
+    Tags.gcp: {
+        "tools": ["gcloud", "kubectl"],
+        "credentials": ["~/.config/gcloud/application_default_credentials.json"],
+        "env": ["GOOGLE_APPLICATION_CREDENTIALS"],
+        "login": "gcloud auth application-default login",
+        "endpoint": ("oauth2.googleapis.com", 443),
+    },
+    Tags.azure: {
+        "tools": ["az", "kubectl"],
+        "credentials": ["~/.azure/azureProfile.json"],
+        "env": ["AZURE_CLIENT_ID"],
+        "login": "az login",
+        "endpoint": ("login.microsoftonline.com", 443),
+    },
+}
+
+NETWORK_TIMEOUT = 5
+NETWORK_TTL = 300
+
+
+def check_tools(provider, tools):
+    errors = []
+    for tool in tools:
+        if which(tool) is None:
+            errors.append(
+                Warning(
+                    "%s is not installed." % tool,
+                    hint="The %s commands need %s on PATH." % (provider, tool),
+                    id="%s.W001" % provider,
+                )
+            )
+            continue
+        try:
+            subprocess.run(
+                [tool, *VERSION_ARGS.get(tool, ["--version"])],
+                check=True,
+                capture_output=True,
+                timeout=30,
+            )
+        except (OSError, subprocess.SubprocessError) as e:
+            errors.append(
+                Warning(
+                    "%s doesn't run: %s" % (tool, e),
+                    id="%s.W002" % provider,
+                )
+            )
+    return errors
+
+
+def check_credentials(provider, paths, env, login):
+    if any(file_stamp(path)[1] is not None for path in paths) or any(
+        env_stamp(*env).values()
+    ):
+        return []
+    return [
+        Warning(
+            "No %s credentials found." % provider,
+            hint="Run `%s` or set %s." % (login, " or ".join(env)),
+            id="%s.W003" % provider,
+        )
+    ]
+
+
+def check_endpoint(provider, host, port):
+    try:
+        socket.create_connection((host, port), timeout=NETWORK_TIMEOUT).close()
+    except OSError as e:
+        return [
+            Warning(
+                "Cannot reach %s:%d: %s" % (host, port, e),
+                id="%s.W004" % provider,
+            )
+        ]
+    return []
+
+
+def _named(func, name):
+    func.__name__ = func.__qualname__ = name
+    return func
+
+
+def register_provider(provider, tools, credentials, env, login, endpoint):
+    register(
+        _named(
+            lambda **kwargs: check_tools(provider, tools), "check_%s_tools" % provider
+        ),
+        provider,
+        Tags.tools,
+        inputs=lambda: [tool_stamp(tool) for tool in tools],
+    )
+    register(
+        _named(
+            lambda **kwargs: check_credentials(provider, credentials, env, login),
+            "check_%s_credentials" % provider,
+        ),
+        provider,
+        inputs=lambda: [[file_stamp(path) for path in credentials], env_stamp(*env)],
+    )
+    register(
+        _named(
+            lambda **kwargs: check_endpoint(provider, *endpoint),
+            "check_%s_endpoint" % provider,
+        ),
+        provider,
+        Tags.network,
+        deploy=True,
+        inputs=lambda: list(endpoint),
+        ttl=NETWORK_TTL,
+    )
+
+
+for provider, config in PROVIDERS.items():
+    register_provider(provider, **config)
@@ -0,0 +1,30 @@
+"""
+Building blocks of the inputs=callable of memoized checks.
+"""
+import os
+import shutil
+
+
+def file_stamp(path):
+    """
+    Return [path, mtime_ns, size] of path, with None for a missing file.
+    """
+    path = os.path.expanduser(path)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return [path, None, None]
+    return [path, stat.st_mtime_ns, stat.st_size]
+
+
+def tool_stamp(name):
+    """
+    Identify the installed version of a command line tool by the stamp of
+    the executable found on PATH, without running it.
+    """
+    path = shutil.which(name)
+    return [name] + (file_stamp(path) if path else [None, None, None])
+
+
+def env_stamp(*names):
+    return {name: os.environ.get(name) for name in names}
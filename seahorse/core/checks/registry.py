@@ -0,0 +1,198 @@
+import hashlib
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+
+from seahorse.core.checks.messages import CheckMessage
+from seahorse.utils._os import atomic_write, get_cache_dir
+from seahorse.utils.version import get_version
+
+
+class Tags:
+    """
+    Built-in tags for internal checks.
+    """
+
+    aws = "aws"
+    azure = "azure"
+    gcp = "gcp"
+    network = "network"
+    tools = "tools"
+
+
+class CheckRegistry:
+    """
+    The registered checks and their tags.
+
+    A check is a callable taking keyword arguments and returning a list of
+    CheckMessages. A check registered with inputs=callable is memoized on
+    disk: inputs() returns a JSON-serializable description of everything its
+    result depends on (config values, file stamps, tool versions) and the
+    check only runs again when that description changes, or when its result
+    is older than ttl seconds. Checks without inputs run every time.
+    """
+
+    max_workers = 8
+
+    def __init__(self):
+        self.registered_checks = set()
+        self.deployment_checks = set()
+
+    def register(self, check=None, *tags, **kwargs):
+        """
+        Can be used as a function or a decorator. Register given function
+        `f` labeled with given `tags`. The function should receive **kwargs
+        and return list of Errors and Warnings.
+
+        Example::
+
+            registry = CheckRegistry()
+            @registry.register("mytag", "anothertag", inputs=lambda: [...])
+            def my_check(**kwargs):
+                # ... perform checks and collect `errors` ...
+                return errors
+            # or
+            registry.register(my_check, "mytag", "anothertag")
+        """
+
+        def inner(check):
+            check.tags = tags
+            check.inputs = kwargs.get("inputs")
+            check.ttl = kwargs.get("ttl")
+            checks = (
+                self.deployment_checks
+                if kwargs.get("deploy")
+                else self.registered_checks
+            )
+            checks.add(check)
+            return check
+
+        if callable(check):
+            return inner(check)
+        else:
+            if check:
+                tags += (check,)
+            return inner
+
+    def get_checks(self, include_deployment_checks=False):
+        checks = list(self.registered_checks)
+        if include_deployment_checks:
+            checks.extend(self.deployment_checks)
+        return sorted(checks, key=lambda check: (check.__module__, check.__qualname__))
+
+    def tag_exists(self, tag, include_deployment_checks=False):
+        return tag in self.tags_available(include_deployment_checks)
+
+    def tags_available(self, deployment_checks=False):
+        return set(
+            chain.from_iterable(
+                check.tags for check in self.get_checks(deployment_checks)
+            )
+        )
+
+    def run_checks(self, tags=None, include_deployment_checks=False, use_cache=True):
+        """
+        Run all registered checks, concurrently, and return a list of
+        CheckMessages. Checks whose inputs are unchanged since their last run
+        return their memoized result.
+        """
+        checks = self.get_checks(include_deployment_checks)
+        if tags is not None:
+            checks = [check for check in checks if set(check.tags) & set(tags)]
+        cache = CheckCache() if use_cache else None
+        results = {}
+        pending = []
+        for check in checks:
+            key = cache.key(check) if cache and check.inputs else None
+            cached = cache.get(key, check.ttl) if key else None
+            if cached is None:
+                pending.append((check, key))
+            else:
+                results[check] = cached
+        if pending:
+            workers = min(self.max_workers, len(pending))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    (check, key, executor.submit(_call_check, check))
+                    for check, key in pending
+                ]
+                for check, key, future in futures:
+                    results[check] = future.result()
+                    if key:
+                        cache.set(key, results[check])
+        if cache:
+            cache.save()
+        return list(chain.from_iterable(results[check] for check in checks))
+
+
+def _call_check(check):
+    new_errors = check()
+    if not isinstance(new_errors, (list, tuple)):
+        raise TypeError(
+            "The function %r did not return a list. All functions "
+            "registered with the checks registry must return a list." % check,
+        )
+    return list(new_errors)
+
+
+class CheckCache:
+    """
+    Results of memoized checks, kept in checks.json in the cache directory.
+    Results unused for max_age seconds are dropped.
+    """
+
+    max_age = 7 * 24 * 3600
+
+    def __init__(self, path=None):
+        self.path = path or get_cache_dir("checks.json")
+        self.changed = False
+        try:
+            with open(self.path) as fh:
+                self.entries = json.load(fh)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def key(self, check):
+        identity = [
+            get_version(),
+            check.__module__,
+            check.__qualname__,
+            check.inputs(),
+        ]
+        data = json.dumps(identity, sort_keys=True, default=str)
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    def get(self, key, ttl=None):
+        entry = self.entries.get(key)
+        if entry is None or (ttl is not None and time.time() - entry["time"] > ttl):
+            return None
+        return [CheckMessage.from_json(message) for message in entry["messages"]]
+
+    def set(self, key, messages):
+        self.entries[key] = {
+            "time": time.time(),
+            "messages": [message.to_json() for message in messages],
+        }
+        self.changed = True
+
+    def save(self):
+        if self.changed:
+            now = time.time()
+            self.entries = {
+                key: entry
+                for key, entry in self.entries.items()
+                if now - entry["time"] <= self.max_age
+            }
+            try:
+                atomic_write(self.path, json.dumps(self.entries))
+            except OSError:
+                # A read-only cache only costs running the checks again.
+                return
+            self.changed = False
+
+
+registry = CheckRegistry()
+register = registry.register
+run_checks = registry.run_checks
+tag_exists = registry.tag_exists
@@ -0,0 +1,112 @@
+"""
+Thin client of `seahorse-admin serve`.
+
+The console script enters through main(), which imports nothing but the
+standard library before trying the server, so an invocation answered by a
+running server never pays for importing the management framework. When no
+server is listening the command runs in this process as usual.
+
+Set SEAHORSE_NO_SERVER=1 to always run commands locally.
+"""
+import json
+import os
+import socket
+import sys
+
+from seahorse.utils._os import get_cache_dir
+
+
+def socket_path():
+    """
+    Return the path of the server socket, SEAHORSE_SOCKET or serve.sock in
+    the cache directory.
+    """
+    return os.environ.get("SEAHORSE_SOCKET") or get_cache_dir("serve.sock")
+
+
+def _reads_stdin(argv):
+    # "-" names stdin, as an argument or as the value of an option, e.g.
+    # "--inventory -" or "--inventory=-".
+    return any(arg == "-" or arg.endswith("=-") for arg in argv[2:])
+
+
+def _can_forward(argv):
+    if os.environ.get("SEAHORSE_NO_SERVER"):
+        return False
+    if len(argv) > 1 and argv[1] == "serve":
+        return False
+    # Commands reading stdin run locally, the server doesn't relay it.
+    return not _reads_stdin(argv)
+
+
+def _umask():
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+def connect(path=None):
+    """
+    Return a socket connected to the server, or None if none is listening.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path or socket_path())
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def send(sock, request):
+    """
+    Send a request and yield the messages the server answers with.
+    """
+    with sock.makefile("rwb") as fh:
+        fh.write(json.dumps(request).encode() + b"\n")
+        fh.flush()
+        for line in fh:
+            yield json.loads(line)
+
+
+def run_remote(argv, path=None, stdout=None, stderr=None):
+    """
+    Run argv on the server, relaying its output, and return the exit code.
+    Return None when the invocation must or can only run locally.
+    """
+    if not _can_forward(argv):
+        return None
+    sock = connect(path)
+    if sock is None:
+        return None
+    streams = {"stdout": stdout or sys.stdout, "stderr": stderr or sys.stderr}
+    with sock:
+        request = {
+            "argv": argv,
+            "cwd": os.getcwd(),
+            "env": dict(os.environ),
+            "umask": _umask(),
+        }
+        for message in send(sock, request):
+            if "exit" in message:
+                return message["exit"]
+            stream = streams[message["stream"]]
+            stream.write(message["data"])
+            stream.flush()
+    streams["stderr"].write("The seahorse server closed the connection.\n")
+    return 1
+
+
+def main(argv=None):
+    argv = argv or sys.argv[:]
+    if argv[1:2] == ["complete"]:
+        # Completion never waits for the server or the management framework.
+        from seahorse.core import completion
+
+        sys.exit(completion.main(argv[2:]))
+    returncode = run_remote(argv)
+    if returncode is not None:
+        sys.exit(returncode)
+    from seahorse.core.management import execute_from_command_line
+
+    execute_from_command_line(argv)
@@ -0,0 +1,252 @@
+"""
+Shell completion of seahorse-admin.
+
+    eval "$(seahorse-admin complete bash)"
+    seahorse-admin complete zsh > "${fpath[1]}/_seahorse-admin"
+    seahorse-admin complete fish > ~/.config/fish/completions/seahorse-admin.fish
+
+The scripts call `seahorse-admin complete --shell SHELL -- WORDS...` with the
+words of the command line up to the cursor, the last one being the word
+completed, and offer the candidates printed one per line.
+
+Answers come from a completion schema, the names, options and choices of
+every command, kept in the cache directory with the stamps of the command
+manifest it was taken from. Like client.main(), this module imports only the
+standard library, so a completion costs the interpreter start, one small
+JSON file and a stat() per stamped path. When a stamped file changed, the
+manifest is loaded, rebuilt if needed, and the schema written again.
+"""
+import hashlib
+import json
+import os
+import sys
+
+from seahorse.utils._os import atomic_write, get_cache_dir
+
+SCHEMA_FORMAT = 1
+
+# Subcommands ManagementUtility handles itself.
+BUILTINS = {
+    "help": "Show the available subcommands, or the help of one of them.",
+    "version": "Show the version of seahorse.",
+    "serve": "Answer the invocations of seahorse-admin from a warm process.",
+    "complete": "Print a shell completion script.",
+}
+
+SHELLS = ("bash", "zsh", "fish")
+
+BASH_SCRIPT = r"""
+_seahorse_admin_complete() {
+    local IFS=$'\n'
+    COMPREPLY=($("${COMP_WORDS[0]}" complete --shell bash -- \
+        "${COMP_WORDS[@]:0:$((COMP_CWORD + 1))}" 2>/dev/null))
+}
+complete -o default -F _seahorse_admin_complete seahorse-admin
+"""
+
+ZSH_SCRIPT = r"""
+#compdef seahorse-admin
+_seahorse_admin() {
+    local -a candidates
+    candidates=("${(@f)$(${words[1]} complete --shell zsh -- \
+        "${(@)words[1,CURRENT]}" 2>/dev/null)}")
+    if [[ -n ${candidates[1]} ]]; then
+        _describe -t values seahorse-admin candidates
+    else
+        _files
+    fi
+}
+compdef _seahorse_admin seahorse-admin
+"""
+
+FISH_SCRIPT = r"""
+function __seahorse_admin_complete
+    set -l tokens (commandline -opc) (commandline -ct)
+    set -l candidates ($tokens[1] complete --shell fish -- $tokens 2>/dev/null)
+    if test (count $candidates) -gt 0
+        printf '%s\n' $candidates
+    else
+        __fish_complete_path (commandline -ct)
+    end
+end
+complete -c seahorse-admin -f -a '(__seahorse_admin_complete)'
+"""
+
+SCRIPTS = {"bash": BASH_SCRIPT, "zsh": ZSH_SCRIPT, "fish": FISH_SCRIPT}
+
+
+def schema_path():
+    """
+    Like the manifest, the schema of each installation has its own file.
+    """
+    key = "\0".join([sys.prefix, sys.version, os.path.dirname(__file__)])
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return get_cache_dir("completion-%s.json" % digest)
+
+
+def _first_line(text):
+    return (text or "").strip().split("\n", 1)[0]
+
+
+def build_schema(manifest):
+    """
+    Return the completion schema of a CommandManifest.
+    """
+    commands = {}
+    for name, entry in manifest.items():
+        commands[name] = {
+            "help": _first_line(entry.get("help")),
+            "arguments": [
+                {
+                    "option_strings": argument["option_strings"],
+                    "takes_value": argument["takes_value"],
+                    "repeatable": argument.get("repeatable", False),
+                    "choices": argument["choices"],
+                    "help": _first_line(argument["help"]),
+                }
+                for argument in entry.get("arguments", [])
+                if not argument.get("suppressed")
+            ],
+        }
+    return {
+        "format": SCHEMA_FORMAT,
+        "stamps": dict(manifest.stamps),
+        "commands": commands,
+    }
+
+
+def _is_fresh(schema):
+    for path, stamp in schema["stamps"].items():
+        try:
+            st = os.stat(path)
+        except OSError:
+            if stamp is not None:
+                return False
+            continue
+        if stamp != [st.st_mtime_ns, st.st_size]:
+            return False
+    return True
+
+
+def load_schema(path=None):
+    """
+    Return the completion schema, from the cache while none of the files it
+    was built from changed.
+    """
+    path = path or schema_path()
+    try:
+        with open(path) as fh:
+            schema = json.load(fh)
+        if schema.get("format") == SCHEMA_FORMAT and _is_fresh(schema):
+            return schema
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+    from seahorse.core.management import get_manifest
+
+    schema = build_schema(get_manifest())
+    try:
+        atomic_write(path, json.dumps(schema))
+    except OSError:
+        pass
+    return schema
+
+
+def _matches(prefix, candidates):
+    return [(value, help) for value, help in candidates if value.startswith(prefix)]
+
+
+def complete(words, schema):
+    """
+    Return the (candidate, description) pairs completing the last of words,
+    the command line up to the cursor, program name included.
+    """
+    # bash splits --option=value into "--option", "=", "value", and only
+    # replaces "value" with the candidates.
+    words = list(words) or [""]
+    if len(words) >= 3 and words[-1] == "=":
+        words[-1] = ""
+    elif len(words) >= 4 and words[-2] == "=":
+        del words[-2]
+    current = words[-1]
+    previous = words[-2] if len(words) >= 2 else ""
+    commands = schema["commands"]
+    if len(words) <= 2:
+        names = {name: entry["help"] for name, entry in commands.items()}
+        return _matches(current, sorted({**BUILTINS, **names}.items()))
+    subcommand = words[1]
+    if subcommand == "help" and len(words) == 3:
+        return _matches(current, sorted((name, "") for name in commands))
+    if subcommand == "complete":
+        return _matches(current, [(shell, "") for shell in SHELLS])
+    entry = commands.get(subcommand)
+    if entry is None:
+        return []
+    options = {}
+    for argument in entry["arguments"]:
+        for option in argument["option_strings"]:
+            options[option] = argument
+    if current.startswith("-") and "=" in current:
+        option, _, value = current.partition("=")
+        argument = options.get(option)
+        if argument is None or not argument["choices"]:
+            return []
+        return [
+            ("%s=%s" % (option, choice), "")
+            for choice in argument["choices"]
+            if choice.startswith(value)
+        ]
+    argument = options.get(previous)
+    if argument is not None and argument["takes_value"]:
+        choices = argument["choices"] or []
+        return _matches(current, [(choice, "") for choice in choices])
+    if current.startswith("-"):
+        used = set(words[2:-1])
+        candidates = []
+        for argument in entry["arguments"]:
+            if not argument["repeatable"] and used & set(argument["option_strings"]):
+                continue
+            for option in argument["option_strings"]:
+                candidates.append((option, argument["help"]))
+        return _matches(current, candidates)
+    candidates = []
+    for argument in entry["arguments"]:
+        if not argument["option_strings"] and argument["choices"]:
+            candidates.extend((choice, "") for choice in argument["choices"])
+    return _matches(current, candidates)
+
+
+def format_candidates(candidates, shell):
+    lines = []
+    for value, help in candidates:
+        if shell == "zsh":
+            value = value.replace(":", r"\:")
+            lines.append("%s:%s" % (value, help) if help else value)
+        elif shell == "fish" and help:
+            lines.append("%s\t%s" % (value, help))
+        else:
+            lines.append(value)
+    return "".join(line + "\n" for line in lines)
+
+
+def main(argv, stdout=None, stderr=None):
+    """
+    Run `complete SHELL` or `complete --shell SHELL -- WORDS...`, argv being
+    the arguments after "complete". Return the exit code.
+    """
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+    if len(argv) == 1 and argv[0] in SCRIPTS:
+        stdout.write(SCRIPTS[argv[0]].lstrip())
+        return 0
+    shell = "bash"
+    if argv[:1] == ["--shell"] and len(argv) >= 2:
+        shell, argv = argv[1], argv[2:]
+    if shell not in SHELLS or argv[:1] != ["--"]:
+        stderr.write(
+            "Usage: seahorse-admin complete {%s}\n"
+            "       seahorse-admin complete [--shell SHELL] -- WORDS...\n"
+            % ",".join(SHELLS)
+        )
+        return 1
+    stdout.write(format_candidates(complete(argv[1:], load_schema()), shell))
+    return 0
@@ -1,15 +1,36 @@
+import asyncio
+import copy
 import functools
+import time
 import  pkgutil
 import sys
 import os
+from argparse import (
+    _AppendConstAction,
+    _CountAction,
+    _StoreConstAction,
+    _SubParsersAction,
+)
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
 from importlib import import_module
+from io import StringIO
+from seahorse.core import metrics
 from seahorse.utils.version import get_version
 
 from seahorse.core.management.base import(
      CommandParser,
      CommandError, 
      BaseCommand,
+     AsyncBaseCommand,
      handle_default_options)
+from seahorse.core.management.manifest import CommandManifest
+from seahorse.core.management.profiling import PhaseTimer
+from seahorse.db import connections
 
 def find_commands(management_dir):
     """
@@ -29,8 +50,28 @@ def load_command_class(app_name, name):
     Given a command name and application name, 
     return the Command class instance
     """
-    module = import_module("%s.management.commands.%s" % (app_name, name))
-    return module.Command()
+    entry = get_manifest().get(name)
+    start = time.perf_counter()
+    if entry is not None and entry["app"] == app_name:
+        module = import_module(entry["module"])
+        klass = getattr(module, entry["class"])
+    else:
+        module = import_module("%s.management.commands.%s" % (app_name, name))
+        klass = module.Command
+    import_time = time.perf_counter() - start
+    command = klass()
+    command.timings.record("import", import_time)
+    return command
+
+@functools.cache
+def get_manifest():
+    """
+    Return the CommandManifest describing the seahorse.core commands and
+    the commands registered through the seahorse.commands entry points.
+    The manifest is persisted between processes and rebuilt only when one
+    of the command modules changes.
+    """
+    return CommandManifest.load([("seahorse.core", __path__[0])])
 
 @functools.cache
 def get_commands():
@@ -40,7 +81,7 @@ def get_commands():
     the dictionary is cached on the first call and reused on 
     subsequent calls
     """
-    commands = {name:"seahorse.core" for name in find_commands(__path__[0])}
+    commands = {name: entry["app"] for name, entry in get_manifest().items()}
     return commands
 
 class ManagementUtility:
@@ -52,8 +93,28 @@ class ManagementUtility:
             self.prog_name = "python3 -m seahorse"
         self.settings_exception = None
 
-    def main_help_text(self, subcommand):
-        pass
+    def main_help_text(self, commands_only=False):
+        """
+        Return the script's main help text, built from the command manifest
+        so that no command module is imported.
+        """
+        if commands_only:
+            return "\n".join(sorted(get_commands()))
+        usage = [
+            "",
+            "Type '%s help <subcommand>' for help on a specific subcommand."
+            % self.prog_name,
+            "",
+            "Available subcommands:",
+        ]
+        manifest = get_manifest()
+        for name in sorted(get_commands()):
+            help_text = (manifest.get(name).get("help") or "").strip()
+            if help_text:
+                usage.append("    %-20s %s" % (name, help_text.splitlines()[0]))
+            else:
+                usage.append("    %s" % name)
+        return "\n".join(usage)
 
     def fetch_command(self, subcommand):
         """
@@ -63,7 +124,10 @@ class ManagementUtility:
         try:
             app_name = commands[subcommand]
         except KeyError:
-            sys.stderr.write("Unknown command: %r" % subcommand)
+            sys.stderr.write(
+                "Unknown command: %r\nType '%s help' for usage.\n"
+                % (subcommand, self.prog_name)
+            )
             sys.exit(1)
 
         if isinstance(app_name, BaseCommand):
@@ -99,21 +163,186 @@ class ManagementUtility:
             elif not options.args:
                 sys.stdout.write(self.main_help_text() + "\n")
             else:
-                self.fetch_command(options.args[0].print_help(self.prog_name,
-                options.args[0]))
-        if subcommand == "version" or self.argv[1:] == ["--version"]:
+                self.fetch_command(options.args[0]).print_help(
+                    self.prog_name, options.args[0]
+                )
+        elif subcommand == "version" or self.argv[1:] == ["--version"]:
             sys.stdout.write(get_version() + "\n")
-        if self.argv[1:] in (["--help"], ["-h"]):
+        elif self.argv[1:] in (["--help"], ["-h"]):
             sys.stdout.write(self.main_help_text() + "\n")
+        elif subcommand == "complete":
+            from seahorse.core import completion
+
+            sys.exit(completion.main(self.argv[2:]))
+        elif subcommand == "serve":
+            from seahorse.core.management import server
+
+            server.main(self.prog_name, self.argv[2:])
         else:
             self.fetch_command(subcommand).run_from_argv(self.argv)
 
-def execute_from_command_line(argv=None):
-    """ Run the command line """
+def execute_from_command_line(argv=None, use_server=False):
+    """
+    Run the command line in this process or, with use_server, on the `serve`
+    process when one is listening. The seahorse-admin console script enters
+    through client.main(), which tries the server itself.
+    """
+    if use_server:
+        from seahorse.core import client
+
+        returncode = client.run_remote(argv or sys.argv[:])
+        if returncode is not None:
+            sys.exit(returncode)
     utility = ManagementUtility(argv)
     utility.execute()
 
-def call_command(command_name, *args, **options):
+def _get_actions(parser):
+    for opt in parser._actions:
+        if isinstance(opt, _SubParsersAction):
+            for sub_opt in opt.choices.values():
+                yield from _get_actions(sub_opt)
+        else:
+            yield opt
+
+
+class CompiledParser:
+    """
+    The parser of a command class together with everything call_command()
+    derives from it: the option -> dest mapping, the required and valid
+    option sets and, when the parser accepts an empty argv, its defaults.
+
+    Building all of this is the bulk of the cost of a call_command(), so it
+    is done once per command class and shared by every later call.
+    """
+
+    def __init__(self, command, command_name):
+        self.command_name = command_name
+        self.parser = parser = command.create_parser("", command_name)
+        self.opt_mapping = {
+            min(s_opt.option_strings).lstrip("-").replace("-", "_"): s_opt.dest
+            for s_opt in parser._actions
+            if s_opt.option_strings
+        }
+        self.actions = list(_get_actions(parser))
+        self.run_options = frozenset(parser.run_options)
+        self.mutually_exclusive_required_options = {
+            opt
+            for group in parser._mutually_exclusive_groups
+            for opt in group._group_actions
+            if group.required
+        }
+        self.required_actions = [
+            opt
+            for opt in self.actions
+            if opt.required or opt in self.mutually_exclusive_required_options
+        ]
+        self.stealth_options = set(
+            command.base_stealth_options + command.stealth_options
+        )
+        self.dest_parameters = {action.dest for action in self.actions}
+        self.valid_options = (self.dest_parameters | self.stealth_options).union(
+            self.opt_mapping
+        )
+        try:
+            self.defaults = dict(parser.parse_args(args=[])._get_kwargs())
+        except (CommandError, SystemExit):
+            # Required arguments, every call has to go through argparse.
+            self.defaults = None
+
+    def parse(self, args, options):
+        """
+        Turn call_command() positional args and **options into the keyword
+        arguments of BaseCommand.execute().
+        """
+        unknown_options = set(options) - self.valid_options
+        if unknown_options:
+            raise TypeError(
+                "Unknown option(s) for %s command: %s. "
+                "Valid options are: %s."
+                % (
+                    self.command_name,
+                    ", ".join(sorted(unknown_options)),
+                    ", ".join(sorted(self.valid_options)),
+                )
+            )
+        arg_options = {
+            self.opt_mapping.get(key, key): value for key, value in options.items()
+        }
+        if not args and self.defaults is not None:
+            # Nothing for argparse to parse, start from the cached defaults.
+            defaults = {
+                key: copy.copy(value) if isinstance(value, (list, dict)) else value
+                for key, value in self.defaults.items()
+            }
+            defaults.update(arg_options)
+            return defaults
+
+        parse_args = []
+        for arg in args:
+            if isinstance(arg, (list, tuple)):
+                parse_args += map(str, arg)
+            else:
+                parse_args.append(str(arg))
+        positionals = []
+        for opt in self.required_actions:
+            if opt.dest in arg_options and not opt.option_strings:
+                # A positional argument given by its dest, as in the options
+                # of the targets of an --inventory.
+                value = arg_options[opt.dest]
+                if isinstance(value, (list, tuple)):
+                    positionals += map(str, value)
+                else:
+                    positionals.append(str(value))
+            elif opt.dest in arg_options:
+                opt_dest_count = sum(v == opt.dest for v in self.opt_mapping.values())
+                if opt_dest_count > 1:
+                    raise TypeError(
+                        f"Cannot pass the dest {opt.dest!r} that matches multiple "
+                        f"arguments via **options."
+                    )
+                parse_args.append(min(opt.option_strings))
+                if isinstance(
+                    opt, (_AppendConstAction, _CountAction, _StoreConstAction)
+                ):
+                    continue
+                value = arg_options[opt.dest]
+                if isinstance(value, (list, tuple)):
+                    parse_args += map(str, value)
+                else:
+                    parse_args.append(str(value))
+        defaults = self.parser.parse_args(args=positionals + parse_args)
+        return dict(defaults._get_kwargs(), **arg_options)
+
+
+_compiled_parsers = {}
+
+
+def get_compiled_parser(command, command_name):
+    """
+    Return the CompiledParser of command's class, building it on first use.
+    """
+    key = (type(command), command_name)
+    try:
+        return _compiled_parsers[key]
+    except KeyError:
+        pass
+    if getattr(command, "_called_from_command_line", False):
+        # The parser of a command run from the command line exits on errors
+        # instead of raising CommandError; compile that of a fresh instance.
+        command = type(command)()
+    compiled = _compiled_parsers[key] = CompiledParser(command, command_name)
+    return compiled
+
+
+def clear_parser_cache():
+    _compiled_parsers.clear()
+
+
+def _load_command(command_name):
+    """
+    Return the (command, command_name) pair call_command() runs for
+    command_name, a command name or a BaseCommand instance.
+    """
     if isinstance(command_name, BaseCommand):
         command = command_name
         command_name = command.__class__.__module__.split(".")[-1]
@@ -126,73 +355,282 @@ def call_command(command_name, *args, **options):
             command = app_name
         else:
             command = load_command_class(app_name, command_name)
-    
-    parser = command.create_parser("", command_name)
-    opt_mapping = {
-        min(s_opt.options_strings).lstrip("-").replace("-",
-                                                       "_"):
-                                                       s_opt.dest
-            for s_opt in parser._actions
-            if s_opt.option_strings
-    }
-    arg_options = {
-        opt_mapping.get(key, key): value for key, value in options.items()
-    }
-    parse_args =[]
-    for arg in args:
-        if isinstance(arg, (list, tuple)):
-            parse_args += map(str, arg)
-        else:
-            parse_args.append(str(arg))
-    
-    def get_actions(parser):
-        for opt in parser._actions:
-            if isinstance(opt, _SubParsersAction):
-                for sub_opt in opt.choices.values():
-                    yield from get_actions(sub_opt)
-            else:
-                yield opt
-    
-    parser_actions = list(get_actions(parser))
-    mutually_exclusive_required_options = {
-        opt 
-        for group in parser._mutually_exclusive_groups
-        for opt in group._group_actions
-        if group.required
-    }
-
-    for opt in parser_actions:
-        if opt.dest in options and(
-            opt.required or opt in mutually_exclusive_required_options
-        ):
-            opt_dest_count = sum(v == opt.dest for v in opt_mapping.values())
-            if opt_dest_count > 1:
-                raise TypeError(
-                    f" {opt.dest!r} that matches"
-                    f"argument via **options")
-            parse_args.append(min(opt.option_strings))
-            if isinstance(opt, ((_AppendConstAction, _CountAction, _StoreConstAction))):
-                continue
-            value = arg_options[opt.dest]
-            if isinstance(value, (list, tuple)):
-                parse_args += map(str(value))
-        defaults = parser.parse_args(args=parse_args)
-        defaults = dict(defaults._get_kwargs(), **arg_options)
-        stealth_options = set(command.base_stealth_options + command.stealth_options)
-        
-        dest_parameters = {action.dest for action in parser_actions}
-        
-        valid_options = (dest_parameters | stealth_options).union(opt_mapping)
-        unknown_options = set(options) - valid_options
-        if unknown_options:
-            raise TypeError(
-                " % command  %s."
-                "valid optoins are %s"
-                % (command_name,
-                   ", ".join(sorted(unknown_options)),
-                   ", ".join(sorted(valid_options)))
+    return command, command_name
+
+
+def _prepare_call(command_name, args, options):
+    command, command_name = _load_command(command_name)
+    with command.timings.phase("create_parser"):
+        compiled = get_compiled_parser(command, command_name)
+    with command.timings.phase("parse_args"):
+        defaults = compiled.parse(args, options)
+    args = defaults.pop("args", ())
+    if "skip_checks" not in options:
+        defaults["skip_checks"] = True
+    return command, args, defaults
+
+
+def call_command(command_name, *args, **options):
+    """
+    Call the given command, with the given options and args/kwargs.
+
+    This is the primary API you should use for calling specific commands.
+    Options are given by their dest names and bypass argparse entirely
+    unless the command has required arguments or positional args are
+    passed.
+    """
+    command, args, defaults = _prepare_call(command_name, args, options)
+    metrics.COMMAND_CALLS.inc(command=command.command_name)
+    return command.execute(*args, **defaults)
+
+
+async def acall_command(command_name, *args, **options):
+    """
+    Awaitable call_command(). An AsyncBaseCommand runs on the caller's event
+    loop; other commands run in a worker thread so they don't block it.
+    """
+    command, args, defaults = _prepare_call(command_name, args, options)
+    metrics.COMMAND_CALLS.inc(command=command.command_name)
+    if isinstance(command, AsyncBaseCommand):
+        return await command.aexecute(*args, **defaults)
+    return await asyncio.to_thread(_execute_in_worker, command, args, defaults)
+
+
+def _execute_in_worker(command, args, options):
+    """
+    Execute a command in a worker thread of acall_command(). Nothing else
+    of the caller runs in that thread, so the connections the command
+    checked out there are returned to their pools when it's done.
+    """
+    try:
+        return command.execute(*args, **options)
+    finally:
+        connections.close_all()
+
+
+class CommandResult:
+    """
+    The outcome of one call_commands() invocation: the value returned by
+    call_command() or the exception it raised, plus everything the command
+    wrote to its stdout and stderr.
+    """
+
+    def __init__(
+        self,
+        index,
+        command_name,
+        args,
+        options,
+        value=None,
+        exception=None,
+        stdout="",
+        stderr="",
+        duration=0.0,
+    ):
+        self.index = index
+        self.command_name = command_name
+        self.args = args
+        self.options = options
+        self.value = value
+        self.exception = exception
+        self.stdout = stdout
+        self.stderr = stderr
+        self.duration = duration
+
+    @property
+    def ok(self):
+        return self.exception is None
+
+    def __repr__(self):
+        return "<%s #%d %s %s>" % (
+            self.__class__.__name__,
+            self.index,
+            self.command_name,
+            "ok" if self.ok else "failed",
+        )
+
+
+def _normalize_invocation(invocation):
+    if isinstance(invocation, (str, BaseCommand, type)):
+        return invocation, (), {}
+    command_name, *rest = invocation
+    args = rest[0] if len(rest) > 1 else ()
+    options = rest[-1] if rest else {}
+    return command_name, tuple(args), dict(options)
+
+
+def _task_command(command_name):
+    """
+    Return the command a batch task runs and the name it is reported under.
+    """
+    if isinstance(command_name, type):
+        command_name = command_name()
+    elif isinstance(command_name, BaseCommand):
+        # Tasks must not share the stdout/stderr execute() sets up.
+        command_name = copy.copy(command_name)
+        command_name.timings = PhaseTimer()
+    name = command_name
+    if isinstance(name, BaseCommand):
+        name = name.__class__.__module__.split(".")[-1]
+    return command_name, name
+
+
+def _run_invocation(index, command_name, args, options):
+    command, name = _task_command(command_name)
+    stdout, stderr = StringIO(), StringIO()
+    value = exception = None
+    start = time.perf_counter()
+    try:
+        value = call_command(command, *args, stdout=stdout, stderr=stderr, **options)
+    except Exception as e:
+        exception = e
+    finally:
+        # Hand the task's connections to the next task instead of keeping
+        # them pinned to this worker.
+        connections.close_all()
+    return CommandResult(
+        index,
+        name,
+        args,
+        options,
+        value=value,
+        exception=exception,
+        stdout=stdout.getvalue(),
+        stderr=stderr.getvalue(),
+        duration=time.perf_counter() - start,
+    )
+
+
+async def _arun_invocation(index, command_name, args, options):
+    command, name = _task_command(command_name)
+    stdout, stderr = StringIO(), StringIO()
+    value = exception = None
+    start = time.perf_counter()
+    try:
+        value = await acall_command(
+            command, *args, stdout=stdout, stderr=stderr, **options
+        )
+    except Exception as e:
+        exception = e
+    return CommandResult(
+        index,
+        name,
+        args,
+        options,
+        value=value,
+        exception=exception,
+        stdout=stdout.getvalue(),
+        stderr=stderr.getvalue(),
+        duration=time.perf_counter() - start,
+    )
+
+
+EXECUTORS = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor}
+
+
+def call_commands(invocations, max_workers=None, executor="thread", ordered=True):
+    """
+    Run many call_command() invocations concurrently and yield a
+    CommandResult for each of them.
+
+    Each invocation is a command name (or BaseCommand instance or subclass),
+    or a (command_name, options) or (command_name, args, options) tuple.
+    At most max_workers invocations run at once, in a thread or process
+    pool. Results are yielded in the order of invocations when ordered is
+    true and as they complete otherwise.
+
+    invocations is consumed lazily: only a small window of invocations is
+    pending at any time, so a generator over a large fleet is fine.
+    Exceptions raised by a command are captured on its CommandResult.
+    """
+    max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+    try:
+        executor_class = EXECUTORS[executor]
+    except KeyError:
+        raise ValueError(
+            "executor must be one of %s, got %r."
+            % (", ".join(sorted(EXECUTORS)), executor)
+        )
+    window = max_workers * 2
+    invocations = enumerate(invocations)
+    with executor_class(max_workers=max_workers) as pool:
+        pending = set()
+        finished = {}
+        next_index = 0
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) + len(finished) < window:
+                try:
+                    index, invocation = next(invocations)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending.add(
+                    pool.submit(
+                        _run_invocation, index, *_normalize_invocation(invocation)
+                    )
+                )
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if not ordered:
+                    yield result
+                else:
+                    finished[result.index] = result
+            while next_index in finished:
+                yield finished.pop(next_index)
+                next_index += 1
+
+
+async def acall_commands(invocations, max_workers=None, ordered=True):
+    """
+    Asynchronous call_commands(): an async generator running up to
+    max_workers invocations at once as tasks of the current event loop.
+
+    AsyncBaseCommand invocations need no thread at all, so max_workers can
+    be in the hundreds; synchronous commands run through asyncio.to_thread()
+    and are additionally bounded by the loop's default executor.
+    """
+    max_workers = max_workers or 100
+    window = max_workers * 2
+    invocations = enumerate(invocations)
+    pending = set()
+    finished = {}
+    next_index = 0
+    exhausted = False
+    try:
+        while True:
+            while (
+                not exhausted
+                and len(pending) < max_workers
+                and len(pending) + len(finished) < window
+            ):
+                try:
+                    index, invocation = next(invocations)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending.add(
+                    asyncio.ensure_future(
+                        _arun_invocation(index, *_normalize_invocation(invocation))
+                    )
+                )
+            if not pending:
+                break
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
             )
-        args = defaults.pop("args", ())
-        if "skip_checks" not in options:
-            defaults["skip_checks"] = True
-        return command.execute(*args, **defaults)
\ No newline at end of file
+            for task in done:
+                result = task.result()
+                if not ordered:
+                    yield result
+                else:
+                    finished[result.index] = result
+            while next_index in finished:
+                yield finished.pop(next_index)
+                next_index += 1
+    finally:
+        for task in pending:
+            task.cancel()
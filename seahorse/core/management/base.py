@@ -1,19 +1,56 @@
 
 from argparse import ArgumentParser, HelpFormatter
 import argparse
+import asyncio
+import cProfile
+from contextlib import contextmanager
+import pstats
+import tracemalloc
 from functools import partial
 from io import TextIOBase
+import json
 import os
+import threading
+import time
+from seahorse.core import checks, metrics
 from seahorse.core.exception import ImproperlyConfigured
+from seahorse.core.management.profiling import (
+    PhaseTimer,
+    format_malloc_top,
+    write_callgrind,
+)
+from seahorse.utils.asyncio import run_async
 from seahorse.utils.version import get_version
 
 from seahorse.db import DEFAULT_DB_ALIAS, connections
 import sys
 
 ALL_CHECKS = "__all__"
+
+# Buffering of the stdout of commands, see OutputWrapper.
+OUTPUT_BUFFER_SIZE = 64 * 1024
+OUTPUT_FLUSH_INTERVAL = 0.5
+
+
 class OutputWrapper(TextIOBase):
     """
     Wrapper around stdout/stderr
+
+    With a buffer_size, writes are batched until buffer_size characters
+    have accumulated or flush_interval seconds have passed since the first
+    of them, unless the stream is a terminal; a timer flushes them then
+    even if nothing else is written, e.g. while a command waits on a
+    provider, and execute() flushes them when the command returns. Behind
+    a proxy picking its stream per thread, like sys.stdout under `serve`,
+    buffered writes go to the stream of the thread that wrote them.
+
+    before_write is called ahead of every write, e.g. to flush a buffered
+    stdout so that it stays in order with stderr.
+
+    With the "jsonl" and "json" formats, write() emits "output" records
+    and write_record() structured ones, as JSON lines or as the items of a
+    single JSON array closed by finish(). Every record includes the fields
+    of context.
     """
 
     @property
@@ -27,27 +64,120 @@ class OutputWrapper(TextIOBase):
         else:
             self._style_func = lambda x: x
 
-    def __init__(self, out, ending="\n"):
+    def __init__(
+        self,
+        out,
+        ending="\n",
+        format="text",
+        buffer_size=0,
+        flush_interval=None,
+        before_write=None,
+    ):
         self._out = out
+        self._isatty = None
         self.style_func = None
         self.ending = ending
+        self.format = format
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.before_write = before_write
+        self.context = {}
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._target = None
+        self._buffered = 0
+        self._timer = None
+        self._records = 0
 
     def __getattr__(self, name):
         return getattr(self._out, name)
 
+    @property
+    def structured(self):
+        return self.format != "text"
+
+    def _flush_buffer(self):
+        # Called with the lock held.
+        if self._buffer:
+            self._target.write("".join(self._buffer))
+            self._buffer = []
+            self._buffered = 0
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _write(self, text):
+        # Called with the lock held.
+        if not self.buffer_size or self.isatty():
+            self._out.write(text)
+            return
+        target = getattr(self._out, "target", self._out)
+        if self._buffer and target is not self._target:
+            self._flush_buffer()
+        self._target = target
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.buffer_size:
+            self._flush_buffer()
+        elif self._timer is None and self.flush_interval is not None:
+            self._timer = threading.Timer(self.flush_interval, self._flush_target)
+            self._timer.daemon = True
+            self._timer.start()
+
     def flush(self):
+        with self._lock:
+            self._flush_buffer()
         if hasattr(self._out, "flush"):
             self._out.flush()
 
+    def _flush_target(self):
+        # Runs in the timer's thread, where a proxy would pick another stream.
+        with self._lock:
+            target = self._target
+            self._flush_buffer()
+        if hasattr(target, "flush"):
+            target.flush()
+
     def isatty(self):
-        return hasattr(self._out, "isatty") and self._out.isatty()
+        if self._isatty is None:
+            self._isatty = hasattr(self._out, "isatty") and self._out.isatty()
+        return self._isatty
 
     def write(self, msg="", style_func=None, ending=None):
         ending = self.ending if ending is None else ending
+        if self.structured:
+            if ending and msg.endswith(ending):
+                msg = msg[: -len(ending)]
+            self.write_record({"event": "output", "message": msg})
+            return
         if ending and not msg.endswith(ending):
             msg += ending
         style_func = style_func or self.style_func
-        self._out.write(style_func(msg))
+        if self.before_write is not None:
+            self.before_write()
+        with self._lock:
+            self._write(style_func(msg))
+
+    def write_record(self, record):
+        line = json.dumps({**self.context, **record}, default=str)
+        if self.before_write is not None:
+            self.before_write()
+        with self._lock:
+            if self.format == "json":
+                line = ("[\n" if not self._records else ",\n") + line
+            else:
+                line += "\n"
+            self._records += 1
+            self._write(line)
+
+    def finish(self):
+        """
+        Close the JSON array of the "json" format.
+        """
+        if self.format == "json":
+            with self._lock:
+                self._write("\n]\n" if self._records else "[]\n")
+                self._records = 0
 
 class CommandError(Exception):
     """
@@ -66,6 +196,8 @@ class CommandParser(ArgumentParser):
     ):
         self.missing_args_message = missing_args_message
         self.called_from_command_line = called_from_command_line
+        # Dests of the options added by BaseCommand.add_base_argument().
+        self.run_options = []
         super().__init__(**kwargs)
 
     def parse_args(self, args=None, namespace=None):
@@ -106,6 +238,17 @@ class SeahorseHelpFormatter(HelpFormatter):
         "--no-color",
         "--force-color",
         "--skip-checks",
+        "--parallel",
+        "--executor",
+        "--timings",
+        "--profile",
+        "--trace-malloc",
+        "--inventory",
+        "--inventory-format",
+        "--shard",
+        "--shard-results",
+        "--output",
+        "--metrics-file",
     }
 
     def _reordered_actions(self, actions):
@@ -130,10 +273,15 @@ class BaseCommand:
     base_stealth_options = ("stderr", "stdout")
     stealth_options=()
     suppressed_base_arguments = set()
+    output_transaction = False
+    default_executor = "thread"
+    # The option whose first value is the shard key of a target.
+    shard_option = None
 
     def __init__(self, stdout=None, stderr=None):
-        self.stdout=OutputWrapper(stdout or sys.stdout)
-        self.stderr=OutputWrapper(stderr or sys.stderr)
+        self.stdout = self._stdout_wrapper(stdout or sys.stdout)
+        self.stderr = self._stderr_wrapper(stderr or sys.stderr)
+        self.timings = PhaseTimer()
         if (
             not isinstance(self.requires_system_checks, (list, tuple))
             and self.requires_system_checks != ALL_CHECKS
@@ -142,14 +290,25 @@ class BaseCommand:
     
     def get_version(self):
         return get_version()
+
+    def _stdout_wrapper(self, out):
+        return OutputWrapper(
+            out, buffer_size=OUTPUT_BUFFER_SIZE, flush_interval=OUTPUT_FLUSH_INTERVAL
+        )
+
+    def _stderr_wrapper(self, out):
+        # Whatever stdout buffered comes first, as it was written first.
+        return OutputWrapper(out, before_write=lambda: self.stdout.flush())
     
     def create_parser(self, prog_name, subcommand, **kwargs):
+        from seahorse.core.management.sharding import shard_argument
+
         kwargs.setdefault("formatter_class", SeahorseHelpFormatter)
         parser = CommandParser(
             prog="%s %s" %(os.path.basename(prog_name), subcommand),
             description=self.help or None,
             missing_args_message=getattr(self, "missing_args_message",None),
-            called_from_command_line=getattr(self, "called_from_command_line", None),
+            called_from_command_line=getattr(self, "_called_from_command_line", None),
             **kwargs,
         )
         self.add_base_argument(
@@ -167,6 +326,120 @@ class BaseCommand:
             type=int,
             choices=[0,1,2,3],
         )
+        self.add_base_argument(
+            parser,
+            "--traceback",
+            action="store_true",
+            help="Raise on CommandError exceptions.",
+        )
+        if self.requires_system_checks:
+            parser.add_argument(
+                "--skip-checks",
+                action="store_true",
+                help="Skip system checks.",
+            )
+        self.add_base_argument(
+            parser,
+            "--parallel",
+            default=1,
+            type=int,
+            metavar="N",
+            help="Run the command's targets N at a time.",
+        )
+        self.add_base_argument(
+            parser,
+            "--executor",
+            default=self.default_executor,
+            choices=["thread", "process", "async"],
+            help=(
+                "Run parallel targets in a thread pool, a process pool or as "
+                "tasks of an event loop."
+            ),
+        )
+        self.add_base_argument(
+            parser,
+            "--inventory",
+            metavar="PATH",
+            help=(
+                "Read the command's targets from a JSONL or CSV file, '-' for "
+                "stdin, one target per record. Record fields override the "
+                "command line options."
+            ),
+        )
+        self.add_base_argument(
+            parser,
+            "--inventory-format",
+            choices=["jsonl", "csv"],
+            help="Format of --inventory, guessed from its extension by default.",
+        )
+        self.add_base_argument(
+            parser,
+            "--shard",
+            type=shard_argument,
+            metavar="INDEX/COUNT",
+            help=(
+                "Run only the targets consistent hashing assigns to shard INDEX "
+                "of COUNT, numbered from 1, and write their results to a file "
+                "for the merge command."
+            ),
+        )
+        self.add_base_argument(
+            parser,
+            "--shard-results",
+            metavar="PATH",
+            help=(
+                "Result file of --shard, by default "
+                "<command>-shard-<INDEX>-of-<COUNT>.jsonl."
+            ),
+        )
+        self.add_base_argument(
+            parser,
+            "--output",
+            default="text",
+            choices=["text", "jsonl", "json"],
+            help=(
+                "Write stdout as text, or as structured records of the run's "
+                "events: one JSON object per line, or a JSON array."
+            ),
+        )
+        self.add_base_argument(
+            parser,
+            "--metrics-file",
+            metavar="PATH",
+            help=(
+                "Write the metrics of the run to PATH, in the Prometheus text "
+                "exposition format, when the command exits."
+            ),
+        )
+        self.add_base_argument(
+            parser,
+            "--timings",
+            nargs="?",
+            const="text",
+            choices=["text", "json"],
+            help="Report the wall time of each phase of the run on stderr.",
+        )
+        self.add_base_argument(
+            parser,
+            "--profile",
+            nargs="?",
+            const="",
+            metavar="PATH",
+            help=(
+                "Profile the run with cProfile and dump the stats to PATH "
+                "(<command>.prof by default). A .callgrind suffix writes the "
+                "callgrind format instead."
+            ),
+        )
+        self.add_base_argument(
+            parser,
+            "--trace-malloc",
+            nargs="?",
+            const=10,
+            type=int,
+            metavar="N",
+            help="Report the N source lines that allocated the most memory.",
+        )
         self.add_arguments(parser)
         return parser
     
@@ -174,11 +447,18 @@ class BaseCommand:
         pass
     
     def add_base_argument(self, parser, *args, **kwargs):
+        """
+        Add an option of the run as a whole rather than of its targets, which
+        may differ between the runs of the shards of a fleet.
+        """
         for arg in args:
             if arg in self.suppressed_base_arguments:
                 kwargs["help"] = argparse.SUPPRESS
                 break
-        parser.add_argument(*args, **kwargs)
+        action = parser.add_argument(*args, **kwargs)
+        # --version and the like exit rather than leave an option.
+        if action.default is not argparse.SUPPRESS:
+            parser.run_options.append(action.dest)
 
     def print_help(self, prog_name, subcommand):
         parser = self.create_parser(prog_name, subcommand)
@@ -189,9 +469,11 @@ class BaseCommand:
         Set up any environment changes requested
         """
         self._called_from_command_line = True
-        parser = self.create_parser(argv[0], argv[1])
+        with self.timings.phase("create_parser"):
+            parser = self.create_parser(argv[0], argv[1])
 
-        options = parser.parse_args(argv[2:])
+        with self.timings.phase("parse_args"):
+            options = parser.parse_args(argv[2:])
         cmd_options = vars(options)
         # remove positional args out of options
         args = cmd_options.pop("args", ())
@@ -201,11 +483,20 @@ class BaseCommand:
         except CommandError as e:
             if options.traceback:
                 raise
+            # SystemCheckError takes care of its own formatting.
+            if isinstance(e, SystemCheckError):
+                self.stderr.write(str(e), lambda x: x)
+            else:
+                self.stderr.write("%s: %s" % (e.__class__.__name__, e))
+            sys.exit(e.returncode)
         finally:
             try:
-                connections.close_all()
+                with self.timings.phase("close_connections"):
+                    connections.close_all()
             except ImproperlyConfigured:
                 pass
+            if options.timings:
+                self.report_timings(options.timings)
 
     def execute(self, *args, **options):
         """
@@ -213,24 +504,433 @@ class BaseCommand:
         Todo:
             Add preparation checklist if there is a need
         """
+        self._prepare_execute(options)
+        with self.report_run(options), self.instrument(options):
+            if self._runs_targets(options):
+                return self.execute_parallel(*args, **options)
+            with self.timings.phase("handle"):
+                output = self.handle(*args, **options)
+            return self._finish_execute(output, options)
+
+    def _prepare_execute(self, options):
         if options.get("stdout"):
-            self.stdout = OutputWrapper(options["stdout"])
+            self.stdout = self._stdout_wrapper(options["stdout"])
         if options.get("stderr"):
-            self.stderr = OutputWrapper(options["stderr"])
-       
-        if self.requires_system_checks and "skip_checks" not in options:
-            if self.requires_system_checks == ALL_CHECKS:
-                print("do the check")
+            self.stderr = self._stderr_wrapper(options["stderr"])
+        self.stdout.format = options.get("output") or "text"
+        self.stdout.context = {"command": self.command_name}
+        if self.stdout.structured:
+            self.timings.listener = self._record_phase
+
+        if self.requires_system_checks and not options.get("skip_checks"):
+            with self.timings.phase("checks"):
+                if self.requires_system_checks == ALL_CHECKS:
+                    self.check()
+                else:
+                    self.check(tags=self.requires_system_checks)
+
+    def check(
+        self,
+        tags=None,
+        display_num_errors=False,
+        include_deployment_checks=False,
+        fail_level=checks.ERROR,
+    ):
+        """
+        Use the system check framework to validate the environment of the
+        command. If there are serious messages, raise a SystemCheckError;
+        otherwise write the messages to stderr.
+        """
+        all_issues = checks.run_checks(
+            tags=tags, include_deployment_checks=include_deployment_checks
+        )
+        header, body, footer = "", "", ""
+        visible_issue_count = 0
+        silenced_issue_count = 0
+        for level in sorted(checks.LEVEL_NAMES, reverse=True):
+            issues = [e for e in all_issues if e.level == level]
+            visible = [e for e in issues if not e.is_silenced()]
+            silenced_issue_count += len(issues) - len(visible)
+            issues = visible
+            if not issues:
+                continue
+            visible_issue_count += len(issues)
+            formatted = "\n".join(sorted(str(e) for e in issues))
+            body += "\n%sS:\n%s\n" % (checks.LEVEL_NAMES[level], formatted)
+        if visible_issue_count:
+            header = "System check identified some issues:\n"
+        if display_num_errors:
+            if visible_issue_count:
+                footer += "\n"
+            footer += "System check identified %s (%s silenced)." % (
+                "no issues"
+                if visible_issue_count == 0
+                else "1 issue"
+                if visible_issue_count == 1
+                else "%s issues" % visible_issue_count,
+                silenced_issue_count,
+            )
+        if any(e.is_serious(fail_level) and not e.is_silenced() for e in all_issues):
+            msg = "SystemCheckError: %s%s%s" % (header, body, footer)
+            raise SystemCheckError(msg)
+        else:
+            msg = header + body + footer
+        if msg:
+            if visible_issue_count:
+                self.stderr.write(msg)
             else:
-                print("checking specific stuff")
-        output = self.handle(*args, **options)
-        if output:
-            if self.output_transaction:
-                connection = connections[options.get("database", DEFAULT_DB_ALIAS)]
-                output = "%s\n%s\n%s" %()
-            self.stdout.write(output)
+                self.stdout.write(msg)
+
+    def _finish_execute(self, output, options):
+        with self.timings.phase("output"):
+            if output:
+                if self.output_transaction:
+                    connection = connections[options.get("database", DEFAULT_DB_ALIAS)]
+                    output = "%s\n%s\n%s" %()
+                self.stdout.write(output)
         return output
-            
+
+    @property
+    def command_name(self):
+        return self.__class__.__module__.split(".")[-1]
+
+    def emit(self, event, **fields):
+        """
+        Write a structured record of event with --output json or jsonl.
+        """
+        if self.stdout.structured:
+            self.stdout.write_record({"event": event, **fields})
+
+    def _record_phase(self, name, seconds):
+        self.emit("phase", phase=name, duration=seconds)
+
+    @contextmanager
+    def report_run(self, options=None):
+        """
+        Emit the "command" record of the run, update the command metrics and
+        flush the output when the block exits.
+        """
+        options = options or {}
+        name = self.command_name
+        metrics.COMMAND_INVOCATIONS.inc(command=name)
+        metrics.COMMANDS_IN_FLIGHT.inc(command=name)
+        handle_start = self.timings.phases.get("handle", 0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            metrics.COMMAND_ERRORS.inc(command=name, error=type(e).__name__)
+            self.emit(
+                "command",
+                status="failed",
+                duration=time.perf_counter() - start,
+                error=str(e),
+            )
+            raise
+        else:
+            self.emit("command", status="ok", duration=time.perf_counter() - start)
+        finally:
+            metrics.COMMANDS_IN_FLIGHT.dec(command=name)
+            handle = self.timings.phases.get("handle", 0.0) - handle_start
+            if handle:
+                metrics.HANDLE_SECONDS.observe(handle, command=name)
+            if options.get("metrics_file"):
+                metrics.write_metrics_file(options["metrics_file"])
+            self.timings.listener = None
+            self.stdout.finish()
+            self.stdout.flush()
+
+    @contextmanager
+    def instrument(self, options):
+        """
+        Run the block under cProfile and tracemalloc when --profile and
+        --trace-malloc ask for it, and report --timings of call_command()
+        runs (run_from_argv() reports once connections are closed).
+        """
+        profiler = None
+        if options.get("profile") is not None:
+            profiler = cProfile.Profile()
+        trace_malloc = options.get("trace_malloc")
+        if trace_malloc:
+            tracemalloc.start()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            if trace_malloc:
+                snapshot = tracemalloc.take_snapshot()
+                tracemalloc.stop()
+                self.stderr.write(format_malloc_top(snapshot, trace_malloc))
+            if profiler is not None:
+                self.dump_profile(profiler, options["profile"])
+            if options.get("timings") and not getattr(
+                self, "_called_from_command_line", False
+            ):
+                self.report_timings(options["timings"])
+
+    def dump_profile(self, profiler, path):
+        path = path or "%s.prof" % self.command_name
+        stats = pstats.Stats(profiler)
+        if path.endswith(".callgrind") or os.path.basename(path).startswith(
+            "callgrind.out"
+        ):
+            with open(path, "w") as fh:
+                write_callgrind(stats, fh)
+        else:
+            stats.dump_stats(path)
+        self.stderr.write("Profile written to %s" % path)
+
+    def report_timings(self, format="text"):
+        self.stderr.write(self.timings.format(self.command_name, format))
+
+    def iter_targets(self, *args, **options):
+        """
+        Split one invocation into the (args, options) pairs of its
+        independent targets. --parallel runs each of them as its own
+        call_command(). The default is a single target.
+        """
+        yield args, options
+
+    def _runs_targets(self, options):
+        return (
+            (options.get("parallel") or 1) > 1
+            or bool(options.get("inventory"))
+            or options.get("shard") is not None
+        )
+
+    def shard_key(self, *args, **options):
+        """
+        Return the key assigning a target to its --shard: the first value
+        of shard_option, or the arguments of the target when it has no such
+        value.
+        """
+        if self.shard_option is not None:
+            value = options.get(self.shard_option)
+            if isinstance(value, (list, tuple)):
+                value = value[0] if value else None
+            if value is not None:
+                return str(value)
+        run_options = self.get_run_options()
+        options = {
+            key: value for key, value in options.items() if key not in run_options
+        }
+        return json.dumps([args, options], sort_keys=True, default=str)
+
+    def get_run_options(self):
+        """
+        Return the dests of the base options, added by add_base_argument().
+        """
+        from seahorse.core.management import get_compiled_parser
+
+        return get_compiled_parser(self, self.command_name).run_options
+
+    def iter_inventory(self, options):
+        """
+        Yield the (line number, options) pairs of the --inventory records,
+        or a single (None, {}) pair without an inventory.
+        """
+        if not options.get("inventory"):
+            yield None, {}
+            return
+        from seahorse.core.management import get_compiled_parser
+        from seahorse.core.management.inventory import iter_inventory
+
+        yield from iter_inventory(
+            options["inventory"],
+            get_compiled_parser(self, self.command_name),
+            options.get("inventory_format"),
+        )
+
+    def _parallel_invocations(self, *args, **options):
+        from seahorse.core.management.inventory import InventoryError
+
+        stealth = set(self.base_stealth_options) | {"skip_checks"}
+        # Targets run with the verbosity and traceback of the run, and none of
+        # its other base options: instrumentation is process-wide and covers
+        # the invocation as a whole.
+        reset = {
+            dest: None
+            for dest in self.get_run_options()
+            if dest not in ("verbosity", "traceback")
+        }
+        shard = options.get("shard")
+        index = 0
+        for line_number, record in self.iter_inventory(options):
+            if isinstance(record, InventoryError):
+                self.stderr.write(str(record))
+                self._invalid_targets += 1
+                continue
+            for target_args, target_options in self.iter_targets(
+                *args, **{**options, **record}
+            ):
+                target_options = {
+                    key: value
+                    for key, value in target_options.items()
+                    if key not in stealth
+                }
+                if shard is not None:
+                    key = self.shard_key(*target_args, **target_options)
+                    if not shard.owns(key):
+                        continue
+                    self._target_keys[index] = key
+                if line_number is not None:
+                    self._target_lines[index] = line_number
+                index += 1
+                # Structured records of the targets are relayed, with their
+                # target number, into this command's output.
+                yield type(self), target_args, target_options | reset | {
+                    "parallel": 1,
+                    "output": "jsonl" if self.stdout.structured else "text",
+                }
+
+    def _relay_result(self, result):
+        line_number = self._target_lines.pop(result.index, None)
+        key = self._target_keys.pop(result.index, None)
+        if key is not None:
+            self._shard_results.append(
+                {
+                    "event": "target",
+                    "key": key,
+                    "shard": str(self._shard),
+                    "status": "ok" if result.exception is None else "failed",
+                    "duration": result.duration,
+                    **({"error": str(result.exception)} if result.exception else {}),
+                }
+            )
+        if self.stdout.structured:
+            self._relay_records(result, line_number)
+        else:
+            self.stdout.write(result.stdout, ending="")
+        self.stderr.write(result.stderr, ending="")
+        if result.exception is not None:
+            target = "Target %d" % result.index
+            if line_number is not None:
+                target += " (line %d)" % line_number
+            self.stderr.write("%s failed: %s" % (target, result.exception))
+            return False
+        return True
+
+    def _relay_records(self, result, line_number):
+        target = {"target": result.index}
+        if line_number is not None:
+            target["line"] = line_number
+        for line in result.stdout.splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = {"event": "output", "message": line}
+            self.stdout.write_record({**record, **target})
+        self.emit(
+            "target",
+            status="ok" if result.exception is None else "failed",
+            duration=result.duration,
+            **target,
+            **({"error": str(result.exception)} if result.exception else {}),
+        )
+
+    def _reset_targets(self, options):
+        self._target_lines = {}
+        self._target_keys = {}
+        self._invalid_targets = 0
+        self._shard = options.get("shard")
+        self._shard_results = []
+
+    def _write_shard_results(self, options):
+        from seahorse.core.management.sharding import write_results
+
+        path = options.get("shard_results") or self._shard.result_path(
+            self.command_name
+        )
+        write_results(path, self.command_name, self._shard, self._shard_results)
+        if options.get("verbosity", 1) >= 1:
+            self.stderr.write(
+                "Shard %s: %d targets, results written to %s."
+                % (self._shard, len(self._shard_results), path)
+            )
+
+    def _raise_failed_targets(self, failed, total, options):
+        if self._shard is not None:
+            self._write_shard_results(options)
+        failed += self._invalid_targets
+        total += self._invalid_targets
+        if failed:
+            raise CommandError("%d of %d targets failed." % (failed, total))
+
+    def execute_parallel(self, *args, **options):
+        """
+        Run every target of --inventory and iter_targets() through
+        call_commands(), relaying each target's output as it completes.
+        """
+        from seahorse.core.management import call_commands
+
+        executor = options.get("executor") or "thread"
+        if executor == "async":
+            return run_async(self.aexecute_parallel(*args, **options))
+        self._reset_targets(options)
+        failed = total = 0
+        for result in call_commands(
+            self._parallel_invocations(*args, **options),
+            max_workers=options.get("parallel") or 1,
+            executor=executor,
+            ordered=False,
+        ):
+            total += 1
+            failed += not self._relay_result(result)
+        self._raise_failed_targets(failed, total, options)
+
+    async def aexecute_parallel(self, *args, **options):
+        """
+        Like execute_parallel(), with the targets running as tasks of the
+        current event loop through acall_commands().
+        """
+        from seahorse.core.management import acall_commands
+
+        self._reset_targets(options)
+        failed = total = 0
+        async for result in acall_commands(
+            self._parallel_invocations(*args, **options),
+            max_workers=options.get("parallel") or 1,
+            ordered=False,
+        ):
+            total += 1
+            failed += not self._relay_result(result)
+        self._raise_failed_targets(failed, total, options)
+
+
+class AsyncBaseCommand(BaseCommand):
+    """
+    A command whose handle() is a coroutine function.
+
+    run_from_argv() and call_command() run the command to completion on the
+    calling thread's managed event loop; acall_command() awaits aexecute()
+    on the caller's loop, so many commands can be in flight in a single
+    thread.
+    """
+
+    default_executor = "async"
+
+    def execute(self, *args, **options):
+        return run_async(self.aexecute(*args, **options))
+
+    async def aexecute(self, *args, **options):
+        self._prepare_execute(options)
+        with self.report_run(options), self.instrument(options):
+            if self._runs_targets(options):
+                if (options.get("executor") or "async") == "async":
+                    return await self.aexecute_parallel(*args, **options)
+                return await asyncio.to_thread(self.execute_parallel, *args, **options)
+            with self.timings.phase("handle"):
+                output = await self.handle(*args, **options)
+            return self._finish_execute(output, options)
+
+    async def handle(self, *args, **options):
+        raise NotImplementedError(
+            "subclasses of AsyncBaseCommand must provide a handle() coroutine"
+        )
+
 def handle_default_options(options):
     """
     include default options that all comamnds should accept
@@ -1,25 +1,83 @@
-from seahorse.core.management.base import BaseCommand
+from seahorse.core.checks import Tags
+from seahorse.provision.base import ProvisioningCommand
 
-class Command(BaseCommand):
-    def add_argument(self, parser):
+class Command(ProvisioningCommand):
+    help = "Provision AKS clusters, one per --subscription."
+    provider = "aks"
+    shard_option = "subscription"
+    lookup_kinds = ("resource-group", "vnet")
+    requires_system_checks = [Tags.azure]
+
+    def add_arguments(self, parser):
         parser.add_argument(
             "--subscription",
             action="append",
             help="subscription is required to use AKS service",
         )
         parser.add_argument(
-            "--public IP",
+            "--public-ip",
             action="append",
             default=[],
             help="AKS has public IP",
         )
         parser.add_argument(
-            "--private IP",
+            "--private-ip",
             action="append",
             default=[],
             help="AKS has private network",
         )
+        parser.add_argument(
+            "--nodepool",
+            action="append",
+            default=[],
+            help="node pool created in every cluster, defaults to 'default'",
+        )
+
+    def iter_targets(self, *args, **options):
+        """
+        Every --subscription is a cluster of its own.
+        """
+        subscriptions = options.get("subscription") or []
+        if len(subscriptions) <= 1:
+            yield args, options
+            return
+        for subscription in subscriptions:
+            yield args, dict(options, subscription=[subscription])
     
-    def handle(self, *app_labels, **options):
-        rsm = options.get("ResourceManager", None)
-        print("use resource manager deploying resources")
\ No newline at end of file
+    def manifest_contexts(self, *args, **options):
+        for subscription in options.get("subscription") or ["default"]:
+            yield {
+                "name": subscription,
+                "subscription": subscription,
+                "nodepools": options["nodepool"] or ["default"],
+                "public_ips": options["public_ip"],
+                "private_ips": options["private_ip"],
+            }
+
+    def declare_resources(self, scheduler, *args, **options):
+        for subscription in options.get("subscription") or ["default"]:
+            group = self.resource(
+                scheduler, "resource-group", subscription, subscription=subscription
+            )
+            vnet = self.resource(
+                scheduler,
+                "vnet",
+                subscription,
+                [group],
+                private_ip=",".join(options["private_ip"]),
+            )
+            cluster = self.resource(scheduler, "cluster", subscription, [vnet])
+            nodepools = [
+                self.resource(
+                    scheduler, "nodepool", "%s/%s" % (subscription, nodepool), [cluster]
+                )
+                for nodepool in options["nodepool"] or ["default"]
+            ]
+            for address in options["public_ip"]:
+                self.resource(
+                    scheduler,
+                    "public-ip",
+                    "%s/%s" % (subscription, address),
+                    nodepools,
+                    address=address,
+                )
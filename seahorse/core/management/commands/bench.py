@@ -0,0 +1,92 @@
+import json
+
+from seahorse.bench import compare, get_benchmarks, run_benchmarks
+from seahorse.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Benchmark the hot paths of the management framework."
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "names",
+            nargs="*",
+            help="benchmarks or groups to run, all of them by default",
+        )
+        parser.add_argument(
+            "--list", action="store_true", help="list the benchmarks and exit"
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=5, help="measurements per benchmark"
+        )
+        parser.add_argument(
+            "--scale",
+            type=int,
+            default=1000,
+            help="size of the scaled benchmarks: mapping keys, rendered clusters",
+        )
+        parser.add_argument("--save", metavar="PATH", help="write the results as JSON")
+        parser.add_argument(
+            "--compare",
+            metavar="PATH",
+            help="compare the results with a baseline saved with --save",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.1,
+            help="slowdown reported as a regression, 0.1 is 10%%",
+        )
+
+    def handle(self, *args, **options):
+        names = options["names"]
+        if options["list"]:
+            for name, (group, func) in get_benchmarks().items():
+                self.stdout.write("%-32s %s" % (name, group))
+            return
+        baseline = None
+        if options["compare"]:
+            try:
+                with open(options["compare"]) as fh:
+                    baseline = json.load(fh)
+            except (OSError, ValueError) as e:
+                raise CommandError("Cannot read baseline: %s" % e)
+        groups = {group for group, _ in get_benchmarks().values()}
+        unknown = set(names) - set(get_benchmarks()) - groups
+        if unknown:
+            raise CommandError("Unknown benchmark(s): %s." % ", ".join(sorted(unknown)))
+        results = run_benchmarks(
+            names, repeat=options["repeat"], scale=options["scale"]
+        )
+        for name, result in results["benchmarks"].items():
+            self.stdout.write(
+                "%-32s min %12.3f us  p50 %12.3f us"
+                % (name, result["min"] * 1e6, result["p50"] * 1e6)
+            )
+        if options["save"]:
+            with open(options["save"], "w") as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write("Results written to %s" % options["save"])
+        if baseline is not None:
+            self.report_comparison(results, baseline, options["threshold"])
+
+    def report_comparison(self, results, baseline, threshold):
+        rows = compare(results, baseline, threshold)
+        regressions = [row for row in rows if row[4]]
+        for name, previous, current, ratio, regressed in rows:
+            self.stdout.write(
+                "%-32s %12.3f us -> %12.3f us  %+7.1f%%%s"
+                % (
+                    name,
+                    previous * 1e6,
+                    current * 1e6,
+                    (ratio - 1) * 100,
+                    "  REGRESSION" if regressed else "",
+                )
+            )
+        if regressions:
+            raise CommandError(
+                "%d of %d benchmarks regressed by more than %d%%."
+                % (len(regressions), len(rows), threshold * 100)
+            )
@@ -0,0 +1,68 @@
+from seahorse.core import checks
+from seahorse.core.checks.registry import registry
+from seahorse.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Checks the environment of the provisioning commands for problems."
+
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tag",
+            "-t",
+            action="append",
+            dest="tags",
+            help="Run only checks labeled with given tag.",
+        )
+        parser.add_argument(
+            "--list-tags",
+            action="store_true",
+            help="List available tags.",
+        )
+        parser.add_argument(
+            "--deploy",
+            action="store_true",
+            help="Check deployment settings, e.g. the reachability of the APIs.",
+        )
+        parser.add_argument(
+            "--fail-level",
+            default="ERROR",
+            choices=["CRITICAL", "ERROR", "WARNING", "INFO", "DEBUG"],
+            help=(
+                "Message level that will cause the command to exit with a "
+                "non-zero status. Default is ERROR."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        include_deployment_checks = options["deploy"]
+        if options["list_tags"]:
+            self.stdout.write(
+                "\n".join(sorted(registry.tags_available(include_deployment_checks)))
+            )
+            return
+
+        tags = options["tags"]
+        if tags:
+            try:
+                invalid_tag = next(
+                    tag
+                    for tag in tags
+                    if not checks.tag_exists(tag, include_deployment_checks)
+                )
+            except StopIteration:
+                # no invalid tags
+                pass
+            else:
+                raise CommandError(
+                    'There is no system check with the "%s" tag.' % invalid_tag
+                )
+
+        self.check(
+            tags=tags,
+            display_num_errors=True,
+            include_deployment_checks=include_deployment_checks,
+            fail_level=getattr(checks, options["fail_level"]),
+        )
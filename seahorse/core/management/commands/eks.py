@@ -1,7 +1,14 @@
+from seahorse.core.checks import Tags
+from seahorse.core.management.base import CommandError
+from seahorse.provision.base import ProvisioningCommand
 
-from seahorse.core.management.base import BaseCommand
+class Command(ProvisioningCommand):
+    help = "Provision EKS clusters, one per --vpcid/--CIDR pair."
+    provider = "eks"
+    shard_option = "vpcid"
+    lookup_kinds = ("vpc", "subnets")
+    requires_system_checks = [Tags.aws]
 
-class Command(BaseCommand):
     def add_arguments(self, parser):
         
         parser.add_argument(
@@ -14,8 +21,51 @@ class Command(BaseCommand):
             action="append",
             help="CIDR is required to provision EKS cluster",
         )
-    
-    def handle(self, *app_labels, **options):
-        vpcid = options.get("vpcid", None)
-        cidr = options.get("CIDR", None)
-        print("EKS vpcid ", vpcid, " cidr ", cidr)
\ No newline at end of file
+        parser.add_argument(
+            "--nodepool",
+            action="append",
+            default=[],
+            help="node group created in every cluster, defaults to 'default'",
+        )
+
+    def clusters(self, options):
+        vpcids = options.get("vpcid") or []
+        cidrs = options.get("CIDR") or []
+        if cidrs and len(cidrs) != len(vpcids):
+            raise CommandError(
+                "--vpcid and --CIDR must be given the same number of times."
+            )
+        return list(zip(vpcids, cidrs or [None] * len(vpcids)))
+
+    def iter_targets(self, *args, **options):
+        """
+        Every --vpcid/--CIDR pair is a cluster of its own.
+        """
+        clusters = self.clusters(options)
+        if len(clusters) <= 1:
+            yield args, options
+            return
+        for vpcid, cidr in clusters:
+            yield args, dict(options, vpcid=[vpcid], CIDR=[cidr] if cidr else None)
+
+    def manifest_contexts(self, *args, **options):
+        for vpcid, cidr in self.clusters(options) or [(None, None)]:
+            yield {
+                "name": vpcid or "default",
+                "vpcid": vpcid,
+                "cidr": cidr,
+                "nodepools": options["nodepool"] or ["default"],
+            }
+
+    def declare_resources(self, scheduler, *args, **options):
+        for vpcid, cidr in self.clusters(options) or [(None, None)]:
+            name = vpcid or "default"
+            network = self.resource(scheduler, "vpc", name, vpcid=vpcid)
+            subnets = self.resource(
+                scheduler, "subnets", name, requires=[network], cidr=cidr
+            )
+            cluster = self.resource(scheduler, "cluster", name, requires=[subnets])
+            for nodepool in options["nodepool"] or ["default"]:
+                self.resource(
+                    scheduler, "nodegroup", "%s/%s" % (name, nodepool), [cluster]
+                )
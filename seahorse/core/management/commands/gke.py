@@ -1,7 +1,14 @@
-from seahorse.core.management.base import BaseCommand
+from seahorse.core.checks import Tags
+from seahorse.provision.base import ProvisioningCommand
 
-class Command(BaseCommand):
-    def add_argument(self, parser):
+class Command(ProvisioningCommand):
+    help = "Provision GKE clusters, one per --hostproject."
+    provider = "gke"
+    shard_option = "hostproject"
+    lookup_kinds = ("network", "subnets")
+    requires_system_checks = [Tags.gcp]
+
+    def add_arguments(self, parser):
         parser.add_argument(
             "--hostproject",
             action="append",
@@ -17,8 +24,52 @@ class Command(BaseCommand):
             action="append",
             help="external load balancer distribute data from outside of the cluster",
         )
-    
-    def handle(self, **options):
-        projectID = options.get("projectID", None)
-        print("GKE ", projectID, " ", options.get("internal_load_balancer", None),
-              options.get("external_load_balancer", None))
\ No newline at end of file
+        parser.add_argument(
+            "--nodepool",
+            action="append",
+            default=[],
+            help="node pool created in every cluster, defaults to 'default'",
+        )
+
+    def iter_targets(self, *args, **options):
+        """
+        Every --hostproject is a cluster of its own.
+        """
+        projects = options.get("hostproject") or []
+        if len(projects) <= 1:
+            yield args, options
+            return
+        for project in projects:
+            yield args, dict(options, hostproject=[project])
+
+    def manifest_contexts(self, *args, **options):
+        for project in options.get("hostproject") or ["default"]:
+            yield {
+                "name": project,
+                "hostproject": project,
+                "nodepools": options["nodepool"] or ["default"],
+                "internal_load_balancers": options.get("internal_load_balancer") or [],
+                "external_load_balancers": options.get("external_load_balancer") or [],
+            }
+
+    def declare_resources(self, scheduler, *args, **options):
+        for project in options.get("hostproject") or ["default"]:
+            network = self.resource(
+                scheduler, "network", project, host_project=project
+            )
+            subnets = self.resource(scheduler, "subnets", project, [network])
+            cluster = self.resource(scheduler, "cluster", project, [subnets])
+            nodepools = [
+                self.resource(
+                    scheduler, "nodepool", "%s/%s" % (project, nodepool), [cluster]
+                )
+                for nodepool in options["nodepool"] or ["default"]
+            ]
+            for kind, dest in (
+                ("internal-lb", "internal_load_balancer"),
+                ("external-lb", "external_load_balancer"),
+            ):
+                for balancer in options.get(dest) or []:
+                    self.resource(
+                        scheduler, kind, "%s/%s" % (project, balancer), nodepools
+                    )
@@ -0,0 +1,120 @@
+import argparse
+import json
+
+from seahorse.bench.load import run_load
+from seahorse.core.management.base import BaseCommand, CommandError
+from seahorse.test.cloud import parse_latency
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test a provisioning command against a local stand-in of the "
+        "provider API, e.g. loadtest -n 200 -c 8 eks --vpcid vpc-{i} --force"
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("command", help="the provisioning command to run")
+        parser.add_argument(
+            "args",
+            nargs=argparse.REMAINDER,
+            help="arguments of the command, {i} is replaced by the invocation "
+            "number",
+        )
+        parser.add_argument(
+            "-n", "--invocations", type=int, default=100, help="number of runs"
+        )
+        parser.add_argument(
+            "-c", "--concurrency", type=int, default=8, help="concurrent runs"
+        )
+        parser.add_argument(
+            "--latency",
+            type=parse_latency,
+            help="latency of the API in seconds, or a distribution such as "
+            "lognormal:median=0.02,sigma=0.8",
+        )
+        parser.add_argument(
+            "--error-rate", type=float, default=0.0, help="share of 503 answers"
+        )
+        parser.add_argument(
+            "--throttle-rate", type=float, default=0.0, help="share of 429 answers"
+        )
+        parser.add_argument(
+            "--retry-after",
+            type=float,
+            default=1.0,
+            help="Retry-After of 429 answers, in seconds",
+        )
+        parser.add_argument(
+            "--max-concurrency",
+            type=int,
+            help="requests in flight beyond which the API answers 429",
+        )
+        parser.add_argument("--seed", type=int, help="seed of the fault injection")
+        parser.add_argument(
+            "--no-rate-limit",
+            action="store_true",
+            help="lift the client-side rate limits",
+        )
+        parser.add_argument("--save", metavar="PATH", help="write the report as JSON")
+
+    def handle(self, *args, **options):
+        if options["invocations"] < 1 or options["concurrency"] < 1:
+            raise CommandError("--invocations and --concurrency must be positive.")
+        rate_limits = None
+        if options["no_rate_limit"]:
+            unlimited = {"rate": 1e9, "burst": 1e9}
+            rate_limits = {"*": {"read": unlimited, "mutate": unlimited}}
+        report = run_load(
+            options["command"],
+            args,
+            invocations=options["invocations"],
+            concurrency=options["concurrency"],
+            server_options={
+                "latency": options["latency"],
+                "error_rate": options["error_rate"],
+                "throttle_rate": options["throttle_rate"],
+                "retry_after": options["retry_after"],
+                "max_concurrency": options["max_concurrency"],
+                "seed": options["seed"],
+            },
+            rate_limits=rate_limits,
+        )
+        latency = report["latency"]
+        self.stdout.write(
+            "%d invocations of %s, %d at a time, in %.3fs: %.1f/s"
+            % (
+                report["invocations"],
+                report["command"],
+                report["concurrency"],
+                report["wall_time"],
+                report["throughput"],
+            )
+        )
+        if latency["count"]:
+            self.stdout.write(
+                "latency p50 %.1f ms  p90 %.1f ms  p99 %.1f ms  max %.1f ms"
+                % tuple(latency[key] * 1e3 for key in ("p50", "p90", "p99", "max"))
+            )
+        server = report["server"]
+        self.stdout.write(
+            "API requests %d: %d throttled, %d rejected over the concurrency cap, "
+            "%d errors"
+            % (
+                server["requests"],
+                server["throttled"],
+                server["rejected"],
+                server["errors"],
+            )
+        )
+        if options["save"]:
+            with open(options["save"], "w") as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write("Report written to %s" % options["save"])
+        if report["errors"]:
+            for error in report["error_samples"]:
+                self.stderr.write(error)
+            raise CommandError(
+                "%d of %d invocations failed."
+                % (report["errors"], report["invocations"])
+            )
@@ -0,0 +1,43 @@
+import json
+
+from seahorse.core.management.base import BaseCommand, CommandError
+from seahorse.core.management.sharding import merge_results
+from seahorse.utils._os import atomic_write
+
+
+class Command(BaseCommand):
+    help = "Combine the result files of every --shard of a run."
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "files", nargs="+", help="result files, one per shard of the run"
+        )
+        parser.add_argument(
+            "--into",
+            metavar="PATH",
+            help="write the target records of every shard to PATH, as JSONL",
+        )
+
+    def handle(self, *args, **options):
+        command, count, targets = merge_results(options["files"])
+        if options["into"]:
+            atomic_write(
+                options["into"],
+                "".join(json.dumps(target) + "\n" for target in targets),
+            )
+        failed = [target for target in targets if target["status"] != "ok"]
+        for target in targets:
+            self.emit(**target)
+        if not self.stdout.structured:
+            for target in failed:
+                self.stdout.write(
+                    "%s failed in shard %s: %s"
+                    % (target["key"], target["shard"], target.get("error", ""))
+                )
+            self.stdout.write(
+                "Merged %d shards of %s: %d targets, %d failed."
+                % (count, command, len(targets), len(failed))
+            )
+        if failed:
+            raise CommandError("%d of %d targets failed." % (len(failed), len(targets)))
@@ -1,4 +1,288 @@
-from seahorse.core.management.base import BaseCommand
+import csv
+import json
+import sys
+import threading
+import time
+from itertools import islice
+
+from seahorse.core.management.base import BaseCommand, CommandError
+from seahorse.db import connections
+from seahorse.db.backends import redis
+from seahorse.utils.connection import ConnectionPool
+from seahorse.utils.stats import summarize
+
+
+def encode_value(value):
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, sort_keys=True)
+
 
 class Command(BaseCommand):
-    pass
\ No newline at end of file
+    help = "Seed, verify and benchmark the Redis caches next to the clusters."
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "action",
+            choices=["load", "verify", "bench"],
+            help="load records, check that records are stored, or benchmark",
+        )
+        parser.add_argument(
+            "path",
+            nargs="?",
+            help="JSONL or CSV file of key/value records, '-' for stdin",
+        )
+        parser.add_argument(
+            "--format",
+            choices=["jsonl", "csv"],
+            help="record format, guessed from the file extension by default",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="commands sent per pipeline",
+        )
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=6379)
+        parser.add_argument("--db", type=int, default=0)
+        parser.add_argument(
+            "--database",
+            help="alias of a seahorse.db.backends.redis database to use instead "
+            "of --host/--port/--db",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=10000,
+            help="bench: number of requests",
+        )
+        parser.add_argument(
+            "--pipeline",
+            type=int,
+            default=16,
+            help="bench: requests per pipeline",
+        )
+        parser.add_argument(
+            "--clients",
+            type=int,
+            default=1,
+            help="bench: concurrent connections",
+        )
+        parser.add_argument(
+            "--value-size",
+            type=int,
+            default=64,
+            help="bench: size of the values written, in bytes",
+        )
+
+    def get_pool(self, options):
+        if options["database"]:
+            return connections.get_pool(options["database"])
+        settings = {
+            "HOST": options["host"],
+            "PORT": options["port"],
+            "NAME": options["db"],
+        }
+        return ConnectionPool(
+            lambda: redis.connect(settings),
+            max_size=max(options["clients"], 1),
+            health_check=redis.is_usable,
+        )
+
+    def handle(self, *args, **options):
+        if options["action"] != "bench" and not options["path"]:
+            raise CommandError("The %s action requires a path." % options["action"])
+        pool = self.get_pool(options)
+        try:
+            getattr(self, "handle_%s" % options["action"])(pool, options)
+        except OSError as e:
+            raise CommandError("Redis connection failed: %s" % e)
+        finally:
+            if not options["database"]:
+                pool.close()
+
+    def describe_error(self, e):
+        if isinstance(e, OSError):
+            return "Redis connection failed: %s" % e
+        return str(e)
+
+    def read_records(self, path, format):
+        """
+        Yield (key, value, ttl) records from path without reading it whole.
+        """
+        if format is None:
+            format = "csv" if path.endswith(".csv") else "jsonl"
+        fh = sys.stdin if path == "-" else open(path, newline="")
+        try:
+            if format == "csv":
+                for lineno, row in enumerate(csv.DictReader(fh), 2):
+                    if not row.get("key"):
+                        raise CommandError("Line %d: missing key." % lineno)
+                    yield row["key"], row.get("value") or "", row.get("ttl") or None
+            else:
+                for lineno, line in enumerate(fh, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                        yield record["key"], record.get("value"), record.get("ttl")
+                    except (ValueError, KeyError, TypeError):
+                        raise CommandError(
+                            "Line %d: expected an object with a 'key'." % lineno
+                        )
+        finally:
+            if fh is not sys.stdin:
+                fh.close()
+
+    def batches(self, records, size):
+        records = iter(records)
+        while batch := list(islice(records, size)):
+            yield batch
+
+    def load_commands(self, key, value, ttl):
+        if isinstance(value, dict):
+            commands = [
+                ["HSET", key]
+                + [item for pair in value.items() for item in map(encode_value, pair)]
+            ]
+            if ttl:
+                commands.append(["EXPIRE", key, ttl])
+            return commands
+        command = ["SET", key, encode_value(value)]
+        if ttl:
+            command += ["EX", ttl]
+        return [command]
+
+    def handle_load(self, pool, options):
+        loaded = errors = batches = 0
+        start = time.perf_counter()
+        try:
+            # On error, pool.connection() discards the connection, which may
+            # be left in the middle of a pipeline.
+            with pool.connection() as conn:
+                records = self.read_records(options["path"], options["format"])
+                for batch in self.batches(records, options["batch_size"]):
+                    commands = [
+                        command
+                        for record in batch
+                        for command in self.load_commands(*record)
+                    ]
+                    for command, reply in zip(commands, conn.pipeline(commands)):
+                        if isinstance(reply, redis.RedisError):
+                            errors += 1
+                            if options["verbosity"] >= 1 and errors <= 10:
+                                self.stderr.write(
+                                    "%s %s: %s" % (command[0], command[1], reply)
+                                )
+                    loaded += len(batch)
+                    batches += 1
+        except (OSError, CommandError) as e:
+            raise CommandError(
+                "%s (%d records loaded in %d batches)"
+                % (self.describe_error(e), loaded, batches)
+            )
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            "Loaded %d records in %d batches, %.3fs (%.0f records/s)."
+            % (loaded, batches, elapsed, loaded / elapsed if elapsed else 0)
+        )
+        if errors:
+            raise CommandError("%d commands failed." % errors)
+
+    def handle_verify(self, pool, options):
+        checked = mismatches = 0
+        try:
+            with pool.connection() as conn:
+                records = self.read_records(options["path"], options["format"])
+                for batch in self.batches(records, options["batch_size"]):
+                    commands = [
+                        ["HGETALL" if isinstance(value, dict) else "GET", key]
+                        for key, value, ttl in batch
+                    ]
+                    replies = conn.pipeline(commands)
+                    for (key, value, ttl), reply in zip(batch, replies):
+                        checked += 1
+                        if isinstance(value, dict):
+                            if reply:
+                                reply = dict(zip(reply[::2], reply[1::2]))
+                            expected = {
+                                encode_value(k): encode_value(v)
+                                for k, v in value.items()
+                            }
+                        else:
+                            expected = encode_value(value)
+                        if reply != expected:
+                            mismatches += 1
+                            if options["verbosity"] >= 1 and mismatches <= 10:
+                                self.stderr.write(
+                                    "%s: expected %r, got %r" % (key, expected, reply)
+                                )
+        except (OSError, CommandError) as e:
+            raise CommandError(
+                "%s (%d records verified, %d mismatches)"
+                % (self.describe_error(e), checked, mismatches)
+            )
+        self.stdout.write("Verified %d records, %d mismatches." % (checked, mismatches))
+        if mismatches:
+            raise CommandError("%d records don't match." % mismatches)
+
+    def handle_bench(self, pool, options):
+        clients = max(options["clients"], 1)
+        pipeline = max(options["pipeline"], 1)
+        value = "x" * options["value_size"]
+        latencies = []
+        lock = threading.Lock()
+        errors = []
+
+        def client(index, requests):
+            samples = []
+            try:
+                with pool.connection() as conn:
+                    for offset in range(0, requests, pipeline):
+                        size = min(pipeline, requests - offset)
+                        commands = [
+                            ["SET", "bench:%d:%d" % (index, i), value]
+                            if i % 2 == 0
+                            else ["GET", "bench:%d:%d" % (index, i - 1)]
+                            for i in range(offset, offset + size)
+                        ]
+                        sent = time.perf_counter()
+                        conn.pipeline(commands)
+                        # Every request of a pipeline waits for the round trip.
+                        samples.extend([time.perf_counter() - sent] * size)
+            except OSError as e:
+                errors.append(e)
+            with lock:
+                latencies.extend(samples)
+
+        share, extra = divmod(options["requests"], clients)
+        threads = [
+            threading.Thread(target=client, args=(i, share + (i < extra)))
+            for i in range(clients)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        if errors:
+            raise errors[0]
+        stats = summarize(latencies)
+        self.stdout.write(
+            "%d requests, %d clients, pipeline %d: %.3fs, %.0f requests/s"
+            % (
+                stats["count"],
+                clients,
+                pipeline,
+                elapsed,
+                stats["count"] / elapsed if elapsed else 0,
+            )
+        )
+        if stats["count"]:
+            self.stdout.write(
+                "latency ms: p50 %.3f  p99 %.3f  max %.3f"
+                % (stats["p50"] * 1e3, stats["p99"] * 1e3, stats["max"] * 1e3)
+            )
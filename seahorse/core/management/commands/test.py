@@ -0,0 +1,62 @@
+import os
+import sys
+
+from seahorse.core.management.base import BaseCommand, CommandError
+from seahorse.test.runner import ParallelTestRunner, TestDurations, build_suite
+
+
+class Command(BaseCommand):
+    help = "Discover and run tests on a pool of worker processes."
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "labels",
+            nargs="*",
+            metavar="label",
+            help="test directories or dotted names, everything by default",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=0,
+            help="number of worker processes, one per CPU by default",
+        )
+        parser.add_argument(
+            "--top-level-dir",
+            default=".",
+            help="directory the test modules are imported from",
+        )
+        parser.add_argument(
+            "--failfast",
+            action="store_true",
+            help="stop at the first failed test",
+        )
+        parser.add_argument(
+            "--durations",
+            metavar="PATH",
+            help="file of the test durations the work is balanced by",
+        )
+
+    def handle(self, *args, **options):
+        top_level_dir = os.path.abspath(options["top_level_dir"])
+        if not os.path.isdir(top_level_dir):
+            raise CommandError("%s is not a directory." % top_level_dir)
+        if top_level_dir not in sys.path:
+            sys.path.insert(0, top_level_dir)
+        suite = build_suite(options["labels"], top_level_dir)
+        runner = ParallelTestRunner(
+            parallel=options["workers"],
+            top_level_dir=top_level_dir,
+            verbosity=options["verbosity"],
+            failfast=options["failfast"],
+            durations=TestDurations(options["durations"]),
+            # The raw stream: progress is written a character at a time.
+            stream=options.get("stderr") or sys.stderr,
+        )
+        records = runner.run(suite)
+        failures = runner.failures()
+        if failures:
+            raise CommandError(
+                "%d of %d tests failed." % (len(failures), len(records))
+            )
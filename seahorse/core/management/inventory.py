@@ -0,0 +1,148 @@
+"""
+Targets streamed from an inventory file, for --inventory.
+
+Each record of a JSONL or CSV inventory holds the options of one target,
+by dest or option name ("vpcid", "--CIDR", "manifest-dir"). Records flow
+through a pipeline of generators,
+
+    read_records() -> validate_records() -> BaseCommand dispatch
+
+so targets are dispatched as soon as their line is read and only the
+records in flight are held in memory, whatever the size of the fleet.
+An invalid record comes through the pipeline as an InventoryError instead
+of options, so one bad line doesn't stop the rest of the fleet.
+"""
+import csv
+import json
+import sys
+from argparse import _AppendAction, _StoreFalseAction, _StoreTrueAction
+from contextlib import contextmanager
+
+from seahorse.core.management.base import CommandError
+
+FORMATS = ("jsonl", "csv")
+
+TRUE_STRINGS = {"1", "true", "yes", "on"}
+FALSE_STRINGS = {"0", "false", "no", "off", ""}
+
+
+class InventoryError(CommandError):
+    def __init__(self, line, message):
+        self.line = line
+        super().__init__("Line %d: %s" % (line, message))
+
+
+def guess_format(path):
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+@contextmanager
+def open_inventory(path):
+    if path == "-":
+        yield sys.stdin
+        return
+    try:
+        fh = open(path, newline="")
+    except OSError as e:
+        raise CommandError("Cannot read inventory %s: %s" % (path, e))
+    with fh:
+        yield fh
+
+
+def read_records(fh, format="jsonl"):
+    """
+    Yield the (line number, record) pairs of an inventory file object.
+    Empty CSV cells are left out so the option keeps its default.
+    """
+    if format == "csv":
+        reader = csv.DictReader(fh)
+        for record in reader:
+            if None in record:
+                yield reader.line_num, InventoryError(
+                    reader.line_num, "more fields than columns in the header"
+                )
+                continue
+            yield reader.line_num, {
+                key: value for key, value in record.items() if value not in ("", None)
+            }
+        return
+    for line_number, line in enumerate(fh, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            record = InventoryError(line_number, "invalid JSON: %s" % e)
+        if not isinstance(record, (dict, InventoryError)):
+            record = InventoryError(line_number, "expected a JSON object")
+        yield line_number, record
+
+
+def _coerce(action, value):
+    if isinstance(action, (_StoreTrueAction, _StoreFalseAction)):
+        if isinstance(value, str):
+            if value.lower() not in TRUE_STRINGS | FALSE_STRINGS:
+                raise ValueError("expected a boolean, got %r" % value)
+            return value.lower() in TRUE_STRINGS
+        return bool(value)
+    if isinstance(action, _AppendAction) or action.nargs in ("*", "+"):
+        values = value if isinstance(value, list) else [value]
+        return [_coerce_value(action, item) for item in values]
+    return _coerce_value(action, value)
+
+
+def _coerce_value(action, value):
+    if action.type is not None and isinstance(value, str):
+        value = action.type(value)
+    if action.choices is not None and value not in action.choices:
+        raise ValueError(
+            "invalid choice: %r (choose from %s)"
+            % (value, ", ".join(map(repr, action.choices)))
+        )
+    return value
+
+
+def validate_records(records, compiled):
+    """
+    Turn the records into the options of the command's targets, applying
+    the parser's types and choices, or into InventoryErrors. compiled is
+    the command's CompiledParser.
+    """
+    actions = {action.dest: action for action in compiled.actions}
+    for line_number, record in records:
+        if isinstance(record, InventoryError):
+            yield line_number, record
+            continue
+        try:
+            yield line_number, _validate(line_number, record, actions, compiled)
+        except InventoryError as e:
+            yield line_number, e
+
+
+def _validate(line_number, record, actions, compiled):
+    options = {}
+    for key, value in record.items():
+        name = key.lstrip("-").replace("-", "_")
+        dest = compiled.opt_mapping.get(name, name)
+        # Base options configure the run itself, not its targets.
+        if dest not in actions or dest in compiled.run_options:
+            raise InventoryError(
+                line_number,
+                "unknown option %r for the %s command" % (key, compiled.command_name),
+            )
+        try:
+            options[dest] = _coerce(actions[dest], value)
+        except (TypeError, ValueError) as e:
+            raise InventoryError(line_number, "%s: %s" % (key, e))
+    return options
+
+
+def iter_inventory(path, compiled, format=None):
+    """
+    Yield the (line number, options or InventoryError) pairs of the targets
+    in the inventory at path, '-' for stdin.
+    """
+    format = format or guess_format(path)
+    with open_inventory(path) as fh:
+        yield from validate_records(read_records(fh, format), compiled)
@@ -0,0 +1,228 @@
+"""
+Persisted command manifest.
+
+Finding the available commands means scanning every ``commands`` directory
+and the ``seahorse.commands`` entry-point group, and describing them means
+importing each command module and building its parser. The manifest stores
+the outcome of that work on disk, so later processes can resolve a command
+name, its help text and its argument schema without importing anything.
+
+The manifest is stamped with the mtime and size of every file and directory
+it was built from and is rebuilt as soon as one of them changes.
+"""
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import site
+import sys
+from importlib import import_module
+from importlib.metadata import entry_points
+
+from seahorse.utils._os import atomic_write, get_cache_dir
+from seahorse.utils.version import get_version
+
+ENTRY_POINT_GROUP = "seahorse.commands"
+MANIFEST_FORMAT = 2
+
+
+def describe_action(action):
+    """
+    Return a JSON-serializable description of an argparse action.
+    """
+    description = {
+        "dest": action.dest,
+        "option_strings": list(action.option_strings),
+        "nargs": action.nargs,
+        "required": bool(action.required),
+        "takes_value": action.nargs != 0,
+        "repeatable": isinstance(
+            action,
+            (
+                argparse._AppendAction,
+                argparse._AppendConstAction,
+                argparse._CountAction,
+            ),
+        ),
+        "choices": None,
+        "help": None if action.help == argparse.SUPPRESS else action.help,
+        "suppressed": action.help == argparse.SUPPRESS,
+    }
+    if isinstance(action, argparse._SubParsersAction):
+        description["choices"] = sorted(action.choices)
+    elif action.choices is not None:
+        description["choices"] = [str(choice) for choice in action.choices]
+    return description
+
+
+def describe_parser(parser):
+    return [describe_action(action) for action in parser._actions]
+
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+class CommandManifest:
+    """
+    Name -> description mapping for every available command.
+
+    Each entry holds the application label, the module path and class name
+    of the command, its help text and the schema of its arguments.
+    """
+
+    def __init__(self, commands, stamps=None):
+        self.commands = commands
+        self.stamps = stamps or {}
+
+    def __contains__(self, name):
+        return name in self.commands
+
+    def __iter__(self):
+        return iter(self.commands)
+
+    def get(self, name):
+        return self.commands.get(name)
+
+    def items(self):
+        return self.commands.items()
+
+    def is_fresh(self):
+        return all(_stamp(path) == stamp for path, stamp in self.stamps.items())
+
+    def to_json(self):
+        return json.dumps(
+            {
+                "format": MANIFEST_FORMAT,
+                "version": get_version(),
+                "stamps": self.stamps,
+                "commands": self.commands,
+            },
+            sort_keys=True,
+        )
+
+    @classmethod
+    def from_json(cls, data):
+        data = json.loads(data)
+        if data.get("format") != MANIFEST_FORMAT or data.get("version") != (
+            get_version()
+        ):
+            raise ValueError("Stale manifest format.")
+        return cls(data["commands"], data["stamps"])
+
+    @classmethod
+    def build(cls, sources):
+        """
+        Import every command found in sources, a list of
+        (app_name, management_dir) pairs, plus the commands registered in the
+        entry-point group, and describe them.
+        """
+        # Imported here, the management package imports this module.
+        from seahorse.core.management import base, find_commands
+
+        commands = {}
+        # The options every command inherits come from base.py.
+        stamps = {base.__file__: _stamp(base.__file__)}
+        for app_name, management_dir in sources:
+            command_dir = os.path.join(management_dir, "commands")
+            stamps[command_dir] = _stamp(command_dir)
+            for name in find_commands(management_dir):
+                module = "%s.management.commands.%s" % (app_name, name)
+                commands[name] = {"app": app_name, "module": module, "class": "Command"}
+        # Installing or removing a distribution touches its site directory.
+        # Other sys.path entries, e.g. the working directory, are left out.
+        for path in site_directories():
+            stamps[path] = _stamp(path)
+        for ep in entry_points(group=ENTRY_POINT_GROUP):
+            commands[ep.name] = {
+                "app": ep.dist.name if ep.dist else ep.module,
+                "module": ep.module,
+                "class": ep.attr or "Command",
+            }
+        for name, entry in commands.items():
+            try:
+                module = import_module(entry["module"])
+                command = getattr(module, entry["class"])()
+                parser = command.create_parser("", name)
+            except Exception:
+                # Describe what we can, loading the command reports the error.
+                entry.update(help="", arguments=[])
+            else:
+                entry.update(help=command.help, arguments=describe_parser(parser))
+            # Stamped even when broken, so that fixing it rebuilds the entry.
+            path = module_file(entry["module"])
+            if path:
+                stamps[path] = _stamp(path)
+                # The package of an installed app, e.g. an editable install.
+                package_dir = os.path.dirname(path)
+                stamps.setdefault(package_dir, _stamp(package_dir))
+        return cls(commands, stamps)
+
+    @classmethod
+    def load(cls, sources):
+        """
+        Return the manifest for sources, read from the cache when it is still
+        fresh and rebuilt (and persisted) otherwise.
+        """
+        path = manifest_path(sources)
+        try:
+            with open(path) as fh:
+                manifest = cls.from_json(fh.read())
+        except (OSError, ValueError, KeyError):
+            manifest = None
+        if manifest is not None and manifest.is_fresh():
+            return manifest
+        manifest = cls.build(sources)
+        try:
+            atomic_write(path, manifest.to_json())
+        except OSError:
+            # A read-only cache only costs the rebuild on the next run.
+            pass
+        return manifest
+
+
+def module_file(name):
+    """
+    Return the path of the source of the module name, without importing
+    it, or None if it can't be found.
+    """
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        return None
+    if spec is None or not spec.has_location:
+        return None
+    return spec.origin
+
+
+def site_directories():
+    """
+    Return the site-packages directories on sys.path, where distributions
+    providing commands are installed.
+    """
+    candidates = set(site.getsitepackages())
+    if site.ENABLE_USER_SITE:
+        candidates.add(site.getusersitepackages())
+    candidates = {os.path.abspath(path) for path in candidates}
+    return [
+        path
+        for path in map(os.path.abspath, filter(None, sys.path))
+        if path in candidates and os.path.isdir(path)
+    ]
+
+
+def manifest_path(sources):
+    """
+    Each installation (interpreter plus package location) gets its own
+    manifest file so that virtualenvs sharing a cache don't evict each other.
+    """
+    key = "\0".join(
+        [sys.prefix, sys.version] + ["%s=%s" % source for source in sources]
+    )
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return get_cache_dir("commands-%s.json" % digest)
@@ -0,0 +1,107 @@
+"""
+Instrumentation behind the --timings, --profile and --trace-malloc options.
+"""
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+PHASES = (
+    "import",
+    "create_parser",
+    "parse_args",
+    "checks",
+    "handle",
+    "output",
+    "close_connections",
+)
+
+
+class PhaseTimer:
+    """
+    Accumulate the wall time spent in each phase of a command run.
+    listener(name, seconds), if set, is called as each phase ends.
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.listener = None
+
+    def record(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+        if self.listener is not None:
+            self.listener(name, seconds)
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def as_dict(self):
+        ordered = {name: self.phases[name] for name in PHASES if name in self.phases}
+        ordered.update(
+            (name, seconds)
+            for name, seconds in self.phases.items()
+            if name not in ordered
+        )
+        return ordered
+
+    def format(self, command_name, format="text"):
+        phases = self.as_dict()
+        total = sum(phases.values())
+        if format == "json":
+            return json.dumps(
+                {"command": command_name, "phases": phases, "total": total},
+                sort_keys=False,
+            )
+        lines = ["Timings for %s:" % command_name]
+        lines.extend(
+            "  %-18s %10.3f ms" % (name, seconds * 1e3)
+            for name, seconds in phases.items()
+        )
+        lines.append("  %-18s %10.3f ms" % ("total", total * 1e3))
+        return "\n".join(lines)
+
+
+def _label(func):
+    filename, lineno, name = func
+    return filename, lineno, "%s:%d(%s)" % (filename, lineno, name)
+
+
+def write_callgrind(stats, fh):
+    """
+    Write pstats.Stats in the callgrind format read by KCachegrind and
+    QCachegrind, with costs in microseconds.
+    """
+    callees = defaultdict(list)
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        for caller, (_, nc, _, ct) in callers.items():
+            callees[caller].append((func, nc, ct))
+    fh.write("# callgrind format\nversion: 1\ncreator: seahorse\n")
+    fh.write("positions: line\nevents: Microseconds\n\n")
+    for func, (_, _, tt, _, _) in stats.stats.items():
+        filename, lineno, label = _label(func)
+        fh.write("fl=%s\nfn=%s\n%d %d\n" % (filename, label, lineno, int(tt * 1e6)))
+        for callee, nc, ct in callees.get(func, ()):
+            callee_file, callee_line, callee_label = _label(callee)
+            fh.write(
+                "cfl=%s\ncfn=%s\ncalls=%d %d\n%d %d\n"
+                % (callee_file, callee_label, nc, callee_line, lineno, int(ct * 1e6))
+            )
+        fh.write("\n")
+
+
+def format_malloc_top(snapshot, limit):
+    stats = snapshot.statistics("lineno")
+    total = sum(stat.size for stat in stats)
+    lines = ["Top %d allocations (%.1f KiB total):" % (limit, total / 1024)]
+    for index, stat in enumerate(stats[:limit], 1):
+        frame = stat.traceback[0]
+        lines.append(
+            "  #%d %s:%d %.1f KiB in %d blocks"
+            % (index, frame.filename, frame.lineno, stat.size / 1024, stat.count)
+        )
+    return "\n".join(lines)
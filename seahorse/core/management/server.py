@@ -0,0 +1,326 @@
+"""
+`seahorse-admin serve`: a warm process running commands for the client in
+seahorse.core.client.
+
+The server imports every command and builds its parser once, then accepts
+invocations over a Unix socket. A client sends one JSON line,
+
+    {"argv": ["seahorse-admin", "eks", "--vpcid", "vpc-1"], "cwd": "/src",
+     "env": {"HOME": "/home/ci", ...}, "umask": 18}
+
+and reads JSON lines back: {"stream": "stdout" | "stderr", "data": ...} as
+the command writes, then {"exit": returncode}.
+
+Invocations run concurrently, one thread each. sys.stdout and sys.stderr
+are replaced by proxies that send whatever a thread writes to the client of
+the invocation it runs. Since the working directory, the environment and the
+umask are process-wide, invocations with another one than the server's run
+alone, with the client's, the locale following its environment. The config
+file is read again when it changes, except for DATABASES: restart the server
+after changing the databases.
+"""
+import json
+import locale
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import traceback
+from contextlib import contextmanager
+from io import TextIOBase
+
+from seahorse.conf import settings
+from seahorse.core import client
+from seahorse.core.management.base import CommandError, CommandParser
+
+
+class _StreamProxy(TextIOBase):
+    """
+    Stand-in for sys.stdout or sys.stderr writing to the stream the current
+    thread redirected it to, or to the original stream.
+    """
+
+    def __init__(self, default):
+        self.default = default
+        self.local = threading.local()
+
+    @property
+    def target(self):
+        return getattr(self.local, "target", None) or self.default
+
+    def write(self, data):
+        return self.target.write(data)
+
+    def flush(self):
+        self.target.flush()
+
+    def isatty(self):
+        return self.target.isatty()
+
+    def __getattr__(self, name):
+        return getattr(self.target, name)
+
+
+class _ClientStream(TextIOBase):
+    def __init__(self, name, wfile, lock):
+        self.name = name
+        self.wfile = wfile
+        self.lock = lock
+
+    def write(self, data):
+        if data:
+            message = json.dumps({"stream": self.name, "data": data}).encode()
+            with self.lock:
+                self.wfile.write(message + b"\n")
+        return len(data)
+
+    def isatty(self):
+        return False
+
+
+class _ProcessState:
+    """
+    Let invocations with the server's working directory, environment and
+    umask run concurrently, and run any other invocation alone, with its
+    own. None stands for the server's.
+    """
+
+    def __init__(self):
+        self.home = os.getcwd()
+        self.umask = os.umask(0)
+        os.umask(self.umask)
+        self._cond = threading.Condition()
+        self._shared = 0
+        self._exclusive = False
+
+    def _is_servers(self, cwd, env, umask):
+        # Called with the lock held, while no invocation runs alone.
+        return (
+            (not cwd or cwd == self.home)
+            and (env is None or env == dict(os.environ))
+            and (umask is None or umask == self.umask)
+        )
+
+    @contextmanager
+    def use(self, cwd=None, env=None, umask=None):
+        with self._cond:
+            self._cond.wait_for(lambda: not self._exclusive)
+            shared = self._is_servers(cwd, env, umask)
+            if shared:
+                self._shared += 1
+            else:
+                self._cond.wait_for(lambda: not self._exclusive and not self._shared)
+                self._exclusive = True
+        if shared:
+            try:
+                yield
+            finally:
+                with self._cond:
+                    self._shared -= 1
+                    self._cond.notify_all()
+            return
+        environ = dict(os.environ)
+        ctype = locale.setlocale(locale.LC_CTYPE)
+        try:
+            os.chdir(cwd or self.home)
+            if env is not None:
+                os.environ.clear()
+                os.environ.update(env)
+                self._setlocale("")
+            if umask is not None:
+                os.umask(umask)
+            yield
+        finally:
+            os.chdir(self.home)
+            os.environ.clear()
+            os.environ.update(environ)
+            self._setlocale(ctype)
+            os.umask(self.umask)
+            with self._cond:
+                self._exclusive = False
+                self._cond.notify_all()
+
+    def _setlocale(self, name):
+        try:
+            locale.setlocale(locale.LC_CTYPE, name)
+        except locale.Error:
+            # A locale the server's system lacks, keep the current one.
+            pass
+
+
+class _InvocationHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        request = json.loads(line)
+        lock = threading.Lock()
+        if request.get("control") == "stop":
+            returncode = 0
+        else:
+            returncode = self.server.run(
+                request["argv"],
+                request.get("cwd"),
+                _ClientStream("stdout", self.wfile, lock),
+                _ClientStream("stderr", self.wfile, lock),
+                env=request.get("env"),
+                umask=request.get("umask"),
+            )
+        with lock:
+            self.wfile.write(json.dumps({"exit": returncode}).encode() + b"\n")
+        if request.get("control") == "stop":
+            self.server.shutdown()
+
+
+class CommandServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path=None):
+        self.path = path or client.socket_path()
+        self._claim_path()
+        super().__init__(self.path, _InvocationHandler)
+        self.state = _ProcessState()
+        self._proxies = None
+        self._thread = None
+
+    def _claim_path(self):
+        sock = client.connect(self.path)
+        if sock is not None:
+            sock.close()
+            raise CommandError("A server is already listening on %s." % self.path)
+        # A socket file nobody listens on is left over by a killed server.
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+    def preload(self):
+        """
+        Import every command and build its parser.
+        """
+        from seahorse.core.management import (
+            get_commands,
+            get_compiled_parser,
+            load_command_class,
+        )
+
+        for name, app_name in get_commands().items():
+            get_compiled_parser(load_command_class(app_name, name), name)
+
+    def install_proxies(self):
+        if self._proxies is None:
+            self._proxies = (sys.stdout, sys.stderr)
+            sys.stdout = _StreamProxy(sys.stdout)
+            sys.stderr = _StreamProxy(sys.stderr)
+
+    def run(self, argv, cwd, stdout, stderr, env=None, umask=None):
+        """
+        Run argv in cwd, with env and umask, its output sent to stdout and
+        stderr, and return the exit code.
+        """
+        from seahorse.core.management import ManagementUtility
+
+        sys.stdout.local.target = stdout
+        sys.stderr.local.target = stderr
+        try:
+            with self.state.use(cwd, env, umask):
+                # SEAHORSE_* variables of the client's environment apply.
+                settings.reload()
+                ManagementUtility(argv).execute()
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                return e.code or 0
+            stderr.write("%s\n" % e.code)
+            return 1
+        except Exception:
+            stderr.write(traceback.format_exc())
+            return 1
+        finally:
+            sys.stdout.local.target = sys.stderr.local.target = None
+        return 0
+
+    def start(self):
+        """
+        Serve from a background thread.
+        """
+        self.preload()
+        self.install_proxies()
+        self._thread = threading.Thread(
+            target=self.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        if self._proxies is not None:
+            sys.stdout, sys.stderr = self._proxies
+            self._proxies = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def stop_server(path=None):
+    """
+    Ask the server listening on path to exit. Return False if there is none.
+    """
+    sock = client.connect(path)
+    if sock is None:
+        return False
+    with sock:
+        for _ in client.send(sock, {"control": "stop"}):
+            pass
+    return True
+
+
+def main(prog_name, argv):
+    """
+    Entry point of `seahorse-admin serve [--socket PATH] [--stop]`.
+    """
+    parser = CommandParser(
+        prog="%s serve" % prog_name,
+        description="Run commands from a warm process listening on a socket.",
+        called_from_command_line=True,
+    )
+    parser.add_argument("--socket", help="socket path, SEAHORSE_SOCKET by default")
+    parser.add_argument(
+        "--stop", action="store_true", help="stop the running server and exit"
+    )
+    options = parser.parse_args(argv)
+    path = options.socket or client.socket_path()
+    if options.stop:
+        if not stop_server(path):
+            sys.stderr.write("No server is listening on %s.\n" % path)
+            sys.exit(1)
+        return
+    try:
+        server = CommandServer(path)
+    except CommandError as e:
+        sys.stderr.write("%s\n" % e)
+        sys.exit(e.returncode)
+    server.preload()
+    server.install_proxies()
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    sys.stderr.write("Serving on %s\n" % path)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
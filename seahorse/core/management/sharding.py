@@ -0,0 +1,175 @@
+"""
+Split the targets of a command across independent runs with --shard.
+
+    runner 1: seahorse-admin eks --inventory fleet.jsonl --shard 1/3
+    runner 2: seahorse-admin eks --inventory fleet.jsonl --shard 2/3
+    runner 3: seahorse-admin eks --inventory fleet.jsonl --shard 3/3
+
+Every run reads the same targets and keeps those whose shard key, e.g. the
+VPC ID, jump consistent hashing assigns to its shard. No coordination is
+needed, and going from n to n + 1 shards only moves 1/(n + 1) of the
+targets. Each run writes the outcome of its targets to a JSONL result file,
+which the merge command combines.
+"""
+import argparse
+import hashlib
+import json
+
+from seahorse.core.management.base import CommandError
+
+
+def key_hash(key):
+    """
+    Return a stable 64-bit hash of the string key, the same in every
+    process unlike hash().
+    """
+    digest = hashlib.blake2b(str(key).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def jump_hash(key, buckets):
+    """
+    Return the bucket in range(buckets) of the 64-bit integer key, by the
+    jump consistent hash of Lamping and Veach.
+    """
+    b, j = -1, 0
+    while j < buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return b
+
+
+class Shard:
+    """
+    Shard index of count, numbered from 1.
+    """
+
+    def __init__(self, index, count):
+        if count < 1 or not 1 <= index <= count:
+            raise ValueError("Shard %d/%d doesn't exist." % (index, count))
+        self.index = index
+        self.count = count
+
+    @classmethod
+    def parse(cls, text):
+        index, sep, count = text.partition("/")
+        try:
+            if not sep:
+                raise ValueError
+            index, count = int(index), int(count)
+        except ValueError:
+            raise ValueError("Invalid shard %r, expected INDEX/COUNT." % text)
+        return cls(index, count)
+
+    def __str__(self):
+        return "%d/%d" % (self.index, self.count)
+
+    def __repr__(self):
+        return "<Shard %s>" % self
+
+    def __eq__(self, other):
+        if not isinstance(other, Shard):
+            return NotImplemented
+        return (self.index, self.count) == (other.index, other.count)
+
+    def __hash__(self):
+        return hash((self.index, self.count))
+
+    def owns(self, key):
+        return jump_hash(key_hash(key), self.count) == self.index - 1
+
+    def result_path(self, command_name):
+        return "%s-shard-%d-of-%d.jsonl" % (command_name, self.index, self.count)
+
+
+def shard_argument(text):
+    """
+    The argparse type of --shard.
+    """
+    try:
+        return Shard.parse(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def write_results(path, command_name, shard, records):
+    """
+    Write the "shard" record of a run, then the "target" records of its
+    targets, to path.
+    """
+    from seahorse.utils._os import atomic_write
+
+    header = {
+        "event": "shard",
+        "command": command_name,
+        "shard": str(shard),
+        "targets": len(records),
+        "failed": sum(record["status"] != "ok" for record in records),
+    }
+    atomic_write(
+        path,
+        "".join(json.dumps(record) + "\n" for record in [header, *records]),
+    )
+
+
+def read_results(path):
+    """
+    Return the shard record and the target records of a result file.
+    """
+    try:
+        with open(path) as fh:
+            records = [json.loads(line) for line in fh if line.strip()]
+    except OSError as e:
+        raise CommandError("Cannot read %s: %s" % (path, e))
+    except ValueError as e:
+        raise CommandError("%s is not a shard result file: %s" % (path, e))
+    if not records or records[0].get("event") != "shard":
+        raise CommandError("%s is not a shard result file." % path)
+    return records[0], records[1:]
+
+
+def merge_results(paths):
+    """
+    Return the command, the shard count and the target records, ordered by
+    key, of the result files of every shard of a run.
+    """
+    command = count = None
+    seen = {}
+    owners = {}
+    targets = []
+    for path in paths:
+        header, records = read_results(path)
+        shard = Shard.parse(header["shard"])
+        if command is None:
+            command, count = header["command"], shard.count
+        elif (header["command"], shard.count) != (command, count):
+            raise CommandError(
+                "%s holds shard %s of %s, not of the %d shards of %s."
+                % (path, shard, header["command"], count, command)
+            )
+        if shard in seen:
+            raise CommandError(
+                "%s and %s both hold shard %s." % (seen[shard], path, shard)
+            )
+        seen[shard] = path
+        for record in records:
+            # Targets sharing a key, e.g. two inventory records of a VPC, all
+            # run in the shard owning the key.
+            owner = owners.setdefault(record["key"], record["shard"])
+            if owner != record["shard"]:
+                raise CommandError(
+                    "Target %s ran in shards %s and %s."
+                    % (record["key"], owner, record["shard"])
+                )
+            targets.append(record)
+    if command is None:
+        raise CommandError("No result files to merge.")
+    missing = [
+        str(Shard(index, count))
+        for index in range(1, count + 1)
+        if Shard(index, count) not in seen
+    ]
+    if missing:
+        raise CommandError("Missing the results of shards %s." % ", ".join(missing))
+    return command, count, sorted(targets, key=lambda record: record["key"])
@@ -0,0 +1,354 @@
+"""
+In-process metrics of the management framework.
+
+Counters, gauges and histograms are registered on a Registry and updated
+by the framework itself: BaseCommand.execute(), call_command(), the rate
+limiter of provider calls and the connection handlers. A registry renders
+itself in the Prometheus text exposition format, for --metrics-file and
+node exporter's textfile collector, or as a JSON-serializable snapshot,
+and can push to a Prometheus Pushgateway:
+
+    from seahorse.core import metrics
+
+    metrics.registry.exposition()
+    metrics.registry.snapshot()
+    metrics.push_to_gateway("http://pushgateway:9091", job="deploy")
+
+Updates take a lock per metric and a dict lookup per label set.
+"""
+import bisect
+import math
+import threading
+import urllib.parse
+import urllib.request
+import weakref
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+    300.0,
+)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return "%d" % value
+    return repr(value)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{%s}" % ",".join(
+        '%s="%s"' % (name, _escape(value)) for name, value in labels
+    )
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(
+                "%s takes the labels %s, got %s."
+                % (self.name, ", ".join(self.labelnames), ", ".join(sorted(labels)))
+            )
+        try:
+            return tuple(str(labels[name]) for name in self.labelnames)
+        except KeyError as e:
+            raise ValueError("%s requires the label %s." % (self.name, e))
+
+    def samples(self):
+        """
+        Return the list of (suffix, labels, value) samples of the metric,
+        labels as a tuple of (name, value) pairs.
+        """
+        with self._lock:
+            values = list(self._values.items())
+        return [("", tuple(zip(self.labelnames, key)), value) for key, value in values]
+
+    def get(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only be incremented.")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """
+    A value that goes up and down. Callbacks returning {label values tuple:
+    value} are also read at collection time, e.g. for the usage of pools.
+    """
+
+    type = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._callbacks = []
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def add_callback(self, callback):
+        """
+        Read callback() when the metric is collected, for as long as the
+        object of the bound method callback is alive.
+        """
+        if hasattr(callback, "__self__"):
+            callback = weakref.WeakMethod(callback)
+        else:
+            callback = (lambda func: lambda: func)(callback)
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def samples(self):
+        samples = super().samples()
+        with self._lock:
+            callbacks = list(self._callbacks)
+        for ref in callbacks:
+            callback = ref()
+            if callback is None:
+                with self._lock:
+                    self._callbacks.remove(ref)
+                continue
+            for key, value in callback().items():
+                samples.append(("", tuple(zip(self.labelnames, key)), value))
+        return samples
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Bucket counts (the last one is +Inf), sum.
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def get(self, **labels):
+        """
+        Return the count and the sum of the observations.
+        """
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return (sum(state[0]), state[1]) if state else (0, 0.0)
+
+    def samples(self):
+        with self._lock:
+            values = [
+                (key, list(counts), total)
+                for key, (counts, total) in self._values.items()
+            ]
+        samples = []
+        for key, counts, total in values:
+            labels = tuple(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                bucket_labels = labels + (("le", _format_value(bound)),)
+                samples.append(("_bucket", bucket_labels, cumulative))
+            samples.append(("_sum", labels, total))
+            samples.append(("_count", labels, cumulative))
+        return samples
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError("Metric %s is already registered." % metric.name)
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def __getitem__(self, name):
+        return self._metrics[name]
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._metrics.values()))
+
+    def exposition(self):
+        """
+        Return the metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        for metric in self:
+            lines.append("# HELP %s %s" % (metric.name, _escape(metric.documentation)))
+            lines.append("# TYPE %s %s" % (metric.name, metric.type))
+            for suffix, labels, value in metric.samples():
+                lines.append(
+                    "%s%s%s %s"
+                    % (
+                        metric.name,
+                        suffix,
+                        _format_labels(labels),
+                        _format_value(value),
+                    )
+                )
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """
+        Return {name: {"type", "help", "samples": [{"name", "labels",
+        "value"}]}}, e.g. to ship the metrics of a run as JSON.
+        """
+        return {
+            metric.name: {
+                "type": metric.type,
+                "help": metric.documentation,
+                "samples": [
+                    {
+                        "name": metric.name + suffix,
+                        "labels": dict(labels),
+                        "value": value,
+                    }
+                    for suffix, labels, value in metric.samples()
+                ],
+            }
+            for metric in self
+        }
+
+    def clear(self):
+        """
+        Reset every metric, e.g. between tests.
+        """
+        for metric in self:
+            metric.clear()
+
+
+registry = Registry()
+
+COMMAND_INVOCATIONS = registry.counter(
+    "seahorse_command_invocations_total",
+    "Commands executed, by command.",
+    ["command"],
+)
+COMMAND_ERRORS = registry.counter(
+    "seahorse_command_errors_total",
+    "Commands that raised, by command and exception class.",
+    ["command", "error"],
+)
+COMMAND_CALLS = registry.counter(
+    "seahorse_call_command_total",
+    "Commands run through call_command(), by command.",
+    ["command"],
+)
+COMMANDS_IN_FLIGHT = registry.gauge(
+    "seahorse_commands_in_flight",
+    "Commands executing right now, by command.",
+    ["command"],
+)
+HANDLE_SECONDS = registry.histogram(
+    "seahorse_command_handle_seconds",
+    "Duration of the handle() phase of commands, by command.",
+    ["command"],
+)
+PROVIDER_CALL_SECONDS = registry.histogram(
+    "seahorse_provider_call_seconds",
+    "Latency of the provider API calls, by provider, operation class and "
+    "outcome, excluding rate limiting waits.",
+    ["provider", "operation", "outcome"],
+)
+POOL_CONNECTIONS = registry.gauge(
+    "seahorse_pool_connections",
+    "Connections of the connection pools, by handler, alias and state "
+    "(in_use or idle).",
+    ["handler", "alias", "state"],
+)
+
+
+def write_metrics_file(path, registry=registry):
+    """
+    Write the exposition of registry to path, atomically.
+    """
+    from seahorse.utils._os import atomic_write
+
+    atomic_write(path, registry.exposition())
+
+
+def push_to_gateway(url, job, registry=registry, grouping=None, timeout=10.0):
+    """
+    Replace the metrics of job, and grouping labels, on the Pushgateway at
+    url with those of registry.
+    """
+    path = "/metrics/job/%s" % urllib.parse.quote(job, safe="")
+    for name, value in (grouping or {}).items():
+        path += "/%s/%s" % (name, urllib.parse.quote(str(value), safe=""))
+    request = urllib.request.Request(
+        url.rstrip("/") + path,
+        data=registry.exposition().encode(),
+        method="PUT",
+        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.status
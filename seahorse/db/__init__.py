@@ -1,6 +1,3 @@
+from seahorse.db.utils import DEFAULT_DB_ALIAS, ConnectionHandler
 
-
-from seahorse.db.utils import ConnectionHandler
-
-DEFAULT_DB_ALIAS = "default"
-connections = ConnectionHandler()
\ No newline at end of file
+connections = ConnectionHandler()
@@ -0,0 +1,115 @@
+"""
+Minimal RESP2 client for the Redis caches provisioned next to clusters.
+
+    DATABASES = {
+        "cache": {
+            "ENGINE": "seahorse.db.backends.redis",
+            "HOST": "127.0.0.1",
+            "PORT": 6379,
+            "NAME": 0,
+        },
+    }
+"""
+import socket
+
+
+class RedisError(Exception):
+    """
+    An error reply of the server.
+    """
+
+
+def encode_command(args):
+    """
+    Encode one command as a RESP array of bulk strings.
+    """
+    out = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, bytes):
+            data = arg
+        elif isinstance(arg, str):
+            data = arg.encode()
+        else:
+            data = str(arg).encode()
+        out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(out)
+
+
+def read_reply(reader):
+    """
+    Read one reply from the buffered reader. Error replies are returned as
+    RedisError instances so a pipeline can report them per command.
+    """
+    line = reader.readline()
+    if not line:
+        raise ConnectionError("Connection closed by the server.")
+    prefix, rest = line[:1], line[1:-2]
+    if prefix == b"+":
+        return rest.decode()
+    if prefix == b"-":
+        return RedisError(rest.decode())
+    if prefix == b":":
+        return int(rest)
+    if prefix == b"$":
+        length = int(rest)
+        if length == -1:
+            return None
+        data = reader.read(length + 2)
+        return data[:-2].decode()
+    if prefix == b"*":
+        length = int(rest)
+        if length == -1:
+            return None
+        return [read_reply(reader) for _ in range(length)]
+    raise RedisError("Unexpected reply %r." % line)
+
+
+class RedisConnection:
+    def __init__(self, host="127.0.0.1", port=6379, db=0, timeout=10.0):
+        self.host = host
+        self.port = port
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile("rb")
+        if db:
+            self.execute("SELECT", db)
+
+    def execute(self, *args):
+        """
+        Send a single command and return its reply, raising RedisError for
+        an error reply.
+        """
+        reply = self.pipeline([args])[0]
+        if isinstance(reply, RedisError):
+            raise reply
+        return reply
+
+    def pipeline(self, commands):
+        """
+        Send every command in one write and return the list of replies, in
+        order. Error replies are RedisError instances in the list.
+        """
+        self.sock.sendall(b"".join(encode_command(args) for args in commands))
+        return [read_reply(self.reader) for _ in range(len(commands))]
+
+    def close(self):
+        try:
+            self.reader.close()
+        finally:
+            self.sock.close()
+
+
+def connect(settings_dict):
+    return RedisConnection(
+        host=settings_dict.get("HOST") or "127.0.0.1",
+        port=int(settings_dict.get("PORT") or 6379),
+        db=int(settings_dict.get("NAME") or 0),
+        **settings_dict.get("OPTIONS", {}),
+    )
+
+
+def is_usable(conn):
+    try:
+        return conn.execute("PING") == "PONG"
+    except (OSError, RedisError):
+        return False
@@ -0,0 +1,25 @@
+import os
+import sqlite3
+
+
+def connect(settings_dict):
+    """
+    Open a connection to the SQLite database file NAME, creating its
+    directory if needed. WAL journaling lets concurrent command processes
+    read the database while one of them writes.
+    """
+    name = settings_dict["NAME"] or ":memory:"
+    if name != ":memory:" and not name.startswith("file:"):
+        os.makedirs(os.path.dirname(os.path.abspath(name)), exist_ok=True)
+    conn = sqlite3.connect(name, check_same_thread=False, **settings_dict["OPTIONS"])
+    if name != ":memory:":
+        conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def is_usable(conn):
+    try:
+        conn.execute("SELECT 1")
+    except sqlite3.Error:
+        return False
+    return True
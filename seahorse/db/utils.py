@@ -1,9 +1,57 @@
-from seahorse.utils.connection import(
-    BaseConnectionHandler
-)
+import os
+from importlib import import_module
+
+from seahorse.core.exception import ImproperlyConfigured
+from seahorse.utils._os import get_data_dir
+from seahorse.utils.connection import BaseConnectionHandler, ConnectionDoesNotExist
+
+DEFAULT_DB_ALIAS = "default"
+
+
+def load_backend(backend_name):
+    try:
+        return import_module(backend_name)
+    except ImportError as e:
+        raise ImproperlyConfigured(
+            "%r isn't an available database backend: %s" % (backend_name, e)
+        )
 
 
 class ConnectionHandler(BaseConnectionHandler):
-    def close_all(self):
-        pass
+    settings_name = "DATABASES"
+    exception_class = ConnectionDoesNotExist
+
+    def configure_settings(self, databases):
+        databases = super().configure_settings(databases)
+        if databases == {}:
+            databases = {
+                DEFAULT_DB_ALIAS: {
+                    "ENGINE": "seahorse.db.backends.sqlite3",
+                    "NAME": os.path.join(get_data_dir(), "state.sqlite3"),
+                }
+            }
+        elif DEFAULT_DB_ALIAS not in databases:
+            raise ImproperlyConfigured(
+                f"You must define a '{DEFAULT_DB_ALIAS}' database."
+            )
+        for conn in databases.values():
+            conn.setdefault("ENGINE", "seahorse.db.backends.sqlite3")
+            conn.setdefault("NAME", "")
+            conn.setdefault("OPTIONS", {})
+            conn.setdefault("POOL", {})
+        return databases
+
+    def create_connection(self, alias):
+        db = self.settings[alias]
+        return load_backend(db["ENGINE"]).connect(db)
+
+    def is_usable(self, alias, conn):
+        return load_backend(self.settings[alias]["ENGINE"]).is_usable(conn)
 
+    def pool_options(self, alias):
+        """
+        Map the POOL settings of alias (MAX_SIZE, MAX_IDLE, MAX_AGE, TIMEOUT)
+        to ConnectionPool arguments.
+        """
+        pool = self.settings[alias].get("POOL", {})
+        return {key.lower(): value for key, value in pool.items()}
@@ -0,0 +1,3 @@
+"""
+Provisioning of cloud resources by the eks, gke and aks commands
+"""
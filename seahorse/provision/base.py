@@ -0,0 +1,340 @@
+import os
+from functools import partial
+
+from seahorse.cloud.cache import describe_cache
+from seahorse.cloud.client import CloudError, get_client
+from seahorse.cloud.ratelimit import MUTATE, READ, RetriesExhausted, limiter
+from seahorse.cloud.watcher import OperationFailed, WatchTimeout, watcher
+from seahorse.core.management.base import BaseCommand, CommandError
+from seahorse.db import DEFAULT_DB_ALIAS
+from seahorse.provision.scheduler import SUCCEEDED, StepScheduler
+from seahorse.provision.state import (
+    CREATE,
+    UNCHANGED,
+    UPDATE,
+    Plan,
+    StateStore,
+    content_hash,
+)
+from seahorse.template import TemplateError, get_default_engine
+from seahorse.utils._os import atomic_write
+
+PLAN_SYMBOLS = {CREATE: "+", UPDATE: "~", UNCHANGED: "="}
+
+
+class ProvisioningCommand(BaseCommand):
+    """
+    A command that provisions a graph of cloud resources.
+
+    Subclasses declare their resources in declare_resources() through
+    resource(); handle() diffs them against the state recorded by previous
+    runs, then applies the new and changed ones with a StepScheduler,
+    independent branches concurrently, and reports failures and the
+    critical path.
+
+    With --manifest, a template is also rendered once per cluster, with the
+    contexts of manifest_contexts(), into --manifest-dir.
+
+    With --wait, the resources of wait_kinds are only done, and their
+    dependents only start, once the provider reports them ready.
+
+    Against a provider API, the resources of lookup_kinds are described
+    before planning, through the describe cache, and planned from the
+    provider's answer rather than the recorded state: they are created
+    again when missing and left alone when already as declared.
+    """
+
+    provider = None
+    client = None
+    wait_kinds = ("cluster", "nodegroup", "nodepool")
+    lookup_kinds = ()
+    wait_timeout = None
+
+    def create_parser(self, prog_name, subcommand, **kwargs):
+        parser = super().create_parser(prog_name, subcommand, **kwargs)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Maximum number of resources provisioned at the same time.",
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database holding the provisioning state. Defaults to 'default'.",
+        )
+        parser.add_argument(
+            "--plan",
+            action="store_true",
+            help="Show which resources would be created or updated, and exit.",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Provision every resource, including those unchanged since the "
+            "last run.",
+        )
+        parser.add_argument(
+            "--manifest",
+            metavar="TEMPLATE",
+            help="Render TEMPLATE for every cluster, e.g. a Kubernetes manifest.",
+        )
+        parser.add_argument(
+            "--manifest-dir",
+            default=".",
+            help="Directory the rendered manifests are written to.",
+        )
+        parser.add_argument(
+            "--manifest-name",
+            default="{{ provider }}-{{ name }}.yaml",
+            help="Template of the file name of each rendered manifest.",
+        )
+        parser.add_argument(
+            "--endpoint",
+            metavar="URL",
+            help="Base URL of the provider API. Defaults to the provider's entry "
+            "in the CLOUD_ENDPOINTS setting; without one, nothing is provisioned.",
+        )
+        parser.add_argument(
+            "--wait",
+            nargs="?",
+            type=float,
+            const=0,
+            metavar="TIMEOUT",
+            help="Wait until clusters and node pools are ready, for at most "
+            "TIMEOUT seconds if given.",
+        )
+        return parser
+
+    def declare_resources(self, scheduler, *args, **options):
+        raise NotImplementedError(
+            "subclasses of ProvisioningCommand must provide a "
+            "declare_resources() method"
+        )
+
+    def manifest_contexts(self, *args, **options):
+        """
+        Yield the template context of each cluster of the invocation, a
+        mapping with at least its "name".
+        """
+        raise NotImplementedError(
+            "subclasses of ProvisioningCommand must provide a "
+            "manifest_contexts() method to render manifests"
+        )
+
+    def render_manifests(self, *args, **options):
+        """
+        Render --manifest for every cluster and return the list of
+        (path, text) pairs. Each template is compiled once for all of them.
+        """
+        engine = get_default_engine()
+        try:
+            template = engine.get_template(options["manifest"])
+            file_name = engine.from_string(options["manifest_name"])
+            contexts = [
+                {"provider": self.provider, **context}
+                for context in self.manifest_contexts(*args, **options)
+            ]
+            paths = [
+                os.path.join(options["manifest_dir"], name)
+                for name in file_name.render_many(contexts)
+            ]
+            return list(zip(paths, template.render_many(contexts)))
+        except TemplateError as e:
+            raise CommandError("Cannot render manifests: %s" % e)
+
+    def resource(self, scheduler, kind, name, requires=(), **spec):
+        """
+        Declare the resource kind/name, provisioned with spec once the
+        resources named in requires exist. Return the step name.
+        """
+        step_name = "%s/%s" % (kind, name)
+        scheduler.add(step_name, partial(self.apply, kind, name, spec), requires)
+        self.resources.append((kind, name, spec, step_name))
+        return step_name
+
+    def apply(self, kind, name, spec):
+        """
+        Provision a resource within the provider's mutate rate limit, then
+        cache the provider's answer about it in place of the previous ones.
+        """
+        try:
+            if self.client is None:
+                # A dry run, there is no API to spare.
+                return self.provision(kind, name, spec)
+            resource = limiter.call(
+                self.provider, MUTATE, self.provision, kind, name, spec
+            )
+        finally:
+            describe_cache.invalidate(self.cache_provider, kind, name)
+        if resource is not None:
+            # The provider's answer describes the resource as it is now.
+            describe_cache.set(self.cache_provider, kind, name, resource)
+        if self.wait_timeout is not None and kind in self.wait_kinds:
+            self.wait_ready(kind, name)
+
+    @property
+    def cache_provider(self):
+        """
+        The provider of the describe cache keys, qualified by the endpoint
+        so that the answers of different APIs are kept apart.
+        """
+        if self.client is None:
+            return self.provider
+        return "%s@%s" % (self.provider, self.client.endpoint)
+
+    def wait_ready(self, kind, name):
+        """
+        Block until the provider reports a resource ready, polled along with
+        every other pending operation of the process.
+        """
+        try:
+            watcher.watch(
+                self.client, kind, name, timeout=self.wait_timeout or None
+            ).result()
+        except (OperationFailed, WatchTimeout) as e:
+            raise CommandError(str(e))
+
+    def describe(self, kind, name, fetch=None):
+        """
+        Return the answer of the read-only call fetch(etag) about a resource,
+        cached and within the provider's read rate limit. fetch defaults to
+        a GET of the resource from the provider API, None when it doesn't
+        exist.
+        """
+        if fetch is None:
+            fetch = partial(self._get, kind, name)
+        return describe_cache.get(
+            self.cache_provider,
+            kind,
+            name,
+            lambda etag: limiter.call(self.provider, READ, fetch, etag),
+        )
+
+    def _get(self, kind, name, etag):
+        try:
+            return self.client.get(kind, name, etag)
+        except CloudError as e:
+            if e.status == 404:
+                return None, None
+            raise
+
+    def lookup(self):
+        """
+        Return {(kind, name): hash} of the declared resources of
+        lookup_kinds as the provider describes them, the hash being None
+        for those it doesn't have.
+        """
+        hashes = {}
+        for kind, name, spec, step_name in self.resources:
+            if kind in self.lookup_kinds:
+                try:
+                    resource = self.describe(kind, name)
+                except (CloudError, RetriesExhausted) as e:
+                    raise CommandError("Cannot describe %s %s: %s" % (kind, name, e))
+                hashes[kind, name] = (
+                    content_hash(resource["spec"]) if resource is not None else None
+                )
+        return hashes
+
+    def provision(self, kind, name, spec):
+        """
+        Create or update a single resource and return the provider's
+        description of it, if any. May raise Throttled or TransientError to
+        be retried.
+        """
+        resource = None
+        if self.client is not None:
+            resource = self.client.put(kind, name, spec)
+        details = " ".join("%s=%s" % item for item in sorted(spec.items()) if item[1])
+        self.stdout.write(
+            ("%s %s %s %s" % (self.provider, kind, name, details)).rstrip()
+        )
+        return resource
+
+    def handle(self, *args, **options):
+        self.client = get_client(self.provider, options.get("endpoint"))
+        self.wait_timeout = options.get("wait")
+        scheduler = StepScheduler(max_workers=options["workers"])
+        self.resources = []
+        self.declare_resources(scheduler, *args, **options)
+        store = StateStore(options["database"])
+        hashes = {} if options["force"] else store.hashes(self.provider)
+        if self.client is not None and not options["force"]:
+            for key, digest in self.lookup().items():
+                if digest is None:
+                    hashes.pop(key, None)
+                else:
+                    hashes[key] = digest
+        plan = Plan.compute(
+            ((kind, name, spec) for kind, name, spec, _ in self.resources), hashes
+        )
+        verbosity = options.get("verbosity", 1)
+        manifests = []
+        if options["manifest"]:
+            manifests = self.render_manifests(*args, **options)
+        if options["plan"]:
+            for kind, name, spec, step_name in self.resources:
+                self.stdout.write(
+                    "%s %s" % (PLAN_SYMBOLS[plan.action(kind, name)], step_name)
+                )
+            for path, text in manifests:
+                self.stdout.write("manifest %s" % path)
+            self.stdout.write(plan.summary())
+            return
+        for path, text in manifests:
+            atomic_write(path, text)
+        if manifests and verbosity >= 1:
+            self.stdout.write(
+                "Wrote %d manifests to %s." % (len(manifests), options["manifest_dir"])
+            )
+        for kind, name, spec, step_name in self.resources:
+            if plan.action(kind, name) == UNCHANGED:
+                scheduler[step_name].skip()
+        if verbosity >= 1:
+            self.stdout.write(plan.summary())
+        report = scheduler.run()
+        describe_cache.save()
+        watcher.save()
+        if self.client is not None:
+            # A dry run provisions nothing, so it records nothing either.
+            store.record(
+                self.provider,
+                [
+                    (kind, name, spec)
+                    for kind, name, spec, step_name in self.resources
+                    if scheduler[step_name].status == SUCCEEDED
+                ],
+            )
+        for step in report.steps.values():
+            self.emit(
+                "step",
+                resource=step.name,
+                status=step.status,
+                duration=step.duration,
+            )
+        if verbosity >= 2:
+            for step in report.steps.values():
+                self.stderr.write(
+                    "%-40s %-10s %.3fs" % (step.name, step.status, step.duration)
+                )
+            self.stderr.write(
+                "Critical path %.3fs of %.3fs wall time: %s"
+                % (
+                    report.critical_path_time,
+                    report.wall_time,
+                    " -> ".join(step.name for step in report.critical_path),
+                )
+            )
+        if not report.ok:
+            for step in report.with_status("failed"):
+                self.stderr.write("%s failed: %s" % (step.name, step.exception))
+            cancelled = report.with_status("cancelled")
+            if cancelled:
+                self.stderr.write(
+                    "Cancelled: %s" % ", ".join(step.name for step in cancelled)
+                )
+            raise CommandError(
+                "%d of %d resources failed."
+                % (len(report.with_status("failed")), len(report.steps))
+            )
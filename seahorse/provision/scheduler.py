@@ -0,0 +1,211 @@
+"""
+Dependency-ordered execution of provisioning steps.
+
+A deployment is a DAG of steps (network -> subnets -> cluster -> node pools
+-> load balancers). StepScheduler runs every step as soon as the steps it
+requires have succeeded, independent branches concurrently up to a worker
+limit, and cancels everything downstream of a failed step.
+"""
+import asyncio
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from seahorse.core.exception import ImproperlyConfigured
+from seahorse.utils.asyncio import run_async
+
+PENDING = "pending"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+UNCHANGED = "unchanged"
+DONE = (SUCCEEDED, UNCHANGED)
+
+
+class Step:
+    """
+    A named unit of work and the names of the steps it requires.
+    func is called without arguments and may be a coroutine function.
+    """
+
+    def __init__(self, name, func, requires=()):
+        self.name = name
+        self.func = func
+        self.requires = tuple(requires)
+        self.status = PENDING
+        self.result = None
+        self.exception = None
+        self.started = None
+        self.finished = None
+
+    @property
+    def duration(self):
+        if self.started is None or self.finished is None:
+            return 0.0
+        return self.finished - self.started
+
+    def skip(self):
+        """
+        Mark the step as already done; it won't run and its dependents
+        don't wait for it.
+        """
+        self.status = UNCHANGED
+
+    def run(self):
+        self.started = time.perf_counter()
+        try:
+            result = self.func()
+            if asyncio.iscoroutine(result):
+                result = run_async(result)
+            self.result = result
+            self.status = SUCCEEDED
+        except Exception as e:
+            self.exception = e
+            self.status = FAILED
+        finally:
+            self.finished = time.perf_counter()
+        return self
+
+    def __repr__(self):
+        return "<%s %s %s>" % (self.__class__.__name__, self.name, self.status)
+
+
+class ScheduleReport:
+    """
+    The steps of a finished run, in dependency order, and its timings.
+    """
+
+    def __init__(self, steps, wall_time):
+        self.steps = steps
+        self.wall_time = wall_time
+
+    @property
+    def ok(self):
+        return all(step.status in DONE for step in self.steps.values())
+
+    def with_status(self, status):
+        return [step for step in self.steps.values() if step.status == status]
+
+    @property
+    def critical_path(self):
+        """
+        The chain of dependent steps with the largest total duration, which
+        bounds the wall time no matter how many workers are available.
+        """
+        path_time = {}
+        previous = {}
+        for name, step in self.steps.items():
+            best = None
+            for dependency in step.requires:
+                if best is None or path_time[dependency] > path_time[best]:
+                    best = dependency
+            previous[name] = best
+            path_time[name] = step.duration + (path_time[best] if best else 0.0)
+        if not path_time:
+            return []
+        name = max(path_time, key=path_time.get)
+        path = []
+        while name is not None:
+            path.append(self.steps[name])
+            name = previous[name]
+        return path[::-1]
+
+    @property
+    def critical_path_time(self):
+        return sum(step.duration for step in self.critical_path)
+
+
+class StepScheduler:
+    """
+    Collect steps with add(), then run() them in dependency order.
+    """
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self.steps = {}
+
+    def __getitem__(self, name):
+        return self.steps[name]
+
+    def __contains__(self, name):
+        return name in self.steps
+
+    def add(self, name, func, requires=()):
+        if name in self.steps:
+            raise ImproperlyConfigured("Step %r is declared twice." % name)
+        step = self.steps[name] = Step(name, func, requires)
+        return step
+
+    def order(self):
+        """
+        Return the step names in a topological order, raising
+        ImproperlyConfigured for unknown requirements and cycles.
+        """
+        dependents = {name: [] for name in self.steps}
+        remaining = {}
+        for name, step in self.steps.items():
+            for dependency in step.requires:
+                if dependency not in self.steps:
+                    raise ImproperlyConfigured(
+                        "Step %r requires unknown step %r." % (name, dependency)
+                    )
+                dependents[dependency].append(name)
+            remaining[name] = len(step.requires)
+        ready = [name for name, count in remaining.items() if not count]
+        order = []
+        while ready:
+            name = ready.pop(0)
+            order.append(name)
+            for dependent in dependents[name]:
+                remaining[dependent] -= 1
+                if not remaining[dependent]:
+                    ready.append(dependent)
+        if len(order) != len(self.steps):
+            cycle = sorted(name for name, count in remaining.items() if count)
+            raise ImproperlyConfigured(
+                "Steps %s have circular requirements." % ", ".join(cycle)
+            )
+        return order
+
+    def _cancel_dependents(self, name, dependents):
+        for dependent in dependents[name]:
+            step = self.steps[dependent]
+            if step.status == PENDING:
+                step.status = CANCELLED
+                self._cancel_dependents(dependent, dependents)
+
+    def run(self):
+        """
+        Run every step and return a ScheduleReport. Failures don't raise,
+        they are recorded on the step and its dependents are cancelled.
+        """
+        order = self.order()
+        dependents = {name: [] for name in self.steps}
+        for name, step in self.steps.items():
+            for dependency in step.requires:
+                dependents[dependency].append(name)
+        submitted = set()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            pending = set()
+            while True:
+                for name in order:
+                    step = self.steps[name]
+                    if (
+                        name not in submitted
+                        and step.status == PENDING
+                        and all(
+                            self.steps[dep].status in DONE for dep in step.requires
+                        )
+                    ):
+                        submitted.add(name)
+                        pending.add(pool.submit(step.run))
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step = future.result()
+                    if step.status == FAILED:
+                        self._cancel_dependents(step.name, dependents)
+        return ScheduleReport(
+            {name: self.steps[name] for name in order}, time.perf_counter() - start
+        )
@@ -0,0 +1,148 @@
+"""
+Persisted record of provisioned resources and plan computation.
+
+Every successfully provisioned resource is stored with a content hash of
+the spec it was provisioned from. Planning a run compares the declared
+resources against those hashes so that only new and changed resources are
+applied.
+"""
+import hashlib
+import json
+import time
+
+from seahorse.db import DEFAULT_DB_ALIAS, connections
+
+CREATE = "create"
+UPDATE = "update"
+UNCHANGED = "unchanged"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seahorse_resource (
+    provider TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    spec TEXT NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (provider, kind, name)
+)
+"""
+
+
+def content_hash(spec):
+    """
+    Return a stable digest of a JSON-serializable resource spec.
+    """
+    data = json.dumps(spec, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+class StateStore:
+    """
+    The seahorse_resource table of the database using.
+    """
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.using = using
+        self._schema_ready = False
+
+    @property
+    def connection(self):
+        conn = connections[self.using]
+        if not self._schema_ready:
+            conn.execute(SCHEMA)
+            self._schema_ready = True
+        return conn
+
+    def hashes(self, provider):
+        """
+        Return {(kind, name): hash} for every resource of provider.
+        """
+        rows = self.connection.execute(
+            "SELECT kind, name, hash FROM seahorse_resource WHERE provider = ?",
+            (provider,),
+        )
+        return {(kind, name): digest for kind, name, digest in rows}
+
+    def record(self, provider, resources):
+        """
+        Store the hash and spec of the (kind, name, spec) resources.
+        """
+        now = time.time()
+        conn = self.connection
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO seahorse_resource "
+                "(provider, kind, name, hash, spec, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        provider,
+                        kind,
+                        name,
+                        content_hash(spec),
+                        json.dumps(spec, sort_keys=True, default=str),
+                        now,
+                    )
+                    for kind, name, spec in resources
+                ],
+            )
+
+    def forget(self, provider, kind=None, name=None):
+        query = "DELETE FROM seahorse_resource WHERE provider = ?"
+        params = [provider]
+        if kind is not None:
+            query += " AND kind = ?"
+            params.append(kind)
+        if name is not None:
+            query += " AND name = ?"
+            params.append(name)
+        conn = self.connection
+        with conn:
+            conn.execute(query, params)
+
+
+class Plan:
+    """
+    The action (create, update or unchanged) for each declared resource.
+    """
+
+    def __init__(self):
+        self.actions = {}
+
+    def add(self, kind, name, action):
+        self.actions[kind, name] = action
+
+    def action(self, kind, name):
+        return self.actions[kind, name]
+
+    def with_action(self, action):
+        return [key for key, value in self.actions.items() if value == action]
+
+    @property
+    def changes(self):
+        return len(self.actions) - len(self.with_action(UNCHANGED))
+
+    def summary(self):
+        return "Plan: %d to create, %d to update, %d unchanged." % (
+            len(self.with_action(CREATE)),
+            len(self.with_action(UPDATE)),
+            len(self.with_action(UNCHANGED)),
+        )
+
+    @classmethod
+    def compute(cls, resources, hashes):
+        """
+        Diff resources, (kind, name, spec) triples, against the stored
+        hashes of StateStore.hashes().
+        """
+        plan = cls()
+        for kind, name, spec in resources:
+            stored = hashes.get((kind, name))
+            if stored is None:
+                plan.add(kind, name, CREATE)
+            elif stored == content_hash(spec):
+                plan.add(kind, name, UNCHANGED)
+            else:
+                plan.add(kind, name, UPDATE)
+        return plan
@@ -0,0 +1,16 @@
+from seahorse.template.base import (
+    TRANSFORMS,
+    Template,
+    TemplateDoesNotExist,
+    TemplateError,
+)
+from seahorse.template.engine import Engine, get_default_engine
+
+__all__ = (
+    "Engine",
+    "Template",
+    "TemplateDoesNotExist",
+    "TemplateError",
+    "TRANSFORMS",
+    "get_default_engine",
+)
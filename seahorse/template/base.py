@@ -0,0 +1,116 @@
+"""
+Compilation of manifest templates.
+
+A template is text with {{ name }} placeholders, replaced by the value of
+name in the context. As with DictWrapper, a prefix on the name applies a
+transform to the value:
+
+    {{ vpcid }}       str(value)
+    {{ json_tags }}   json.dumps(value), a YAML/HCL/JSON literal
+    {{ sh_name }}     shlex.quote(value), for shell snippets
+    {{ b64_data }}    base64 of value, for Kubernetes secrets
+
+Anything else between double braces, such as Helm's {{ .Values.image }},
+is left as is.
+
+A template is compiled once into a Python function concatenating its
+literal text with the transformed values; rendering runs that function.
+"""
+import base64
+import json
+import re
+import shlex
+
+PLACEHOLDER_RE = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}")
+
+
+def _b64(value):
+    if isinstance(value, str):
+        value = value.encode()
+    return base64.b64encode(value).decode()
+
+
+def _str(value):
+    return value if isinstance(value, str) else str(value)
+
+
+TRANSFORMS = {
+    "json_": json.dumps,
+    "sh_": lambda value: shlex.quote(_str(value)),
+    "b64_": _b64,
+}
+
+
+class TemplateError(Exception):
+    pass
+
+
+class TemplateDoesNotExist(TemplateError):
+    pass
+
+
+def split_name(name, transforms):
+    """
+    Return (transform, key) of a placeholder name, stripping the first
+    matching prefix like DictWrapper.__getitem__() does.
+    """
+    for prefix, func in transforms.items():
+        if name.startswith(prefix) and len(name) > len(prefix):
+            return func, name[len(prefix) :]
+    return _str, name
+
+
+def compile_template(source, transforms=TRANSFORMS):
+    """
+    Return (render, keys): a function of a context mapping returning the
+    rendered text, and the context keys the template uses.
+    """
+    namespace = {}
+    parts = []
+    keys = []
+    position = 0
+    for match in PLACEHOLDER_RE.finditer(source):
+        if match.start() > position:
+            parts.append(repr(source[position : match.start()]))
+        func, key = split_name(match.group(1), transforms)
+        func_name = "_f%d" % len(namespace)
+        namespace[func_name] = func
+        # Keys are repr()'d, a template can't inject code.
+        parts.append("%s(c[%r])" % (func_name, key))
+        keys.append(key)
+        position = match.end()
+    if position < len(source):
+        parts.append(repr(source[position:]))
+    code = "def render(c):\n    return ''.join((%s,))\n" % ", ".join(parts or ["''"])
+    exec(compile(code, "<template>", "exec"), namespace)
+    return namespace["render"], tuple(dict.fromkeys(keys))
+
+
+class Template:
+    """
+    A compiled template. Use Engine.from_string() or Engine.get_template()
+    to share compiled templates through the engine's cache.
+    """
+
+    def __init__(self, source, name=None, transforms=TRANSFORMS):
+        self.source = source
+        self.name = name
+        self._render, self.keys = compile_template(source, transforms)
+
+    def render(self, context):
+        try:
+            return self._render(context)
+        except KeyError as e:
+            raise TemplateError(
+                "Template %s requires %r." % (self.name or "<string>", e.args[0])
+            ) from None
+
+    def render_many(self, contexts):
+        """
+        Render the template once per context, lazily.
+        """
+        render = self.render
+        return (render(context) for context in contexts)
+
+    def __repr__(self):
+        return "<%s %s>" % (self.__class__.__name__, self.name or "<string>")
@@ -0,0 +1,65 @@
+import functools
+import hashlib
+import os
+
+from seahorse.conf import settings
+from seahorse.template.base import TRANSFORMS, Template, TemplateDoesNotExist
+from seahorse.utils.datastructures import LRUCache
+
+
+class Engine:
+    """
+    Load templates from dirs and keep the compiled templates in an LRU
+    cache keyed by a hash of their source, so each distinct template is
+    compiled once however many clusters it is rendered for.
+
+    transforms extends the placeholder prefixes of seahorse.template.base.
+    """
+
+    def __init__(self, dirs=None, transforms=None, cache_size=128):
+        self.dirs = list(dirs or [])
+        self.transforms = {**TRANSFORMS, **(transforms or {})}
+        self.cache = LRUCache(cache_size)
+
+    def from_string(self, source, name=None):
+        key = hashlib.sha1(source.encode()).hexdigest()
+        template = self.cache.get(key)
+        if template is None:
+            template = Template(source, name, self.transforms)
+            self.cache.set(key, template)
+        return template
+
+    def find_template(self, name):
+        if os.path.isabs(name):
+            candidates = [name]
+        else:
+            candidates = [os.path.join(directory, name) for directory in self.dirs]
+            candidates.append(name)
+        for path in candidates:
+            try:
+                with open(path) as fh:
+                    return fh.read(), path
+            except FileNotFoundError:
+                continue
+        raise TemplateDoesNotExist(name)
+
+    def get_template(self, name):
+        source, path = self.find_template(name)
+        return self.from_string(source, path)
+
+    def render_many(self, template, contexts):
+        """
+        Render template, a Template or a template name, for each of
+        contexts. Return a generator of the rendered texts.
+        """
+        if not isinstance(template, Template):
+            template = self.get_template(template)
+        return template.render_many(contexts)
+
+
+@functools.cache
+def get_default_engine():
+    """
+    Return the engine loading templates from settings.TEMPLATE_DIRS.
+    """
+    return Engine(settings.TEMPLATE_DIRS)
@@ -1,3 +1,6 @@
 """
 seahorse unit test framkework
-"""
\ No newline at end of file
+"""
+from seahorse.test.testcase import SimpleTestCase
+
+__all__ = ["SimpleTestCase"]
@@ -0,0 +1,299 @@
+"""
+In-process HTTP server standing in for the provider provisioning APIs in
+tests and load tests.
+
+    with CloudServer(latency={"distribution": "lognormal", "median": 0.02},
+                     throttle_rate=0.05, max_concurrency=16) as server:
+        call_command("eks", vpcid=["vpc-1"], endpoint=server.url)
+
+It serves the resource protocol of seahorse.cloud.client: PUT and GET of
+/<provider>/<kind>/<name>, with a generation number as ETag, and batch GETs
+of /<provider>/<kind>?name=...&name=.... A resource created or changed by a
+PUT has the "status" PENDING for provision_time seconds, drawn like
+latency, then READY. Faults are injected before a request is handled:
+
+- latency: seconds slept per request, a number, a callable returning one,
+  or a {"distribution": ...} mapping, see latency_sampler();
+- throttle_rate: share of requests answered 429 with Retry-After;
+- error_rate: share of requests answered 503;
+- max_concurrency: requests beyond this many in flight are answered 429,
+  as providers do when a caller exceeds its concurrency quota.
+
+The random draws come from a generator seeded with seed, so a run is
+repeatable up to thread scheduling.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+
+def latency_sampler(latency, rng):
+    """
+    Return a function drawing a latency in seconds from latency: None, a
+    number, a callable, or a mapping with a "distribution" of:
+
+    - "constant": {"value"}
+    - "uniform": {"low", "high"}
+    - "exponential": {"mean"}
+    - "lognormal": {"median", "sigma"}, a long tail as real APIs have.
+    """
+    if latency is None:
+        return lambda: 0.0
+    if callable(latency):
+        return latency
+    if isinstance(latency, (int, float)):
+        return lambda: float(latency)
+    latency = dict(latency)
+    distribution = latency.pop("distribution", "constant")
+    if distribution == "constant":
+        value = float(latency.get("value", 0.0))
+        return lambda: value
+    if distribution == "uniform":
+        low, high = float(latency["low"]), float(latency["high"])
+        return lambda: rng.uniform(low, high)
+    if distribution == "exponential":
+        mean = float(latency["mean"])
+        return lambda: rng.expovariate(1 / mean)
+    if distribution == "lognormal":
+        median = float(latency["median"])
+        sigma = float(latency.get("sigma", 0.5))
+        return lambda: median * rng.lognormvariate(0, sigma)
+    raise ValueError("Unknown latency distribution %r." % distribution)
+
+
+def parse_latency(text):
+    """
+    Parse the command line form of a latency: seconds, or a distribution
+    and its parameters, e.g. "lognormal:median=0.02,sigma=0.8".
+    """
+    distribution, _, params = text.partition(":")
+    try:
+        if not params:
+            return float(distribution)
+        latency = {"distribution": distribution}
+        for param in params.split(","):
+            name, value = param.split("=")
+            latency[name.strip()] = float(value)
+    except ValueError:
+        raise ValueError("Invalid latency %r." % text)
+    try:
+        latency_sampler(latency, random.Random())
+    except KeyError as e:
+        raise ValueError("Latency %r lacks the %s parameter." % (text, e))
+    return latency
+
+
+def _etag(resource):
+    # A resource becoming ready changes, its generation doesn't.
+    if resource["status"] == "PENDING":
+        return "%d-pending" % resource["generation"]
+    return str(resource["generation"])
+
+
+class _CloudHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body=None, headers=None):
+        data = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _handle(self, method):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        fault = self.server.enter()
+        try:
+            if fault is not None:
+                status, headers = fault
+                self._reply(status, {"error": self.responses[status][0]}, headers)
+                return
+            time.sleep(self.server.sample_latency())
+            url = urlsplit(self.path)
+            parts = url.path.strip("/").split("/", 2)
+            if method == "GET" and len(parts) == 2:
+                provider, kind = (unquote(part) for part in parts)
+                names = parse_qs(url.query).get("name", [])
+                self._reply(200, self.server.describe_many(provider, kind, names))
+                return
+            if len(parts) != 3:
+                self._reply(404, {"error": "Not Found"})
+                return
+            key = tuple(unquote(part) for part in parts)
+            if method == "PUT":
+                try:
+                    spec = json.loads(body or b"null")
+                except ValueError:
+                    self._reply(400, {"error": "Invalid JSON"})
+                    return
+                status, resource = self.server.put(key, spec)
+                self._reply(status, resource, {"ETag": _etag(resource)})
+                return
+            resource = self.server.describe(key)
+            if resource is None:
+                self._reply(404, {"error": "Not Found"})
+            elif self.headers.get("If-None-Match") == _etag(resource):
+                self._reply(304)
+            else:
+                self._reply(200, resource, {"ETag": _etag(resource)})
+        finally:
+            self.server.leave()
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+
+class CloudServer(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        latency=None,
+        error_rate=0.0,
+        throttle_rate=0.0,
+        retry_after=1,
+        max_concurrency=None,
+        provision_time=None,
+        seed=None,
+    ):
+        super().__init__((host, port), _CloudHandler)
+        self.rng = random.Random(seed)
+        self.sample_latency = latency_sampler(latency, self.rng)
+        self.sample_provision_time = latency_sampler(provision_time, self.rng)
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.max_concurrency = max_concurrency
+        self.resources = {}
+        self.ready_at = {}
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.counters = {
+            "requests": 0,
+            "describes": 0,
+            "throttled": 0,
+            "errors": 0,
+            "rejected": 0,
+            "max_in_flight": 0,
+        }
+        self._thread = None
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    @property
+    def url(self):
+        return "http://%s:%d" % self.server_address[:2]
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def enter(self):
+        """
+        Count a request in, and return the (status, headers) of the fault
+        injected into it, if any.
+        """
+        throttled = {"Retry-After": str(self.retry_after)}
+        with self.lock:
+            self.in_flight += 1
+            self.counters["requests"] += 1
+            self.counters["max_in_flight"] = max(
+                self.counters["max_in_flight"], self.in_flight
+            )
+            if self.max_concurrency and self.in_flight > self.max_concurrency:
+                self.counters["rejected"] += 1
+                return 429, throttled
+            draw = self.rng.random()
+            if draw < self.throttle_rate:
+                self.counters["throttled"] += 1
+                return 429, throttled
+            if draw < self.throttle_rate + self.error_rate:
+                self.counters["errors"] += 1
+                return 503, None
+        return None
+
+    def leave(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def put(self, key, spec):
+        with self.lock:
+            resource = self.resources.get(key)
+            if resource is not None and resource["spec"] == spec:
+                return 200, resource
+            resource = self.resources[key] = {
+                "provider": key[0],
+                "kind": key[1],
+                "name": key[2],
+                "spec": spec,
+                "generation": resource["generation"] + 1 if resource else 1,
+                "status": "PENDING",
+            }
+            self.ready_at[key] = time.monotonic() + self.sample_provision_time()
+            return (201 if resource["generation"] == 1 else 200), resource
+
+    def _current(self, key):
+        # Called with the lock held.
+        resource = self.resources.get(key)
+        if resource is not None and resource["status"] == "PENDING":
+            if time.monotonic() >= self.ready_at[key]:
+                resource["status"] = "READY"
+        return resource
+
+    def describe(self, key):
+        with self.lock:
+            self.counters["describes"] += 1
+            return self._current(key)
+
+    def describe_many(self, provider, kind, names):
+        """
+        Return {"items": [resources], "missing": [names]} for names.
+        """
+        items, missing = [], []
+        with self.lock:
+            self.counters["describes"] += 1
+            for name in names:
+                resource = self._current((provider, kind, name))
+                if resource is None:
+                    missing.append(name)
+                else:
+                    items.append(resource)
+        return {"items": items, "missing": missing}
+
+    def stats(self):
+        with self.lock:
+            return {**self.counters, "resources": len(self.resources)}
@@ -0,0 +1,187 @@
+"""
+In-process RESP server standing in for Redis in tests and benchmarks.
+
+    with RespServer() as server:
+        call_command("redis", "load", path, port=server.port)
+
+It speaks enough of the protocol for the redis command: strings, hashes,
+key deletion and the connection commands. Data lives in one dict per
+server and is shared by all clients.
+"""
+import socketserver
+import threading
+
+
+def _bulk(value):
+    if value is None:
+        return b"$-1\r\n"
+    data = value if isinstance(value, bytes) else str(value).encode()
+    return b"$%d\r\n%s\r\n" % (len(data), data)
+
+
+def _array(values):
+    return b"*%d\r\n" % len(values) + b"".join(_bulk(value) for value in values)
+
+
+class _RespHandler(socketserver.StreamRequestHandler):
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections_accepted += 1
+
+    def handle(self):
+        while True:
+            try:
+                args = self._read_command()
+            except (ConnectionError, ValueError):
+                return
+            if args is None:
+                return
+            self.wfile.write(self.server.dispatch(args))
+            if args[0].upper() == b"QUIT":
+                return
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            # Inline command, as typed into telnet.
+            return line.split()
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+
+class RespServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0):
+        super().__init__((host, port), _RespHandler)
+        self.data = {}
+        self.lock = threading.Lock()
+        self.commands_processed = 0
+        self.connections_accepted = 0
+        self._thread = None
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def dispatch(self, args):
+        name = args[0].decode().upper()
+        handler = getattr(self, "cmd_%s" % name.lower(), None)
+        if handler is None:
+            return b"-ERR unknown command '%s'\r\n" % name.encode()
+        with self.lock:
+            self.commands_processed += 1
+            try:
+                return handler(*args[1:])
+            except (TypeError, ValueError):
+                return (
+                    b"-ERR wrong number of arguments for '%s' command\r\n"
+                    % name.lower().encode()
+                )
+
+    def cmd_ping(self, *args):
+        return _bulk(args[0]) if args else b"+PONG\r\n"
+
+    def cmd_echo(self, message):
+        return _bulk(message)
+
+    def cmd_select(self, db):
+        return b"+OK\r\n"
+
+    def cmd_quit(self):
+        return b"+OK\r\n"
+
+    def cmd_flushdb(self):
+        self.data.clear()
+        return b"+OK\r\n"
+
+    def cmd_dbsize(self):
+        return b":%d\r\n" % len(self.data)
+
+    def cmd_set(self, key, value, *options):
+        # EX/PX are accepted; the stand-in never expires keys.
+        self.data[key] = value
+        return b"+OK\r\n"
+
+    def cmd_get(self, key):
+        value = self.data.get(key)
+        if isinstance(value, dict):
+            return _WRONGTYPE
+        return _bulk(value)
+
+    def cmd_mset(self, *pairs):
+        if not pairs or len(pairs) % 2:
+            raise ValueError
+        for key, value in zip(pairs[::2], pairs[1::2]):
+            self.data[key] = value
+        return b"+OK\r\n"
+
+    def cmd_mget(self, *keys):
+        values = [self.data.get(key) for key in keys]
+        return _array([None if isinstance(v, dict) else v for v in values])
+
+    def cmd_del(self, *keys):
+        return b":%d\r\n" % sum(self.data.pop(key, None) is not None for key in keys)
+
+    def cmd_exists(self, *keys):
+        return b":%d\r\n" % sum(key in self.data for key in keys)
+
+    def cmd_expire(self, key, seconds):
+        return b":%d\r\n" % (key in self.data)
+
+    def cmd_hset(self, key, *pairs):
+        if not pairs or len(pairs) % 2:
+            raise ValueError
+        value = self.data.setdefault(key, {})
+        if not isinstance(value, dict):
+            return _WRONGTYPE
+        added = 0
+        for field, field_value in zip(pairs[::2], pairs[1::2]):
+            added += field not in value
+            value[field] = field_value
+        return b":%d\r\n" % added
+
+    def cmd_hget(self, key, field):
+        value = self.data.get(key) or {}
+        if not isinstance(value, dict):
+            return _WRONGTYPE
+        return _bulk(value.get(field))
+
+    def cmd_hgetall(self, key):
+        value = self.data.get(key) or {}
+        if not isinstance(value, dict):
+            return _WRONGTYPE
+        return _array([item for pair in value.items() for item in pair])
+
+
+_WRONGTYPE = (
+    b"-WRONGTYPE Operation against a key holding the wrong kind of value\r\n"
+)
@@ -0,0 +1,363 @@
+"""
+Run test suites across a pool of processes.
+
+Tests are discovered with unittest, grouped by TestCase class, so that
+setUpClass() runs once per class, and handed to the workers longest first,
+by the durations recorded by previous runs. Each worker process gets a
+state and cache directory of its own, and its file databases renamed with
+its number, so concurrent tests can't see each other's provisioning state
+or sockets. The outcomes and timings of the workers are merged into one
+report, in the format of unittest's text runner.
+"""
+import copy
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import unittest
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from seahorse.utils._os import atomic_write, get_cache_dir
+
+SUCCESS = "ok"
+FAILURE = "FAIL"
+ERROR = "ERROR"
+SKIP = "skipped"
+EXPECTED_FAILURE = "expected failure"
+UNEXPECTED_SUCCESS = "unexpected success"
+
+SYMBOLS = {
+    SUCCESS: ".",
+    FAILURE: "F",
+    ERROR: "E",
+    SKIP: "s",
+    EXPECTED_FAILURE: "x",
+    UNEXPECTED_SUCCESS: "u",
+}
+
+WORKER_ENVIRONMENT_VARIABLE = "SEAHORSE_TEST_WORKER"
+
+
+class TestDurations:
+    """
+    The duration of every test seen by previous runs, smoothed over runs.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or get_cache_dir("test-durations.json")
+        try:
+            with open(self.path) as fh:
+                self.durations = json.load(fh)
+        except (OSError, ValueError):
+            self.durations = {}
+
+    def expected(self, test_id):
+        """
+        Return the expected duration of test_id, the median of the known
+        tests for a new one.
+        """
+        try:
+            return self.durations[test_id]
+        except KeyError:
+            pass
+        if not self.durations:
+            return 0.0
+        known = sorted(self.durations.values())
+        return known[len(known) // 2]
+
+    def update(self, test_id, duration):
+        previous = self.durations.get(test_id)
+        if previous is not None:
+            duration = (previous + duration) / 2
+        self.durations[test_id] = duration
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        atomic_write(self.path, json.dumps(self.durations, sort_keys=True))
+
+
+def iter_tests(suite):
+    for test in suite:
+        if isinstance(test, unittest.TestSuite):
+            yield from iter_tests(test)
+        else:
+            yield test
+
+
+def build_suite(labels, top_level_dir):
+    """
+    Return a suite of the tests of labels: directories, relative to
+    top_level_dir, are discovered, other labels are dotted names.
+    """
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    for label in labels or [top_level_dir]:
+        path = os.path.join(top_level_dir, label)
+        if os.path.isdir(path):
+            suite.addTests(loader.discover(path, top_level_dir=top_level_dir))
+        else:
+            suite.addTests(loader.loadTestsFromName(label))
+    return suite
+
+
+def partition_suite(suite, durations):
+    """
+    Return the test ids of suite grouped by TestCase class, the groups with
+    the longest expected duration first, and the tests that can't be loaded
+    again by id, e.g. the import errors reported by discovery.
+    """
+    groups = defaultdict(list)
+    local = []
+    for test in iter_tests(suite):
+        if test.__class__.__module__.startswith("unittest."):
+            local.append(test)
+        else:
+            groups[test.__class__].append(test.id())
+    chunks = sorted(
+        groups.values(),
+        key=lambda ids: sum(durations.expected(test_id) for test_id in ids),
+        reverse=True,
+    )
+    return chunks, local
+
+
+class RecordingResult(unittest.TestResult):
+    """
+    Record the outcome, duration and traceback of every test, in a form
+    that can be sent back from a worker.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self._started = None
+
+    def startTest(self, test):
+        super().startTest(test)
+        self._started = time.perf_counter()
+
+    def stopTest(self, test):
+        super().stopTest(test)
+        self._started = None
+
+    def _record(self, test, outcome, err=None):
+        duration = 0.0
+        if self._started is not None:
+            duration = time.perf_counter() - self._started
+        details = self._exc_info_to_string(err, test) if err else ""
+        self.records.append((test.id(), outcome, duration, details))
+
+    def addSuccess(self, test):
+        super().addSuccess(test)
+        self._record(test, SUCCESS)
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self._record(test, FAILURE, err)
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        self._record(test, ERROR, err)
+
+    def addSkip(self, test, reason):
+        super().addSkip(test, reason)
+        self.records.append((test.id(), SKIP, 0.0, reason))
+
+    def addExpectedFailure(self, test, err):
+        super().addExpectedFailure(test, err)
+        self._record(test, EXPECTED_FAILURE)
+
+    def addUnexpectedSuccess(self, test):
+        super().addUnexpectedSuccess(test)
+        self._record(test, UNEXPECTED_SUCCESS)
+
+    def addSubTest(self, test, subtest, err):
+        super().addSubTest(test, subtest, err)
+        if err is not None:
+            outcome = FAILURE if issubclass(err[0], test.failureException) else ERROR
+            self._record(subtest, outcome, err)
+
+
+def worker_databases(databases, index, state_dir):
+    """
+    Return a copy of databases whose SQLite files outside of state_dir are
+    renamed with the worker index.
+    """
+    databases = copy.deepcopy(databases)
+    for settings in databases.values():
+        name = settings.get("NAME")
+        if (
+            settings.get("ENGINE", "").endswith("sqlite3")
+            and name
+            and name != ":memory:"
+            and not os.path.abspath(name).startswith(state_dir + os.sep)
+        ):
+            root, ext = os.path.splitext(name)
+            settings["NAME"] = "%s_%d%s" % (root, index, ext)
+    return databases
+
+
+_worker_index = None
+
+
+def _init_worker(counter, base_dir, top_level_dir):
+    """
+    Give the worker process a number, its own state and cache directories
+    and its own databases.
+    """
+    global _worker_index
+    from seahorse.db import connections
+
+    with counter.get_lock():
+        counter.value += 1
+        _worker_index = counter.value
+    worker_dir = os.path.join(base_dir, "worker-%d" % _worker_index)
+    state_dir = os.path.join(worker_dir, "state")
+    os.environ[WORKER_ENVIRONMENT_VARIABLE] = str(_worker_index)
+    os.environ["SEAHORSE_STATE_DIR"] = state_dir
+    os.environ["SEAHORSE_CACHE_DIR"] = os.path.join(worker_dir, "cache")
+    if top_level_dir not in sys.path:
+        sys.path.insert(0, top_level_dir)
+    # Read the databases again, with the default one in the new state
+    # directory.
+    connections.configure()
+    connections.configure(
+        worker_databases(connections.settings, _worker_index, state_dir)
+    )
+
+
+def _run_chunk(test_ids):
+    from seahorse.db import connections
+
+    start = time.perf_counter()
+    result = RecordingResult()
+    try:
+        suite = unittest.TestLoader().loadTestsFromNames(test_ids)
+    except Exception:
+        result.addError(unittest.FunctionTestCase(lambda: None), sys.exc_info())
+    else:
+        suite.run(result)
+    connections.close_all()
+    return _worker_index, time.perf_counter() - start, result.records
+
+
+class ParallelTestRunner:
+    """
+    Run a suite on parallel processes and write the report to stream.
+    """
+
+    def __init__(
+        self,
+        parallel=None,
+        top_level_dir=None,
+        verbosity=1,
+        failfast=False,
+        durations=None,
+        stream=None,
+    ):
+        self.parallel = parallel or os.cpu_count() or 1
+        self.top_level_dir = os.path.abspath(top_level_dir or os.getcwd())
+        self.verbosity = verbosity
+        self.failfast = failfast
+        self.durations = durations if durations is not None else TestDurations()
+        self.stream = stream or sys.stderr
+        self.records = []
+        self.workers = defaultdict(lambda: [0, 0.0])
+        self.processes = 0
+
+    def _report_records(self, records):
+        for test_id, outcome, duration, details in records:
+            if self.verbosity >= 2:
+                self.stream.write("%s ... %s\n" % (test_id, outcome))
+            elif self.verbosity == 1:
+                self.stream.write(SYMBOLS[outcome])
+            self.stream.flush()
+
+    def _collect(self, worker, seconds, records):
+        self.records.extend(records)
+        self.workers[worker][0] += len(records)
+        self.workers[worker][1] += seconds
+        self._report_records(records)
+        return any(record[1] in (FAILURE, ERROR) for record in records)
+
+    def run(self, suite):
+        """
+        Run suite and return the list of (test id, outcome, duration,
+        details) records.
+        """
+        chunks, local = partition_suite(suite, self.durations)
+        start = time.perf_counter()
+        if local:
+            result = RecordingResult()
+            unittest.TestSuite(local).run(result)
+            self._collect(0, time.perf_counter() - start, result.records)
+        processes = self.processes = min(self.parallel, len(chunks))
+        if processes:
+            counter = multiprocessing.Value("i", 0)
+            with tempfile.TemporaryDirectory(prefix="seahorse-test-") as base_dir:
+                # Not a multiprocessing.Pool: its daemonic workers couldn't
+                # start the process pools of the tests.
+                with ProcessPoolExecutor(
+                    processes,
+                    initializer=_init_worker,
+                    initargs=(counter, base_dir, self.top_level_dir),
+                ) as pool:
+                    futures = [pool.submit(_run_chunk, chunk) for chunk in chunks]
+                    for future in as_completed(futures):
+                        failed = self._collect(*future.result())
+                        if failed and self.failfast:
+                            pool.shutdown(cancel_futures=True)
+                            break
+        self.wall_time = time.perf_counter() - start
+        for test_id, outcome, duration, details in self.records:
+            if outcome != SKIP:
+                self.durations.update(test_id, duration)
+        self.durations.save()
+        self.report()
+        return self.records
+
+    def report(self):
+        write = self.stream.write
+        if self.verbosity == 1:
+            write("\n")
+        counts = defaultdict(int)
+        for test_id, outcome, duration, details in self.records:
+            counts[outcome] += 1
+            if outcome in (FAILURE, ERROR):
+                write("=" * 70 + "\n")
+                write("%s: %s\n" % (outcome, test_id))
+                write("-" * 70 + "\n")
+                write(details + "\n")
+        if self.verbosity >= 2:
+            write("\nSlowest tests:\n")
+            slowest = sorted(self.records, key=lambda record: record[2], reverse=True)
+            for test_id, outcome, duration, details in slowest[:10]:
+                write("  %8.3fs %s\n" % (duration, test_id))
+            write("\nWorkers:\n")
+            for worker, (tests, seconds) in sorted(self.workers.items()):
+                write("  %-8s %4d tests %8.3fs\n" % (worker or "main", tests, seconds))
+        write("-" * 70 + "\n")
+        write(
+            "Ran %d tests in %.3fs on %d processes\n\n"
+            % (len(self.records), self.wall_time, self.processes)
+        )
+        details = [
+            "%s=%d" % (name, counts[outcome])
+            for name, outcome in (
+                ("failures", FAILURE),
+                ("errors", ERROR),
+                ("skipped", SKIP),
+                ("expected failures", EXPECTED_FAILURE),
+                ("unexpected successes", UNEXPECTED_SUCCESS),
+            )
+            if counts[outcome]
+        ]
+        status = "FAILED" if counts[FAILURE] or counts[ERROR] else "OK"
+        write("%s%s\n" % (status, " (%s)" % ", ".join(details) if details else ""))
+        self.stream.flush()
+
+    def failures(self):
+        return [record for record in self.records if record[1] in (FAILURE, ERROR)]
@@ -1,6 +1,8 @@
 import json
 import unittest
 
+from seahorse.utils.jsonstream import JSONMismatch, compare_documents
+
 
 class SimpleTestCase(unittest.TestCase):
     """
@@ -16,7 +18,7 @@ class SimpleTestCase(unittest.TestCase):
 
     def assertJSONEqual(self, raw, expected_data, msg=None):
         try:
-            data =json.load(raw)
+            data = json.load(raw) if hasattr(raw, "read") else json.loads(raw)
         except json.JSONDecodeError:
             self.fail("First argument is not Valid JSON: %r" % raw)
         if isinstance(expected_data, str) :
@@ -25,4 +27,21 @@ class SimpleTestCase(unittest.TestCase):
             except ValueError:
                 self.fail("Second argument %r" % expected_data)
         self.assertEqual(data, expected_data, msg=msg)
-    
\ No newline at end of file
+
+    def assertJSONStreamEqual(
+        self, first, second, ignore_paths=(), unordered_paths=(), msg=None
+    ):
+        """
+        Compare two JSON documents, files, JSON text or data, parsing them
+        incrementally. Fail at the first difference with its JSON path.
+
+        Values at ignore_paths are skipped and lists at unordered_paths are
+        compared regardless of order, e.g. ["$.meta.generated_at"] and
+        ["$.clusters[*].nodepools"].
+        """
+        try:
+            compare_documents(first, second, ignore_paths, unordered_paths)
+        except JSONMismatch as e:
+            self.fail(self._formatMessage(msg, "JSON documents differ at %s" % e))
+        except (json.JSONDecodeError, StopIteration) as e:
+            self.fail(self._formatMessage(msg, "Invalid JSON document: %s" % e))
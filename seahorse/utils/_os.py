@@ -0,0 +1,64 @@
+import os
+import tempfile
+
+
+def get_cache_dir(*parts):
+    """
+    Return the directory seahorse keeps its on-disk caches in, joined with
+    parts. SEAHORSE_CACHE_DIR overrides the default XDG cache location.
+    The directory is not created.
+    """
+    base = os.environ.get("SEAHORSE_CACHE_DIR")
+    if not base:
+        base = os.path.join(
+            os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+            "seahorse",
+        )
+    return os.path.join(base, *parts)
+
+
+def get_config_dir(*parts):
+    """
+    Return the directory of the seahorse config file, joined with parts.
+    The directory is not created.
+    """
+    return os.path.join(
+        os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config"),
+        "seahorse",
+        *parts,
+    )
+
+
+def get_data_dir(*parts):
+    """
+    Return the directory seahorse keeps persistent state in, joined with
+    parts. SEAHORSE_STATE_DIR overrides the default XDG data location.
+    The directory is not created.
+    """
+    base = os.environ.get("SEAHORSE_STATE_DIR")
+    if not base:
+        base = os.path.join(
+            os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share"),
+            "seahorse",
+        )
+    return os.path.join(base, *parts)
+
+
+def atomic_write(path, data, mode="w"):
+    """
+    Write data to path through a temporary file in the same directory so
+    concurrent readers never observe a partially written file.
+    """
+    directory = os.path.dirname(path) or os.curdir
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, mode) as fh:
+            fh.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
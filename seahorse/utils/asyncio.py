@@ -0,0 +1,47 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class _ManagedLoop:
+    """
+    Owner of a thread's event loop, closing it when the thread's locals are
+    released so pool threads don't leak loops.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+
+    def __del__(self):
+        if not self.loop.is_closed() and not self.loop.is_running():
+            self.loop.close()
+
+
+_local = threading.local()
+
+
+def get_managed_loop():
+    """
+    Return this thread's event loop, creating it on first use. The loop is
+    kept open and reused by every later run_async() call in the thread.
+    """
+    managed = getattr(_local, "managed", None)
+    if managed is None or managed.loop.is_closed():
+        managed = _local.managed = _ManagedLoop()
+    return managed.loop
+
+
+def run_async(coro):
+    """
+    Run coro to completion from synchronous code and return its result.
+
+    The coroutine runs on the calling thread's managed loop. When that
+    thread is already running an event loop, which can't be blocked on
+    itself, the coroutine runs to completion on a helper thread instead.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return get_managed_loop().run_until_complete(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
@@ -1,4 +1,339 @@
+import copy
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from seahorse.conf import settings as seahorse_settings
+from seahorse.core import metrics
+
+
+class ConnectionDoesNotExist(Exception):
+    pass
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """
+    A bounded pool of connections created by factory.
+
+    At most max_size connections are open at once; acquire() blocks up to
+    timeout seconds for one to be released when all of them are in use.
+    Idle connections unused for max_idle seconds and connections older than
+    max_age seconds are closed instead of being handed out again, and every
+    idle connection must pass health_check(conn) on checkout.
+    """
+
+    def __init__(
+        self,
+        factory,
+        max_size=8,
+        max_idle=300.0,
+        max_age=3600.0,
+        timeout=30.0,
+        health_check=None,
+    ):
+        self.factory = factory
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.max_age = max_age
+        self.timeout = timeout
+        self.health_check = health_check
+        self._cond = threading.Condition()
+        # (connection, last used) pairs, most recently used last.
+        self._idle = deque()
+        self._created = {}
+        self._size = 0
+        self._closed = False
+        self._counters = {
+            "created": 0,
+            "reused": 0,
+            "closed": 0,
+            "evicted": 0,
+            "unhealthy": 0,
+            "waits": 0,
+            "timeouts": 0,
+        }
+
+    def _expired(self, conn, now, last_used=None):
+        if self.max_age is not None and now - self._created[id(conn)] > self.max_age:
+            return True
+        return (
+            last_used is not None
+            and self.max_idle is not None
+            and now - last_used > self.max_idle
+        )
+
+    def _close(self, conn):
+        # Called with the lock held. Only the pool's own connections count,
+        # a connection closed twice or created elsewhere leaves _size alone.
+        if id(conn) in self._created:
+            del self._created[id(conn)]
+            self._size -= 1
+            self._counters["closed"] += 1
+            self._cond.notify()
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _evict(self, now):
+        # Called with the lock held. The oldest idle connections are at the
+        # left of the deque.
+        for conn, last_used in list(self._idle):
+            if self._expired(conn, now, last_used):
+                self._idle.remove((conn, last_used))
+                self._counters["evicted"] += 1
+                self._close(conn)
+
+    def acquire(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            conn = None
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("The connection pool is closed.")
+                self._evict(time.monotonic())
+                if self._idle:
+                    conn, _ = self._idle.pop()
+                elif self._size < self.max_size:
+                    self._size += 1
+                else:
+                    self._counters["waits"] += 1
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._cond.wait(remaining):
+                        self._counters["timeouts"] += 1
+                        raise PoolTimeout(
+                            "No connection became available within %ss." % timeout
+                        )
+                    continue
+            if conn is None:
+                break
+            # Health checks may be network round trips, run them unlocked.
+            if self.health_check is None or self.health_check(conn):
+                with self._cond:
+                    self._counters["reused"] += 1
+                return conn
+            with self._cond:
+                self._counters["unhealthy"] += 1
+                self._close(conn)
+        try:
+            conn = self.factory()
+        except BaseException:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._created[id(conn)] = time.monotonic()
+            self._counters["created"] += 1
+        return conn
+
+    def release(self, conn):
+        with self._cond:
+            if id(conn) in self._created:
+                if self._closed or self._expired(conn, time.monotonic()):
+                    self._close(conn)
+                else:
+                    self._idle.append((conn, time.monotonic()))
+                    self._cond.notify()
+                return
+        # Not one of the pool's connections, e.g. one assigned through the
+        # handler's __setitem__: close it without counting it.
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def discard(self, conn):
+        """
+        Close a checked out connection that must not be reused.
+        """
+        with self._cond:
+            self._close(conn)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        except BaseException:
+            # The connection may be left mid-protocol, e.g. by a socket error
+            # or a partly read reply, don't hand it out again.
+            self.discard(conn)
+            raise
+        self.release(conn)
+
+    def close(self):
+        """
+        Close the idle connections; connections in use are closed when
+        they are released.
+        """
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.popleft()
+                self._close(conn)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "max_size": self.max_size,
+                **self._counters,
+            }
 
 
 class BaseConnectionHandler:
-    pass
\ No newline at end of file
+    """
+    Hand out connections from a mapping of alias -> settings dict.
+
+    Connections are created lazily, on the first access to an alias, from
+    a per-alias ConnectionPool. A thread keeps the connection it checked out
+    for an alias until close_all() returns it to the pool, so consecutive
+    commands in a thread reuse it and concurrent commands share a bounded
+    set of connections.
+    """
+
+    settings_name = None
+    exception_class = ConnectionDoesNotExist
+
+    def __init__(self, settings=None):
+        self._settings = settings
+        self._connections = threading.local()
+        self._pools = {}
+        self._pools_lock = threading.Lock()
+        metrics.POOL_CONNECTIONS.add_callback(self.pool_usage)
+
+    @property
+    def settings(self):
+        if not hasattr(self, "_configured_settings"):
+            self._configured_settings = self.configure_settings(self._settings)
+        return self._configured_settings
+
+    def configure_settings(self, settings):
+        if settings is None:
+            if self.settings_name is None:
+                return {}
+            # A copy, subclasses fill in defaults.
+            settings = copy.deepcopy(getattr(seahorse_settings, self.settings_name))
+        return settings
+
+    def create_connection(self, alias):
+        raise NotImplementedError("Subclasses must implement create_connection().")
+
+    def is_usable(self, alias, conn):
+        """
+        Health check run on every connection taken from the idle pool.
+        """
+        return True
+
+    def pool_options(self, alias):
+        """
+        Keyword arguments of the ConnectionPool of alias.
+        """
+        return {}
+
+    def get_pool(self, alias):
+        try:
+            return self._pools[alias]
+        except KeyError:
+            pass
+        if alias not in self.settings:
+            raise self.exception_class(f"The connection '{alias}' doesn't exist.")
+        with self._pools_lock:
+            if alias not in self._pools:
+                self._pools[alias] = ConnectionPool(
+                    lambda: self.create_connection(alias),
+                    health_check=lambda conn: self.is_usable(alias, conn),
+                    **self.pool_options(alias),
+                )
+            return self._pools[alias]
+
+    def __getitem__(self, alias):
+        try:
+            return getattr(self._connections, alias)
+        except AttributeError:
+            pass
+        conn = self.get_pool(alias).acquire()
+        setattr(self._connections, alias, conn)
+        return conn
+
+    def __setitem__(self, key, value):
+        setattr(self._connections, key, value)
+
+    def __delitem__(self, key):
+        delattr(self._connections, key)
+
+    def __iter__(self):
+        return iter(self.settings)
+
+    def all(self, initialized_only=False):
+        return [
+            self[alias]
+            for alias in self
+            # If initialized_only is True, return only initialized connections.
+            if not initialized_only or hasattr(self._connections, alias)
+        ]
+
+    @contextmanager
+    def checkout(self, alias):
+        """
+        Borrow a connection of alias for the duration of a block, e.g. for
+        an asyncio task that must not share its thread's connection.
+        """
+        with self.get_pool(alias).connection() as conn:
+            yield conn
+
+    def close_all(self):
+        """
+        Return the connections checked out by the current thread to their
+        pools.
+        """
+        for alias in self:
+            conn = getattr(self._connections, alias, None)
+            if conn is not None:
+                delattr(self._connections, alias)
+                self.get_pool(alias).release(conn)
+
+    def shutdown(self):
+        """
+        Close every pooled connection.
+        """
+        self.close_all()
+        with self._pools_lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            pool.close()
+
+    def configure(self, settings=None):
+        """
+        Close every pooled connection and use settings from now on, by
+        default those of the settings module, read again.
+        """
+        self.shutdown()
+        self._settings = settings
+        self.__dict__.pop("_configured_settings", None)
+
+    def stats(self):
+        """
+        Return {alias: pool statistics} for the aliases in use.
+        """
+        return {alias: pool.stats() for alias, pool in list(self._pools.items())}
+
+    def pool_usage(self):
+        """
+        Return the seahorse_pool_connections samples of the handler.
+        """
+        handler = self.settings_name or type(self).__name__
+        usage = {}
+        for alias, stats in self.stats().items():
+            usage[(handler, alias, "in_use")] = stats["in_use"]
+            usage[(handler, alias, "idle")] = stats["idle"]
+        return usage
@@ -1,4 +1,6 @@
 
+import threading
+from collections import OrderedDict
 from collections.abc import Mapping
 
 class ImmutableList(tuple):
@@ -36,6 +38,8 @@ class CaseInsensitiveMapping(Mapping):
     Original case of keys is preserved for iterations and string
     representation
     """
+    __slots__ = ("_store",)
+
     def __init__(self, data):
         self._store = {k.lower(): (k, v) for k, v in self._unpack_items(data)}
     
@@ -46,12 +50,23 @@ class CaseInsensitiveMapping(Mapping):
         return len(self._store)
     
     def __eq__(self, other):
-        if isinstance(other, Mapping):
-            return (
-                {k.lower(): v for k, v in self.items()}
-                ==
-                {k.lower(): v for k, v in other.items()}
-            )
+        if self is other:
+            return True
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        if not isinstance(other, CaseInsensitiveMapping):
+            other = CaseInsensitiveMapping(other)
+        if len(self) != len(other):
+            return False
+        # Compare in place, without building lowered copies of both sides.
+        other_store = other._store
+        for lower_key, (_, value) in self._store.items():
+            try:
+                if other_store[lower_key][1] != value:
+                    return False
+            except KeyError:
+                return False
+        return True
 
     def __iter__(self):
         return (org_key for org_key, value in self._store.values())
@@ -70,4 +85,63 @@ class CaseInsensitiveMapping(Mapping):
                 raise ValueError("#{} {}".format(i,len(elem)))
             if not isinstance(elem[0], str):
                 raise ValueError(" %r"%elem[0])
-            yield elem
\ No newline at end of file
+            yield elem
+
+class LRUCache:
+    """
+    A thread-safe mapping of at most maxsize items, evicting the least
+    recently used item first.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def items(self):
+        """
+        Return a list of the (key, value) pairs, least recently used first.
+        """
+        with self._lock:
+            return list(self._data.items())
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def info(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+        }
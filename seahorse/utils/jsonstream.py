@@ -0,0 +1,492 @@
+"""
+Incremental JSON parsing and comparison.
+
+iter_events() reads a document from a file in chunks and yields its parse
+events, so that memory use depends on the nesting depth of the document
+and the size of its largest string, not on its size:
+
+    ("start_map", None), ("key", name), ("end_map", None),
+    ("start_array", None), ("end_array", None), ("scalar", value)
+
+compare_events() walks two event streams in lockstep and raises
+JSONMismatch at the first difference, with the JSON path of the value,
+e.g. $.clusters[3].nodepools[0].size. Objects whose keys come in different
+orders and lists compared regardless of order are the only values built in
+memory, one at a time.
+
+Paths of ignored values and of unordered lists are patterns in the same
+syntax, where * stands for any key or index: $.meta.generated_at,
+$.clusters[*].id, $.resources.
+"""
+import codecs
+import io
+import json
+import re
+from collections import Counter
+from json.decoder import scanstring
+
+CHUNK_SIZE = 64 * 1024
+
+WHITESPACE = " \t\n\r"
+WHITESPACE_RE = re.compile(r"[ \t\n\r]*")
+NUMBER_RE = re.compile(r"-?(?:0|[1-9]\d*)(\.\d+)?([eE][-+]?\d+)?")
+LITERALS = {"t": ("true", True), "f": ("false", False), "n": ("null", None)}
+PATH_RE = re.compile(
+    r"\.([A-Za-z_][\w-]*|\*)|\[(\d+|\*)\]|\[(\"(?:[^\"\\]|\\.)*\")\]"
+)
+IDENTIFIER_RE = re.compile(r"[A-Za-z_][\w-]*\Z")
+ANY = "*"
+
+
+class JSONMismatch(AssertionError):
+    def __init__(self, path, message):
+        super().__init__("%s: %s" % (format_path(path), message))
+        self.path = path
+        self.message = message
+
+
+def format_path(path):
+    """
+    Return the JSON path of a tuple of keys and indexes.
+    """
+    parts = ["$"]
+    for part in path:
+        if isinstance(part, int):
+            parts.append("[%d]" % part)
+        elif part == ANY:
+            parts.append("[*]")
+        elif IDENTIFIER_RE.match(part):
+            parts.append(".%s" % part)
+        else:
+            parts.append("[%s]" % json.dumps(part))
+    return "".join(parts)
+
+
+def parse_path(text):
+    """
+    Return the tuple of keys, indexes and ANY of a JSON path.
+    """
+    if not text.startswith("$"):
+        raise ValueError("Invalid JSON path %r, it must start with $." % text)
+    path = []
+    pos = 1
+    while pos < len(text):
+        match = PATH_RE.match(text, pos)
+        if match is None:
+            raise ValueError("Invalid JSON path %r at %r." % (text, text[pos:]))
+        name, index, quoted = match.groups()
+        if name is not None:
+            path.append(name)
+        elif index is not None:
+            path.append(ANY if index == ANY else int(index))
+        else:
+            path.append(json.loads(quoted))
+        pos = match.end()
+    return tuple(path)
+
+
+class PathSet:
+    """
+    A set of path patterns, matched against concrete paths.
+    """
+
+    def __init__(self, patterns=()):
+        self.by_length = {}
+        for pattern in patterns:
+            if isinstance(pattern, str):
+                pattern = parse_path(pattern)
+            self.by_length.setdefault(len(pattern), []).append(pattern)
+
+    def __bool__(self):
+        return bool(self.by_length)
+
+    def __contains__(self, path):
+        for pattern in self.by_length.get(len(path), ()):
+            if all(
+                expected == ANY or expected == part
+                for expected, part in zip(pattern, path)
+            ):
+                return True
+        return False
+
+
+class _Tokenizer:
+    def __init__(self, fh, chunk_size):
+        self.fh = fh
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        # Binary files may split a character between two chunks.
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+
+    def _fill(self):
+        """
+        Read one more chunk, dropping what was consumed. Return False at the
+        end of the file.
+        """
+        if self.eof:
+            return False
+        data = self.fh.read(self.chunk_size)
+        chunk = self.decoder.decode(data, not data) if isinstance(data, bytes) else data
+        if not data:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def error(self, message):
+        return json.JSONDecodeError(message, self.buffer, self.pos)
+
+    def peek(self):
+        """
+        Return the next non-whitespace character, "" at the end of file.
+        """
+        while True:
+            if self.pos < len(self.buffer):
+                char = self.buffer[self.pos]
+                if char not in WHITESPACE:
+                    return char
+                self.pos = WHITESPACE_RE.match(self.buffer, self.pos).end()
+                if self.pos < len(self.buffer):
+                    return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise self.error("Expecting %r" % char)
+        self.pos += 1
+
+    def string(self):
+        while True:
+            try:
+                value, end = scanstring(self.buffer, self.pos + 1)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            self.pos = end
+            return value
+
+    def number(self):
+        # Look ahead far enough for "1." or "1e+" not to end a chunk.
+        while len(self.buffer) - self.pos < 64 and self._fill():
+            pass
+        while True:
+            match = NUMBER_RE.match(self.buffer, self.pos)
+            if match is None:
+                raise self.error("Expecting value")
+            if match.end() == len(self.buffer) and self._fill():
+                continue
+            self.pos = match.end()
+            integer = match.group(1) is None and match.group(2) is None
+            return int(match.group()) if integer else float(match.group())
+
+    def literal(self):
+        text, value = LITERALS[self.buffer[self.pos]]
+        while len(self.buffer) - self.pos < len(text) and self._fill():
+            pass
+        if not self.buffer.startswith(text, self.pos):
+            raise self.error("Expecting value")
+        self.pos += len(text)
+        return value
+
+
+def iter_events(fh, chunk_size=CHUNK_SIZE):
+    """
+    Yield the (event, value) pairs of the JSON document read from fh, a
+    text or binary file.
+    """
+    tokens = _Tokenizer(fh, chunk_size)
+    # The containers being parsed, True for objects.
+    stack = []
+    while True:
+        char = tokens.peek()
+        if char == "{":
+            tokens.pos += 1
+            yield "start_map", None
+            if tokens.peek() == "}":
+                tokens.pos += 1
+                yield "end_map", None
+            else:
+                stack.append(True)
+                if tokens.peek() != '"':
+                    raise tokens.error("Expecting property name")
+                yield "key", tokens.string()
+                tokens.expect(":")
+                continue
+        elif char == "[":
+            tokens.pos += 1
+            yield "start_array", None
+            if tokens.peek() == "]":
+                tokens.pos += 1
+                yield "end_array", None
+            else:
+                stack.append(False)
+                continue
+        elif char == '"':
+            yield "scalar", tokens.string()
+        elif char in LITERALS:
+            yield "scalar", tokens.literal()
+        elif char:
+            yield "scalar", tokens.number()
+        else:
+            raise tokens.error("Expecting value")
+        # A value ended: close containers until one has more items.
+        while stack:
+            char = tokens.peek()
+            if char == ",":
+                tokens.pos += 1
+                if stack[-1]:
+                    if tokens.peek() != '"':
+                        raise tokens.error("Expecting property name")
+                    yield "key", tokens.string()
+                    tokens.expect(":")
+                break
+            if char == ("}" if stack[-1] else "]"):
+                tokens.pos += 1
+                yield ("end_map" if stack.pop() else "end_array"), None
+            else:
+                raise tokens.error("Expecting ',' delimiter")
+        else:
+            if tokens.peek():
+                raise tokens.error("Extra data")
+            return
+
+
+def iter_object_events(value):
+    """
+    Yield the parse events of a document already loaded in memory.
+    """
+    if isinstance(value, dict):
+        yield "start_map", None
+        for key, item in value.items():
+            yield "key", key
+            yield from iter_object_events(item)
+        yield "end_map", None
+    elif isinstance(value, (list, tuple)):
+        yield "start_array", None
+        for item in value:
+            yield from iter_object_events(item)
+        yield "end_array", None
+    else:
+        yield "scalar", value
+
+
+def open_events(document, chunk_size=CHUNK_SIZE):
+    """
+    Return the events of a document: a file object, JSON text, or data.
+    """
+    if hasattr(document, "read"):
+        return iter_events(document, chunk_size)
+    if isinstance(document, bytes):
+        document = document.decode()
+    if isinstance(document, str):
+        return iter_events(io.StringIO(document), chunk_size)
+    return iter_object_events(document)
+
+
+def build_value(events, event):
+    """
+    Return the value starting with event, consuming the rest of it.
+    """
+    kind, value = event
+    if kind == "scalar":
+        return value
+    if kind == "start_map":
+        result = {}
+        for kind, key in events:
+            if kind == "end_map":
+                return result
+            result[key] = build_value(events, next(events))
+    if kind == "start_array":
+        result = []
+        for event in events:
+            if event[0] == "end_array":
+                return result
+            result.append(build_value(events, event))
+    raise ValueError("Unexpected %s event." % kind)
+
+
+def _describe(value):
+    if isinstance(value, dict):
+        return "an object"
+    if isinstance(value, list):
+        return "an array"
+    return json.dumps(value)
+
+
+def _same_scalar(first, second):
+    # 1 == 1.0 as in JSON, but True != 1.
+    return first == second and isinstance(first, bool) == isinstance(second, bool)
+
+
+class Comparator:
+    def __init__(self, ignore_paths=(), unordered_paths=()):
+        self.ignore = PathSet(ignore_paths)
+        self.unordered = PathSet(unordered_paths)
+
+    def compare_events(self, first, second):
+        """
+        Compare two event streams, raising JSONMismatch at the first
+        difference.
+        """
+        first, second = iter(first), iter(second)
+        self._compare_streams(first, second, next(first), next(second), ())
+
+    def _compare_streams(self, first, second, event1, event2, path):
+        if path in self.ignore:
+            build_value(first, event1)
+            build_value(second, event2)
+            return
+        kind1, kind2 = event1[0], event2[0]
+        if kind1 != kind2 or kind1 == "scalar" or path in self.unordered:
+            # Build the values, scalars are already built.
+            self.compare_values(
+                build_value(first, event1), build_value(second, event2), path
+            )
+        elif kind1 == "start_array":
+            index = 0
+            while True:
+                event1, event2 = next(first), next(second)
+                if event1[0] == "end_array" or event2[0] == "end_array":
+                    if event1[0] != event2[0]:
+                        self._length_mismatch(
+                            first, second, event1, event2, index, path
+                        )
+                    return
+                self._compare_streams(first, second, event1, event2, path + (index,))
+                index += 1
+        else:
+            while True:
+                event1, event2 = next(first), next(second)
+                if event1 != event2:
+                    break
+                if event1[0] == "end_map":
+                    return
+                key = event1[1]
+                self._compare_streams(
+                    first, second, next(first), next(second), path + (key,)
+                )
+            # The keys diverge: build what is left of both objects.
+            self.compare_values(
+                self._rest_of_map(first, event1),
+                self._rest_of_map(second, event2),
+                path,
+            )
+
+    def _rest_of_map(self, events, event):
+        result = {}
+        while event[0] != "end_map":
+            result[event[1]] = build_value(events, next(events))
+            event = next(events)
+        return result
+
+    def _length_mismatch(self, first, second, event1, event2, index, path):
+        if event1[0] == "end_array":
+            extra, where = build_value(second, event2), "second"
+        else:
+            extra, where = build_value(first, event1), "first"
+        raise JSONMismatch(
+            path + (index,), "only in the %s document: %s" % (where, _describe(extra))
+        )
+
+    def compare_values(self, first, second, path=()):
+        """
+        Compare two values loaded in memory, raising JSONMismatch at the
+        first difference.
+        """
+        if path in self.ignore:
+            return
+        if isinstance(first, dict) and isinstance(second, dict):
+            for key in first:
+                if key not in second and path + (key,) not in self.ignore:
+                    raise JSONMismatch(
+                        path + (key,), "only in the first document: %s"
+                        % _describe(first[key]),
+                    )
+            for key in second:
+                if key not in first and path + (key,) not in self.ignore:
+                    raise JSONMismatch(
+                        path + (key,), "only in the second document: %s"
+                        % _describe(second[key]),
+                    )
+            for key in first:
+                if key in second:
+                    self.compare_values(first[key], second[key], path + (key,))
+        elif isinstance(first, list) and isinstance(second, list):
+            if path in self.unordered:
+                self._compare_unordered(first, second, path)
+                return
+            for index, (item1, item2) in enumerate(zip(first, second)):
+                self.compare_values(item1, item2, path + (index,))
+            if len(first) != len(second):
+                longer, where = (
+                    (first, "first") if len(first) > len(second) else (second, "second")
+                )
+                index = min(len(first), len(second))
+                raise JSONMismatch(
+                    path + (index,),
+                    "only in the %s document: %s" % (where, _describe(longer[index])),
+                )
+        elif type(first) in (dict, list) or type(second) in (dict, list):
+            raise JSONMismatch(path, "%s != %s" % (_describe(first), _describe(second)))
+        elif not _same_scalar(first, second):
+            raise JSONMismatch(path, "%s != %s" % (_describe(first), _describe(second)))
+
+    def _canonical(self, value, path):
+        """
+        Return a hashable form of value without its ignored parts, for the
+        items of unordered lists.
+        """
+        if isinstance(value, dict):
+            return tuple(
+                sorted(
+                    (key, self._canonical(item, path + (key,)))
+                    for key, item in value.items()
+                    if path + (key,) not in self.ignore
+                )
+            )
+        if isinstance(value, list):
+            items = [
+                self._canonical(item, path + (index,))
+                for index, item in enumerate(value)
+                if path + (index,) not in self.ignore
+            ]
+            if path in self.unordered:
+                items.sort(key=repr)
+            return ("list", tuple(items))
+        return (type(value) is bool, value)
+
+    def _compare_unordered(self, first, second, path):
+        item_path = path + (ANY,)
+        remaining = Counter(self._canonical(item, item_path) for item in second)
+        for index, item in enumerate(first):
+            key = self._canonical(item, item_path)
+            if remaining[key] <= 0:
+                raise JSONMismatch(
+                    path + (index,),
+                    "%s has no match in the second document" % _describe(item),
+                )
+            remaining[key] -= 1
+        for index, item in enumerate(second):
+            key = self._canonical(item, item_path)
+            if remaining[key] > 0:
+                raise JSONMismatch(
+                    path + (index,),
+                    "%s has no match in the first document" % _describe(item),
+                )
+
+
+def compare_documents(
+    first, second, ignore_paths=(), unordered_paths=(), chunk_size=CHUNK_SIZE
+):
+    """
+    Compare two JSON documents, file objects, JSON text or data, raising
+    JSONMismatch at the first difference.
+    """
+    Comparator(ignore_paths, unordered_paths).compare_events(
+        open_events(first, chunk_size), open_events(second, chunk_size)
+    )
@@ -0,0 +1,30 @@
+def percentile(values, q):
+    """
+    Return the q-th percentile (0-100) of values with linear interpolation
+    between the closest ranks.
+    """
+    if not values:
+        raise ValueError("percentile() of an empty sequence.")
+    values = sorted(values)
+    rank = (len(values) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+def summarize(samples):
+    """
+    Return count, mean, min, p50, p90, p99 and max of samples.
+    """
+    samples = sorted(samples)
+    if not samples:
+        return {"count": 0}
+    return {
+        "count": len(samples),
+        "mean": sum(samples) / len(samples),
+        "min": samples[0],
+        "p50": percentile(samples, 50),
+        "p90": percentile(samples, 90),
+        "p99": percentile(samples, 99),
+        "max": samples[-1],
+    }
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+from io import StringIO
+
+from seahorse.core import management
+from seahorse.core.management import (
+    AsyncBaseCommand,
+    acall_command,
+    acall_commands,
+    call_command,
+)
+from seahorse.test import SimpleTestCase
+
+
+class SleepCommand(AsyncBaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument("--name", default="cluster")
+        parser.add_argument("--delay", type=float, default=0)
+
+    async def handle(self, *args, **options):
+        await asyncio.sleep(options["delay"])
+        self.thread = threading.current_thread()
+        return "ready %s" % options["name"]
+
+
+class AsyncCommandTests(SimpleTestCase):
+    def test_call_command(self):
+        stdout = StringIO()
+        self.assertEqual(call_command(SleepCommand(), stdout=stdout), "ready cluster")
+        self.assertEqual(stdout.getvalue(), "ready cluster\n")
+
+    def test_call_command_reuses_managed_loop(self):
+        loops = []
+
+        class LoopCommand(AsyncBaseCommand):
+            async def handle(self, *args, **options):
+                loops.append(asyncio.get_running_loop())
+
+        call_command(LoopCommand(stdout=StringIO()))
+        call_command(LoopCommand(stdout=StringIO()))
+        self.assertIs(loops[0], loops[1])
+
+    def test_acall_command_runs_on_callers_loop(self):
+        command = SleepCommand(stdout=StringIO())
+
+        async def main():
+            return await acall_command(command, name="a"), threading.current_thread()
+
+        value, thread = asyncio.run(main())
+        self.assertEqual(value, "ready a")
+        self.assertIs(command.thread, thread)
+
+    def test_acall_command_sync_command(self):
+        stdout = StringIO()
+        asyncio.run(acall_command("eks", vpcid=["vpc-1"], force=True, stdout=stdout))
+        self.assertIn("eks cluster vpc-1\n", stdout.getvalue())
+
+    def test_call_command_inside_running_loop(self):
+        async def main():
+            return call_command(SleepCommand(stdout=StringIO()), name="nested")
+
+        self.assertEqual(asyncio.run(main()), "ready nested")
+
+    def test_acall_commands_concurrent(self):
+        invocations = [
+            (SleepCommand, {"name": str(i), "delay": 0.1}) for i in range(200)
+        ]
+
+        async def main():
+            return [r async for r in acall_commands(invocations, max_workers=200)]
+
+        start = time.perf_counter()
+        results = asyncio.run(main())
+        self.assertLess(time.perf_counter() - start, 2)
+        self.assertEqual([r.value for r in results], ["ready %d" % i for i in range(200)])
+
+    def test_parallel_option_runs_tasks(self):
+        class FleetCommand(SleepCommand):
+            def iter_targets(self, *args, **options):
+                for name in ("a", "b", "c"):
+                    yield args, dict(options, name=name)
+
+        stdout = StringIO()
+        management.call_command(FleetCommand(), parallel=3, delay=0.01, stdout=stdout)
+        self.assertEqual(
+            sorted(stdout.getvalue().splitlines()), ["ready a", "ready b", "ready c"]
+        )
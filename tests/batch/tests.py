@@ -0,0 +1,115 @@
+import threading
+import time
+from io import StringIO
+
+from seahorse.core import management
+from seahorse.core.management import BaseCommand, CommandError, call_commands
+from seahorse.test import SimpleTestCase
+
+
+class EchoCommand(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument("--name")
+        parser.add_argument("--delay", type=float, default=0)
+        parser.add_argument("--fail", action="store_true")
+
+    def handle(self, *args, **options):
+        time.sleep(options["delay"])
+        if options["fail"]:
+            raise CommandError("%s failed" % options["name"])
+        self.stderr.write("done %s" % options["name"])
+        return "hello %s" % options["name"]
+
+
+class CallCommandsTests(SimpleTestCase):
+    def test_ordered_results(self):
+        invocations = [
+            (EchoCommand, {"name": str(i), "delay": 0.02 * (5 - i)}) for i in range(5)
+        ]
+        results = list(call_commands(invocations, max_workers=5))
+        self.assertEqual([r.index for r in results], list(range(5)))
+        self.assertEqual([r.value for r in results], ["hello %d" % i for i in range(5)])
+        self.assertEqual(results[2].stdout, "hello 2\n")
+        self.assertEqual(results[2].stderr, "done 2\n")
+
+    def test_as_completed(self):
+        invocations = [
+            (EchoCommand, {"name": "slow", "delay": 0.2}),
+            (EchoCommand, {"name": "fast"}),
+        ]
+        results = list(call_commands(invocations, max_workers=2, ordered=False))
+        self.assertEqual([r.value for r in results], ["hello fast", "hello slow"])
+
+    def test_exceptions_are_collected(self):
+        results = list(
+            call_commands(
+                [(EchoCommand, {"name": "a", "fail": True}), (EchoCommand, {"name": "b"})]
+            )
+        )
+        self.assertIsInstance(results[0].exception, CommandError)
+        self.assertFalse(results[0].ok)
+        self.assertTrue(results[1].ok)
+
+    def test_concurrency_is_bounded(self):
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        class TrackingCommand(BaseCommand):
+            def handle(self, *args, **options):
+                with lock:
+                    running.append(1)
+                    peak.append(len(running))
+                time.sleep(0.01)
+                with lock:
+                    running.pop()
+
+        list(call_commands((TrackingCommand for _ in range(12)), max_workers=3))
+        self.assertEqual(len(peak), 12)
+        self.assertLessEqual(max(peak), 3)
+
+    def test_unknown_executor(self):
+        with self.assertRaisesRegex(ValueError, "executor must be one of"):
+            list(call_commands(["eks"], executor="fiber"))
+
+    def test_process_executor(self):
+        results = list(
+            call_commands(
+                [("eks", {"vpcid": ["vpc-1"], "force": True})], executor="process"
+            )
+        )
+        self.assertIn("eks cluster vpc-1\n", results[0].stdout)
+
+
+class ParallelOptionTests(SimpleTestCase):
+    def test_eks_fans_out_targets(self):
+        stdout = StringIO()
+        management.call_command(
+            "eks",
+            vpcid=["vpc-1", "vpc-2", "vpc-3"],
+            CIDR=["10.0.0.0/16", "10.1.0.0/16", "10.2.0.0/16"],
+            parallel=3,
+            force=True,
+            stdout=stdout,
+        )
+        lines = stdout.getvalue().splitlines()
+        for vpcid, cidr in (
+            ("vpc-1", "10.0.0.0/16"),
+            ("vpc-2", "10.1.0.0/16"),
+            ("vpc-3", "10.2.0.0/16"),
+        ):
+            self.assertIn("eks subnets %s cidr=%s" % (vpcid, cidr), lines)
+            self.assertIn("eks cluster %s" % vpcid, lines)
+
+    def test_failed_targets_raise(self):
+        class FailingCommand(EchoCommand):
+            def iter_targets(self, *args, **options):
+                for name in ("a", "b"):
+                    yield args, dict(options, name=name, fail=name == "b")
+
+        stderr = StringIO()
+        with self.assertRaisesRegex(CommandError, "1 of 2 targets failed"):
+            management.call_command(
+                FailingCommand(), parallel=2, stdout=StringIO(), stderr=stderr
+            )
+        self.assertIn("b failed", stderr.getvalue())
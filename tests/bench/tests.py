@@ -0,0 +1,97 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from seahorse.bench import compare, get_benchmarks, run_benchmarks, time_calls
+from seahorse.core.management import CommandError, call_command
+from seahorse.test import SimpleTestCase
+
+
+class RunBenchmarksTests(SimpleTestCase):
+    def test_registry(self):
+        benchmarks = get_benchmarks()
+        for name in (
+            "startup.version",
+            "commands.get_commands",
+            "commands.load_command_class",
+            "parser.create_parser",
+            "parser.call_command",
+            "output.write",
+            "mapping.construct",
+            "mapping.lookup",
+            "mapping.eq",
+        ):
+            self.assertIn(name, benchmarks)
+
+    def test_run_group(self):
+        results = run_benchmarks(["mapping"], repeat=2, scale=10)
+        self.assertEqual(
+            list(results["benchmarks"]),
+            ["mapping.construct", "mapping.lookup", "mapping.eq"],
+        )
+        result = results["benchmarks"]["mapping.eq"]
+        self.assertEqual(result["count"], 2)
+        self.assertEqual(result["group"], "mapping")
+        self.assertLessEqual(result["min"], result["max"])
+        self.assertEqual(results["meta"]["scale"], 10)
+
+    def test_startup_not_forwarded_to_server(self):
+        with mock.patch("seahorse.bench.framework.subprocess.run") as run:
+            run_benchmarks(["startup"], repeat=1)
+        self.assertEqual(run.call_args.kwargs["env"]["SEAHORSE_NO_SERVER"], "1")
+
+    def test_time_calls(self):
+        calls = []
+        samples = time_calls(lambda: calls.append(1), repeat=3, number=4)
+        self.assertEqual(len(samples), 3)
+        self.assertEqual(len(calls), 12)
+
+    def test_compare(self):
+        baseline = {"benchmarks": {"a": {"min": 1.0}, "b": {"min": 1.0}}}
+        results = {
+            "benchmarks": {"a": {"min": 1.05}, "b": {"min": 1.5}, "c": {"min": 1.0}}
+        }
+        self.assertEqual(
+            compare(results, baseline, threshold=0.1),
+            [("a", 1.0, 1.05, 1.05, False), ("b", 1.0, 1.5, 1.5, True)],
+        )
+
+
+class BenchCommandTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "results.json")
+
+    def bench(self, *args, **options):
+        out = StringIO()
+        call_command("bench", *args, repeat=1, scale=10, stdout=out, **options)
+        return out.getvalue()
+
+    def test_list(self):
+        output = self.bench(list=True)
+        self.assertIn("parser.call_command", output)
+
+    def test_save(self):
+        output = self.bench("output.write", save=self.path)
+        self.assertIn("Results written to %s" % self.path, output)
+        with open(self.path) as fh:
+            self.assertEqual(list(json.load(fh)["benchmarks"]), ["output.write"])
+
+    def test_compare_regression(self):
+        with open(self.path, "w") as fh:
+            json.dump({"benchmarks": {"mapping.lookup": {"min": 1e-12}}}, fh)
+        with self.assertRaisesRegex(CommandError, "1 of 1 benchmarks regressed"):
+            self.bench("mapping.lookup", compare=self.path)
+
+    def test_compare_no_regression(self):
+        with open(self.path, "w") as fh:
+            json.dump({"benchmarks": {"mapping.lookup": {"min": 1.0}}}, fh)
+        output = self.bench("mapping.lookup", compare=self.path)
+        self.assertNotIn("REGRESSION", output)
+
+    def test_unknown_benchmark(self):
+        with self.assertRaisesRegex(CommandError, "Unknown benchmark.*nope"):
+            self.bench("nope")
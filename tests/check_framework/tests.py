@@ -0,0 +1,190 @@
+import os
+import tempfile
+import threading
+from io import StringIO
+from unittest import mock
+
+from seahorse.conf import Settings, settings
+from seahorse.core import checks
+from seahorse.core.checks import Error, Warning
+from seahorse.core.checks.cloud import check_credentials, check_tools
+from seahorse.core.checks.registry import CheckRegistry
+from seahorse.core.management import BaseCommand, CommandError, call_command
+from seahorse.core.management.base import SystemCheckError
+from seahorse.test import SimpleTestCase
+
+
+class CacheDirMixin:
+    def setUp(self):
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch.dict(os.environ, {"SEAHORSE_CACHE_DIR": tmp.name})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class CheckRegistryTests(CacheDirMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.registry = CheckRegistry()
+
+    def test_register_and_run(self):
+        @self.registry.register("tag1")
+        def f(**kwargs):
+            return [Warning("f")]
+
+        def g(**kwargs):
+            return [Error("g")]
+
+        self.registry.register(g, "tag2")
+        self.assertEqual(self.registry.run_checks(), [Warning("f"), Error("g")])
+        self.assertEqual(self.registry.run_checks(tags=["tag2"]), [Error("g")])
+        self.assertEqual(self.registry.tags_available(), {"tag1", "tag2"})
+
+    def test_deployment_checks(self):
+        self.registry.register(lambda **kwargs: [Warning("d")], "net", deploy=True)
+        self.assertEqual(self.registry.run_checks(), [])
+        self.assertFalse(self.registry.tag_exists("net"))
+        self.assertEqual(
+            self.registry.run_checks(include_deployment_checks=True), [Warning("d")]
+        )
+
+    def test_checks_run_concurrently(self):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def waiting_check(**kwargs):
+            barrier.wait()
+            return []
+
+        self.registry.register(waiting_check, "a")
+        self.registry.register(lambda **kwargs: waiting_check(), "b")
+        self.assertEqual(self.registry.run_checks(), [])
+
+    def test_not_a_list(self):
+        self.registry.register(lambda **kwargs: None, "a")
+        with self.assertRaisesRegex(TypeError, "did not return a list"):
+            self.registry.run_checks()
+
+    def test_memoized_until_inputs_change(self):
+        calls = []
+        inputs = {"version": 1}
+
+        def expensive(**kwargs):
+            calls.append(1)
+            return [Warning("slow", hint="h", id="t.W001")]
+
+        self.registry.register(expensive, "t", inputs=lambda: inputs["version"])
+        self.assertEqual(self.registry.run_checks(), self.registry.run_checks())
+        self.assertEqual(len(calls), 1)
+        # The memoized messages keep their class.
+        self.assertEqual(
+            self.registry.run_checks(), [Warning("slow", hint="h", id="t.W001")]
+        )
+        inputs["version"] = 2
+        self.registry.run_checks()
+        self.assertEqual(len(calls), 2)
+        self.registry.run_checks(use_cache=False)
+        self.assertEqual(len(calls), 3)
+
+    def test_ttl(self):
+        calls = []
+        self.registry.register(
+            lambda **kwargs: calls.append(1) or [], "t", inputs=lambda: 1, ttl=-1
+        )
+        self.registry.run_checks()
+        self.registry.run_checks()
+        self.assertEqual(len(calls), 2)
+
+    def test_memoized_with_read_only_cache(self):
+        calls = []
+        self.registry.register(
+            lambda **kwargs: calls.append(1) or [Warning("w")], "t", inputs=lambda: 1
+        )
+        with mock.patch(
+            "seahorse.core.checks.registry.atomic_write",
+            side_effect=PermissionError("read-only"),
+        ):
+            self.assertEqual(self.registry.run_checks(), [Warning("w")])
+        self.assertEqual(len(calls), 1)
+
+    def test_unmemoized(self):
+        calls = []
+        self.registry.register(lambda **kwargs: calls.append(1) or [], "t")
+        self.registry.run_checks()
+        self.registry.run_checks()
+        self.assertEqual(len(calls), 2)
+
+
+class CheckedCommand(BaseCommand):
+    requires_system_checks = ["t"]
+
+    def handle(self, *args, **options):
+        return "handled"
+
+
+class CommandChecksTests(CacheDirMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.registry = CheckRegistry()
+        patcher = mock.patch.object(checks, "run_checks", self.registry.run_checks)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def call(self, **options):
+        out, err = StringIO(), StringIO()
+        call_command(CheckedCommand(), stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_warnings_written_to_stderr(self):
+        self.registry.register(lambda **kwargs: [Warning("careful", id="t.W001")], "t")
+        out, err = self.call(skip_checks=False)
+        self.assertEqual(out, "handled\n")
+        self.assertIn("WARNINGS:\n?: (t.W001) careful", err)
+
+    def test_errors_raise(self):
+        self.registry.register(lambda **kwargs: [Error("broken", id="t.E001")], "t")
+        with self.assertRaisesRegex(SystemCheckError, r"\(t.E001\) broken"):
+            self.call(skip_checks=False)
+
+    def test_only_required_tags(self):
+        self.registry.register(lambda **kwargs: [Error("other")], "other")
+        self.assertEqual(self.call(skip_checks=False), ("handled\n", ""))
+
+    def test_skip_checks(self):
+        self.registry.register(lambda **kwargs: [Error("broken")], "t")
+        self.assertEqual(self.call(), ("handled\n", ""))
+
+    def test_check_command(self):
+        self.registry.register(lambda **kwargs: [Warning("careful")], "t")
+        out, err = StringIO(), StringIO()
+        call_command("check", stdout=out, stderr=err)
+        self.assertIn("System check identified 1 issue (0 silenced).", err.getvalue())
+        with self.assertRaises(SystemCheckError):
+            call_command("check", fail_level="WARNING", stdout=out, stderr=err)
+
+    def test_silenced(self):
+        self.registry.register(lambda **kwargs: [Error("broken", id="t.E001")], "t")
+        silenced = Settings(overrides={"SILENCED_SYSTEM_CHECKS": ["t.E001"]})
+        with mock.patch.object(settings, "_wrapped", silenced):
+            self.assertEqual(self.call(skip_checks=False), ("handled\n", ""))
+
+    def test_check_command_unknown_tag(self):
+        with self.assertRaisesRegex(CommandError, 'no system check with the "x" tag'):
+            call_command("check", tags=["x"])
+
+
+class CloudChecksTests(SimpleTestCase):
+    def test_missing_tool(self):
+        with mock.patch("seahorse.core.checks.cloud.which", return_value=None):
+            errors = check_tools("aws", ["aws"])
+        self.assertEqual([e.id for e in errors], ["aws.W001"])
+
+    def test_credentials_from_environment(self):
+        with mock.patch.dict(os.environ, {"AWS_PROFILE": "ci"}):
+            self.assertEqual(
+                check_credentials("aws", ["/nonexistent"], ["AWS_PROFILE"], "x"), []
+            )
+        with mock.patch.dict(os.environ, {"AWS_PROFILE": ""}):
+            errors = check_credentials("aws", ["/nonexistent"], ["AWS_PROFILE"], "x")
+        self.assertEqual([e.id for e in errors], ["aws.W003"])
@@ -0,0 +1,171 @@
+import random
+import threading
+from io import StringIO
+from unittest import mock
+
+from seahorse.bench.load import run_load
+from seahorse.cloud.cache import NOT_MODIFIED
+from seahorse.cloud.client import CloudClient, CloudError, get_client
+from seahorse.cloud.ratelimit import Throttled, TransientError, limiter
+from seahorse.core import management
+from seahorse.core.management import CommandError
+from seahorse.test import SimpleTestCase
+from seahorse.test.cloud import CloudServer, latency_sampler, parse_latency
+
+UNLIMITED = {
+    "*": {"read": {"rate": 1e6, "burst": 1e6}, "mutate": {"rate": 1e6, "burst": 1e6}}
+}
+
+
+class LatencyTests(SimpleTestCase):
+    def test_samplers(self):
+        rng = random.Random(0)
+        self.assertEqual(latency_sampler(None, rng)(), 0.0)
+        self.assertEqual(latency_sampler(0.5, rng)(), 0.5)
+        uniform = latency_sampler({"distribution": "uniform", "low": 1, "high": 2}, rng)
+        self.assertTrue(all(1 <= uniform() <= 2 for _ in range(100)))
+        lognormal = latency_sampler(
+            {"distribution": "lognormal", "median": 0.01, "sigma": 1}, rng
+        )
+        samples = sorted(lognormal() for _ in range(1001))
+        self.assertAlmostEqual(samples[500], 0.01, delta=0.003)
+        with self.assertRaisesRegex(ValueError, "Unknown latency distribution"):
+            latency_sampler({"distribution": "pareto"}, rng)
+
+    def test_parse_latency(self):
+        self.assertEqual(parse_latency("0.25"), 0.25)
+        self.assertEqual(
+            parse_latency("exponential:mean=0.1"),
+            {"distribution": "exponential", "mean": 0.1},
+        )
+        with self.assertRaisesRegex(ValueError, "lacks the 'high' parameter"):
+            parse_latency("uniform:low=1")
+        with self.assertRaisesRegex(ValueError, "Invalid latency"):
+            parse_latency("uniform:low")
+
+
+class CloudServerTests(SimpleTestCase):
+    def test_resources(self):
+        with CloudServer() as server:
+            client = CloudClient(server.url, "eks")
+            self.assertEqual(client.put("nodegroup", "vpc-1/a", {"size": 3})["generation"], 1)
+            value, etag = client.get("nodegroup", "vpc-1/a")
+            self.assertEqual((value["spec"], etag), ({"size": 3}, "1"))
+            self.assertIs(client.get("nodegroup", "vpc-1/a", etag), NOT_MODIFIED)
+            # Putting the same spec again is a no-op, a new one a new generation.
+            self.assertEqual(client.put("nodegroup", "vpc-1/a", {"size": 3})["generation"], 1)
+            self.assertEqual(client.put("nodegroup", "vpc-1/a", {"size": 4})["generation"], 2)
+            self.assertEqual(client.get("nodegroup", "vpc-1/a", etag)[1], "2")
+            with self.assertRaisesRegex(CloudError, "404"):
+                client.get("nodegroup", "missing")
+            client.close()
+        self.assertEqual(server.stats()["resources"], 1)
+
+    def test_throttling(self):
+        with CloudServer(throttle_rate=1, retry_after=7) as server:
+            client = CloudClient(server.url, "eks")
+            with self.assertRaises(Throttled) as cm:
+                client.put("vpc", "a", {})
+            self.assertEqual(cm.exception.retry_after, 7)
+        self.assertEqual(server.stats()["throttled"], 1)
+
+    def test_errors(self):
+        with CloudServer(error_rate=1) as server:
+            with self.assertRaises(TransientError):
+                CloudClient(server.url, "eks").put("vpc", "a", {})
+        self.assertEqual(server.stats()["errors"], 1)
+
+    def test_connection_refused(self):
+        server = CloudServer()
+        url = server.url
+        server.server_close()
+        with self.assertRaises(TransientError):
+            CloudClient(url, "eks").get("vpc", "a")
+
+    def test_concurrency_cap(self):
+        statuses = []
+        barrier = threading.Barrier(4)
+
+        def latency():
+            return 0.2
+
+        with CloudServer(latency=latency, max_concurrency=2) as server:
+            def put(index):
+                client = CloudClient(server.url, "eks")
+                barrier.wait()
+                try:
+                    client.put("vpc", str(index), {})
+                    statuses.append(200)
+                except Throttled:
+                    statuses.append(429)
+
+            threads = [threading.Thread(target=put, args=(i,)) for i in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(sorted(statuses), [200, 200, 429, 429])
+        self.assertEqual(server.stats()["rejected"], 2)
+
+    def test_get_client(self):
+        self.assertIsNone(get_client("eks"))
+        client = get_client("eks", "http://127.0.0.1:1")
+        self.assertIs(get_client("eks", "http://127.0.0.1:1"), client)
+        with self.assertRaisesRegex(ValueError, "Invalid endpoint"):
+            CloudClient("localhost:80", "eks")
+
+
+class LoadTests(SimpleTestCase):
+    def setUp(self):
+        # Retry failed calls without the production backoff delays.
+        patcher = mock.patch.object(limiter, "backoff_base", 0.001)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_provisioning_against_standin(self):
+        report = run_load(
+            "gke",
+            ["--hostproject", "host-{i}", "--force", "--skip-checks"],
+            invocations=6,
+            concurrency=3,
+            server_options={"latency": 0.001, "throttle_rate": 0.2, "retry_after": 0.01, "seed": 1},
+            rate_limits=UNLIMITED,
+        )
+        self.assertEqual(report["errors"], 0, report["error_samples"])
+        self.assertEqual(report["latency"]["count"], 6)
+        self.assertGreater(report["throughput"], 0)
+        server = report["server"]
+        self.assertEqual(server["requests"] - server["throttled"], server["resources"])
+        self.assertIn("gke.mutate", report["rate_limits"])
+
+    def test_failures_reported(self):
+        report = run_load(
+            "eks",
+            ["--vpcid", "vpc-{i}", "--skip-checks"],
+            invocations=2,
+            concurrency=2,
+            server_options={"error_rate": 1},
+            rate_limits=UNLIMITED,
+        )
+        self.assertEqual(report["errors"], 2)
+        self.assertRegex(report["error_samples"][0], "CommandError")
+
+    def test_command(self):
+        stdout = StringIO()
+        management.call_command(
+            "loadtest", "eks", "--vpcid", "vpc-{i}", "--skip-checks",
+            invocations=4, concurrency=2, no_rate_limit=True, stdout=stdout,
+        )
+        output = stdout.getvalue()
+        self.assertRegex(output, r"4 invocations of eks, 2 at a time")
+        self.assertRegex(output, r"latency p50 [\d.]+ ms")
+        # 4 PUTs per invocation and a GET of its VPC and subnets.
+        self.assertRegex(output, r"API requests 24: 0 throttled")
+
+    def test_command_failure(self):
+        with self.assertRaisesRegex(CommandError, "2 of 2 invocations failed"):
+            management.call_command(
+                "loadtest", "eks", "--vpcid", "vpc-{i}", "--skip-checks",
+                invocations=2, error_rate=1, no_rate_limit=True,
+                stdout=StringIO(), stderr=StringIO(),
+            )
@@ -0,0 +1,99 @@
+import os
+import sys
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from seahorse.core import management
+from seahorse.core.management.manifest import CommandManifest, manifest_path
+from seahorse.test import SimpleTestCase
+
+SOURCES = [("seahorse.core", management.__path__[0])]
+
+
+class CommandManifestTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch.dict(os.environ, {"SEAHORSE_CACHE_DIR": tmp.name})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_build_describes_commands(self):
+        manifest = CommandManifest.build(SOURCES)
+        entry = manifest.get("eks")
+        self.assertEqual(entry["app"], "seahorse.core")
+        self.assertEqual(entry["module"], "seahorse.core.management.commands.eks")
+        options = {
+            option for arg in entry["arguments"] for option in arg["option_strings"]
+        }
+        self.assertIn("--vpcid", options)
+        self.assertIn("--CIDR", options)
+
+    def test_load_persists_and_reuses(self):
+        built = CommandManifest.load(SOURCES)
+        self.assertTrue(os.path.exists(manifest_path(SOURCES)))
+        with mock.patch.object(CommandManifest, "build") as build:
+            loaded = CommandManifest.load(SOURCES)
+        build.assert_not_called()
+        self.assertEqual(loaded.commands, built.commands)
+
+    def test_stale_stamp_rebuilds(self):
+        manifest = CommandManifest.load(SOURCES)
+        path = next(p for p in manifest.stamps if p.endswith("eks.py"))
+        manifest.stamps[path] = [0, 0]
+        with open(manifest_path(SOURCES), "w") as fh:
+            fh.write(manifest.to_json())
+        with mock.patch.object(
+            CommandManifest, "build", wraps=CommandManifest.build
+        ) as build:
+            CommandManifest.load(SOURCES)
+        build.assert_called_once()
+
+    def test_base_stamped(self):
+        manifest = CommandManifest.build(SOURCES)
+        self.assertIn(management.base.__file__, manifest.stamps)
+
+    def test_broken_command_stamped(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        management_dir = os.path.join(tmp.name, "brokenapp", "management")
+        commands_dir = os.path.join(management_dir, "commands")
+        os.makedirs(commands_dir)
+        for package_dir in (management_dir, commands_dir):
+            open(os.path.join(package_dir, "__init__.py"), "w").close()
+        open(os.path.join(tmp.name, "brokenapp", "__init__.py"), "w").close()
+        path = os.path.join(commands_dir, "broken.py")
+        with open(path, "w") as fh:
+            fh.write("import nonexistent_module\n")
+        self.addCleanup(
+            lambda: [
+                sys.modules.pop(name)
+                for name in list(sys.modules)
+                if name.startswith("brokenapp")
+            ]
+        )
+        with mock.patch.object(sys, "path", [tmp.name, *sys.path]):
+            manifest = CommandManifest.build([("brokenapp", management_dir)])
+        self.assertEqual(manifest.get("broken")["arguments"], [])
+        self.assertIn(path, manifest.stamps)
+
+    def test_working_directory_not_stamped(self):
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        with mock.patch.object(sys, "path", ["", workdir.name, *sys.path]):
+            manifest = CommandManifest.build(SOURCES)
+        self.assertNotIn(workdir.name, manifest.stamps)
+        self.assertNotIn(os.getcwd(), manifest.stamps)
+        with open(os.path.join(workdir.name, "notes.txt"), "w"):
+            pass
+        self.assertTrue(manifest.is_fresh())
+
+    def test_help_commands_uses_manifest(self):
+        stdout = StringIO()
+        utility = management.ManagementUtility(["seahorse-admin", "help", "--commands"])
+        with mock.patch.object(sys, "stdout", stdout):
+            utility.execute()
+        self.assertEqual(
+            stdout.getvalue().split(), sorted(management.get_commands())
+        )
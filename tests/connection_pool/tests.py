@@ -0,0 +1,198 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+
+from seahorse.core.management import BaseCommand, acall_commands, call_commands
+from seahorse.db.utils import ConnectionHandler
+from seahorse.test import SimpleTestCase
+from seahorse.utils.connection import ConnectionDoesNotExist, ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.healthy = True
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def test_reuse(self):
+        pool = ConnectionPool(FakeConnection, max_size=2)
+        conn = pool.acquire()
+        pool.release(conn)
+        self.assertIs(pool.acquire(), conn)
+        stats = pool.stats()
+        self.assertEqual((stats["created"], stats["reused"]), (1, 1))
+        self.assertEqual((stats["size"], stats["in_use"]), (1, 1))
+
+    def test_bounded(self):
+        pool = ConnectionPool(FakeConnection, max_size=1, timeout=0.05)
+        conn = pool.acquire()
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+        threading.Timer(0.02, pool.release, [conn]).start()
+        self.assertIs(pool.acquire(timeout=1), conn)
+        self.assertEqual(pool.stats()["timeouts"], 1)
+
+    def test_health_check_on_checkout(self):
+        pool = ConnectionPool(FakeConnection, health_check=lambda conn: conn.healthy)
+        conn = pool.acquire()
+        conn.healthy = False
+        pool.release(conn)
+        replacement = pool.acquire()
+        self.assertIsNot(replacement, conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.stats()["unhealthy"], 1)
+
+    def test_max_idle_eviction(self):
+        pool = ConnectionPool(FakeConnection, max_idle=0.01)
+        conn = pool.acquire()
+        pool.release(conn)
+        time.sleep(0.02)
+        self.assertIsNot(pool.acquire(), conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.stats()["evicted"], 1)
+
+    def test_max_age_closes_on_release(self):
+        pool = ConnectionPool(FakeConnection, max_age=0.01)
+        conn = pool.acquire()
+        time.sleep(0.02)
+        pool.release(conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.stats()["size"], 0)
+
+    def test_close(self):
+        pool = ConnectionPool(FakeConnection)
+        idle, busy = pool.acquire(), pool.acquire()
+        pool.release(idle)
+        pool.close()
+        self.assertTrue(idle.closed)
+        self.assertFalse(busy.closed)
+        pool.release(busy)
+        self.assertTrue(busy.closed)
+
+
+    def test_connection_discarded_on_error(self):
+        pool = ConnectionPool(FakeConnection)
+        with self.assertRaises(OSError):
+            with pool.connection() as conn:
+                raise OSError("connection reset")
+        self.assertTrue(conn.closed)
+        self.assertIsNot(pool.acquire(), conn)
+        self.assertEqual(pool.stats()["size"], 1)
+
+    def test_discard_counted_once(self):
+        pool = ConnectionPool(FakeConnection, max_size=1, timeout=0.05)
+        conn = pool.acquire()
+        pool.discard(conn)
+        pool.discard(conn)
+        pool.discard(FakeConnection())
+        self.assertEqual(pool.stats()["size"], 0)
+        pool.acquire()
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+
+
+class ConnectionHandlerTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.handler = ConnectionHandler(
+            {
+                "default": {
+                    "NAME": os.path.join(tmp.name, "db.sqlite3"),
+                    "POOL": {"MAX_SIZE": 3, "TIMEOUT": 5},
+                }
+            }
+        )
+        self.addCleanup(self.handler.shutdown)
+
+    def test_lazy(self):
+        self.assertEqual(self.handler.stats(), {})
+        self.handler["default"].execute("SELECT 1")
+        self.assertEqual(self.handler.stats()["default"]["created"], 1)
+
+    def test_unknown_alias(self):
+        with self.assertRaises(ConnectionDoesNotExist):
+            self.handler["other"]
+
+    def test_per_thread_connection(self):
+        conn = self.handler["default"]
+        self.assertIs(self.handler["default"], conn)
+        other = []
+        thread = threading.Thread(target=lambda: other.append(self.handler["default"]))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], conn)
+
+    def test_close_all_returns_to_pool(self):
+        conn = self.handler["default"]
+        self.handler.close_all()
+        other = []
+        thread = threading.Thread(target=lambda: other.append(self.handler["default"]))
+        thread.start()
+        thread.join()
+        self.assertIs(other[0], conn)
+        self.assertEqual(self.handler.stats()["default"]["reused"], 1)
+
+    def test_close_all_closes_assigned_connection(self):
+        conn = FakeConnection()
+        self.handler["default"] = conn
+        self.handler.close_all()
+        self.assertTrue(conn.closed)
+        self.assertEqual(self.handler.stats()["default"]["size"], 0)
+
+    def test_checkout(self):
+        with self.handler.checkout("default") as conn:
+            self.assertIsNot(conn, self.handler["default"])
+            self.assertEqual(self.handler.stats()["default"]["in_use"], 2)
+        self.assertEqual(self.handler.stats()["default"]["idle"], 1)
+
+    def test_batch_shares_connections(self):
+        from seahorse.core import management
+
+        handler = self.handler
+
+        class QueryCommand(BaseCommand):
+            def handle(self, *args, **options):
+                handler["default"].execute("SELECT 1")
+
+        original = management.connections
+        management.connections = handler
+        self.addCleanup(setattr, management, "connections", original)
+        results = list(call_commands((QueryCommand for _ in range(30)), max_workers=3))
+        self.assertTrue(all(result.ok for result in results))
+        stats = handler.stats()["default"]
+        self.assertLessEqual(stats["created"], 3)
+        self.assertEqual(stats["created"] + stats["reused"], 30)
+
+    def test_async_batch_releases_worker_connections(self):
+        """
+        Sync commands of acall_commands() run in worker threads, more of
+        them than the pool has connections.
+        """
+        from seahorse.core import management
+
+        handler = self.handler
+
+        class QueryCommand(BaseCommand):
+            def handle(self, *args, **options):
+                handler["default"].execute("SELECT 1")
+
+        original = management.connections
+        management.connections = handler
+        self.addCleanup(setattr, management, "connections", original)
+
+        async def main():
+            invocations = (QueryCommand for _ in range(30))
+            return [r async for r in acall_commands(invocations, max_workers=20)]
+
+        results = asyncio.run(main())
+        self.assertTrue(all(result.ok for result in results), results)
+        stats = handler.stats()["default"]
+        self.assertLessEqual(stats["created"], 3)
+        self.assertEqual(stats["in_use"], 0)
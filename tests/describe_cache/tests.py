@@ -0,0 +1,238 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from seahorse.cloud import cache
+from seahorse.cloud.cache import NOT_MODIFIED, DescribeCache
+from seahorse.core import management
+from seahorse.core.management import CommandError
+from seahorse.cloud.ratelimit import limiter
+from seahorse.db import connections
+from seahorse.provision.state import StateStore
+from seahorse.test import SimpleTestCase
+from seahorse.test.cloud import CloudServer
+
+UNLIMITED = {
+    "*": {"read": {"rate": 1e6, "burst": 1e6}, "mutate": {"rate": 1e6, "burst": 1e6}}
+}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class Fetcher:
+    """
+    A provider answering with a generation number, bumped by change().
+    """
+
+    def __init__(self, value="v1"):
+        self.value = value
+        self.generation = 1
+        self.calls = []
+
+    def change(self, value):
+        self.value = value
+        self.generation += 1
+
+    def __call__(self, etag):
+        self.calls.append(etag)
+        if etag == self.generation:
+            return NOT_MODIFIED
+        return self.value, self.generation
+
+
+class DescribeCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = DescribeCache(
+            ttls={"vpc": 10, "cluster": 0}, maxsize=2, persist=False, clock=self.clock
+        )
+
+    def test_hit_until_expiry(self):
+        fetch = Fetcher()
+        self.assertEqual(self.cache.get("eks", "vpc", "vpc-1", fetch), "v1")
+        self.assertEqual(self.cache.get("eks", "vpc", "vpc-1", fetch), "v1")
+        self.assertEqual(fetch.calls, [None])
+        self.clock.now += 11
+        self.assertEqual(self.cache.get("eks", "vpc", "vpc-1", fetch), "v1")
+        self.assertEqual(fetch.calls, [None, 1])
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["revalidated"], 1)
+
+    def test_revalidation_picks_up_changes(self):
+        fetch = Fetcher()
+        self.cache.get("eks", "vpc", "vpc-1", fetch)
+        fetch.change("v2")
+        self.clock.now += 11
+        self.assertEqual(self.cache.get("eks", "vpc", "vpc-1", fetch), "v2")
+        self.assertEqual(self.cache.stats()["refreshed"], 1)
+
+    def test_without_etag(self):
+        calls = []
+
+        def fetch(etag):
+            calls.append(etag)
+            return "answer", None
+
+        self.cache.get("eks", "vpc", "vpc-1", fetch)
+        self.clock.now += 11
+        self.cache.get("eks", "vpc", "vpc-1", fetch)
+        self.assertEqual(calls, [None, None])
+
+    def test_not_modified_without_entry(self):
+        with self.assertRaisesRegex(ValueError, "without an etag"):
+            self.cache.get("eks", "vpc", "vpc-1", lambda etag: NOT_MODIFIED)
+
+    def test_zero_ttl_disables_caching(self):
+        fetch = Fetcher()
+        self.cache.get("eks", "cluster", "c", fetch)
+        self.cache.get("eks", "cluster", "c", fetch)
+        self.assertEqual(fetch.calls, [None, None])
+        self.assertEqual(len(self.cache.entries), 0)
+
+    def test_bounded(self):
+        for name in ("a", "b", "c"):
+            self.cache.get("eks", "vpc", name, Fetcher(name))
+        self.assertEqual(len(self.cache.entries), 2)
+        self.assertNotIn(("eks", "vpc", "a"), self.cache.entries)
+
+    def test_invalidate(self):
+        self.cache = DescribeCache(ttls={}, maxsize=10, persist=False)
+        self.cache.get("eks", "vpc", "a", Fetcher())
+        self.cache.get("eks", "subnets", "a", Fetcher())
+        self.cache.get("gke", "vpc", "a", Fetcher())
+        self.cache.invalidate("eks", "vpc", "a")
+        self.assertEqual(
+            sorted(key for key, _ in self.cache.entries.items()),
+            [("eks", "subnets", "a"), ("gke", "vpc", "a")],
+        )
+        self.cache.invalidate("gke")
+        self.assertEqual(len(self.cache.entries), 1)
+        self.assertEqual(self.cache.stats()["invalidated"], 2)
+
+    def test_persistence(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "describe.json")
+        first = DescribeCache(ttls={"vpc": 10}, persist=True, path=path, clock=self.clock)
+        first.get("eks", "vpc", "vpc-1", Fetcher({"cidr": "10.0.0.0/16"}))
+        first.save()
+        second = DescribeCache(ttls={"vpc": 10}, persist=True, path=path, clock=self.clock)
+        fetch = Fetcher()
+        self.assertEqual(
+            second.get("eks", "vpc", "vpc-1", fetch), {"cidr": "10.0.0.0/16"}
+        )
+        self.assertEqual(fetch.calls, [])
+        # Expired entries aren't loaded.
+        self.clock.now += 11
+        third = DescribeCache(ttls={"vpc": 10}, persist=True, path=path, clock=self.clock)
+        self.assertEqual(len(third.entries), 0)
+
+    def test_corrupt_file(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "describe.json")
+        with open(path, "w") as fh:
+            fh.write("{")
+        self.assertEqual(len(DescribeCache(persist=True, path=path).entries), 0)
+
+
+class ProvisioningCacheMixin:
+    """
+    Provision against a state database and a describe cache of the test's
+    own.
+    """
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        settings = {
+            "ENGINE": "seahorse.db.backends.sqlite3",
+            "NAME": os.path.join(tmp.name, "state.sqlite3"),
+            "OPTIONS": {},
+        }
+        patcher = mock.patch.dict(connections.settings, {"state": settings})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(connections.shutdown)
+        describe_cache = DescribeCache(persist=False)
+        patcher = mock.patch.object(cache, "describe_cache", describe_cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+
+class ProvisioningInvalidationTests(ProvisioningCacheMixin, SimpleTestCase):
+    def test_mutation_invalidates(self):
+        command = management.load_command_class("seahorse.core", "eks")
+        with mock.patch("seahorse.provision.base.describe_cache", cache.describe_cache):
+            command.describe("vpc", "vpc-1", Fetcher())
+            command.describe("vpc", "vpc-2", Fetcher())
+            management.call_command(
+                command, vpcid=["vpc-1"], database="state",
+                stdout=StringIO(), stderr=StringIO(),
+            )
+        self.assertEqual(
+            [key for key, _ in cache.describe_cache.entries.items()],
+            [("eks", "vpc", "vpc-2")],
+        )
+
+
+class ProvisioningLookupTests(ProvisioningCacheMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.server = CloudServer().start()
+        self.addCleanup(self.server.stop)
+        limiter.reset(UNLIMITED)
+        self.addCleanup(limiter.reset)
+        patcher = mock.patch(
+            "seahorse.provision.base.describe_cache", cache.describe_cache
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def call(self, name="eks", **options):
+        stdout = StringIO()
+        management.call_command(
+            name, database="state", endpoint=self.server.url, stdout=stdout,
+            stderr=StringIO(), **{"vpcid": ["vpc-1"], **options},
+        )
+        return stdout.getvalue().splitlines()
+
+    def test_second_invocation_served_from_cache(self):
+        self.call()
+        describes = self.server.stats()["describes"]
+        self.assertEqual(describes, 2)
+        lines = self.call()
+        self.assertEqual(lines, ["Plan: 0 to create, 0 to update, 4 unchanged."])
+        self.assertEqual(self.server.stats()["describes"], describes)
+        self.assertGreaterEqual(cache.describe_cache.stats()["hits"], 2)
+
+    def test_lookups_take_precedence_over_state(self):
+        self.call()
+        # The VPC was deleted behind seahorse's back.
+        del self.server.resources["eks", "vpc", "vpc-1"]
+        cache.describe_cache.clear()
+        lines = self.call()
+        self.assertEqual(lines[:2], [
+            "Plan: 1 to create, 0 to update, 3 unchanged.",
+            "eks vpc vpc-1 vpcid=vpc-1",
+        ])
+        # Resources already as declared are adopted without a PUT.
+        StateStore("state").forget("eks")
+        cache.describe_cache.clear()
+        lines = self.call(plan=True)
+        self.assertEqual(lines[:2], ["= vpc/vpc-1", "= subnets/vpc-1"])
+
+    def test_lookup_failure(self):
+        self.server.error_rate = 1
+        with mock.patch.object(limiter, "backoff_base", 0.001):
+            with self.assertRaisesRegex(CommandError, "Cannot describe vpc vpc-1"):
+                self.call()
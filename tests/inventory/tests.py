@@ -0,0 +1,195 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from seahorse.core.management import (
+    BaseCommand,
+    CommandError,
+    call_command,
+    get_compiled_parser,
+)
+from seahorse.core.management.inventory import (
+    InventoryError,
+    read_records,
+    validate_records,
+)
+from seahorse.test import SimpleTestCase
+
+
+class TargetCommand(BaseCommand):
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--name")
+        parser.add_argument("--size", type=int, default=1)
+        parser.add_argument("--tag", action="append", default=[])
+        parser.add_argument("--zone", choices=["a", "b"], default="a")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["name"] == "fail":
+            raise CommandError("failing target")
+        return "%(name)s size=%(size)s tags=%(tag)s zone=%(zone)s dry=%(dry_run)s" % (
+            options
+        )
+
+
+class ActionCommand(TargetCommand):
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["show", "hide"])
+        super().add_arguments(parser)
+
+    def handle(self, *args, **options):
+        return "%s %s" % (options["action"], super().handle(*args, **options))
+
+
+class ValidateRecordsTests(SimpleTestCase):
+    def validate(self, *records):
+        compiled = get_compiled_parser(TargetCommand(), "target")
+        return list(validate_records(enumerate(records, 1), compiled))
+
+    def test_coercion(self):
+        self.assertEqual(
+            self.validate(
+                {"name": "a", "--size": "3", "tag": "x", "dry-run": "yes"},
+                {"name": "b", "tag": ["x", "y"], "dry_run": False},
+            ),
+            [
+                (1, {"name": "a", "size": 3, "tag": ["x"], "dry_run": True}),
+                (2, {"name": "b", "tag": ["x", "y"], "dry_run": False}),
+            ],
+        )
+
+    def test_errors(self):
+        results = self.validate(
+            {"nope": 1},
+            {"size": "big"},
+            {"zone": "c"},
+            {"parallel": 2},
+            {"trace-malloc": 5},
+        )
+        self.assertTrue(all(isinstance(e, InventoryError) for _, e in results))
+        self.assertEqual(
+            [str(e) for _, e in results],
+            [
+                "Line 1: unknown option 'nope' for the target command",
+                "Line 2: size: invalid literal for int() with base 10: 'big'",
+                "Line 3: zone: invalid choice: 'c' (choose from 'a', 'b')",
+                "Line 4: unknown option 'parallel' for the target command",
+                "Line 5: unknown option 'trace-malloc' for the target command",
+            ],
+        )
+
+
+class ReadRecordsTests(SimpleTestCase):
+    def test_jsonl(self):
+        records = list(read_records(StringIO('{"a": 1}\n\n# note\n[1]\n{"b": 2}\n')))
+        self.assertEqual(records[0], (1, {"a": 1}))
+        self.assertEqual(str(records[1][1]), "Line 4: expected a JSON object")
+        self.assertEqual(records[2], (5, {"b": 2}))
+
+    def test_csv(self):
+        records = list(read_records(StringIO("name,size\na,2\nb,\nc,1,x\n"), "csv"))
+        self.assertEqual(
+            records[:2], [(2, {"name": "a", "size": "2"}), (3, {"name": "b"})]
+        )
+        self.assertIsInstance(records[2][1], InventoryError)
+
+
+class InventoryOptionTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp, name)
+        with open(path, "w") as fh:
+            fh.write(content)
+        return path
+
+    def call(self, **options):
+        stdout, stderr = StringIO(), StringIO()
+        try:
+            call_command(TargetCommand(), stdout=stdout, stderr=stderr, **options)
+        finally:
+            self.stderr = stderr.getvalue()
+        return stdout.getvalue().splitlines()
+
+    def test_jsonl_inventory(self):
+        path = self.write("fleet.jsonl", '{"name": "a"}\n{"name": "b", "size": 2}\n')
+        self.assertEqual(
+            self.call(inventory=path, tag=["common"]),
+            [
+                "a size=1 tags=['common'] zone=a dry=False",
+                "b size=2 tags=['common'] zone=a dry=False",
+            ],
+        )
+
+    def test_csv_inventory_in_parallel(self):
+        path = self.write("fleet.csv", "name,zone\na,b\nb,\nc,a\n")
+        self.assertEqual(
+            sorted(self.call(inventory=path, parallel=3)),
+            [
+                "a size=1 tags=[] zone=b dry=False",
+                "b size=1 tags=[] zone=a dry=False",
+                "c size=1 tags=[] zone=a dry=False",
+            ],
+        )
+
+    def test_failures_reported_with_line(self):
+        path = self.write(
+            "fleet.jsonl", '{"name": "a"}\n{"name": "fail"}\n{"bogus": 1}\n'
+        )
+        with self.assertRaisesRegex(CommandError, "2 of 3 targets failed."):
+            self.call(inventory=path)
+        self.assertIn("Target 1 (line 2) failed: failing target", self.stderr)
+        self.assertIn("Line 3: unknown option 'bogus'", self.stderr)
+
+    def test_required_positional_from_command_line(self):
+        path = self.write("fleet.jsonl", '{"name": "a"}\n{"name": "b"}\n')
+        stdout = StringIO()
+        command = ActionCommand(stdout=stdout, stderr=StringIO())
+        command.run_from_argv(["seahorse-admin", "target", "show", "--inventory", path])
+        # Targets run concurrently, in no particular order.
+        self.assertEqual(
+            sorted(stdout.getvalue().splitlines()),
+            [
+                "show a size=1 tags=[] zone=a dry=False",
+                "show b size=1 tags=[] zone=a dry=False",
+            ],
+        )
+        # Later calls get a parser raising CommandError, not exiting.
+        with self.assertRaisesRegex(CommandError, "action"):
+            call_command(ActionCommand(), stdout=StringIO())
+
+    def test_missing_inventory(self):
+        with self.assertRaisesRegex(CommandError, "Cannot read inventory"):
+            self.call(inventory=os.path.join(self.tmp, "missing.jsonl"))
+
+    def test_streamed_from_stdin(self):
+        """
+        Targets start before the inventory is read to the end, and only a
+        window of records is read ahead.
+        """
+        lines_read = []
+
+        class Stdin:
+            def __iter__(self):
+                for i in range(1000):
+                    lines_read.append(i)
+                    yield '{"name": "n%d"}\n' % i
+
+        observed = []
+
+        class StreamingCommand(TargetCommand):
+            def handle(self, *args, **options):
+                observed.append(len(lines_read))
+                return ""
+
+        with mock.patch("sys.stdin", Stdin()):
+            call_command(StreamingCommand(), inventory="-", stdout=StringIO())
+        self.assertEqual(len(observed), 1000)
+        self.assertLess(observed[0], 10)
+        self.assertLess(max(n - i for i, n in enumerate(observed)), 10)
@@ -0,0 +1,208 @@
+import io
+import json
+import os
+import tempfile
+import tracemalloc
+
+from seahorse.test import SimpleTestCase
+from seahorse.utils.jsonstream import (
+    JSONMismatch,
+    PathSet,
+    build_value,
+    compare_documents,
+    format_path,
+    iter_events,
+    parse_path,
+)
+
+DOCUMENT = {
+    "clusters": [
+        {"name": "a", "nodepools": ["x", "y"], "size": 3, "ratio": 0.5},
+        {"name": "bé", "nodepools": [], "enabled": True, "zone": None},
+    ],
+    "meta": {"generated_at": 1700000000, "escaped": 'quote " and \\ \n'},
+    "big": 12345678901234567890,
+    "exp": -1.5e-7,
+}
+
+
+class IterEventsTests(SimpleTestCase):
+    def parse(self, text, chunk_size):
+        events = iter_events(io.StringIO(text), chunk_size)
+        return build_value(events, next(events))
+
+    def test_round_trip_across_chunk_boundaries(self):
+        text = json.dumps(DOCUMENT, indent=2)
+        for chunk_size in (1, 2, 3, 5, 64, 1 << 16):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(self.parse(text, chunk_size), DOCUMENT)
+
+    def test_binary_utf8(self):
+        data = json.dumps(DOCUMENT, ensure_ascii=False).encode()
+        for chunk_size in (1, 3, 7):
+            events = iter_events(io.BytesIO(data), chunk_size)
+            self.assertEqual(build_value(events, next(events)), DOCUMENT)
+
+    def test_events(self):
+        self.assertEqual(
+            list(iter_events(io.StringIO('{"a": [1, {}], "b": null}'))),
+            [
+                ("start_map", None),
+                ("key", "a"),
+                ("start_array", None),
+                ("scalar", 1),
+                ("start_map", None),
+                ("end_map", None),
+                ("end_array", None),
+                ("key", "b"),
+                ("scalar", None),
+                ("end_map", None),
+            ],
+        )
+
+    def test_invalid(self):
+        for text, message in [
+            ('{"a" 1}', "Expecting ':'"),
+            ("[1,]", "Expecting value"),
+            ("[1 2]", "Expecting ',' delimiter"),
+            ('{"a": 1} x', "Extra data"),
+            ("{1: 2}", "Expecting property name"),
+            ("nul", "Expecting value"),
+            ('"abc', "Unterminated string"),
+            ("", "Expecting value"),
+        ]:
+            with self.subTest(text=text):
+                with self.assertRaisesRegex(json.JSONDecodeError, message):
+                    list(iter_events(io.StringIO(text), 2))
+
+
+class PathTests(SimpleTestCase):
+    def test_round_trip(self):
+        for text in ["$", "$.a[0].b", '$["odd key"][*].c', "$[*].x-y"]:
+            self.assertEqual(format_path(parse_path(text)), text)
+
+    def test_invalid(self):
+        with self.assertRaisesRegex(ValueError, "must start with"):
+            parse_path("a.b")
+        with self.assertRaisesRegex(ValueError, "at '..b'"):
+            parse_path("$.a..b")
+
+    def test_path_set(self):
+        paths = PathSet(["$.clusters[*].name", "$.meta"])
+        self.assertIn(("clusters", 3, "name"), paths)
+        self.assertIn(("meta",), paths)
+        self.assertNotIn(("meta", "x"), paths)
+        self.assertNotIn(("clusters", 3), paths)
+
+
+class CompareDocumentsTests(SimpleTestCase):
+    def assertMismatch(self, first, second, expected, **kwargs):
+        with self.assertRaises(JSONMismatch) as cm:
+            compare_documents(first, second, **kwargs)
+        self.assertEqual(str(cm.exception), expected)
+
+    def test_equal(self):
+        compare_documents(json.dumps(DOCUMENT), DOCUMENT)
+        compare_documents(json.dumps(DOCUMENT, sort_keys=True), json.dumps(DOCUMENT))
+
+    def test_first_mismatch(self):
+        other = json.loads(json.dumps(DOCUMENT))
+        other["clusters"][1]["nodepools"] = ["z"]
+        other["meta"]["generated_at"] = 0
+        self.assertMismatch(
+            json.dumps(DOCUMENT),
+            other,
+            "$.clusters[1].nodepools[0]: only in the second document: \"z\"",
+        )
+
+    def test_types(self):
+        self.assertMismatch('{"a": true}', '{"a": 1}', "$.a: true != 1")
+        self.assertMismatch('{"a": [1]}', '{"a": {}}', "$.a: an array != an object")
+        compare_documents('{"a": 1}', '{"a": 1.0}')
+
+    def test_keys(self):
+        self.assertMismatch('{"a": 1}', '{"b": 1, "a": 1}', "$.b: only in the second document: 1")
+        self.assertMismatch('{"a": 1, "c": 2}', '{"a": 1}', "$.c: only in the first document: 2")
+
+    def test_ignore_paths(self):
+        other = json.loads(json.dumps(DOCUMENT))
+        other["meta"]["generated_at"] = 0
+        del other["clusters"][0]["ratio"]
+        compare_documents(
+            json.dumps(DOCUMENT),
+            other,
+            ignore_paths=["$.meta.generated_at", "$.clusters[*].ratio"],
+        )
+
+    def test_unordered_paths(self):
+        first = {"clusters": [{"name": "a", "tags": [1, 2]}, {"name": "b", "tags": []}]}
+        second = {"clusters": [{"name": "b", "tags": []}, {"name": "a", "tags": [2, 1]}]}
+        compare_documents(
+            json.dumps(first),
+            json.dumps(second),
+            unordered_paths=["$.clusters", "$.clusters[*].tags"],
+        )
+        self.assertMismatch(
+            json.dumps(first),
+            json.dumps(second),
+            "$.clusters[0]: an object has no match in the second document",
+            unordered_paths=["$.clusters"],
+        )
+        second["clusters"].append({"name": "c", "tags": []})
+        self.assertMismatch(
+            json.dumps(first),
+            json.dumps(second),
+            "$.clusters[2]: an object has no match in the first document",
+            unordered_paths=["$.clusters", "$.clusters[*].tags"],
+        )
+
+    def test_unordered_with_ignored_fields(self):
+        compare_documents(
+            [{"id": 1, "at": 5}, {"id": 2, "at": 6}],
+            [{"id": 2, "at": 0}, {"id": 1, "at": 0}],
+            ignore_paths=["$[*].at"],
+            unordered_paths=["$"],
+        )
+
+    def test_bounded_memory(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "plan.json")
+        with open(path, "w") as fh:
+            fh.write('{"resources": [')
+            fh.write(
+                ",".join(
+                    json.dumps({"kind": "nodegroup", "name": "pool-%d" % i, "size": i})
+                    for i in range(10000)
+                )
+            )
+            fh.write("]}")
+        tracemalloc.start()
+        try:
+            with open(path) as first, open(path, "rb") as second:
+                compare_documents(first, second, chunk_size=8192)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        # Loading either document would take several times its size.
+        self.assertLess(peak, os.path.getsize(path) / 4)
+
+
+class AssertionTests(SimpleTestCase):
+    def test_assert_json_equal_text(self):
+        self.assertJSONEqual('{"a": [1, 2]}', {"a": [1, 2]})
+        self.assertJSONEqual(io.StringIO('{"a": 1}'), '{"a": 1}')
+        with self.assertRaises(AssertionError):
+            self.assertJSONEqual('{"a": 1}', '{"a": 2}')
+
+    def test_assert_json_stream_equal(self):
+        self.assertJSONStreamEqual(
+            io.StringIO('{"a": [3, 1], "t": 1}'),
+            '{"a": [1, 3], "t": 2}',
+            ignore_paths=["$.t"],
+            unordered_paths=["$.a"],
+        )
+        with self.assertRaisesRegex(AssertionError, r"differ at \$\.a\[1\]: 1 != 2"):
+            self.assertJSONStreamEqual('{"a": [0, 1]}', '{"a": [0, 2]}')
+        with self.assertRaisesRegex(AssertionError, "Invalid JSON document"):
+            self.assertJSONStreamEqual('{"a": ', '{"a": 1}')
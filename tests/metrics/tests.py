@@ -0,0 +1,252 @@
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from seahorse.cloud.ratelimit import RateLimiter, Throttled
+from seahorse.core import management, metrics
+from seahorse.core.management import BaseCommand, CommandError
+from seahorse.test import SimpleTestCase
+from seahorse.utils.connection import BaseConnectionHandler
+
+
+class RecordCommand(BaseCommand):
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fail", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["fail"]:
+            raise CommandError("failed")
+
+
+class FakeHandler(BaseConnectionHandler):
+    settings_name = "FAKE"
+
+    def create_connection(self, alias):
+        return object()
+
+
+class RegistryTests(SimpleTestCase):
+    def setUp(self):
+        self.registry = metrics.Registry()
+
+    def test_counter(self):
+        counter = self.registry.counter("jobs_total", "Jobs.", ["kind"])
+        counter.inc(kind="a")
+        counter.inc(2, kind="a")
+        self.assertEqual(counter.get(kind="a"), 3)
+        self.assertEqual(counter.get(kind="b"), 0)
+        with self.assertRaisesRegex(ValueError, "only be incremented"):
+            counter.inc(-1, kind="a")
+
+    def test_labels_checked(self):
+        counter = self.registry.counter("jobs_total", "Jobs.", ["kind"])
+        with self.assertRaisesRegex(ValueError, "takes the labels kind"):
+            counter.inc()
+        with self.assertRaisesRegex(ValueError, "requires the label 'kind'"):
+            counter.inc(other="a")
+
+    def test_duplicate_name(self):
+        self.registry.counter("jobs_total", "Jobs.")
+        with self.assertRaisesRegex(ValueError, "already registered"):
+            self.registry.gauge("jobs_total", "Jobs.")
+
+    def test_gauge(self):
+        gauge = self.registry.gauge("running", "Running.")
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+        self.assertEqual(gauge.get(), 1)
+        gauge.set(7)
+        self.assertEqual(gauge.get(), 7)
+
+    def test_gauge_callback_dropped_with_its_object(self):
+        gauge = self.registry.gauge("pool", "Pool.", ["alias"])
+
+        class Pool:
+            def usage(self):
+                return {("default",): 3}
+
+        pool = Pool()
+        gauge.add_callback(pool.usage)
+        self.assertEqual(gauge.samples(), [("", (("alias", "default"),), 3)])
+        del pool
+        self.assertEqual(gauge.samples(), [])
+
+    def test_histogram(self):
+        histogram = self.registry.histogram("latency", "Latency.", buckets=(0.1, 1))
+        for value in (0.05, 0.1, 0.5, 5):
+            histogram.observe(value)
+        self.assertEqual(histogram.get(), (4, 5.65))
+        self.assertEqual(
+            [
+                (suffix, dict(labels).get("le"), value)
+                for suffix, labels, value in histogram.samples()
+            ],
+            [
+                ("_bucket", "0.1", 2),
+                ("_bucket", "1", 3),
+                ("_bucket", "+Inf", 4),
+                ("_sum", None, 5.65),
+                ("_count", None, 4),
+            ],
+        )
+
+    def test_exposition(self):
+        counter = self.registry.counter("jobs_total", "Jobs run.", ["kind"])
+        counter.inc(kind='say "hi"\n')
+        histogram = self.registry.histogram("latency", "Latency.", buckets=(1,))
+        histogram.observe(0.5)
+        self.assertEqual(
+            self.registry.exposition(),
+            "# HELP jobs_total Jobs run.\n"
+            "# TYPE jobs_total counter\n"
+            'jobs_total{kind="say \\"hi\\"\\n"} 1\n'
+            "# HELP latency Latency.\n"
+            "# TYPE latency histogram\n"
+            'latency_bucket{le="1"} 1\n'
+            'latency_bucket{le="+Inf"} 1\n'
+            "latency_sum 0.5\n"
+            "latency_count 1\n",
+        )
+
+    def test_snapshot(self):
+        self.registry.counter("jobs_total", "Jobs.", ["kind"]).inc(kind="a")
+        self.assertEqual(
+            self.registry.snapshot(),
+            {
+                "jobs_total": {
+                    "type": "counter",
+                    "help": "Jobs.",
+                    "samples": [
+                        {"name": "jobs_total", "labels": {"kind": "a"}, "value": 1}
+                    ],
+                }
+            },
+        )
+
+    def test_concurrent_updates(self):
+        counter = self.registry.counter("jobs_total", "Jobs.")
+
+        def work():
+            for _ in range(1000):
+                counter.inc()
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(counter.get(), 8000)
+
+
+class PushHandler(BaseHTTPRequestHandler):
+    def do_PUT(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.pushed.append((self.path, body.decode()))
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class PushTests(SimpleTestCase):
+    def test_push_to_gateway(self):
+        server = HTTPServer(("127.0.0.1", 0), PushHandler)
+        server.pushed = []
+        thread = threading.Thread(target=server.handle_request)
+        thread.start()
+        registry = metrics.Registry()
+        registry.counter("jobs_total", "Jobs.").inc()
+        try:
+            status = metrics.push_to_gateway(
+                "http://127.0.0.1:%d/" % server.server_port,
+                "deploy nightly",
+                registry=registry,
+                grouping={"region": "us-east-1"},
+            )
+        finally:
+            thread.join()
+            server.server_close()
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            server.pushed,
+            [
+                (
+                    "/metrics/job/deploy%20nightly/region/us-east-1",
+                    registry.exposition(),
+                )
+            ],
+        )
+
+
+class FrameworkMetricsTests(SimpleTestCase):
+    def test_command_metrics(self):
+        invocations = metrics.COMMAND_INVOCATIONS.get(command="tests")
+        calls = metrics.COMMAND_CALLS.get(command="tests")
+        errors = metrics.COMMAND_ERRORS.get(command="tests", error="CommandError")
+        handled = metrics.HANDLE_SECONDS.get(command="tests")[0]
+        management.call_command(RecordCommand())
+        with self.assertRaises(CommandError):
+            management.call_command(RecordCommand(), fail=True)
+        self.assertEqual(
+            metrics.COMMAND_INVOCATIONS.get(command="tests"), invocations + 2
+        )
+        self.assertEqual(metrics.COMMAND_CALLS.get(command="tests"), calls + 2)
+        self.assertEqual(
+            metrics.COMMAND_ERRORS.get(command="tests", error="CommandError"),
+            errors + 1,
+        )
+        self.assertEqual(metrics.HANDLE_SECONDS.get(command="tests")[0], handled + 2)
+        self.assertEqual(metrics.COMMANDS_IN_FLIGHT.get(command="tests"), 0)
+
+    def test_metrics_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "seahorse.prom")
+            management.call_command(RecordCommand(), metrics_file=path)
+            with open(path) as fh:
+                exposition = fh.read()
+        self.assertIn("# TYPE seahorse_command_invocations_total counter", exposition)
+        self.assertIn(
+            'seahorse_command_handle_seconds_count{command="tests"}', exposition
+        )
+
+    def test_provider_call_latency(self):
+        limiter = RateLimiter({"*": {"read": {"rate": 1000, "burst": 1000}}})
+        limiter.sleep = lambda seconds: None
+        attempts = []
+
+        def describe():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise Throttled("slow down")
+            return "ready"
+
+        labels = {"provider": "metrics-test", "operation": "read"}
+        self.assertEqual(limiter.call("metrics-test", "read", describe), "ready")
+        self.assertEqual(
+            metrics.PROVIDER_CALL_SECONDS.get(outcome="throttled", **labels)[0], 1
+        )
+        self.assertEqual(
+            metrics.PROVIDER_CALL_SECONDS.get(outcome="ok", **labels)[0], 1
+        )
+
+    def test_pool_connections(self):
+        handler = FakeHandler({"one": {}})
+        handler["one"]
+        usage = {
+            labels: value
+            for _, labels, value in metrics.POOL_CONNECTIONS.samples()
+            if dict(labels)["handler"] == "FAKE"
+        }
+        self.assertEqual(
+            usage,
+            {
+                (("handler", "FAKE"), ("alias", "one"), ("state", "in_use")): 1,
+                (("handler", "FAKE"), ("alias", "one"), ("state", "idle")): 0,
+            },
+        )
+        handler.close_all()
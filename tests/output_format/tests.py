@@ -0,0 +1,222 @@
+import json
+import threading
+import time
+from io import StringIO
+from unittest import mock
+
+from seahorse.core import management
+from seahorse.core.management import BaseCommand, CommandError
+from seahorse.core.management.base import OutputWrapper
+from seahorse.core.management.server import _StreamProxy
+from seahorse.test import SimpleTestCase
+
+
+class CountingStream(StringIO):
+    def __init__(self, tty=False):
+        super().__init__()
+        self.writes = 0
+        self.tty = tty
+
+    def write(self, data):
+        self.writes += 1
+        return super().write(data)
+
+    def isatty(self):
+        return self.tty
+
+
+class InterleavedCommand(BaseCommand):
+    requires_system_checks = []
+
+    def handle(self, *args, **options):
+        self.stdout.write("first")
+        self.stderr.write("second")
+        self.stdout.write("third")
+
+
+class GreetCommand(BaseCommand):
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--name", default="world")
+        parser.add_argument("--fail", action="store_true")
+
+    def handle(self, *args, **options):
+        self.stdout.write("hello %s" % options["name"])
+        if options["fail"]:
+            raise CommandError("no greeting for %s" % options["name"])
+
+    def iter_targets(self, *args, **options):
+        for name in options["name"].split(","):
+            yield args, dict(options, name=name)
+
+
+class OutputWrapperTests(SimpleTestCase):
+    def test_unbuffered(self):
+        out = CountingStream()
+        wrapper = OutputWrapper(out)
+        wrapper.write("a")
+        wrapper.write("b")
+        self.assertEqual((out.getvalue(), out.writes), ("a\nb\n", 2))
+
+    def test_size_threshold(self):
+        out = CountingStream()
+        wrapper = OutputWrapper(out, buffer_size=12)
+        for _ in range(4):
+            wrapper.write("abcd")
+        # Flushed once 12 characters were buffered.
+        self.assertEqual((out.getvalue(), out.writes), ("abcd\n" * 3, 1))
+        wrapper.flush()
+        self.assertEqual((out.getvalue(), out.writes), ("abcd\n" * 4, 2))
+
+    def test_time_threshold(self):
+        out = CountingStream()
+        wrapper = OutputWrapper(out, buffer_size=1024, flush_interval=0.05)
+        wrapper.write("a")
+        wrapper.write("b")
+        self.assertEqual(out.writes, 0)
+        # Flushed by the timer, without another write.
+        time.sleep(0.2)
+        self.assertEqual((out.getvalue(), out.writes), ("a\nb\n", 1))
+
+    def test_time_threshold_behind_proxy(self):
+        default, redirected = CountingStream(), CountingStream()
+        proxy = _StreamProxy(default)
+        proxy.local.target = redirected
+        wrapper = OutputWrapper(proxy, buffer_size=1024, flush_interval=0.05)
+        wrapper.write("a")
+        # The timer's thread has no redirection of its own.
+        time.sleep(0.2)
+        self.assertEqual((redirected.getvalue(), default.getvalue()), ("a\n", ""))
+
+    def test_buffer_kept_per_target(self):
+        default, redirected = CountingStream(), CountingStream()
+        proxy = _StreamProxy(default)
+        wrapper = OutputWrapper(proxy, buffer_size=1024)
+        wrapper.write("a")
+        thread = threading.Thread(
+            target=lambda: (
+                setattr(proxy.local, "target", redirected),
+                wrapper.write("b"),
+            )
+        )
+        thread.start()
+        thread.join()
+        wrapper.flush()
+        self.assertEqual((default.getvalue(), redirected.getvalue()), ("a\n", "b\n"))
+
+    def test_stderr_after_buffered_stdout(self):
+        out = CountingStream()
+        management.call_command(InterleavedCommand(), stdout=out, stderr=out)
+        self.assertEqual(out.getvalue(), "first\nsecond\nthird\n")
+
+    def test_terminal_unbuffered(self):
+        out = CountingStream(tty=True)
+        wrapper = OutputWrapper(out, buffer_size=1024)
+        wrapper.write("a")
+        self.assertEqual(out.getvalue(), "a\n")
+
+    def test_isatty_cached(self):
+        out = mock.Mock(spec=["write", "isatty"])
+        out.isatty.return_value = False
+        wrapper = OutputWrapper(out)
+        for _ in range(3):
+            wrapper.style_func = str.upper
+            wrapper.write("a")
+        self.assertEqual(out.isatty.call_count, 1)
+
+    def test_jsonl(self):
+        out = StringIO()
+        wrapper = OutputWrapper(out, format="jsonl")
+        wrapper.context = {"command": "eks"}
+        wrapper.write("hello\n")
+        wrapper.write_record({"event": "step", "status": "succeeded"})
+        self.assertEqual(
+            [json.loads(line) for line in out.getvalue().splitlines()],
+            [
+                {"command": "eks", "event": "output", "message": "hello"},
+                {"command": "eks", "event": "step", "status": "succeeded"},
+            ],
+        )
+
+    def test_json(self):
+        out = StringIO()
+        wrapper = OutputWrapper(out, format="json")
+        wrapper.finish()
+        self.assertEqual(json.loads(out.getvalue()), [])
+        out.seek(0)
+        out.truncate()
+        wrapper.write("a")
+        wrapper.write("b")
+        wrapper.finish()
+        self.assertEqual(
+            json.loads(out.getvalue()),
+            [{"event": "output", "message": "a"}, {"event": "output", "message": "b"}],
+        )
+
+
+class OutputOptionTests(SimpleTestCase):
+    def call(self, *args, **options):
+        stdout = StringIO()
+        management.call_command(
+            GreetCommand(), *args, stdout=stdout, stderr=StringIO(), **options
+        )
+        return stdout.getvalue()
+
+    def test_text(self):
+        self.assertEqual(self.call(), "hello world\n")
+
+    def test_jsonl(self):
+        records = [json.loads(line) for line in self.call(output="jsonl").splitlines()]
+        self.assertEqual(
+            records[0],
+            {"command": "tests", "event": "output", "message": "hello world"},
+        )
+        self.assertEqual(
+            [(record["event"], record.get("phase")) for record in records],
+            [("output", None), ("phase", "handle"), ("phase", "output"), ("command", None)],
+        )
+        self.assertEqual(records[-1]["status"], "ok")
+        self.assertIsInstance(records[-1]["duration"], float)
+
+    def test_json(self):
+        records = json.loads(self.call(output="json"))
+        self.assertEqual(records[-1]["event"], "command")
+
+    def test_failure_record(self):
+        stdout = StringIO()
+        with self.assertRaises(CommandError):
+            management.call_command(
+                GreetCommand(), fail=True, output="jsonl", stdout=stdout, stderr=StringIO()
+            )
+        record = json.loads(stdout.getvalue().splitlines()[-1])
+        self.assertEqual(record["status"], "failed")
+        self.assertEqual(record["error"], "no greeting for world")
+
+    def test_targets(self):
+        output = self.call(name="a,b", parallel=2, output="jsonl")
+        records = [json.loads(line) for line in output.splitlines()]
+        messages = {
+            record["target"]: record["message"]
+            for record in records
+            if record["event"] == "output"
+        }
+        self.assertEqual(messages, {0: "hello a", 1: "hello b"})
+        targets = [record for record in records if record["event"] == "target"]
+        self.assertEqual(sorted(record["target"] for record in targets), [0, 1])
+        self.assertEqual({record["status"] for record in targets}, {"ok"})
+        self.assertNotIn("target", records[-1])
+
+    def test_provisioning_steps(self):
+        stdout = StringIO()
+        management.call_command(
+            "gke", hostproject=["p"], plan=False, force=True, skip_checks=True,
+            output="jsonl", stdout=stdout, stderr=StringIO(),
+        )
+        steps = [
+            json.loads(line) for line in stdout.getvalue().splitlines()
+            if json.loads(line)["event"] == "step"
+        ]
+        self.assertTrue(steps)
+        self.assertTrue(all(step["status"] == "succeeded" for step in steps))
+        self.assertTrue(all(step["command"] == "gke" for step in steps))
@@ -0,0 +1,90 @@
+import json
+import os
+import pstats
+import tempfile
+from io import StringIO
+
+from seahorse.core.management import BaseCommand, call_command
+from seahorse.core.management.profiling import PhaseTimer
+from seahorse.test import SimpleTestCase
+
+
+class AllocatingCommand(BaseCommand):
+    def handle(self, *args, **options):
+        self.blocks = [bytearray(1024) for _ in range(100)]
+        return "done"
+
+
+class ProfilingOptionsTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+
+    def call(self, **options):
+        stderr = StringIO()
+        call_command(AllocatingCommand(), stdout=StringIO(), stderr=stderr, **options)
+        return stderr.getvalue()
+
+    def test_timings_json(self):
+        report = json.loads(self.call(timings="json"))
+        self.assertEqual(report["command"], "tests")
+        self.assertEqual(
+            list(report["phases"]), ["create_parser", "parse_args", "handle", "output"]
+        )
+        self.assertAlmostEqual(report["total"], sum(report["phases"].values()))
+
+    def test_timings_text(self):
+        report = self.call(timings="text")
+        self.assertTrue(report.startswith("Timings for tests:"))
+        self.assertIn(" handle ", report)
+
+    def test_profile_pstats(self):
+        path = os.path.join(self.tmp, "run.prof")
+        self.assertIn("Profile written to %s" % path, self.call(profile=path))
+        stats = pstats.Stats(path)
+        self.assertTrue(any(func[2] == "handle" for func in stats.stats))
+
+    def test_profile_callgrind(self):
+        path = os.path.join(self.tmp, "run.callgrind")
+        self.call(profile=path)
+        with open(path) as fh:
+            content = fh.read()
+        self.assertTrue(content.startswith("# callgrind format"))
+        self.assertIn("(handle)", content)
+
+    def test_trace_malloc(self):
+        report = self.call(trace_malloc=3)
+        self.assertTrue(report.startswith("Top 3 allocations"))
+        self.assertIn("profiling/tests.py", report)
+
+    def test_parallel_targets_instrumented_once(self):
+        path = os.path.join(self.tmp, "eks.prof")
+        stderr = StringIO()
+        call_command(
+            "eks",
+            vpcid=["vpc-1", "vpc-2", "vpc-3", "vpc-4"],
+            parallel=4,
+            force=True,
+            trace_malloc=3,
+            profile=path,
+            timings="json",
+            skip_checks=True,
+            stdout=StringIO(),
+            stderr=stderr,
+        )
+        report = stderr.getvalue()
+        self.assertEqual(report.count("Top 3 allocations"), 1)
+        self.assertEqual(report.count("Profile written to"), 1)
+        self.assertEqual(report.count('"command": "eks"'), 1)
+        pstats.Stats(path)
+
+
+class PhaseTimerTests(SimpleTestCase):
+    def test_phases_in_run_order(self):
+        timer = PhaseTimer()
+        timer.record("handle", 0.5)
+        timer.record("custom", 0.1)
+        timer.record("import", 0.25)
+        timer.record("handle", 0.5)
+        self.assertEqual(timer.as_dict(), {"import": 0.25, "handle": 1.0, "custom": 0.1})
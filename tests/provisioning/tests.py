@@ -0,0 +1,249 @@
+import os
+import tempfile
+import threading
+import time
+from io import StringIO
+from unittest import mock
+
+from seahorse.cloud.cache import DescribeCache
+from seahorse.cloud.ratelimit import limiter
+from seahorse.core import management
+from seahorse.core.exception import ImproperlyConfigured
+from seahorse.core.management import CommandError
+from seahorse.db import connections
+from seahorse.provision.state import StateStore, content_hash
+from seahorse.provision.scheduler import StepScheduler
+from seahorse.test import SimpleTestCase
+from seahorse.test.cloud import CloudServer
+
+UNLIMITED = {
+    "*": {"read": {"rate": 1e6, "burst": 1e6}, "mutate": {"rate": 1e6, "burst": 1e6}}
+}
+
+
+class StepSchedulerTests(SimpleTestCase):
+    def test_dependency_order(self):
+        calls = []
+        scheduler = StepScheduler(max_workers=4)
+        scheduler.add("cluster", lambda: calls.append("cluster"), ["subnets"])
+        scheduler.add("network", lambda: calls.append("network"))
+        scheduler.add("subnets", lambda: calls.append("subnets"), ["network"])
+        report = scheduler.run()
+        self.assertTrue(report.ok)
+        self.assertEqual(calls, ["network", "subnets", "cluster"])
+
+    def test_independent_branches_run_concurrently(self):
+        barrier = threading.Barrier(3, timeout=2)
+        scheduler = StepScheduler(max_workers=3)
+        scheduler.add("cluster", lambda: None)
+        for name in ("pool-a", "pool-b", "pool-c"):
+            scheduler.add(name, barrier.wait, ["cluster"])
+        self.assertTrue(scheduler.run().ok)
+
+    def test_failure_cancels_dependents_only(self):
+        def fail():
+            raise RuntimeError("quota exceeded")
+
+        scheduler = StepScheduler()
+        scheduler.add("network", lambda: None)
+        scheduler.add("cluster-a", fail, ["network"])
+        scheduler.add("pool-a", lambda: None, ["cluster-a"])
+        scheduler.add("lb-a", lambda: None, ["pool-a"])
+        scheduler.add("cluster-b", lambda: "b", ["network"])
+        report = scheduler.run()
+        self.assertFalse(report.ok)
+        self.assertEqual(
+            [step.name for step in report.with_status("cancelled")], ["pool-a", "lb-a"]
+        )
+        self.assertEqual(str(scheduler["cluster-a"].exception), "quota exceeded")
+        self.assertEqual(scheduler["cluster-b"].result, "b")
+
+    def test_critical_path(self):
+        scheduler = StepScheduler(max_workers=4)
+        scheduler.add("network", lambda: time.sleep(0.01))
+        scheduler.add("fast", lambda: None, ["network"])
+        scheduler.add("slow", lambda: time.sleep(0.05), ["network"])
+        scheduler.add("lb", lambda: None, ["fast", "slow"])
+        report = scheduler.run()
+        self.assertEqual(
+            [step.name for step in report.critical_path], ["network", "slow", "lb"]
+        )
+        self.assertGreaterEqual(report.critical_path_time, 0.06)
+
+    def test_coroutine_steps(self):
+        async def create():
+            return "created"
+
+        scheduler = StepScheduler()
+        scheduler.add("cluster", create)
+        scheduler.run()
+        self.assertEqual(scheduler["cluster"].result, "created")
+
+    def test_cycle(self):
+        scheduler = StepScheduler()
+        scheduler.add("a", lambda: None, ["b"])
+        scheduler.add("b", lambda: None, ["a"])
+        with self.assertRaisesRegex(ImproperlyConfigured, "circular"):
+            scheduler.run()
+
+    def test_unknown_requirement(self):
+        scheduler = StepScheduler()
+        scheduler.add("a", lambda: None, ["missing"])
+        with self.assertRaisesRegex(ImproperlyConfigured, "unknown step 'missing'"):
+            scheduler.order()
+
+
+class StateTestMixin:
+    """
+    Provision against a state database of the test's own.
+    """
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        settings = {
+            "ENGINE": "seahorse.db.backends.sqlite3",
+            "NAME": os.path.join(tmp.name, "state.sqlite3"),
+            "OPTIONS": {},
+        }
+        patcher = mock.patch.dict(connections.settings, {"state": settings})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(connections.shutdown)
+
+    def call(self, name, **options):
+        stdout = StringIO()
+        management.call_command(
+            name, database="state", stdout=stdout, stderr=StringIO(), **options
+        )
+        return stdout.getvalue().splitlines()
+
+
+class ApplyTestMixin(StateTestMixin):
+    """
+    Provision against a cloud API stand-in, call() applying to it.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.server = CloudServer().start()
+        self.addCleanup(self.server.stop)
+        patcher = mock.patch(
+            "seahorse.provision.base.describe_cache", DescribeCache(persist=False)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        limiter.reset(UNLIMITED)
+        self.addCleanup(limiter.reset)
+
+    def call(self, name, **options):
+        options.setdefault("endpoint", self.server.url)
+        return super().call(name, **options)
+
+
+class ProvisioningCommandTests(StateTestMixin, SimpleTestCase):
+    def test_gke_resources(self):
+        stdout, stderr = StringIO(), StringIO()
+        management.call_command(
+            "gke",
+            hostproject=["host-1"],
+            nodepool=["a", "b"],
+            internal_load_balancer=["ilb"],
+            verbosity=2,
+            database="state",
+            stdout=stdout,
+            stderr=stderr,
+        )
+        lines = stdout.getvalue().splitlines()
+        self.assertLess(
+            lines.index("gke cluster host-1"), lines.index("gke nodepool host-1/a")
+        )
+        self.assertEqual(lines[-1], "gke internal-lb host-1/ilb")
+        self.assertIn("Critical path", stderr.getvalue())
+
+    def test_aks_resources(self):
+        stdout = StringIO()
+        management.call_command(
+            "aks",
+            subscription=["sub-1"],
+            public_ip=["1.2.3.4"],
+            database="state",
+            stdout=stdout,
+        )
+        self.assertIn("aks public-ip sub-1/1.2.3.4 address=1.2.3.4", stdout.getvalue())
+
+    def test_eks_mismatched_pairs(self):
+        with self.assertRaisesRegex(CommandError, "same number of times"):
+            management.call_command(
+                "eks", vpcid=["vpc-1", "vpc-2"], CIDR=["10.0.0.0/16"], stdout=StringIO()
+            )
+
+
+class IncrementalProvisioningTests(ApplyTestMixin, SimpleTestCase):
+    def test_rerun_skips_unchanged(self):
+        first = self.call("eks", vpcid=["vpc-1"], CIDR=["10.0.0.0/16"])
+        self.assertEqual(first[0], "Plan: 4 to create, 0 to update, 0 unchanged.")
+        second = self.call("eks", vpcid=["vpc-1"], CIDR=["10.0.0.0/16"])
+        self.assertEqual(second, ["Plan: 0 to create, 0 to update, 4 unchanged."])
+
+    def test_only_delta_is_applied(self):
+        self.call("eks", vpcid=["vpc-1"], CIDR=["10.0.0.0/16"])
+        lines = self.call("eks", vpcid=["vpc-1"], CIDR=["10.9.0.0/16"], nodepool=["gpu"])
+        self.assertEqual(lines[0], "Plan: 1 to create, 1 to update, 2 unchanged.")
+        self.assertEqual(
+            sorted(lines[1:]),
+            ["eks nodegroup vpc-1/gpu", "eks subnets vpc-1 cidr=10.9.0.0/16"],
+        )
+
+    def test_plan_only(self):
+        self.call("eks", vpcid=["vpc-1"])
+        lines = self.call("eks", vpcid=["vpc-1"], nodepool=["default", "gpu"], plan=True)
+        self.assertEqual(
+            lines,
+            [
+                "= vpc/vpc-1",
+                "= subnets/vpc-1",
+                "= cluster/vpc-1",
+                "= nodegroup/vpc-1/default",
+                "+ nodegroup/vpc-1/gpu",
+                "Plan: 1 to create, 0 to update, 4 unchanged.",
+            ],
+        )
+        # --plan doesn't record anything.
+        self.assertNotIn(
+            ("nodegroup", "vpc-1/gpu"), StateStore("state").hashes("eks")
+        )
+
+    def test_force(self):
+        self.call("eks", vpcid=["vpc-1"])
+        lines = self.call("eks", vpcid=["vpc-1"], force=True)
+        self.assertEqual(lines[0], "Plan: 4 to create, 0 to update, 0 unchanged.")
+
+    def test_failed_resources_not_recorded(self):
+        class FailingCommand(management.load_command_class("seahorse.core", "eks").__class__):
+            def provision(self, kind, name, spec):
+                if kind == "cluster":
+                    raise RuntimeError("boom")
+                super().provision(kind, name, spec)
+
+        with self.assertRaises(CommandError):
+            management.call_command(
+                FailingCommand(), vpcid=["vpc-1"], database="state",
+                endpoint=self.server.url, stdout=StringIO(), stderr=StringIO(),
+            )
+        self.assertEqual(
+            set(StateStore("state").hashes("eks")),
+            {("vpc", "vpc-1"), ("subnets", "vpc-1")},
+        )
+
+    def test_dry_run_not_recorded(self):
+        dry_run = self.call("eks", vpcid=["vpc-1"], endpoint=None)
+        self.assertEqual(dry_run[0], "Plan: 4 to create, 0 to update, 0 unchanged.")
+        self.assertEqual(StateStore("state").hashes("eks"), {})
+        lines = self.call("eks", vpcid=["vpc-1"])
+        self.assertEqual(lines[0], "Plan: 4 to create, 0 to update, 0 unchanged.")
+        self.assertEqual(self.server.stats()["resources"], 4)
+
+    def test_content_hash_is_order_independent(self):
+        self.assertEqual(content_hash({"a": 1, "b": 2}), content_hash({"b": 2, "a": 1}))
+        self.assertNotEqual(content_hash({"a": 1}), content_hash({"a": 2}))
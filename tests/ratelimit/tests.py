@@ -0,0 +1,224 @@
+import asyncio
+import threading
+import time
+from unittest import mock
+
+from seahorse.cloud import ratelimit
+from seahorse.cloud.ratelimit import (
+    MUTATE,
+    READ,
+    RateLimiter,
+    RetriesExhausted,
+    Throttled,
+    TokenBucket,
+    TransientError,
+    backoff_delay,
+    parse_retry_after,
+)
+from seahorse.conf import settings
+from seahorse.test import SimpleTestCase
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    async def async_sleep(self, seconds):
+        self.sleep(seconds)
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_burst_then_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, burst=3, clock=clock)
+        self.assertEqual([bucket.reserve() for _ in range(3)], [0, 0, 0])
+        # Later callers queue behind each other at the bucket's rate.
+        self.assertEqual([bucket.reserve() for _ in range(3)], [0.5, 1.0, 1.5])
+        stats = bucket.stats()
+        self.assertEqual(stats["acquired"], 6)
+        self.assertEqual(stats["delayed"], 3)
+        self.assertEqual(stats["wait_seconds"], 3.0)
+
+    def test_refill(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1, burst=2, clock=clock)
+        bucket.reserve(), bucket.reserve()
+        clock.now = 10.0
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertEqual(bucket.reserve(), 1.0)
+
+    def test_pause(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10, burst=10, clock=clock)
+        bucket.pause(5)
+        self.assertAlmostEqual(bucket.reserve(), 5.1)
+
+    def test_waiters_spaced_after_pause(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, burst=5, clock=clock)
+        bucket.pause(10)
+        starts = []
+        for _ in range(20):
+            starts.append(clock.now + bucket.reserve())
+            clock.now += 0.1
+        # No burst once the pause ends: one call every 1/rate seconds.
+        self.assertAlmostEqual(starts[0], 10.5)
+        for earlier, later in zip(starts, starts[1:]):
+            self.assertAlmostEqual(later - earlier, 0.5)
+        # Tokens accrue again once the waiters are served.
+        clock.now = starts[-1] + 10
+        self.assertEqual([bucket.reserve() for _ in range(5)], [0] * 5)
+
+    def test_threads(self):
+        bucket = TokenBucket(rate=1000, burst=10)
+        waits = []
+
+        def worker():
+            for _ in range(50):
+                waits.append(bucket.reserve())
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(bucket.stats()["acquired"], 400)
+        # 390 tokens beyond the burst at 1000/s: the last waits about 0.39s.
+        self.assertAlmostEqual(max(waits), 0.39, delta=0.05)
+
+
+class HelperTests(SimpleTestCase):
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("3"), 3.0)
+        self.assertEqual(parse_retry_after(" 1.5 "), 1.5)
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertEqual(
+            parse_retry_after("Thu, 01 Jan 1970 00:00:30 GMT", now=10), 20.0
+        )
+        self.assertEqual(parse_retry_after("Thu, 01 Jan 1970 00:00:30 GMT"), 0.0)
+
+    def test_backoff_delay(self):
+        for attempt in range(8):
+            delay = backoff_delay(attempt, base=1, cap=10)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, min(10, 2**attempt))
+        self.assertGreaterEqual(backoff_delay(0, base=1, retry_after=7), 7)
+
+
+class RateLimiterTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.limiter = RateLimiter(
+            limits={
+                "*": {READ: {"rate": 1, "burst": 1}, MUTATE: {"rate": 1, "burst": 1}},
+                "eks": {READ: {"rate": 10, "burst": 2}},
+            },
+            clock=self.clock,
+            sleep=self.clock.sleep,
+            async_sleep=self.clock.async_sleep,
+        )
+
+    def test_buckets(self):
+        bucket = self.limiter.bucket("eks", READ)
+        self.assertIs(self.limiter.bucket("eks", READ), bucket)
+        self.assertEqual((bucket.rate, bucket.burst), (10, 2))
+        # Unknown providers and operations fall back to "*".
+        self.assertEqual(self.limiter.bucket("eks", MUTATE).burst, 1)
+        self.assertEqual(self.limiter.bucket("oci", READ).burst, 1)
+        self.assertIsNot(self.limiter.bucket("eks", MUTATE), bucket)
+
+    def test_call(self):
+        for _ in range(4):
+            self.assertEqual(self.limiter.call("eks", READ, lambda x: x * 2, 2), 4)
+        self.assertEqual(self.clock.sleeps, [0.1, 0.1])
+        self.assertEqual(self.limiter.stats()["eks.read"]["acquired"], 4)
+
+    def test_retry_after(self):
+        calls = []
+
+        def func():
+            calls.append(self.clock.now)
+            if len(calls) < 3:
+                raise Throttled(retry_after=4)
+            return "ok"
+
+        self.assertEqual(self.limiter.call("eks", READ, func), "ok")
+        self.assertEqual(len(calls), 3)
+        self.assertGreaterEqual(calls[1] - calls[0], 4)
+        self.assertGreaterEqual(calls[2] - calls[1], 4)
+        stats = self.limiter.stats()["eks.read"]
+        self.assertEqual(stats["throttled"], 2)
+        self.assertEqual(stats["retries"], 2)
+
+    def test_retries_exhausted(self):
+        func = mock.Mock(side_effect=TransientError("503"))
+        with self.assertRaisesRegex(RetriesExhausted, "Gave up after 5 attempts: 503"):
+            self.limiter.call("eks", READ, func)
+        self.assertEqual(func.call_count, 5)
+        self.assertEqual(self.limiter.stats()["eks.read"]["failures"], 1)
+
+    def test_other_errors_not_retried(self):
+        func = mock.Mock(side_effect=KeyError("x"))
+        with self.assertRaises(KeyError):
+            self.limiter.call("eks", READ, func)
+        self.assertEqual(func.call_count, 1)
+
+    def test_acall(self):
+        attempts = []
+
+        async def func(value):
+            attempts.append(value)
+            if len(attempts) == 1:
+                raise Throttled(retry_after=2)
+            return value
+
+        async def main():
+            return await asyncio.gather(
+                *(self.limiter.acall("eks", READ, func, i) for i in range(3))
+            )
+
+        self.assertEqual(asyncio.run(main()), [0, 1, 2])
+        self.assertEqual(self.limiter.stats()["eks.read"]["throttled"], 1)
+
+    def test_settings(self):
+        limiter = RateLimiter()
+        limits = {"gke": {READ: {"rate": 1, "burst": 3}}}
+        with mock.patch.object(settings, "_wrapped", mock.Mock(RATE_LIMITS=limits)):
+            self.assertEqual(limiter.bucket("gke", READ).burst, 3)
+        # Defaults of the other operation class are kept.
+        self.assertEqual(
+            limiter.bucket("gke", MUTATE).burst,
+            ratelimit.DEFAULT_RATE_LIMITS["gke"][MUTATE]["burst"],
+        )
+
+    def test_settings_merged_per_key(self):
+        limiter = RateLimiter()
+        limits = {
+            "*": {MUTATE: {"rate": 1}},
+            "gke": {READ: {"rate": 50}},
+            "oci": {READ: {"burst": 7}},
+        }
+        with mock.patch.object(settings, "_wrapped", mock.Mock(RATE_LIMITS=limits)):
+            gke = limiter.bucket("gke", READ)
+            oci_read = limiter.bucket("oci", READ)
+            oci_mutate = limiter.bucket("oci", MUTATE)
+        self.assertEqual((gke.rate, gke.burst), (50, 40))
+        self.assertEqual((oci_read.rate, oci_read.burst), (10, 7))
+        self.assertEqual((oci_mutate.rate, oci_mutate.burst), (1, 5))
+
+    def test_real_sleep(self):
+        limiter = RateLimiter(limits={"*": {READ: {"rate": 50, "burst": 1}}})
+        start = time.perf_counter()
+        for _ in range(4):
+            limiter.acquire("x", READ)
+        self.assertGreaterEqual(time.perf_counter() - start, 0.05)
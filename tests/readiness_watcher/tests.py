@@ -0,0 +1,226 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from io import StringIO
+from unittest import mock
+
+from seahorse.cloud.client import CloudClient
+from seahorse.cloud.ratelimit import limiter
+from seahorse.cloud.watcher import (
+    OperationFailed,
+    OperationHistory,
+    PollPolicy,
+    ReadinessWatcher,
+    WatchTimeout,
+    watcher,
+)
+from seahorse.core import management
+from seahorse.core.management import CommandError
+from seahorse.test import SimpleTestCase
+from seahorse.test.cloud import CloudServer
+
+UNLIMITED = {
+    "*": {"read": {"rate": 1e6, "burst": 1e6}, "mutate": {"rate": 1e6, "burst": 1e6}}
+}
+FAST = PollPolicy(initial=0.01, factor=2, maximum=0.05, near=0.01)
+
+
+class FakeClient:
+    provider = "fake"
+
+    def __init__(self, ready_after=0.0, status="READY"):
+        self.ready_after = ready_after
+        self.status = status
+        self.created = time.monotonic()
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def describe_many(self, kind, names):
+        with self.lock:
+            self.requests.append(list(names))
+        done = time.monotonic() - self.created >= self.ready_after
+        status = self.status if done else "PENDING"
+        return {name: {"name": name, "status": status} for name in names}
+
+
+class PollPolicyTests(SimpleTestCase):
+    def test_backoff(self):
+        policy = PollPolicy(initial=1, factor=2, maximum=10)
+        self.assertEqual(
+            [policy.interval(0, polls) for polls in range(6)], [1, 2, 4, 8, 10, 10]
+        )
+
+    def test_expected_duration(self):
+        policy = PollPolicy(initial=1, factor=2, maximum=30, near=2, window=0.1)
+        # Fast at first, then backing off.
+        self.assertEqual(policy.interval(1, 0, expected=100), 1)
+        self.assertEqual(policy.interval(20, 4, expected=100), 16)
+        # Without sleeping past the start of the window around 100s.
+        self.assertEqual(policy.interval(85, 5, expected=100), 5)
+        self.assertEqual(policy.interval(95, 6, expected=100), 2)
+        self.assertEqual(policy.interval(105, 7, expected=100), 2)
+        # Overdue operations back off with the overrun.
+        self.assertEqual(policy.interval(130, 8, expected=100), 20)
+        self.assertEqual(policy.interval(500, 9, expected=100), 30)
+
+
+class OperationHistoryTests(SimpleTestCase):
+    def test_history(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "operations.json")
+            history = OperationHistory(path, keep=3)
+            self.assertIsNone(history.expected("eks", "cluster"))
+            for duration in (100, 600, 500, 400):
+                history.record("eks", "cluster", duration)
+            self.assertEqual(history.expected("eks", "cluster"), 500)
+            history.save()
+            reloaded = OperationHistory(path, keep=3)
+            self.assertEqual(reloaded.expected("eks", "cluster"), 500)
+            self.assertIsNone(reloaded.expected("gke", "cluster"))
+
+
+class ReadinessWatcherTests(SimpleTestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.history = OperationHistory(os.path.join(self.tmpdir.name, "ops.json"))
+        self.watcher = ReadinessWatcher(
+            policy=FAST, history=self.history, batch_size=100, coalesce=0.02
+        )
+        self.addCleanup(self.watcher.close)
+
+    def test_batched_polls(self):
+        client = FakeClient(ready_after=0.1)
+        futures = [
+            self.watcher.watch(client, "cluster", "c-%d" % i) for i in range(300)
+        ]
+        resources = [future.result(timeout=5) for future in futures]
+        self.assertEqual(resources[7], {"name": "c-7", "status": "READY"})
+        self.assertLessEqual(max(len(names) for names in client.requests), 100)
+        # 300 operations polled every 10-50ms for 100ms, a few batches a round.
+        self.assertLess(len(client.requests), 60)
+        stats = self.watcher.stats()
+        self.assertEqual((stats["watched"], stats["ready"]), (300, 300))
+        self.assertEqual(stats["requests"], len(client.requests))
+        self.assertAlmostEqual(self.history.expected("fake", "cluster"), 0.1, delta=0.1)
+
+    def test_callbacks(self):
+        done = threading.Event()
+        results = []
+
+        def callback(future):
+            results.append(future.result()["name"])
+            done.set()
+
+        self.watcher.watch(FakeClient(), "cluster", "c-1").add_done_callback(callback)
+        self.assertTrue(done.wait(5))
+        self.assertEqual(results, ["c-1"])
+
+    def test_wait(self):
+        async def wait_all():
+            client = FakeClient(ready_after=0.02)
+            return await asyncio.gather(
+                *(self.watcher.wait(client, "nodepool", str(i)) for i in range(5))
+            )
+
+        resources = asyncio.run(wait_all())
+        self.assertEqual([resource["name"] for resource in resources], list("01234"))
+
+    def test_failed(self):
+        future = self.watcher.watch(FakeClient(status="FAILED"), "cluster", "c-1")
+        with self.assertRaisesRegex(OperationFailed, "fake cluster c-1 is FAILED"):
+            future.result(timeout=5)
+        self.assertEqual(future.exception().resource["status"], "FAILED")
+
+    def test_timeout(self):
+        future = self.watcher.watch(
+            FakeClient(ready_after=60), "cluster", "c-1", timeout=0.05
+        )
+        with self.assertRaisesRegex(WatchTimeout, "c-1 was not ready"):
+            future.result(timeout=5)
+        self.assertEqual(self.watcher.stats()["timed_out"], 1)
+
+    def test_describe_error(self):
+        def describe(client, kind, names):
+            raise RuntimeError("API down")
+
+        watcher = ReadinessWatcher(describe=describe, policy=FAST, history=self.history)
+        self.addCleanup(watcher.close)
+        with self.assertRaisesRegex(RuntimeError, "API down"):
+            watcher.watch(FakeClient(), "cluster", "c-1").result(timeout=5)
+
+    def test_close_cancels_pending(self):
+        future = self.watcher.watch(FakeClient(ready_after=60), "cluster", "c-1")
+        self.watcher.close()
+        self.assertTrue(future.cancelled())
+        # A closed watcher starts again on the next watch().
+        self.assertEqual(
+            self.watcher.watch(FakeClient(), "cluster", "c-2").result(timeout=5),
+            {"name": "c-2", "status": "READY"},
+        )
+
+
+class StandinTests(SimpleTestCase):
+    def setUp(self):
+        history = OperationHistory(os.path.join(tempfile.mkdtemp(), "ops.json"))
+        for name, value in (
+            ("policy", FAST),
+            ("coalesce", 0.01),
+            ("history", history),
+        ):
+            patcher = mock.patch.object(watcher, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        limiter.reset(UNLIMITED)
+        self.addCleanup(limiter.reset)
+
+    def test_describe_many(self):
+        with CloudServer(provision_time=60) as server:
+            client = CloudClient(server.url, "gke")
+            client.put("cluster", "a/b", {"size": 1})
+            found = client.describe_many("cluster", ["a/b", "missing"])
+            self.assertEqual(list(found), ["a/b"])
+            self.assertEqual(found["a/b"]["status"], "PENDING")
+
+    def test_provision_and_wait(self):
+        with CloudServer(provision_time=0.05) as server:
+            stdout = StringIO()
+            management.call_command(
+                "eks",
+                vpcid=["vpc-1"],
+                nodepool=["a", "b"],
+                endpoint=server.url,
+                force=True,
+                wait=10,
+                skip_checks=True,
+                stdout=stdout,
+            )
+            # Only the clusters and node groups were waited on, the node
+            # groups once their cluster was ready.
+            self.assertEqual(
+                {key[1:]: value["status"] for key, value in server.resources.items()},
+                {
+                    ("vpc", "vpc-1"): "PENDING",
+                    ("subnets", "vpc-1"): "PENDING",
+                    ("cluster", "vpc-1"): "READY",
+                    ("nodegroup", "vpc-1/a"): "READY",
+                    ("nodegroup", "vpc-1/b"): "READY",
+                },
+            )
+
+    def test_wait_timeout(self):
+        with CloudServer(provision_time=60) as server:
+            with mock.patch.object(limiter, "backoff_base", 0.001):
+                with self.assertRaisesRegex(CommandError, "resources failed"):
+                    management.call_command(
+                        "eks",
+                        vpcid=["vpc-1"],
+                        endpoint=server.url,
+                        force=True,
+                        wait=0.1,
+                        skip_checks=True,
+                        stdout=StringIO(),
+                        stderr=StringIO(),
+                    )
@@ -0,0 +1,134 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from seahorse.core.management import CommandError, call_command
+from seahorse.db.backends.redis import RedisConnection, RedisError
+from seahorse.test import SimpleTestCase
+from seahorse.test.redis import RespServer
+from seahorse.utils.connection import ConnectionPool
+
+
+class RedisCommandTests(SimpleTestCase):
+    def setUp(self):
+        self.server = RespServer().start()
+        self.addCleanup(self.server.stop)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp, name)
+        with open(path, "w") as fh:
+            fh.write(content)
+        return path
+
+    def call(self, *args, **options):
+        stdout = StringIO()
+        call_command(
+            "redis", *args, port=self.server.port, stdout=stdout, stderr=StringIO(),
+            **options,
+        )
+        return stdout.getvalue()
+
+    def jsonl(self, count):
+        return self.write(
+            "records.jsonl",
+            "".join(
+                json.dumps({"key": "cluster:%d" % i, "value": "ready-%d" % i}) + "\n"
+                for i in range(count)
+            ),
+        )
+
+    def test_load_jsonl_in_batches_on_one_connection(self):
+        out = self.call("load", self.jsonl(25), batch_size=10)
+        self.assertIn("Loaded 25 records in 3 batches", out)
+        self.assertEqual(self.server.data[b"cluster:24"], b"ready-24")
+        self.assertEqual(self.server.connections_accepted, 1)
+
+    def test_load_structured_values(self):
+        path = self.write(
+            "records.jsonl",
+            '{"key": "nodes", "value": {"a": 1, "b": "x"}, "ttl": 60}\n'
+            '{"key": "cidrs", "value": ["10.0.0.0/16"]}\n',
+        )
+        self.call("load", path)
+        self.assertEqual(self.server.data[b"nodes"], {b"a": b"1", b"b": b"x"})
+        self.assertEqual(self.server.data[b"cidrs"], b'["10.0.0.0/16"]')
+        self.assertIn("Verified 2 records, 0 mismatches.", self.call("verify", path))
+
+    def test_load_csv(self):
+        path = self.write("records.csv", "key,value,ttl\nvpc-1,10.0.0.0/16,\nvpc-2,10.1.0.0/16,30\n")
+        self.call("load", path)
+        self.assertEqual(self.server.data[b"vpc-2"], b"10.1.0.0/16")
+
+    def test_verify_mismatch(self):
+        path = self.jsonl(3)
+        self.call("load", path)
+        self.server.data[b"cluster:1"] = b"stale"
+        with self.assertRaisesRegex(CommandError, "1 records don't match"):
+            self.call("verify", path)
+
+    def test_invalid_record(self):
+        path = self.write("records.jsonl", '{"value": 1}\n')
+        with self.assertRaisesRegex(CommandError, "Line 1"):
+            self.call("load", path)
+
+    def test_invalid_record_after_loaded_ones(self):
+        path = self.write(
+            "records.jsonl", '{"key": "a", "value": 1}\n{"key": "b"}\n{"value": 1}\n'
+        )
+        with self.assertRaisesRegex(
+            CommandError, r"Line 3.*\(2 records loaded in 2 batches\)"
+        ):
+            self.call("load", path, batch_size=1)
+
+    def test_connection_lost_during_load(self):
+        pipeline = RedisConnection.pipeline
+        calls = []
+
+        def failing_pipeline(conn, commands):
+            calls.append(conn)
+            if len(calls) > 1:
+                raise ConnectionError("Connection closed by the server.")
+            return pipeline(conn, commands)
+
+        discard = mock.patch.object(
+            ConnectionPool, "discard", autospec=True, side_effect=ConnectionPool.discard
+        )
+        with mock.patch.object(RedisConnection, "pipeline", failing_pipeline):
+            with discard as discarded, self.assertRaisesRegex(
+                CommandError,
+                r"Redis connection failed: .*\(10 records loaded in 1 batches\)",
+            ):
+                self.call("load", self.jsonl(25), batch_size=10)
+        # Left in the middle of a pipeline, the connection isn't reused.
+        self.assertIs(discarded.call_args.args[1], calls[0])
+
+    def test_path_required(self):
+        with self.assertRaisesRegex(CommandError, "requires a path"):
+            self.call("load")
+
+    def test_bench(self):
+        out = self.call("bench", requests=200, pipeline=8, clients=2)
+        self.assertIn("200 requests, 2 clients, pipeline 8", out)
+        self.assertIn("p99", out)
+        self.assertEqual(self.server.connections_accepted, 2)
+
+    def test_connection_refused(self):
+        self.server.stop()
+        with self.assertRaisesRegex(CommandError, "Redis connection failed"):
+            self.call("bench", requests=1)
+
+
+class RedisConnectionTests(SimpleTestCase):
+    def test_pipeline_errors_are_per_command(self):
+        with RespServer() as server:
+            conn = RedisConnection(port=server.port)
+            replies = conn.pipeline([["SET", "a", "1"], ["NOPE"], ["GET", "a"]])
+            conn.close()
+        self.assertEqual(replies[0], "OK")
+        self.assertIsInstance(replies[1], RedisError)
+        self.assertEqual(replies[2], "1")
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+import argparse
+import os
+import sys
+import tempfile
+import unittest
+
+RUNTESTS_DIR = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, os.path.dirname(RUNTESTS_DIR))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the seahorse test suite.")
+    parser.add_argument(
+        "modules",
+        nargs="*",
+        metavar="module",
+        help='Optional test modules, e.g. "user_commands" or "batch.tests".',
+    )
+    parser.add_argument("-v", "--verbosity", type=int, default=1, choices=[0, 1, 2, 3])
+    parser.add_argument("--failfast", action="store_true")
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Run the tests on N processes, 0 for one per CPU.",
+    )
+    options = parser.parse_args()
+
+    from seahorse.test.runner import ParallelTestRunner, TestDurations, build_suite
+
+    # Read before the cache directory is redirected, so it outlives the run.
+    durations = TestDurations()
+
+    # Keep the caches and the provisioning state of the suite away from the
+    # user's own.
+    tmp_dir = tempfile.TemporaryDirectory(prefix="seahorse-tests-")
+    os.environ["SEAHORSE_CACHE_DIR"] = os.path.join(tmp_dir.name, "cache")
+    os.environ["SEAHORSE_STATE_DIR"] = os.path.join(tmp_dir.name, "state")
+
+    suite = build_suite(options.modules, RUNTESTS_DIR)
+    if options.parallel != 1:
+        runner = ParallelTestRunner(
+            parallel=options.parallel,
+            top_level_dir=RUNTESTS_DIR,
+            verbosity=options.verbosity,
+            failfast=options.failfast,
+            durations=durations,
+        )
+        runner.run(suite)
+        successful = not runner.failures()
+    else:
+        result = unittest.TextTestRunner(
+            verbosity=options.verbosity, failfast=options.failfast
+        ).run(suite)
+        successful = result.wasSuccessful()
+    tmp_dir.cleanup()
+    return not successful
+
+
+if __name__ == "__main__":
+    sys.exit(main())
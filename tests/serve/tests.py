@@ -0,0 +1,158 @@
+import os
+import socket
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from seahorse.core import client
+from seahorse.core.management import CommandError, execute_from_command_line
+from seahorse.core.management.server import (
+    CommandServer,
+    _ProcessState,
+    stop_server,
+)
+from seahorse.test import SimpleTestCase
+
+
+class CommandServerTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = os.path.realpath(tmp.name)
+        self.path = os.path.join(self.tmp, "serve.sock")
+        self.server = CommandServer(self.path).start()
+        self.addCleanup(self.server.stop)
+
+    def run_remote(self, *args, cwd=None):
+        stdout, stderr = StringIO(), StringIO()
+        if cwd is not None:
+            old_cwd = os.getcwd()
+            os.chdir(cwd)
+            self.addCleanup(os.chdir, old_cwd)
+        returncode = client.run_remote(
+            ["seahorse-admin", *args], self.path, stdout=stdout, stderr=stderr
+        )
+        return returncode, stdout.getvalue(), stderr.getvalue()
+
+    def test_version(self):
+        self.assertEqual(self.run_remote("version"), (0, "4.2.1\n", ""))
+
+    def test_command_output(self):
+        returncode, stdout, stderr = self.run_remote(
+            "eks", "--vpcid", "vpc-1", "--CIDR", "10.0.0.0/16", "--plan"
+        )
+        self.assertEqual(returncode, 0)
+        self.assertIn("cluster/vpc-1", stdout)
+
+    def test_command_error(self):
+        returncode, stdout, stderr = self.run_remote("bench", "nope")
+        self.assertEqual(returncode, 1)
+        self.assertIn("CommandError: Unknown benchmark(s): nope.", stderr)
+
+    def test_usage_error(self):
+        returncode, stdout, stderr = self.run_remote("eks", "--bogus")
+        self.assertEqual(returncode, 2)
+        self.assertIn("unrecognized arguments: --bogus", stderr)
+
+    def test_unknown_command(self):
+        returncode, stdout, stderr = self.run_remote("nope")
+        self.assertEqual(returncode, 1)
+        self.assertIn("Unknown command: 'nope'", stderr)
+
+    def test_client_working_directory(self):
+        returncode, stdout, stderr = self.run_remote(
+            "bench", "output.write", "--repeat", "1", "--save", "out.json", cwd=self.tmp
+        )
+        self.assertEqual(returncode, 0, stderr)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp, "out.json")))
+        # The client and the server share this process, the server went back
+        # to its own directory.
+        self.assertEqual(os.getcwd(), self.server.state.home)
+
+    def test_client_environment(self):
+        environ = dict(os.environ)
+        sock = client.connect(self.path)
+        with sock:
+            messages = list(
+                client.send(
+                    sock,
+                    {
+                        "argv": ["seahorse-admin", "version"],
+                        "env": dict(environ, SEAHORSE_CLIENT="1"),
+                        "umask": 0o077,
+                    },
+                )
+            )
+        self.assertEqual(messages[-1], {"exit": 0})
+        self.assertEqual(dict(os.environ), environ)
+
+    def test_stdin_runs_locally(self):
+        for argv in (
+            ["seahorse-admin", "redis", "load", "-"],
+            ["seahorse-admin", "eks", "--inventory=-"],
+            ["seahorse-admin", "eks", "--inventory", "-"],
+        ):
+            with self.subTest(argv=argv):
+                self.assertIsNone(client.run_remote(argv))
+
+    def test_no_server(self):
+        self.assertIsNone(
+            client.run_remote(["seahorse-admin", "version"], self.path + ".missing")
+        )
+
+    def test_execute_from_command_line_runs_locally(self):
+        stdout = StringIO()
+        with mock.patch.dict(os.environ, {"SEAHORSE_SOCKET": self.path}):
+            with mock.patch.object(client, "run_remote") as run_remote:
+                with mock.patch("sys.stdout", stdout):
+                    execute_from_command_line(["seahorse-admin", "version"])
+        run_remote.assert_not_called()
+        self.assertEqual(stdout.getvalue(), "4.2.1\n")
+
+    def test_already_listening(self):
+        with self.assertRaisesRegex(CommandError, "already listening"):
+            CommandServer(self.path)
+
+    def test_stop(self):
+        self.assertTrue(stop_server(self.path))
+        self.server._thread.join()
+        self.assertFalse(stop_server(self.path + ".missing"))
+
+
+class ProcessStateTests(SimpleTestCase):
+    def test_server_state_shared(self):
+        state = _ProcessState()
+        with state.use(os.getcwd(), dict(os.environ), state.umask):
+            self.assertEqual(state._shared, 1)
+            self.assertFalse(state._exclusive)
+
+    def test_client_state_applied_and_restored(self):
+        state = _ProcessState()
+        environ = dict(os.environ)
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = os.path.realpath(tmp)
+            with state.use(tmp, {"SEAHORSE_CLIENT": "1"}, 0o077):
+                self.assertTrue(state._exclusive)
+                self.assertEqual(os.getcwd(), tmp)
+                self.assertEqual(dict(os.environ), {"SEAHORSE_CLIENT": "1"})
+                self.assertEqual(client._umask(), 0o077)
+        self.assertEqual(os.getcwd(), state.home)
+        self.assertEqual(dict(os.environ), environ)
+        self.assertEqual(client._umask(), state.umask)
+
+
+class StaleSocketTests(SimpleTestCase):
+    def test_stale_socket_replaced(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "serve.sock")
+            stale = socket.socket(socket.AF_UNIX)
+            stale.bind(path)
+            stale.close()
+            with CommandServer(path):
+                self.assertEqual(
+                    client.run_remote(
+                        ["seahorse-admin", "version"], path, stdout=StringIO()
+                    ),
+                    0,
+                )
+            self.assertFalse(os.path.exists(path))
@@ -0,0 +1,168 @@
+import json
+import os
+import tempfile
+from unittest import mock
+
+from seahorse import conf
+from seahorse.conf import LazySettings, Settings
+from seahorse.core.exception import ImproperlyConfigured
+from seahorse.db.utils import ConnectionHandler
+from seahorse.test import SimpleTestCase
+from seahorse.utils.datastructures import CaseInsensitiveMapping
+
+
+class SettingsTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "config.json")
+        self.write_config({"Region": "eu-west-1", "nodepools": ["a"]})
+
+    def write_config(self, data):
+        with open(self.path, "w") as fh:
+            json.dump(data, fh)
+        # Make the change visible even within the mtime granularity.
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    def test_layers(self):
+        settings = Settings(
+            self.path,
+            overrides={"NODEPOOLS": ["b"]},
+            environ={"SEAHORSE_REGION": "us-east-1", "SEAHORSE_WORKERS": "8"},
+        )
+        self.assertEqual(settings.DATABASES, {})
+        self.assertEqual(settings.REGION, "us-east-1")
+        self.assertEqual(settings.workers, 8)
+        self.assertEqual(settings.nodepools, ["b"])
+
+    def test_case_insensitive(self):
+        settings = Settings(self.path, environ={})
+        self.assertEqual(settings.region, "eu-west-1")
+        self.assertEqual(settings.REGION, "eu-west-1")
+        self.assertIn("region", settings)
+        self.assertIn("Region", list(settings))
+
+    def test_unknown_setting(self):
+        with self.assertRaisesRegex(AttributeError, "'NOPE' is not defined"):
+            Settings(environ={}).NOPE
+
+    def test_env_strings(self):
+        settings = Settings(environ={"SEAHORSE_NAME": "not json"})
+        self.assertEqual(settings.NAME, "not json")
+
+    def test_reserved_environment_variables(self):
+        settings = Settings(
+            environ={
+                "SEAHORSE_CACHE_DIR": "/tmp/cache",
+                "SEAHORSE_NO_SERVER": "1",
+                "SEAHORSE_REGION": "us-east-1",
+            }
+        )
+        self.assertNotIn("CACHE_DIR", settings)
+        self.assertNotIn("NO_SERVER", settings)
+        self.assertEqual(settings.REGION, "us-east-1")
+
+    def test_file_parsed_once_per_change(self):
+        with mock.patch.object(
+            conf, "_parse_config_file", wraps=conf._parse_config_file
+        ) as parse:
+            Settings(self.path, environ={})
+            Settings(self.path, environ={})
+            self.assertEqual(parse.call_count, 1)
+            self.write_config({"region": "ap-south-1"})
+            self.assertEqual(Settings(self.path, environ={}).region, "ap-south-1")
+            self.assertEqual(parse.call_count, 2)
+
+    def test_change_detection(self):
+        environ = {}
+        settings = Settings(self.path, environ=environ)
+        self.assertFalse(settings.is_stale())
+        self.write_config({"Region": "eu-west-1", "nodepools": ["a", "b"]})
+        self.assertTrue(settings.is_stale())
+        fresh = settings.reloaded()
+        self.assertEqual(settings.diff(fresh), {"nodepools"})
+        environ["SEAHORSE_EXTRA"] = "1"
+        self.assertTrue(fresh.is_stale())
+        self.assertEqual(fresh.diff(fresh.reloaded()), {"EXTRA"})
+
+    def test_lazy_settings(self):
+        lazy = LazySettings()
+        self.assertFalse(lazy.configured)
+        with mock.patch.dict(os.environ, {"SEAHORSE_CONFIG": self.path}):
+            self.assertEqual(lazy.REGION, "eu-west-1")
+            self.assertTrue(lazy.configured)
+            self.assertEqual(lazy.reload(), set())
+            self.write_config({"Region": "eu-central-1"})
+            self.assertEqual(lazy.reload(), {"Region", "nodepools"})
+            self.assertEqual(lazy.REGION, "eu-central-1")
+
+    def test_reload_finds_new_config_file(self):
+        config_dir = os.path.dirname(self.path)
+        os.rename(self.path, self.path + ".new")
+        lazy = LazySettings()
+        with mock.patch.dict(os.environ), mock.patch.object(
+            conf, "get_config_dir", lambda name: os.path.join(config_dir, name)
+        ):
+            os.environ.pop("SEAHORSE_CONFIG", None)
+            self.assertNotIn("region", lazy)
+            self.assertEqual(lazy.reload(), set())
+            os.rename(self.path + ".new", self.path)
+            self.assertEqual(lazy.reload(), {"Region", "nodepools"})
+            self.assertEqual(lazy.REGION, "eu-west-1")
+
+    def test_configure(self):
+        lazy = LazySettings()
+        lazy.configure(self.path, REGION="override")
+        self.assertEqual(lazy.region, "override")
+        with self.assertRaisesRegex(RuntimeError, "already configured"):
+            lazy.configure()
+
+    def test_missing_config_file(self):
+        with self.assertRaisesRegex(ImproperlyConfigured, "doesn't exist"):
+            Settings(self.path + ".missing")
+
+    def test_invalid_config_file(self):
+        with open(self.path, "w") as fh:
+            fh.write("[1, 2]")
+        with self.assertRaisesRegex(ImproperlyConfigured, "must define a mapping"):
+            Settings(self.path)
+
+    def test_toml(self):
+        if conf.tomllib is None:
+            self.skipTest("tomllib requires Python 3.11")
+        path = self.path.replace(".json", ".toml")
+        with open(path, "w") as fh:
+            fh.write('region = "eu-north-1"\n[databases.default]\nname = "x"\n')
+        settings = Settings(path, environ={})
+        self.assertEqual(settings.REGION, "eu-north-1")
+        self.assertEqual(settings.DATABASES, {"default": {"name": "x"}})
+
+    def test_connection_handler_reads_databases(self):
+        name = os.path.join(os.path.dirname(self.path), "x")
+        databases = {"default": {"NAME": name}}
+        with mock.patch.object(
+            conf.settings, "_wrapped", Settings(overrides={"DATABASES": databases})
+        ):
+            handler = ConnectionHandler()
+            self.assertEqual(handler.settings["default"]["NAME"], name)
+        # The handler fills in defaults on a copy.
+        self.assertNotIn("ENGINE", databases["default"])
+
+
+class CaseInsensitiveMappingTests(SimpleTestCase):
+    def test_eq(self):
+        mapping = CaseInsensitiveMapping({"Accept": "json", "Host": "x"})
+        self.assertEqual(mapping, mapping)
+        other = CaseInsensitiveMapping({"accept": "json", "HOST": "x"})
+        self.assertEqual(mapping, other)
+        self.assertEqual(mapping, {"ACCEPT": "json", "host": "x"})
+        self.assertNotEqual(mapping, {"Accept": "json"})
+        self.assertNotEqual(mapping, {"Accept": "json", "Host": "y"})
+        self.assertNotEqual(mapping, {"Accept": "json", "Other": "x"})
+        self.assertNotEqual(mapping, [("Accept", "json"), ("Host", "x")])
+
+    def test_slots(self):
+        mapping = CaseInsensitiveMapping({"a": 1})
+        with self.assertRaises(AttributeError):
+            mapping.extra = 1
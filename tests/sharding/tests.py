@@ -0,0 +1,248 @@
+import json
+import os
+import tempfile
+from collections import Counter
+from io import StringIO
+
+from seahorse.core import management
+from seahorse.core.management import BaseCommand, CommandError
+from seahorse.core.management.sharding import (
+    Shard,
+    jump_hash,
+    key_hash,
+    merge_results,
+    write_results,
+)
+from seahorse.test import SimpleTestCase
+
+KEYS = ["vpc-%d" % i for i in range(2000)]
+
+
+class FleetCommand(BaseCommand):
+    requires_system_checks = []
+    shard_option = "vpcid"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--vpcid", action="append", default=[])
+        parser.add_argument("--fail", action="append", default=[])
+
+    def iter_targets(self, *args, **options):
+        for vpcid in options["vpcid"]:
+            yield args, dict(options, vpcid=[vpcid])
+
+    def handle(self, *args, **options):
+        vpcid = options["vpcid"][0]
+        if vpcid in options["fail"]:
+            raise CommandError("%s is broken" % vpcid)
+        self.stdout.write("provisioned %s" % vpcid)
+
+
+class JumpHashTests(SimpleTestCase):
+    def test_stable(self):
+        self.assertEqual(key_hash("vpc-1"), key_hash("vpc-1"))
+        self.assertEqual(jump_hash(0, 1), 0)
+        self.assertEqual(
+            [jump_hash(key_hash(key), 10) for key in KEYS[:5]],
+            [jump_hash(key_hash(key), 10) for key in KEYS[:5]],
+        )
+
+    def test_balanced(self):
+        counts = Counter(jump_hash(key_hash(key), 4) for key in KEYS)
+        self.assertEqual(set(counts), {0, 1, 2, 3})
+        for count in counts.values():
+            self.assertAlmostEqual(count, 500, delta=100)
+
+    def test_minimal_movement(self):
+        # Going from n to n + 1 buckets only moves keys into the new bucket,
+        # about 1/(n + 1) of them.
+        for n in (1, 3, 7):
+            moved = 0
+            for key in KEYS:
+                before = jump_hash(key_hash(key), n)
+                after = jump_hash(key_hash(key), n + 1)
+                if before != after:
+                    self.assertEqual(after, n)
+                    moved += 1
+            self.assertAlmostEqual(moved / len(KEYS), 1 / (n + 1), delta=0.05)
+
+
+class ShardTests(SimpleTestCase):
+    def test_parse(self):
+        self.assertEqual(Shard.parse("2/3"), Shard(2, 3))
+        self.assertEqual(str(Shard.parse("2/3")), "2/3")
+        for text in ("2", "a/3", "2/3/4"):
+            with self.assertRaisesRegex(ValueError, "Invalid shard"):
+                Shard.parse(text)
+        for text in ("0/3", "4/3", "1/0"):
+            with self.assertRaisesRegex(ValueError, "doesn't exist"):
+                Shard.parse(text)
+
+    def test_owns_partition(self):
+        shards = [Shard(index, 3) for index in (1, 2, 3)]
+        for key in KEYS[:200]:
+            self.assertEqual(sum(shard.owns(key) for shard in shards), 1)
+
+    def test_result_path(self):
+        self.assertEqual(Shard(1, 4).result_path("eks"), "eks-shard-1-of-4.jsonl")
+
+
+class ShardedRunTests(SimpleTestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.tmpdir.name, name)
+
+    def run_shard(self, index, count, vpcids, **options):
+        stdout, stderr = StringIO(), StringIO()
+        path = self.path("shard-%d.jsonl" % index)
+        try:
+            management.call_command(
+                FleetCommand(),
+                vpcid=vpcids,
+                shard=Shard(index, count),
+                shard_results=path,
+                stdout=stdout,
+                stderr=stderr,
+                **options,
+            )
+        finally:
+            self.outputs = stdout.getvalue(), stderr.getvalue()
+        return path
+
+    def test_shards_split_targets(self):
+        vpcids = KEYS[:20]
+        paths = [self.run_shard(index, 3, vpcids) for index in (1, 2, 3)]
+        ran = []
+        for index, path in enumerate(paths, 1):
+            with open(path) as fh:
+                header, *records = [json.loads(line) for line in fh]
+            self.assertEqual(
+                header,
+                {
+                    "event": "shard",
+                    "command": "tests",
+                    "shard": "%d/3" % index,
+                    "targets": len(records),
+                    "failed": 0,
+                },
+            )
+            for record in records:
+                self.assertTrue(Shard(index, 3).owns(record["key"]))
+                self.assertEqual(record["status"], "ok")
+            ran.extend(record["key"] for record in records)
+        self.assertEqual(sorted(ran), sorted(vpcids))
+        self.assertRegex(self.outputs[0], "provisioned vpc-")
+        self.assertRegex(self.outputs[1], r"Shard 3/3: \d+ targets, results written")
+
+    def test_failed_target_recorded(self):
+        vpcids = [key for key in KEYS[:20] if Shard(1, 2).owns(key)]
+        message = "1 of %d targets failed" % len(vpcids)
+        with self.assertRaisesRegex(CommandError, message):
+            self.run_shard(1, 2, vpcids, fail=[vpcids[0]])
+        command, count, targets = merge_results(
+            [self.path("shard-1.jsonl"), self.run_shard(2, 2, [])]
+        )
+        self.assertEqual((command, count), ("tests", 2))
+        failed = [target for target in targets if target["status"] == "failed"]
+        self.assertEqual(
+            [(target["key"], target["error"]) for target in failed],
+            [(vpcids[0], "%s is broken" % vpcids[0])],
+        )
+
+
+    def test_targets_without_shard_option(self):
+        class TagCommand(FleetCommand):
+            def add_arguments(self, parser):
+                super().add_arguments(parser)
+                parser.add_argument("--tag", action="append", default=[])
+
+            def iter_targets(self, *args, **options):
+                for tag in options["tag"]:
+                    yield args, dict(options, tag=[tag])
+
+            def handle(self, *args, **options):
+                pass
+
+        paths = []
+        for index in (1, 2):
+            path = self.path("tags-%d.jsonl" % index)
+            management.call_command(
+                TagCommand(),
+                tag=["a", "b", "c", "d"],
+                shard=Shard(index, 2),
+                shard_results=path,
+                stdout=StringIO(),
+                stderr=StringIO(),
+            )
+            paths.append(path)
+        command, count, targets = merge_results(paths)
+        self.assertEqual(len(targets), 4)
+        self.assertEqual(len({target["key"] for target in targets}), 4)
+
+
+class MergeCommandTests(SimpleTestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def write(self, shard, records, command="eks"):
+        path = os.path.join(self.tmpdir.name, "%s-%d.jsonl" % (command, shard.index))
+        records = [
+            {"event": "target", "key": key, "shard": str(shard), "status": status}
+            for key, status in records
+        ]
+        write_results(path, command, shard, records)
+        return path
+
+    def test_merge(self):
+        paths = [
+            self.write(Shard(1, 2), [("vpc-2", "ok")]),
+            self.write(Shard(2, 2), [("vpc-1", "ok")]),
+        ]
+        into = os.path.join(self.tmpdir.name, "merged.jsonl")
+        stdout = StringIO()
+        management.call_command("merge", *paths, into=into, stdout=stdout)
+        self.assertEqual(
+            stdout.getvalue(), "Merged 2 shards of eks: 2 targets, 0 failed.\n"
+        )
+        with open(into) as fh:
+            self.assertEqual(
+                [json.loads(line)["key"] for line in fh], ["vpc-1", "vpc-2"]
+            )
+
+    def test_failures(self):
+        paths = [
+            self.write(Shard(1, 2), [("vpc-2", "failed")]),
+            self.write(Shard(2, 2), [("vpc-1", "ok")]),
+        ]
+        stdout = StringIO()
+        with self.assertRaisesRegex(CommandError, "1 of 2 targets failed"):
+            management.call_command("merge", *paths, stdout=stdout)
+        self.assertIn("vpc-2 failed in shard 1/2", stdout.getvalue())
+
+    def test_invalid_sets(self):
+        one = self.write(Shard(1, 3), [("vpc-1", "ok")])
+        two = self.write(Shard(2, 3), [("vpc-1", "ok")])
+        with self.assertRaisesRegex(CommandError, "Missing the results of shards 2/3"):
+            merge_results([one])
+        with self.assertRaisesRegex(CommandError, "vpc-1 ran in shards 1/3 and 2/3"):
+            merge_results([one, two])
+        # Targets sharing a key within a shard are all kept.
+        three = self.write(Shard(3, 3), [("vpc-3", "ok"), ("vpc-3", "failed")])
+        empty = self.write(Shard(2, 3), [])
+        command, count, targets = merge_results([one, empty, three])
+        self.assertEqual(
+            [(target["key"], target["status"]) for target in targets],
+            [("vpc-1", "ok"), ("vpc-3", "ok"), ("vpc-3", "failed")],
+        )
+        with self.assertRaisesRegex(CommandError, "both hold shard 1/3"):
+            merge_results([one, one])
+        other = self.write(Shard(1, 2), [], command="gke")
+        with self.assertRaisesRegex(CommandError, "not of the 3 shards of eks"):
+            merge_results([one, other])
+        with open(os.path.join(self.tmpdir.name, "bad.jsonl"), "w") as fh:
+            fh.write('{"event": "target"}\n')
+        with self.assertRaisesRegex(CommandError, "not a shard result file"):
+            merge_results([fh.name])
@@ -0,0 +1,188 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from io import StringIO
+from unittest import mock
+
+import seahorse
+from seahorse.core import completion, management
+from seahorse.core.completion import build_schema, complete, load_schema
+from seahorse.core.management.manifest import CommandManifest
+from seahorse.test import SimpleTestCase
+
+
+def values(candidates):
+    return [value for value, _ in candidates]
+
+
+class CompleteTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.schema = build_schema(management.get_manifest())
+
+    def complete(self, *words):
+        return values(complete(["seahorse-admin", *words], self.schema))
+
+    def test_subcommands(self):
+        self.assertEqual(self.complete("e"), ["eks"])
+        names = self.complete("")
+        self.assertIn("help", names)
+        self.assertIn("gke", names)
+        self.assertEqual(self.complete("help", "g"), ["gke"])
+        self.assertEqual(self.complete("complete", ""), ["bash", "zsh", "fish"])
+        self.assertEqual(self.complete("nope", "--"), [])
+
+    def test_descriptions(self):
+        candidates = dict(complete(["seahorse-admin", "ek"], self.schema))
+        self.assertEqual(
+            candidates, {"eks": "Provision EKS clusters, one per --vpcid/--CIDR pair."}
+        )
+
+    def test_options(self):
+        self.assertEqual(self.complete("eks", "--vp"), ["--vpcid"])
+        self.assertIn("--verbosity", self.complete("eks", "--ver"))
+
+    def test_used_options(self):
+        # --vpcid may be given again, --plan only once.
+        self.assertEqual(self.complete("eks", "--vpcid", "vpc-1", "--vp"), ["--vpcid"])
+        self.assertEqual(self.complete("eks", "--plan", "--pl"), [])
+
+    def test_choices(self):
+        self.assertEqual(self.complete("eks", "--output", "j"), ["jsonl", "json"])
+        self.assertEqual(
+            self.complete("eks", "--output=j"), ["--output=jsonl", "--output=json"]
+        )
+        # bash splits the = into a word of its own.
+        self.assertEqual(
+            self.complete("eks", "--output", "=", ""), ["text", "jsonl", "json"]
+        )
+        self.assertEqual(self.complete("eks", "--output", "=", "t"), ["text"])
+        # Values without choices are left to the shell.
+        self.assertEqual(self.complete("eks", "--vpcid", ""), [])
+
+    def test_suppressed_options(self):
+        def argument(option, suppressed):
+            return {
+                "option_strings": [option],
+                "takes_value": False,
+                "repeatable": False,
+                "choices": None,
+                "help": None if suppressed else "",
+                "suppressed": suppressed,
+            }
+
+        manifest = CommandManifest(
+            {
+                "cmd": {
+                    "help": "",
+                    "arguments": [
+                        argument("--hidden", True),
+                        argument("--shown", False),
+                    ],
+                }
+            }
+        )
+        self.assertEqual(
+            values(complete(["x", "cmd", "--"], build_schema(manifest))), ["--shown"]
+        )
+
+    def test_format(self):
+        candidates = [("--plan", "Show the plan."), ("a:b", "")]
+        self.assertEqual(
+            completion.format_candidates(candidates, "bash"), "--plan\na:b\n"
+        )
+        self.assertEqual(
+            completion.format_candidates(candidates, "zsh"),
+            "--plan:Show the plan.\na\\:b\n",
+        )
+        self.assertEqual(
+            completion.format_candidates(candidates, "fish"),
+            "--plan\tShow the plan.\na:b\n",
+        )
+
+
+class SchemaCacheTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "completion.json")
+
+    def test_cached_until_stale(self):
+        schema = load_schema(self.path)
+        self.assertIn("eks", schema["commands"])
+        # New base options reach the schema too.
+        self.assertIn(management.base.__file__, schema["stamps"])
+        with mock.patch.object(management, "get_manifest") as get_manifest:
+            self.assertEqual(load_schema(self.path), schema)
+        get_manifest.assert_not_called()
+        # A command module changed since the schema was built.
+        with open(self.path) as fh:
+            cached = json.load(fh)
+        path = next(p for p in cached["stamps"] if p.endswith("eks.py"))
+        cached["stamps"][path] = [0, 0]
+        with open(self.path, "w") as fh:
+            json.dump(cached, fh)
+        with mock.patch.object(
+            management, "get_manifest", wraps=management.get_manifest
+        ) as get_manifest:
+            rebuilt = load_schema(self.path)
+        get_manifest.assert_called_once()
+        self.assertNotEqual(rebuilt["stamps"][path], [0, 0])
+
+    def test_corrupt_cache(self):
+        with open(self.path, "w") as fh:
+            fh.write("{")
+        self.assertIn("eks", load_schema(self.path)["commands"])
+
+
+class EntryPointTests(SimpleTestCase):
+    def test_scripts(self):
+        for shell in ("bash", "zsh", "fish"):
+            stdout = StringIO()
+            self.assertEqual(completion.main([shell], stdout=stdout), 0)
+            self.assertIn("complete --shell %s" % shell, stdout.getvalue())
+
+    def test_usage(self):
+        stderr = StringIO()
+        self.assertEqual(
+            completion.main(["--shell", "tcsh", "--", "x"], stderr=stderr), 1
+        )
+        self.assertIn("Usage: seahorse-admin complete", stderr.getvalue())
+
+    def test_management_utility(self):
+        stdout = StringIO()
+        utility = management.ManagementUtility(
+            ["seahorse-admin", "complete", "--", "seahorse-admin", "ek"]
+        )
+        with mock.patch.object(sys, "stdout", stdout):
+            with self.assertRaises(SystemExit) as cm:
+                utility.execute()
+        self.assertEqual((cm.exception.code, stdout.getvalue()), (0, "eks\n"))
+
+    def test_fast_path_imports(self):
+        # Once the schema is cached, completing imports nothing of the
+        # management framework.
+        load_schema()
+        root = os.path.dirname(os.path.dirname(seahorse.__file__))
+        code = (
+            "import sys\n"
+            "from seahorse.core import client\n"
+            "sys.argv = ['seahorse-admin', 'complete', '--', 'seahorse-admin', 'ek']\n"
+            "try:\n"
+            "    client.main()\n"
+            "except SystemExit:\n"
+            "    pass\n"
+            "print('seahorse.core.management' in sys.modules)\n"
+        )
+        env = dict(os.environ, PYTHONPATH=root)
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        self.assertEqual(output, "eks\nFalse\n")
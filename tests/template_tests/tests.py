@@ -0,0 +1,134 @@
+import os
+import tempfile
+from io import StringIO
+
+from seahorse.core.management import CommandError, call_command
+from seahorse.template import Engine, Template, TemplateDoesNotExist, TemplateError
+from seahorse.test import SimpleTestCase
+from seahorse.utils.datastructures import LRUCache
+
+
+class TemplateTests(SimpleTestCase):
+    def test_placeholders(self):
+        template = Template("name: {{ name }}\nsize: {{size}}\n")
+        self.assertEqual(template.render({"name": "a", "size": 3}), "name: a\nsize: 3\n")
+        self.assertEqual(template.keys, ("name", "size"))
+
+    def test_transforms(self):
+        template = Template("{{ json_tags }} {{ sh_cmd }} {{ b64_secret }}")
+        self.assertEqual(
+            template.render({"tags": ["a", "b"], "cmd": "a; b", "secret": "hi"}),
+            "[\"a\", \"b\"] 'a; b' aGk=",
+        )
+
+    def test_other_braces_kept(self):
+        source = "image: {{ .Values.image }} {{ }} {{ a-b }} { single }"
+        self.assertEqual(Template(source).render({}), source)
+
+    def test_literal_text_is_not_code(self):
+        source = "'''\"\"\" {{ x }} \\n %s {0}"
+        self.assertEqual(Template(source).render({"x": 1}), "'''\"\"\" 1 \\n %s {0}")
+
+    def test_missing_value(self):
+        with self.assertRaisesRegex(TemplateError, "requires 'vpcid'"):
+            Template("{{ json_vpcid }}").render({})
+
+    def test_render_many(self):
+        template = Template("{{ name }}")
+        self.assertEqual(
+            list(template.render_many([{"name": "a"}, {"name": "b"}])), ["a", "b"]
+        )
+
+
+class EngineTests(SimpleTestCase):
+    def test_compiled_once(self):
+        engine = Engine()
+        template = engine.from_string("{{ a }}")
+        self.assertIs(engine.from_string("{{ a }}"), template)
+        self.assertEqual(engine.cache.info()["hits"], 1)
+
+    def test_custom_transform(self):
+        engine = Engine(transforms={"upper_": str.upper})
+        self.assertEqual(engine.from_string("{{ upper_a }}").render({"a": "x"}), "X")
+
+    def test_get_template(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "cluster.yaml"), "w") as fh:
+                fh.write("name: {{ name }}")
+            engine = Engine([tmp])
+            self.assertEqual(
+                list(engine.render_many("cluster.yaml", [{"name": "a"}])), ["name: a"]
+            )
+            with self.assertRaises(TemplateDoesNotExist):
+                engine.get_template("missing.yaml")
+
+
+class LRUCacheTests(SimpleTestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertNotIn("b", cache)
+        self.assertEqual((cache.get("a"), cache.get("c")), (1, 3))
+        self.assertEqual(cache.info(), {"hits": 3, "misses": 0, "size": 2, "maxsize": 2})
+
+
+class ManifestTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+        self.template = os.path.join(self.tmp, "cluster.yaml")
+        with open(self.template, "w") as fh:
+            fh.write("name: {{ name }}\ncidr: {{ json_cidr }}\n")
+
+    def eks(self, **options):
+        stdout = StringIO()
+        call_command(
+            "eks",
+            vpcid=["vpc-1", "vpc-2"],
+            CIDR=["10.0.0.0/16", "10.1.0.0/16"],
+            manifest=self.template,
+            manifest_dir=self.tmp,
+            plan=True,
+            stdout=stdout,
+            **options,
+        )
+        return stdout.getvalue()
+
+    def test_plan_lists_manifests(self):
+        output = self.eks()
+        self.assertIn("manifest %s" % os.path.join(self.tmp, "eks-vpc-1.yaml"), output)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp, "eks-vpc-1.yaml")))
+
+    def test_render_error(self):
+        with self.assertRaisesRegex(CommandError, "requires 'missing'"):
+            self.eks(manifest_name="{{ missing }}")
+
+    def test_manifests_written(self):
+        from seahorse.core.management.commands.eks import Command
+
+        command = Command()
+        manifests = command.render_manifests(
+            vpcid=["vpc-1", "vpc-2"],
+            CIDR=["10.0.0.0/16", "10.1.0.0/16"],
+            nodepool=[],
+            manifest=self.template,
+            manifest_dir=self.tmp,
+            manifest_name="{{ provider }}-{{ name }}.yaml",
+        )
+        self.assertEqual(
+            manifests,
+            [
+                (
+                    os.path.join(self.tmp, "eks-vpc-1.yaml"),
+                    'name: vpc-1\ncidr: "10.0.0.0/16"\n',
+                ),
+                (
+                    os.path.join(self.tmp, "eks-vpc-2.yaml"),
+                    'name: vpc-2\ncidr: "10.1.0.0/16"\n',
+                ),
+            ],
+        )
@@ -0,0 +1,211 @@
+import json
+import os
+import sys
+import tempfile
+import textwrap
+import unittest
+from io import StringIO
+
+from seahorse.core import management
+from seahorse.core.management import CommandError
+from seahorse.test import SimpleTestCase
+from seahorse.test.runner import (
+    ERROR,
+    FAILURE,
+    SKIP,
+    SUCCESS,
+    ParallelTestRunner,
+    RecordingResult,
+    TestDurations,
+    build_suite,
+    partition_suite,
+    worker_databases,
+)
+
+SAMPLE_TESTS = """
+import os
+import time
+import unittest
+
+from seahorse.db import connections
+
+
+class FirstTests(unittest.TestCase):
+    def test_slow(self):
+        time.sleep(0.2)
+
+    def test_worker(self):
+        # Every worker has a state directory and a database of its own.
+        worker = os.environ["SEAHORSE_TEST_WORKER"]
+        state_dir = os.environ["SEAHORSE_STATE_DIR"]
+        self.assertIn("worker-%s" % worker, state_dir)
+        self.assertTrue(connections.settings["default"]["NAME"].startswith(state_dir))
+
+
+class SecondTests(unittest.TestCase):
+    def test_fail(self):
+        self.assertEqual(1, 2)
+
+    @unittest.skip("not today")
+    def test_skip(self):
+        pass
+
+    def test_error(self):
+        raise KeyError("boom")
+
+
+class ThirdTests(unittest.TestCase):
+    def test_pass(self):
+        pass
+"""
+
+
+class RunnerTestMixin:
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+        # A package name of its own, the test modules stay in sys.modules.
+        self.package = "sample_%s" % os.path.basename(self.tmp).replace("-", "_")
+        os.makedirs(os.path.join(self.tmp, self.package))
+        open(os.path.join(self.tmp, self.package, "__init__.py"), "w").close()
+        with open(os.path.join(self.tmp, self.package, "tests.py"), "w") as fh:
+            fh.write(textwrap.dedent(SAMPLE_TESTS))
+        self.addCleanup(
+            lambda: sys.path.remove(self.tmp) if self.tmp in sys.path else None
+        )
+        self.durations_path = os.path.join(self.tmp, "durations.json")
+
+
+class PartitionTests(RunnerTestMixin, SimpleTestCase):
+    def test_durations(self):
+        durations = TestDurations(self.durations_path)
+        self.assertEqual(durations.expected("a"), 0.0)
+        durations.update("a", 1.0)
+        durations.update("a", 3.0)
+        durations.update("b", 10.0)
+        durations.update("c", 5.0)
+        self.assertEqual(durations.expected("a"), 2.0)
+        # Unknown tests are expected to take the median duration.
+        self.assertEqual(durations.expected("z"), 5.0)
+        durations.save()
+        self.assertEqual(TestDurations(self.durations_path).durations["b"], 10.0)
+
+    def test_partition_by_class_longest_first(self):
+        suite = build_suite([self.package], self.tmp)
+        durations = TestDurations(self.durations_path)
+        for name, duration in [
+            ("FirstTests.test_slow", 0.1),
+            ("FirstTests.test_worker", 0.1),
+            ("SecondTests.test_fail", 1.0),
+            ("SecondTests.test_skip", 1.0),
+            ("SecondTests.test_error", 1.0),
+            ("ThirdTests.test_pass", 5.0),
+        ]:
+            durations.update("%s.tests.%s" % (self.package, name), duration)
+        chunks, local = partition_suite(suite, durations)
+        self.assertEqual(local, [])
+        self.assertEqual(
+            [[test_id.rsplit(".", 2)[1] for test_id in chunk][0] for chunk in chunks],
+            ["ThirdTests", "SecondTests", "FirstTests"],
+        )
+        self.assertEqual(len(chunks[1]), 3)
+
+    def test_import_errors_run_locally(self):
+        with open(os.path.join(self.tmp, self.package, "tests_broken.py"), "w") as fh:
+            fh.write("import does_not_exist\n")
+        chunks, local = partition_suite(
+            build_suite([self.package], self.tmp), TestDurations(self.durations_path)
+        )
+        self.assertEqual(len(local), 1)
+        self.assertEqual(len(chunks), 3)
+
+    def test_worker_databases(self):
+        databases = {
+            "default": {"ENGINE": "seahorse.db.backends.sqlite3", "NAME": "/s/state.db"},
+            "mine": {"ENGINE": "seahorse.db.backends.sqlite3", "NAME": "/x/db.sqlite3"},
+            "memory": {"ENGINE": "seahorse.db.backends.sqlite3", "NAME": ":memory:"},
+            "cache": {"ENGINE": "seahorse.db.backends.redis", "NAME": 0},
+        }
+        workers = worker_databases(databases, 3, "/s")
+        self.assertEqual(workers["default"]["NAME"], "/s/state.db")
+        self.assertEqual(workers["mine"]["NAME"], "/x/db_3.sqlite3")
+        self.assertEqual(workers["memory"]["NAME"], ":memory:")
+        self.assertEqual(workers["cache"]["NAME"], 0)
+        self.assertEqual(databases["mine"]["NAME"], "/x/db.sqlite3")
+
+    def test_recording_result(self):
+        class Tests(unittest.TestCase):
+            def test_subtests(self):
+                for i in range(3):
+                    with self.subTest(i=i):
+                        self.assertNotEqual(i, 1)
+
+        result = RecordingResult()
+        Tests("test_subtests").run(result)
+        self.assertEqual(len(result.records), 1)
+        test_id, outcome, duration, details = result.records[0]
+        self.assertIn("(i=1)", test_id)
+        self.assertEqual(outcome, FAILURE)
+        self.assertIn("AssertionError", details)
+
+
+class ParallelRunnerTests(RunnerTestMixin, SimpleTestCase):
+    def test_run(self):
+        stream = StringIO()
+        runner = ParallelTestRunner(
+            parallel=2,
+            top_level_dir=self.tmp,
+            verbosity=2,
+            durations=TestDurations(self.durations_path),
+            stream=stream,
+        )
+        records = runner.run(build_suite([self.package], self.tmp))
+        outcomes = {test_id.rsplit(".", 1)[1]: outcome for test_id, outcome, _, _ in records}
+        self.assertEqual(
+            outcomes,
+            {
+                "test_slow": SUCCESS,
+                "test_worker": SUCCESS,
+                "test_fail": FAILURE,
+                "test_skip": SKIP,
+                "test_error": ERROR,
+                "test_pass": SUCCESS,
+            },
+        )
+        output = stream.getvalue()
+        self.assertIn("FAIL: %s.tests.SecondTests.test_fail" % self.package, output)
+        self.assertIn("KeyError: 'boom'", output)
+        self.assertIn("Ran 6 tests", output)
+        self.assertIn("FAILED (failures=1, errors=1, skipped=1)", output)
+        self.assertIn("Slowest tests:", output)
+        self.assertEqual(len(runner.failures()), 2)
+        with open(self.durations_path) as fh:
+            durations = json.load(fh)
+        self.assertGreaterEqual(
+            durations["%s.tests.FirstTests.test_slow" % self.package], 0.2
+        )
+
+    def test_command(self):
+        stderr = StringIO()
+        with self.assertRaisesRegex(CommandError, "2 of 6 tests failed"):
+            management.call_command(
+                "test",
+                "%s.tests" % self.package,
+                workers=2,
+                top_level_dir=self.tmp,
+                durations=self.durations_path,
+                stderr=stderr,
+            )
+        self.assertRegex(stderr.getvalue(), r"Ran 6 tests in [\d.]+s on 2 processes")
+
+    def test_command_ok(self):
+        stderr = StringIO()
+        management.call_command(
+            "test",
+            "%s.tests.ThirdTests" % self.package,
+            top_level_dir=self.tmp,
+            durations=self.durations_path,
+            stderr=stderr,
+        )
+        self.assertIn("OK", stderr.getvalue())
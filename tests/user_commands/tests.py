@@ -1,10 +1,78 @@
-
 from io import StringIO
 from seahorse.test import SimpleTestCase
 from seahorse.core import management 
+from seahorse.core.management import BaseCommand, CommandError
+
+
+class OptionsCommand(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument("--vpcid", action="append", default=[])
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        self.options = options
+
+
+class RequiredCommand(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument("--region", required=True)
+        parser.add_argument("--count", type=int, default=1)
+
+    def handle(self, *args, **options):
+        self.options = options
+
 
 class CommandTests(SimpleTestCase):
 
+    def setUp(self):
+        management.clear_parser_cache()
+
     def test_eks(self):
         io = StringIO()
         management.call_command("eks", stdout=io)
+
+    def test_parser_cached_per_command_class(self):
+        management.call_command(OptionsCommand(stdout=StringIO()))
+        compiled = management.get_compiled_parser(OptionsCommand(), "tests")
+        management.call_command(OptionsCommand(stdout=StringIO()))
+        self.assertIs(management.get_compiled_parser(OptionsCommand(), "tests"), compiled)
+
+    def test_parser_of_command_line_instance_not_cached(self):
+        command = RequiredCommand(stdout=StringIO(), stderr=StringIO())
+        command._called_from_command_line = True
+        compiled = management.get_compiled_parser(command, "tests")
+        self.assertIsNone(compiled.defaults)
+        self.assertFalse(compiled.parser.called_from_command_line)
+        with self.assertRaisesRegex(CommandError, "--region"):
+            management.call_command(RequiredCommand(stdout=StringIO()))
+
+    def test_fast_path_options(self):
+        command = OptionsCommand(stdout=StringIO())
+        management.call_command(command, dry_run=True)
+        options = command.options
+        self.assertIs(options["dry_run"], True)
+        self.assertEqual(options["vpcid"], [])
+        self.assertIs(options["skip_checks"], True)
+
+    def test_fast_path_defaults_not_shared(self):
+        first = OptionsCommand(stdout=StringIO())
+        management.call_command(first)
+        first.options["vpcid"].append("vpc-1")
+        second = OptionsCommand(stdout=StringIO())
+        management.call_command(second)
+        self.assertEqual(second.options["vpcid"], [])
+
+    def test_required_option_via_options(self):
+        command = RequiredCommand(stdout=StringIO())
+        management.call_command(command, region="eu-west-1")
+        self.assertEqual(command.options["region"], "eu-west-1")
+        self.assertEqual(command.options["count"], 1)
+
+    def test_missing_required_option(self):
+        with self.assertRaises(CommandError):
+            management.call_command(RequiredCommand(stdout=StringIO()))
+
+    def test_unknown_option(self):
+        msg = r"Unknown option\(s\) for tests command: nope\."
+        with self.assertRaisesRegex(TypeError, msg):
+            management.call_command(OptionsCommand(stdout=StringIO()), nope=1)